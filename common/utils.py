@@ -0,0 +1,308 @@
+"""
+Cliente HTTP compartilhado para as fontes externas de dados
+===========================================================
+Todas as buscas (CVM, BCB, Tesouro, ANBIMA) passam por um único HttpClient:
+
+ - conexões keep-alive reutilizadas (um pool por host), evitando um novo
+   handshake TLS a cada arquivo mensal da CVM;
+ - limite de conexões simultâneas por host (HTTP_MAX_PER_HOST): quem passa do
+   limite espera uma conexão livre;
+ - resposta comprimida (gzip/deflate) quando o servidor oferece;
+ - novas tentativas com backoff exponencial e jitter para 429 e 5xx e para
+   falhas de conexão/timeout, respeitando Retry-After; o timeout informado
+   pelo chamador é o orçamento da chamada lógica inteira (tentativas +
+   esperas), não de cada tentativa;
+ - métricas por host: requisições, bytes recebidos (na rede), latência,
+   tentativas extras e erros (HttpClient.metrics()).
+
+Configuração (variáveis de ambiente):
+    HTTP_MAX_RETRIES: tentativas extras. Default: 3.
+    HTTP_TIMEOUT: timeout (s) quando o chamador não informa. Default: 10.
+    HTTP_MAX_PER_HOST: conexões simultâneas por host. Default: 8.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+import requests
+import structlog
+from requests.adapters import HTTPAdapter
+
+log = structlog.get_logger(__name__)
+
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "8"))
+
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+USER_AGENT = "b3-portfolio-analysis/1.0 (educational; non-commercial)"
+
+_BACKOFF_BASE = 0.5  # s — espera antes da 1ª nova tentativa (antes do jitter)
+_BACKOFF_MAX = 30.0  # s — teto de cada espera
+_HOST_POOLS = 32  # hosts com pool de conexões mantido
+
+
+class HttpClient:
+    """
+    Sessão HTTP com pool por host, retry com backoff e métricas.
+
+    Args:
+        max_retries: Tentativas extras após a primeira. Default: HTTP_MAX_RETRIES.
+        timeout: Timeout (s) padrão das requisições. Default: HTTP_TIMEOUT.
+        max_per_host: Conexões simultâneas por host. Default: HTTP_MAX_PER_HOST.
+        backoff_base: Espera base (s) do backoff exponencial.
+        backoff_max: Espera máxima (s) entre tentativas.
+    """
+
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_per_host: Optional[int] = None,
+        backoff_base: float = _BACKOFF_BASE,
+        backoff_max: float = _BACKOFF_MAX,
+    ) -> None:
+        self.max_retries = HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.timeout = timeout or HTTP_TIMEOUT
+        self.max_per_host = max_per_host or HTTP_MAX_PER_HOST
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # pool_block: acima de max_per_host conexões o chamador espera (limite por host)
+        adapter = HTTPAdapter(
+            pool_connections=_HOST_POOLS,
+            pool_maxsize=self.max_per_host,
+            pool_block=True,
+            max_retries=0,
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate", "User-Agent": USER_AGENT})
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    # ------------------------------------------------------------------
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """GET com retry; mesmos argumentos de requests.get."""
+        return self.request("GET", url, **kwargs)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        retries: Optional[int] = None,
+        deadline: Optional[float] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """
+        Requisição com novas tentativas para 429/5xx e falhas de rede.
+
+        Só métodos idempotentes (GET, HEAD) são repetidos. A resposta final é
+        devolvida mesmo com status de erro — o chamador decide (raise_for_status).
+
+        SourceChain e CvmArchiveCache tratam timeout como o prazo da chamada
+        toda: quando o chamador informa timeout (ou deadline), tentativas e
+        esperas cabem nesse orçamento — cada tentativa recebe só o tempo que
+        resta e não há nova tentativa se a espera passaria do prazo.
+
+        Args:
+            retries: Tentativas extras nesta chamada. Default: max_retries.
+            deadline: Orçamento total (s). Default: o timeout do chamador, se
+                informado; sem timeout, cada tentativa usa self.timeout.
+            **kwargs: Mesmos argumentos de requests.request.
+
+        Raises:
+            requests.RequestException: Falha de rede após esgotar as tentativas.
+        """
+        if deadline is None and isinstance(kwargs.get("timeout"), (int, float)):
+            deadline = float(kwargs["timeout"])
+        kwargs.setdefault("timeout", self.timeout)
+        retries = self.max_retries if retries is None else retries
+        host = urlsplit(url).netloc
+        retryable = method.upper() in ("GET", "HEAD")
+        end = time.monotonic() + deadline if deadline is not None else None
+        attempt = 0
+        while True:
+            t0 = time.monotonic()
+            if end is not None:
+                kwargs["timeout"] = _capped_timeout(kwargs["timeout"], end - t0)
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._count(host, errors=1, latency_s=time.monotonic() - t0)
+                delay = self._delay(attempt)
+                if not retryable or attempt >= retries or not _fits(end, delay):
+                    raise
+                self._backoff(host, attempt, url, delay, erro=str(e))
+                attempt += 1
+                continue
+
+            latency = time.monotonic() - t0
+            if resp.status_code in RETRY_STATUS and retryable and attempt < retries:
+                delay = self._delay(attempt, _retry_after(resp))
+                if _fits(end, delay):
+                    self._count(host, latency_s=latency, bytes=_wire_bytes(resp, len(resp.content)))
+                    self._backoff(host, attempt, url, delay, status=resp.status_code)
+                    resp.close()
+                    attempt += 1
+                    continue
+
+            if kwargs.get("stream"):
+                self._count(host, latency_s=latency)
+                self._count_stream(resp, host)
+            else:
+                self._count(host, latency_s=latency, bytes=_wire_bytes(resp, len(resp.content)))
+            return resp
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """
+        Métricas acumuladas por host.
+
+        Returns:
+            {host: {requests, bytes, latency_s, latency_max_s, retries, errors}}
+            — latency_s é a soma; a média é latency_s / requests.
+        """
+        with self._lock:
+            return {host: dict(m) for host, m in self._metrics.items()}
+
+    def log_metrics(self) -> None:
+        """Registra no log as métricas de cada host."""
+        for host, m in self.metrics().items():
+            log.info(
+                "http_client.metricas",
+                host=host,
+                requisicoes=int(m["requests"]),
+                bytes=int(m["bytes"]),
+                latencia_media_s=round(m["latency_s"] / max(m["requests"], 1), 3),
+                latencia_max_s=round(m["latency_max_s"], 3),
+                novas_tentativas=int(m["retries"]),
+                erros=int(m["errors"]),
+            )
+
+    def close(self) -> None:
+        self.session.close()
+
+    # ------------------------------------------------------------------
+
+    def _count(self, host: str, latency_s: Optional[float] = None, **deltas: float) -> None:
+        with self._lock:
+            m = self._metrics.setdefault(
+                host,
+                {
+                    "requests": 0,
+                    "bytes": 0,
+                    "latency_s": 0.0,
+                    "latency_max_s": 0.0,
+                    "retries": 0,
+                    "errors": 0,
+                },
+            )
+            if latency_s is not None:
+                m["requests"] += 1
+                m["latency_s"] += latency_s
+                m["latency_max_s"] = max(m["latency_max_s"], latency_s)
+            for key, value in deltas.items():
+                m[key] += value
+
+    def _count_stream(self, resp: requests.Response, host: str) -> None:
+        """Conta os bytes de uma resposta stream=True à medida que é consumida."""
+        iter_content = resp.iter_content
+
+        def counted(*args: Any, **kwargs: Any) -> Iterator[bytes]:
+            received = 0
+            try:
+                for chunk in iter_content(*args, **kwargs):
+                    received += len(chunk)
+                    yield chunk
+            finally:
+                # O corpo já foi consumido: resp.content não pode ser lido de novo
+                self._count(host, bytes=_wire_bytes(resp, received))
+
+        resp.iter_content = counted  # type: ignore[method-assign]
+
+    def _delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Espera antes da próxima tentativa: Retry-After do servidor ou backoff com jitter."""
+        if retry_after is not None:
+            return min(self.backoff_max, retry_after)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def _backoff(self, host: str, attempt: int, url: str, delay: float, **context: Any) -> None:
+        self._count(host, retries=1)
+        log.warning(
+            "http_client.nova_tentativa",
+            host=host,
+            url=url,
+            tentativa=attempt + 1,
+            espera_s=round(delay, 2),
+            **context,
+        )
+        time.sleep(delay)
+
+
+def _fits(end: Optional[float], delay: float) -> bool:
+    """True se ainda há orçamento para esperar delay e tentar de novo."""
+    return end is None or time.monotonic() + delay < end
+
+
+def _capped_timeout(timeout: Any, remaining: float) -> Any:
+    """Timeout da tentativa limitado ao que resta do orçamento (aceita tupla connect/read)."""
+    remaining = max(remaining, 0.001)
+    if isinstance(timeout, tuple):
+        return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def _retry_after(resp: requests.Response) -> Optional[float]:
+    value = resp.headers.get("Retry-After")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None  # formato data HTTP: usa o backoff próprio
+
+
+def _wire_bytes(resp: requests.Response, fallback: int) -> int:
+    """
+    Bytes recebidos na rede (comprimidos), pelo contador do urllib3.
+
+    Sem contador, usa Content-Length e, por fim, fallback (tamanho do corpo
+    decodificado, informado pelo chamador — nunca lê resp.content aqui, que
+    falha em respostas stream já consumidas).
+    """
+    tell = getattr(resp.raw, "tell", None)
+    if tell is not None:
+        try:
+            wire = int(tell())
+            if wire:
+                return wire
+        except (TypeError, ValueError, OSError):
+            pass
+    length = resp.headers.get("Content-Length")
+    if length is not None and length.isdigit():
+        return int(length)
+    return fallback
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Cliente compartilhado do processo (criado no primeiro uso)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def http_get(url: str, **kwargs: Any) -> requests.Response:
+    """Atalho para get_http_client().get(url, ...) — substitui requests.get."""
+    return get_http_client().get(url, **kwargs)
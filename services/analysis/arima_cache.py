@@ -0,0 +1,269 @@
+"""
+Cache do modelo ARIMA ajustado, com reajuste incremental
+========================================================
+A busca de ordem (grade ARIMA por AIC) é a etapa mais cara da projeção. O
+modelo ajustado fica gravado em disco por série; na execução seguinte:
+
+ - série igual à ajustada → o modelo gravado é reutilizado sem novo ajuste;
+ - poucos pregões novos (até ARIMA_MAX_NEW_BARS) → os pregões são anexados e
+   os parâmetros reestimados partindo dos parâmetros gravados (warm start),
+   mantendo a ordem escolhida;
+ - busca completa de ordem só quando: não há modelo, o trecho em comum com a
+   série ajustada mudou (série revisada), chegaram pregões demais, a última
+   busca tem mais de ARIMA_RESEARCH_DAYS dias, ou o reajuste degrada o
+   diagnóstico (AIC por observação pior que o da busca em mais de
+   ARIMA_AIC_TOLERANCE, ou o otimizador não convergiu).
+
+A série é comparada pelas datas: uma janela móvel (o pregão mais antigo sai a
+cada dia) continua a série ajustada. O modelo segue ancorado no início da
+série da última busca até a próxima busca completa, que reancora na janela
+corrente.
+
+O modelo guardado é o resultado statsmodels (MLEResults) da busca.
+
+Configuração (variáveis de ambiente):
+    ARIMA_CACHE_DIR: Diretório dos modelos. Default: services/analysis/cache/arima.
+    ARIMA_MAX_NEW_BARS: Pregões novos aceitos no reajuste incremental. Default: 21.
+    ARIMA_RESEARCH_DAYS: Idade (dias) máxima da última busca de ordem. Default: 30.
+    ARIMA_AIC_TOLERANCE: Piora aceita no AIC por observação. Default: 0.05.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import os
+import pickle
+import re
+import tempfile
+import warnings
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import structlog
+
+log = structlog.get_logger(__name__)
+
+ARIMA_MAX_NEW_BARS = int(os.getenv("ARIMA_MAX_NEW_BARS", "21"))
+ARIMA_RESEARCH_DAYS = int(os.getenv("ARIMA_RESEARCH_DAYS", "30"))
+ARIMA_AIC_TOLERANCE = float(os.getenv("ARIMA_AIC_TOLERANCE", "0.05"))
+
+# Busca de ordem: recebe a série (log) e devolve (resultado statsmodels, ordem)
+SearchFn = Callable[[np.ndarray], Tuple[Any, Tuple[int, int, int]]]
+
+
+def default_cache_dir() -> Path:
+    """Diretório dos modelos (ARIMA_CACHE_DIR ou cache/arima)."""
+    env = os.getenv("ARIMA_CACHE_DIR")
+    return Path(env) if env else Path(__file__).parent / "cache" / "arima"
+
+
+def series_fingerprint(y: np.ndarray) -> str:
+    """SHA-256 dos valores da série (float64)."""
+    return hashlib.sha256(np.ascontiguousarray(y, dtype=np.float64).tobytes()).hexdigest()
+
+
+def _as_index(dates: Optional[Sequence[Any]], n: int) -> np.ndarray:
+    """Datas como datetime64[ns] (ou posições 0..n-1, sem datas)."""
+    if dates is None:
+        return np.arange(n, dtype=np.int64)
+    index = np.asarray(dates, dtype="datetime64[ns]")
+    if len(index) != n:
+        raise ValueError(f"arima_cache: {len(index)} datas para {n} pontos")
+    return index
+
+
+def _aic_per_obs(results: Any) -> float:
+    return float(results.aic) / max(int(results.nobs), 1)
+
+
+def _converged(results: Any) -> bool:
+    retvals = getattr(results, "mle_retvals", None) or {}
+    # warnflag 2 (L-BFGS sem passo que melhore) é o caso comum do warm start:
+    # os parâmetros de partida já estão no ótimo — o AIC decide se degradou
+    return bool(retvals.get("converged", True)) or retvals.get("warnflag") == 2
+
+
+class ArimaModelCache:
+    """
+    Modelos ARIMA ajustados, um por chave (ex: ticker), gravados em disco.
+
+    Cada entrada guarda: resultado statsmodels, ordem, série ajustada (valores
+    e datas), nobs, fingerprint, data da última busca de ordem e o AIC por
+    observação dessa busca (referência do diagnóstico).
+
+    Args:
+        root: Diretório dos modelos. Default: default_cache_dir().
+        max_new_bars: Default: ARIMA_MAX_NEW_BARS.
+        research_days: Default: ARIMA_RESEARCH_DAYS.
+        aic_tolerance: Default: ARIMA_AIC_TOLERANCE.
+        clock: Função que devolve a data de hoje (injetável em testes).
+    """
+
+    def __init__(
+        self,
+        root: Optional[Union[str, Path]] = None,
+        max_new_bars: Optional[int] = None,
+        research_days: Optional[int] = None,
+        aic_tolerance: Optional[float] = None,
+        clock: Callable[[], date] = date.today,
+    ) -> None:
+        self.root = Path(root) if root is not None else default_cache_dir()
+        self.max_new_bars = ARIMA_MAX_NEW_BARS if max_new_bars is None else max_new_bars
+        self.research_days = ARIMA_RESEARCH_DAYS if research_days is None else research_days
+        self.aic_tolerance = ARIMA_AIC_TOLERANCE if aic_tolerance is None else aic_tolerance
+        self.clock = clock
+
+    def _path(self, key: str) -> Path:
+        return self.root / (re.sub(r"[^A-Za-z0-9_.-]", "_", key) + ".pkl")
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Entrada gravada da chave, ou None (ausente ou ilegível)."""
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError) as e:
+            log.warning("arima_cache.entrada_ilegivel", key=key, erro=str(e))
+            return None
+
+    def save(self, key: str, entry: Dict[str, Any]) -> None:
+        """Grava a entrada (escrita atômica)."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f, protocol=5)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    # ------------------------------------------------------------------
+
+    def fit(
+        self,
+        key: str,
+        y: np.ndarray,
+        search: SearchFn,
+        dates: Optional[Sequence[Any]] = None,
+    ) -> Tuple[Any, str]:
+        """
+        Modelo ajustado para a série y, reaproveitando o cache quando possível.
+
+        Args:
+            key: Identificador da série (ex: "^BVSP").
+            y: Série (em log), ordenada no tempo.
+            search: Busca completa de ordem, usada quando o cache não serve.
+            dates: Data de cada ponto de y. Com datas, uma janela que começa
+                depois da série ajustada (janela móvel) ainda a continua.
+                Default: posições 0..n-1 (só séries que crescem pelo fim).
+
+        Returns:
+            (resultado statsmodels, modo) — modo é "cache", "warm" (reajuste
+            incremental) ou "search". Nos modos "cache" e "warm" o modelo pode
+            começar antes de y (ancorado no início da última busca).
+        """
+        y = np.asarray(y, dtype=np.float64)
+        index = _as_index(dates, len(y))
+        entry = self.load(key)
+        reason, first_new = self._research_reason(entry, y, index)
+        if reason is None:
+            assert entry is not None
+            new = y[first_new:]
+            if len(new) == 0:
+                log.info("arima_cache.hit", key=key, order=entry["order"])
+                return entry["results"], "cache"
+            results = self._warm_refit(entry, new)
+            if results is not None:
+                fitted_y = np.concatenate([entry["y"], new])
+                fitted_index = np.concatenate([entry["dates"], index[first_new:]])
+                self.save(key, {**entry, **self._describe(results, fitted_y, fitted_index)})
+                log.info(
+                    "arima_cache.reajuste_incremental",
+                    key=key,
+                    order=entry["order"],
+                    novos_pregoes=len(new),
+                )
+                return results, "warm"
+            reason = "diagnostico_degradado"
+
+        log.info("arima_cache.busca_completa", key=key, motivo=reason)
+        results, order = search(y)
+        self.save(
+            key,
+            {
+                "order": tuple(order),
+                "searched_on": self.clock().isoformat(),
+                "baseline_aic_per_obs": _aic_per_obs(results),
+                **self._describe(results, y, index),
+            },
+        )
+        return results, "search"
+
+    def _research_reason(
+        self, entry: Optional[Dict[str, Any]], y: np.ndarray, index: np.ndarray
+    ) -> Tuple[Optional[str], int]:
+        """
+        Motivo para uma busca completa (ou None se o cache serve) e a posição
+        em y do primeiro pregão posterior à série ajustada.
+        """
+        if entry is None or "dates" not in entry:
+            return "sem_modelo", 0
+        fitted_y, fitted_index = entry["y"], entry["dates"]
+        if fitted_index.dtype != index.dtype or len(y) == 0:
+            return "serie_alterada", 0
+        # Janela corrente dentro da série ajustada: mesmas datas e valores no trecho comum
+        offset = int(np.searchsorted(fitted_index, index[0]))
+        first_new = len(fitted_index) - offset
+        if (
+            offset >= len(fitted_index)
+            or first_new > len(y)
+            or not np.array_equal(fitted_index[offset:], index[:first_new])
+            or not np.array_equal(fitted_y[offset:], y[:first_new])
+        ):
+            return "serie_alterada", 0
+        if len(y) - first_new > self.max_new_bars:
+            return "pregoes_demais", first_new
+        age = (self.clock() - date.fromisoformat(entry["searched_on"])).days
+        if age >= self.research_days:
+            return "agendada", first_new
+        return None, first_new
+
+    def _warm_refit(self, entry: Dict[str, Any], new: np.ndarray) -> Optional[Any]:
+        """Anexa os pregões novos e reestima partindo dos parâmetros gravados."""
+        previous = entry["results"]
+        # SARIMAX (pmdarima) aceita disp; o ARIMA do statsmodels não
+        quiet = (
+            {"disp": False} if "disp" in inspect.signature(previous.model.fit).parameters else {}
+        )
+        try:
+            with warnings.catch_warnings():  # convergência é avaliada abaixo
+                warnings.simplefilter("ignore")
+                results = previous.append(new, refit=True, fit_kwargs=quiet)
+        except Exception as e:  # modelo gravado incompatível: busca de novo
+            log.warning("arima_cache.reajuste_falhou", erro=str(e))
+            return None
+        degraded = _aic_per_obs(results) > entry["baseline_aic_per_obs"] + self.aic_tolerance
+        if degraded or not _converged(results):
+            log.warning(
+                "arima_cache.diagnostico_degradado",
+                aic_por_obs=round(_aic_per_obs(results), 4),
+                referencia=round(entry["baseline_aic_per_obs"], 4),
+                convergiu=_converged(results),
+            )
+            return None
+        return results
+
+    @staticmethod
+    def _describe(results: Any, y: np.ndarray, index: np.ndarray) -> Dict[str, Any]:
+        return {
+            "results": results,
+            "nobs": len(y),
+            "fingerprint": series_fingerprint(y),
+            "y": y,
+            "dates": index,
+        }
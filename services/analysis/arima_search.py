@@ -0,0 +1,148 @@
+"""
+Seleção de ordem ARIMA por AIC em grade, em paralelo
+====================================================
+Cada ordem (p, d, q) candidata é ajustada de forma independente (statsmodels)
+e a de menor AIC vence. A ordem de diferenciação d vem do teste KPSS, como no
+ndiffs/auto_arima do pmdarima, e a grade é a da busca exaustiva do auto_arima
+(p, q ≤ max, p + q ≤ max_order). Com workers > 1 os ajustes rodam num pool
+de processos; a escolha é a mesma da execução serial:
+
+ - o AIC de cada candidata é calculado pela mesma função, sobre os mesmos dados;
+ - empates são decididos pela posição na grade, não pela ordem de término;
+ - só a vencedora é reajustada no processo chamador, que recebe o modelo.
+
+Configuração (variáveis de ambiente):
+    ARIMA_SEARCH_WORKERS: Processos da busca de ordem (1 = serial).
+        Default: núcleos da máquina, até 4.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+import structlog
+
+log = structlog.get_logger(__name__)
+
+ARIMA_SEARCH_WORKERS = int(os.getenv("ARIMA_SEARCH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Teste KPSS (nível): nível de significância e p-valores da tabela de Kwiatkowski
+_KPSS_ALPHA = 0.05
+
+Order = Tuple[int, int, int]
+
+
+def order_grid(
+    max_p: int = 2, max_q: int = 2, d: int = 1, max_order: Optional[int] = None
+) -> List[Order]:
+    """
+    Ordens (p, d, q) com p ≤ max_p, q ≤ max_q e, se dado, p + q ≤ max_order,
+    em ordem crescente de p e q.
+    """
+    return [
+        (p, d, q)
+        for p in range(max_p + 1)
+        for q in range(max_q + 1)
+        if max_order is None or p + q <= max_order
+    ]
+
+
+def select_d(y: np.ndarray, max_d: int = 2, alpha: float = _KPSS_ALPHA) -> int:
+    """
+    Ordem de diferenciação: diferencia enquanto o KPSS rejeita estacionariedade.
+
+    Mesmo critério do ndiffs(test="kpss") do pmdarima: hipótese nula de
+    estacionariedade em nível, lags trunc(4·(n/100)^¼), p-valor interpolado
+    na tabela do teste e parada em série constante ou em max_d.
+    """
+    from statsmodels.tsa.stattools import kpss
+
+    x = np.asarray(y, dtype=np.float64)
+    d = 0
+    while d < max_d and len(x) > 2 and np.ptp(x) > 0:
+        with warnings.catch_warnings():  # p-valor fora da tabela (InterpolationWarning)
+            warnings.simplefilter("ignore")
+            _, pvalue, _, _ = kpss(x, regression="c", nlags=int(4 * (len(x) / 100) ** 0.25))
+        if not pvalue < alpha:
+            break
+        d += 1
+        x = np.diff(x)
+    return d
+
+
+def _fit(y: np.ndarray, order: Order) -> Any:
+    from statsmodels.tsa.arima.model import ARIMA
+
+    with warnings.catch_warnings():  # avisos de convergência por candidata
+        warnings.simplefilter("ignore")
+        return ARIMA(y, order=order).fit()
+
+
+def fit_aic(y: np.ndarray, order: Order) -> float:
+    """AIC do ARIMA(order) ajustado em y; inf se o ajuste falhar ou divergir."""
+    try:
+        aic = float(_fit(y, order).aic)
+    except Exception as e:  # candidata inviável não derruba a busca
+        log.debug("arima_search.candidata_falhou", order=order, erro=str(e))
+        return math.inf
+    return aic if math.isfinite(aic) else math.inf
+
+
+def evaluate_orders(
+    y: np.ndarray, orders: Sequence[Order], workers: Optional[int] = None
+) -> List[float]:
+    """
+    AIC de cada ordem, na mesma posição de orders.
+
+    Args:
+        y: Série (ex: log dos preços).
+        orders: Ordens candidatas.
+        workers: Processos. Default: ARIMA_SEARCH_WORKERS; ≤ 1 roda no processo atual.
+    """
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    workers = ARIMA_SEARCH_WORKERS if workers is None else workers
+    workers = max(1, min(workers, len(orders)))
+    if workers == 1:
+        return [fit_aic(y, order) for order in orders]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fit_aic, repeat(y), orders))
+
+
+def grid_search(
+    y: np.ndarray, orders: Sequence[Order], workers: Optional[int] = None
+) -> Tuple[Any, Order]:
+    """
+    Ordem de menor AIC na grade e o modelo ajustado com ela.
+
+    Args:
+        y: Série (ex: log dos preços).
+        orders: Ordens candidatas (ex: order_grid()); empates ficam com a primeira.
+        workers: Processos. Default: ARIMA_SEARCH_WORKERS.
+
+    Returns:
+        (resultado statsmodels ajustado, ordem escolhida).
+
+    Raises:
+        ValueError: Se nenhuma ordem candidata puder ser ajustada.
+    """
+    if not orders:
+        raise ValueError("grid_search: grade de ordens vazia")
+    aics = evaluate_orders(y, orders, workers)
+    best = min(range(len(orders)), key=lambda i: (aics[i], i))
+    if not math.isfinite(aics[best]):
+        raise ValueError("grid_search: nenhuma ordem candidata pôde ser ajustada")
+    order = tuple(orders[best])
+    log.info(
+        "arima_search.ordem_selecionada",
+        order=order,
+        aic=round(aics[best], 3),
+        candidatas=len(orders),
+        workers=workers if workers is not None else ARIMA_SEARCH_WORKERS,
+    )
+    return _fit(np.asarray(y, dtype=np.float64), order), order  # type: ignore[return-value]
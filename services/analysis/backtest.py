@@ -0,0 +1,248 @@
+"""
+Backtest de rebalanceamento da carteira
+=======================================
+Simula várias políticas de rebalanceamento de uma vez sobre o mesmo painel
+de preços (datas × ativos), com custo de transação proporcional ao volume
+negociado:
+
+ - calendário: volta aos pesos-alvo no último pregão de cada mês, trimestre
+   ou ano (ou a cada n pregões);
+ - banda: rebalanceia quando algum peso se afasta do alvo mais que threshold;
+ - calendário + banda: só nas datas do calendário e só se fora da banda;
+ - sem frequência nem banda: buy-and-hold.
+
+Entre dois rebalanceamentos as quantidades ficam fixas, então o valor da
+carteira é V(t) = Σᵢ cᵢ·Gᵢ(t), com G = preço / preço inicial e cᵢ fixos no
+segmento: valores, pesos à deriva e o primeiro disparo de cada política saem
+de operações matriciais sobre uma janela de datas do segmento (_WINDOW
+pregões por rodada, a partir do ponto de cada política). O laço Python é só
+sobre rodadas — um rebalanceamento ou uma janela sem disparo por política —,
+com todas as políticas ainda ativas juntas.
+
+Política = dict com name e, opcionais, frequency ("monthly", "quarterly",
+"yearly" ou inteiro de pregões), threshold (desvio absoluto de peso, ex: 0.05)
+e cost (fração do volume negociado, ex: 0.001 = 10 bps).
+
+Configuração (variáveis de ambiente):
+    BACKTEST_TRANSACTION_COST: Custo padrão por volume negociado. Default: 0.001.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import structlog
+
+log = structlog.get_logger(__name__)
+
+BACKTEST_TRANSACTION_COST = float(os.getenv("BACKTEST_TRANSACTION_COST", "0.001"))
+
+CALENDAR_FREQUENCIES = {"monthly": "M", "quarterly": "Q", "yearly": "Y"}
+
+DEFAULT_POLICIES: Tuple[Dict[str, Any], ...] = (
+    {"name": "buy_and_hold"},
+    {"name": "monthly", "frequency": "monthly"},
+    {"name": "quarterly", "frequency": "quarterly"},
+    {"name": "band_5pct", "threshold": 0.05},
+)
+
+# Datas avaliadas por política em cada rodada (um trimestre de pregões)
+_WINDOW = 63
+
+# Iterações do ponto fixo do custo (erro ~ custo^n: desprezível com 4)
+_COST_ITERATIONS = 4
+
+
+def _check_dates(policy: Dict[str, Any], index: pd.DatetimeIndex) -> np.ndarray:
+    """Datas (máscara booleana) em que a política avalia um rebalanceamento."""
+    frequency = policy.get("frequency")
+    check = np.zeros(len(index), dtype=bool)
+    if frequency is None:
+        check[1:] = policy.get("threshold") is not None
+    elif isinstance(frequency, (int, np.integer)) and not isinstance(frequency, bool):
+        if frequency < 1:
+            raise ValueError(f"backtest: frequência inválida {frequency}")
+        check[frequency::frequency] = True
+    elif frequency in CALENDAR_FREQUENCIES:
+        periods = index.to_period(CALENDAR_FREQUENCIES[frequency])
+        # Último pregão de cada período (o último pregão do painel não conta)
+        check[:-1] = periods[:-1] != periods[1:]
+    else:
+        raise ValueError(
+            f"backtest: frequência desconhecida {frequency!r} "
+            f"(use {sorted(CALENDAR_FREQUENCIES)} ou inteiro)"
+        )
+    return check
+
+
+def _target_weights(
+    weights: Union[Dict[str, float], pd.Series, None], columns: pd.Index
+) -> np.ndarray:
+    """Pesos-alvo na ordem das colunas, normalizados para somar 1."""
+    raw = weights if weights is not None else {key: 1.0 for key in columns}
+    missing = set(columns) - set(raw.keys())
+    if missing:
+        raise ValueError(f"backtest: pesos ausentes para {sorted(missing)}")
+    w = np.array([raw[key] for key in columns], dtype=np.float64)
+    if (w < 0).any() or w.sum() <= 0:
+        raise ValueError("backtest: pesos devem ser não negativos e somar mais que 0")
+    return w / w.sum()
+
+
+def _trade(
+    holdings: np.ndarray, value: np.ndarray, w: np.ndarray, cost: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Valor após o rebalanceamento e volume negociado (por política).
+
+    O custo incide sobre o volume que leva às posições finais w·V', e V'
+    depende do custo: V' = V − cost·Σ|w·V' − h|, resolvido por ponto fixo
+    (contração de fator cost < 1).
+    """
+    after = value
+    for _ in range(_COST_ITERATIONS):
+        traded = np.abs(w * after[:, None] - holdings).sum(axis=1)
+        after = value - cost * traded
+    return after, traded
+
+
+def backtest_rebalancing(
+    prices: pd.DataFrame,
+    weights: Union[Dict[str, float], pd.Series, None] = None,
+    policies: Optional[Sequence[Dict[str, Any]]] = None,
+    initial_value: float = 100.0,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Valor diário da carteira sob cada política de rebalanceamento.
+
+    A carteira começa nos pesos-alvo no primeiro pregão do painel, sem custo
+    de entrada. Em cada rebalanceamento o custo é descontado do valor da
+    carteira antes de voltar aos pesos-alvo.
+
+    Args:
+        prices: Valores dos ativos, datas × ativos (DatetimeIndex). Datas com
+            algum NaN são descartadas.
+        weights: Peso-alvo de cada coluna (normalizado para somar 1).
+            Default: iguais.
+        policies: Políticas (ver docstring do módulo). Default: DEFAULT_POLICIES.
+        initial_value: Valor inicial da carteira. Default: 100 (base 100).
+
+    Returns:
+        Dict com:
+          - "values": DataFrame datas × políticas com o valor da carteira
+            (no dia de um rebalanceamento, já líquido do custo);
+          - "summary": DataFrame políticas × (rebalances, turnover, costs,
+            final_value), turnover = Σ volume negociado / valor antes da troca.
+
+    Raises:
+        ValueError: Pesos ausentes ou negativos, política inválida, nomes
+            repetidos ou menos de 2 datas completas.
+    """
+    policies = list(DEFAULT_POLICIES if policies is None else policies)
+    names = [policy["name"] for policy in policies]
+    if len(set(names)) != len(names):
+        raise ValueError(f"backtest: nomes de política repetidos em {names}")
+    clean = prices.dropna().sort_index()
+    if len(clean) < 2:
+        raise ValueError("backtest: são necessárias ao menos 2 datas completas")
+
+    w = _target_weights(weights, clean.columns)
+    p = clean.to_numpy(dtype=np.float64)
+    growth = p / p[0]
+    n_dates, n_policies = len(p), len(policies)
+
+    check = np.array([_check_dates(policy, clean.index) for policy in policies]).reshape(
+        n_policies, n_dates
+    )
+    threshold = np.array(
+        [-1.0 if policy.get("threshold") is None else policy["threshold"] for policy in policies]
+    )
+    cost = np.array([policy.get("cost", BACKTEST_TRANSACTION_COST) for policy in policies])
+
+    # Quantidades (em unidades de G) de cada política no segmento corrente
+    units = np.tile(initial_value * w, (n_policies, 1))
+    start = np.zeros(n_policies, dtype=np.int64)  # data do último rebalanceamento
+    scan = np.zeros(n_policies, dtype=np.int64)  # próxima data a avaliar
+    active = np.ones(n_policies, dtype=bool)
+    values = np.empty((n_policies, n_dates))
+    rebalances = np.zeros(n_policies, dtype=np.int64)
+    turnover = np.zeros(n_policies)
+    costs = np.zeros(n_policies)
+    offsets = np.arange(_WINDOW)
+
+    while active.any():
+        idx = np.flatnonzero(active)
+        # Janela de _WINDOW datas a partir do ponto de cada política (sem laço por data)
+        t = scan[idx, None] + offsets
+        inside = t < n_dates
+        t = np.minimum(t, n_dates - 1)
+        held = units[idx, None, :] * growth[t]  # políticas × datas × ativos
+        value = held.sum(axis=2)
+        drift = np.abs(held / value[:, :, None] - w).max(axis=2)
+        trigger = check[idx[:, None], t] & (drift > threshold[idx, None])
+        trigger &= inside & (t > start[idx, None])
+        fired = trigger.any(axis=1)
+        last = np.where(fired, trigger.argmax(axis=1), inside.sum(axis=1) - 1)
+
+        write = offsets[None, :] <= last[:, None]
+        values[np.broadcast_to(idx[:, None], t.shape)[write], t[write]] = value[write]
+
+        local = np.flatnonzero(fired)
+        rows, at = idx[fired], t[local, last[local]]
+        pre_value = value[local, last[local]]
+        after, traded = _trade(held[local, last[local]], pre_value, w, cost[rows])
+        values[rows, at] = after
+        units[rows] = w * after[:, None] / growth[at]
+        rebalances[rows] += 1
+        turnover[rows] += traded / pre_value
+        costs[rows] += pre_value - after
+        start[rows] = at
+
+        scan[idx] = np.where(fired, t[np.arange(len(idx)), last], t[:, -1] + 1)
+        active[idx] = scan[idx] < n_dates
+
+    result = {
+        "values": pd.DataFrame(values.T, index=clean.index, columns=names),
+        "summary": pd.DataFrame(
+            {
+                "rebalances": rebalances,
+                "turnover": turnover,
+                "costs": costs,
+                "final_value": values[:, -1],
+            },
+            index=pd.Index(names, name="policy"),
+        ),
+    }
+    log.info(
+        "backtest.ok",
+        politicas=n_policies,
+        ativos=len(w),
+        datas=n_dates,
+        rebalanceamentos=int(rebalances.sum()),
+    )
+    return result
+
+
+def policy_grid(
+    frequencies: Sequence[Union[str, int, None]],
+    thresholds: Sequence[Optional[float]],
+    costs: Sequence[float],
+) -> List[Dict[str, Any]]:
+    """
+    Produto cartesiano de frequências, bandas e custos como lista de políticas.
+
+    Ex: policy_grid(["monthly", None], [None, 0.05], [0.001]) gera 4 políticas
+    (mensal, mensal + banda 5%, banda 5% diária e buy-and-hold).
+    """
+    grid = []
+    for frequency in frequencies:
+        for threshold in thresholds:
+            for cost in costs:
+                name = f"freq={frequency}|band={threshold}|cost={cost}"
+                grid.append(
+                    {"name": name, "frequency": frequency, "threshold": threshold, "cost": cost}
+                )
+    return grid
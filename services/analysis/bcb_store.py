@@ -0,0 +1,280 @@
+"""
+Armazenamento local e atualização incremental de séries do SGS/BCB
+==================================================================
+Cada série (CDI=12, SELIC=432, ...) fica em uma base SQLite local com o
+intervalo já coberto. Uma nova consulta só pede ao BCB o que falta:
+
+ - cauda: de (última observação + 1 dia) até a data final pedida — na rotina
+   diária, poucos registros em vez de anos de histórico;
+ - cabeça: se a data inicial pedida é anterior à cobertura armazenada.
+
+O SGS limita séries diárias a janelas de 10 anos por requisição. Intervalos
+maiores são divididos em janelas de até MAX_WINDOW_DAYS, baixadas em paralelo.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+import structlog
+
+from common.utils import http_get
+
+log = structlog.get_logger(__name__)
+
+BCB_BASE_URL = os.getenv("BCB_BASE_URL", "https://api.bcb.gov.br")
+SGS_PATH = "/dados/serie/bcdata.sgs.{series_id}/dados"
+
+# Janelas baixadas simultaneamente em um backfill longo
+BCB_DOWNLOAD_WORKERS = int(os.getenv("BCB_DOWNLOAD_WORKERS", "4"))
+
+# Limite do SGS para séries diárias: 10 anos por requisição (com folga)
+MAX_WINDOW_DAYS = 10 * 365 - 5
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / "cache" / "bcb"
+
+_HEADERS = {
+    "Accept": "application/json",
+    "User-Agent": "b3-portfolio-analysis/1.0 (educational; non-commercial)",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    series_id INTEGER PRIMARY KEY,
+    covered_from TEXT NOT NULL,
+    last_date TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS observations (
+    series_id INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (series_id, date)
+) WITHOUT ROWID;
+"""
+
+
+def default_cache_dir() -> Path:
+    """Diretório da base: variável BCB_CACHE_DIR ou services/analysis/cache/bcb."""
+    return Path(os.getenv("BCB_CACHE_DIR", str(DEFAULT_CACHE_DIR)))
+
+
+def sgs_url(series_id: int, start: date, end: date, base_url: Optional[str] = None) -> str:
+    """URL da API SGS para a série entre start e end (inclusive)."""
+    return (
+        (base_url or BCB_BASE_URL).rstrip("/")
+        + SGS_PATH.format(series_id=series_id)
+        + f"?formato=json&dataInicial={start:%d/%m/%Y}&dataFinal={end:%d/%m/%Y}"
+    )
+
+
+def split_windows(
+    start: date, end: date, max_days: int = MAX_WINDOW_DAYS
+) -> List[Tuple[date, date]]:
+    """
+    Divide [start, end] em janelas contíguas de no máximo max_days dias.
+
+    Returns:
+        Lista de (início, fim) inclusivos, em ordem cronológica; vazia se start > end.
+    """
+    windows = []
+    while start <= end:
+        stop = min(start + timedelta(days=max_days - 1), end)
+        windows.append((start, stop))
+        start = stop + timedelta(days=1)
+    return windows
+
+
+def download_window(
+    series_id: int,
+    start: date,
+    end: date,
+    base_url: Optional[str] = None,
+    timeout: float = 90,
+) -> pd.DataFrame:
+    """
+    Baixa uma janela da série (até 10 anos) da API SGS.
+
+    Uma janela sem observações (fim de semana, feriado) não é erro: o SGS
+    responde 404 ou lista vazia e o resultado é um DataFrame vazio.
+
+    Returns:
+        DataFrame com colunas Date e Rate, ordenado por Date.
+
+    Raises:
+        requests.HTTPError: Se a API retornar erro HTTP (exceto 404).
+    """
+    url = sgs_url(series_id, start, end, base_url)
+    log.info("bcb_store.request", series_id=series_id, url=url)
+
+    resp = http_get(url, timeout=timeout, headers=_HEADERS)
+    if resp.status_code == 404:
+        data: List[Dict[str, Any]] = []
+    else:
+        resp.raise_for_status()
+        data = resp.json()
+    if not data:
+        return pd.DataFrame({"Date": pd.Series(dtype="datetime64[ns]"), "Rate": []})
+
+    df = pd.DataFrame(data)
+    df["Date"] = pd.to_datetime(df["data"], dayfirst=True)
+    df["Rate"] = pd.to_numeric(df["valor"], errors="coerce")
+    return pd.DataFrame(df[["Date", "Rate"]].dropna()).sort_values("Date").reset_index(drop=True)
+
+
+class BcbSeriesStore:
+    """
+    Base SQLite de séries SGS com atualização incremental.
+
+    Args:
+        path: Arquivo SQLite. Default: <BCB_CACHE_DIR>/sgs.sqlite.
+        base_url: Raiz da API. Default: BCB_BASE_URL.
+        max_workers: Janelas baixadas em paralelo. Default: BCB_DOWNLOAD_WORKERS.
+        timeout: Timeout (s) de cada requisição. Default: 90.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        base_url: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        timeout: float = 90,
+    ) -> None:
+        self.path = Path(path) if path is not None else default_cache_dir() / "sgs.sqlite"
+        self.base_url = base_url
+        self.max_workers = max_workers or BCB_DOWNLOAD_WORKERS
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._ready = False
+
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            conn.executescript(_SCHEMA)
+            self._ready = True
+        return conn
+
+    def coverage(self, series_id: int) -> Optional[Tuple[date, Optional[date]]]:
+        """(início coberto, última observação) da série, ou None se nunca baixada."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT covered_from, last_date FROM series WHERE series_id = ?", (series_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return date.fromisoformat(row[0]), date.fromisoformat(row[1]) if row[1] else None
+
+    def missing_windows(self, series_id: int, start: date, end: date) -> List[Tuple[date, date]]:
+        """Janelas (≤ MAX_WINDOW_DAYS) que faltam para cobrir [start, end]."""
+        return self._missing(self.coverage(series_id), start, end)
+
+    @staticmethod
+    def _missing(
+        cov: Optional[Tuple[date, Optional[date]]], start: date, end: date
+    ) -> List[Tuple[date, date]]:
+        if cov is None:
+            return split_windows(start, end)
+        covered_from, last = cov
+        windows = []
+        if start < covered_from:
+            windows += split_windows(start, covered_from - timedelta(days=1))
+        # A cauda sempre parte da última observação: a cobertura fica contígua
+        windows += split_windows((last + timedelta(days=1)) if last else covered_from, end)
+        return windows
+
+    def update(self, series_id: int, start: date, end: date) -> int:
+        """
+        Baixa do BCB apenas o que falta para cobrir [start, end] e grava na base.
+
+        As janelas são baixadas em paralelo; se alguma falhar, nada é gravado
+        e a exceção é repassada (a cobertura registrada continua válida).
+
+        Returns:
+            Número de observações novas recebidas.
+        """
+        cov = self.coverage(series_id)
+        windows = self._missing(cov, start, end)
+        if not windows:
+            log.debug("bcb_store.atualizada", series_id=series_id)
+            return 0
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(windows))) as pool:
+            frames = list(
+                pool.map(
+                    lambda w: download_window(series_id, *w, self.base_url, self.timeout),
+                    windows,
+                )
+            )
+        new = pd.concat(frames, ignore_index=True)
+        rows = [
+            (series_id, d.date().isoformat(), float(v)) for d, v in zip(new["Date"], new["Rate"])
+        ]
+
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO observations (series_id, date, value) VALUES (?, ?, ?)",
+                rows,
+            )
+            covered_from = cov[0] if cov else start
+            last_obs = conn.execute(
+                "SELECT MAX(date) FROM observations WHERE series_id = ?", (series_id,)
+            ).fetchone()[0]
+            conn.execute(
+                "INSERT OR REPLACE INTO series (series_id, covered_from, last_date, updated_at)"
+                " VALUES (?, ?, ?, ?)",
+                (
+                    series_id,
+                    min(covered_from, start).isoformat(),
+                    last_obs,
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+
+        log.info(
+            "bcb_store.atualizada",
+            series_id=series_id,
+            janelas=len(windows),
+            registros_novos=len(rows),
+            ultima_data=last_obs,
+        )
+        return len(rows)
+
+    def read(self, series_id: int, start: date, end: date) -> pd.DataFrame:
+        """Observações armazenadas entre start e end, como DataFrame Date/Rate."""
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(
+                "SELECT date AS Date, value AS Rate FROM observations"
+                " WHERE series_id = ? AND date BETWEEN ? AND ? ORDER BY date",
+                conn,
+                params=(series_id, start.isoformat(), end.isoformat()),
+            )
+        df["Date"] = pd.to_datetime(df["Date"])
+        return df
+
+    def series(self, series_id: int, start: date, end: Optional[date] = None) -> pd.DataFrame:
+        """
+        Série completa entre start e end, atualizando a base antes de ler.
+
+        Args:
+            series_id: Código SGS da série.
+            start: Data inicial.
+            end: Data final. Default: hoje.
+
+        Returns:
+            DataFrame com colunas Date e Rate, ordenado por Date.
+        """
+        end = end or date.today()
+        self.update(series_id, start, end)
+        return self.read(series_id, start, end)
@@ -0,0 +1,89 @@
+"""
+Benchmark — projeção ARIMA: busca de ordem completa × reajuste incremental.
+
+Série sintética (passeio aleatório em log, ~5 anos de pregões). Mede:
+ - busca completa (_search_arima_order, o mesmo caminho da primeira execução);
+ - reajuste incremental com k pregões novos numa janela móvel, como a de
+   fetch_ibovespa_history (ArimaModelCache, warm start);
+ - reuso do modelo gravado (série inalterada).
+
+Uso:
+    python benchmarks/bench_arima_refit.py [--bars 1250] [--new 1 5 21] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).resolve().parents[3]))  # common/
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import structlog  # noqa: E402
+
+from arima_cache import ArimaModelCache  # noqa: E402
+from ibovespa_analysis import _search_arima_order  # noqa: E402
+
+
+def timed(fn, repeat: int) -> float:
+    """Menor tempo (s) de repeat execuções."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bars", type=int, default=1250, help="pregões já ajustados")
+    parser.add_argument("--new", type=int, nargs="+", default=[1, 5, 21])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    warnings.simplefilter("ignore")
+
+    rng = np.random.default_rng(42)
+    y = np.log(120_000) + np.cumsum(rng.normal(0.0003, 0.012, args.bars + max(args.new)))
+    dates = pd.bdate_range("2020-01-02", periods=len(y))
+    base, base_dates = y[: args.bars], dates[: args.bars]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ArimaModelCache(tmp, max_new_bars=max(args.new))
+        cold = timed(lambda: _search_arima_order(base), args.repeat)
+        _, order = _search_arima_order(base)
+        print(f"série: {args.bars} pregões | ordem escolhida: {order}")
+        print(f"{'cenário':<28} {'tempo (s)':>10} {'speedup':>8}")
+        print(f"{'busca completa':<28} {cold:>10.3f} {1.0:>7.1f}x")
+
+        cache.fit("bench", base, _search_arima_order, dates=base_dates)
+        hit = timed(
+            lambda: cache.fit("bench", base, _search_arima_order, dates=base_dates), args.repeat
+        )
+        print(f"{'modelo gravado (0 novos)':<28} {hit:>10.3f} {cold / hit:>7.1f}x")
+
+        snapshot = cache.load("bench")
+        for k in args.new:
+            # Janela móvel: entram k pregões e saem os k mais antigos
+            series, window = y[k : args.bars + k], dates[k : args.bars + k]
+            warm = float("inf")
+            for _ in range(args.repeat):
+                cache.save("bench", snapshot)  # volta ao modelo ajustado em base
+                t0 = time.perf_counter()
+                _, mode = cache.fit("bench", series, _search_arima_order, dates=window)
+                warm = min(warm, time.perf_counter() - t0)
+                assert mode == "warm", mode
+            label = f"reajuste ({k} novos)"
+            print(f"{label:<28} {warm:>10.3f} {cold / warm:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
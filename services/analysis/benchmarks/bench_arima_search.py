@@ -0,0 +1,55 @@
+"""
+Benchmark — busca de ordem ARIMA em grade: serial × pool de processos.
+
+Série sintética (passeio aleatório em log). A grade é ARIMA(p,1,q) com
+p, q ≤ --max-pq; confere que todas as configurações escolhem a mesma ordem.
+
+Uso:
+    python benchmarks/bench_arima_search.py [--bars 1250] [--max-pq 3] [--workers 1 4 8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+import structlog  # noqa: E402
+
+from arima_search import grid_search, order_grid  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bars", type=int, default=1250)
+    parser.add_argument("--max-pq", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    rng = np.random.default_rng(42)
+    y = np.log(120_000) + np.cumsum(rng.normal(0.0003, 0.012, args.bars))
+    grid = order_grid(max_p=args.max_pq, max_q=args.max_pq, d=1)
+
+    print(f"série: {args.bars} pregões | candidatas: {len(grid)} | CPUs: {os.cpu_count()}")
+    print(f"{'workers':>8} {'tempo (s)':>10} {'speedup':>8} {'ordem':>10}")
+    baseline = None
+    chosen = None
+    for workers in args.workers:
+        t0 = time.perf_counter()
+        _, order = grid_search(y, grid, workers=workers)
+        elapsed = time.perf_counter() - t0
+        baseline = baseline or elapsed
+        chosen = chosen or order
+        assert order == chosen, f"ordem diferente com {workers} workers: {order} ≠ {chosen}"
+        print(f"{workers:>8} {elapsed:>10.2f} {baseline / elapsed:>7.1f}x {str(order):>10}")
+
+
+if __name__ == "__main__":
+    main()
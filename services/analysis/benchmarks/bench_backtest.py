@@ -0,0 +1,90 @@
+"""
+Benchmark — backtest de rebalanceamento com muitas políticas em lote.
+
+Painel sintético de 3 ativos; grade de políticas (frequência × banda × custo)
+rodada de uma vez por backtest_rebalancing e, para comparação, pregão a pregão
+em Python para uma amostra das políticas.
+
+Uso:
+    python benchmarks/bench_backtest.py [--days 1250] [--loop-sample 8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import structlog  # noqa: E402
+
+from backtest import (  # noqa: E402
+    _check_dates,
+    _trade,
+    backtest_rebalancing,
+    policy_grid,
+)
+
+
+def _loop(prices: pd.DataFrame, w: np.ndarray, policy: dict) -> float:
+    """Backtest ingênuo de uma política: um passo Python por pregão."""
+    p = prices.to_numpy()
+    check = _check_dates(policy, prices.index)
+    threshold = policy["threshold"]
+    holdings = 100 * w
+    for t in range(1, len(p)):
+        holdings = holdings * p[t] / p[t - 1]
+        value = holdings.sum()
+        if check[t] and (threshold is None or np.abs(holdings / value - w).max() > threshold):
+            after, _ = _trade(holdings[None], np.array([value]), w, np.array([policy["cost"]]))
+            holdings = w * after[0]
+    return holdings.sum()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=1250)
+    parser.add_argument("--loop-sample", type=int, default=8)
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    rng = np.random.default_rng(42)
+    dates = pd.bdate_range("2020-01-02", periods=args.days)
+    steps = rng.normal([0.0004, 0.0004, 0.0003], [0.001, 0.004, 0.006], size=(args.days, 3))
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(steps, axis=0)), index=dates, columns=list("abc"))
+    w = np.array([0.4, 0.4, 0.2])
+    weights = dict(zip(prices.columns, w))
+
+    frequencies = ["monthly", "quarterly", "yearly", 5, 10, 21, None]
+    thresholds = [None, 0.01, 0.02, 0.05, 0.1]
+    costs = [0.0, 0.0005, 0.001, 0.002, 0.005]
+    grid = policy_grid(frequencies, thresholds, costs)
+
+    t0 = time.perf_counter()
+    result = backtest_rebalancing(prices, weights, grid)
+    batch = time.perf_counter() - t0
+
+    sample = grid[:: max(1, len(grid) // args.loop_sample)][: args.loop_sample]
+    t0 = time.perf_counter()
+    finals = [_loop(prices, w, policy) for policy in sample]
+    loop = (time.perf_counter() - t0) / len(sample) * len(grid)
+    gap = max(
+        abs(final - result["summary"].loc[p["name"], "final_value"])
+        for final, p in zip(finals, sample)
+    )
+
+    print(f"{len(grid)} políticas; {args.days} pregões; 3 ativos")
+    print(f"{'modo':<22} {'tempo (s)':>10}")
+    print(f"{'lote vetorizado':<22} {batch:>10.3f}")
+    print(f"{'laço (extrapolado)':<22} {loop:>10.3f}")
+    print(f"speedup {loop / batch:.1f}x; diferença máxima {gap:.2e}")
+    print(f"rebalanceamentos totais: {int(result['summary']['rebalances'].sum())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark — download dos arquivos mensais INF_DIARIO: sequencial × concorrente.
+
+Usa o servidor HTTP local dos testes (tests/http_stub.py) com latência fixa
+por requisição, simulando dados.cvm.gov.br. Cada cenário usa um cache vazio,
+ou seja, mede o pior caso (primeira execução).
+
+Uso:
+    python benchmarks/bench_cvm_download.py [--latency 0.25] [--workers 1 8 16]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).resolve().parents[3]))  # common/
+sys.path.insert(0, str(Path(__file__).parent.parent / "tests"))
+
+import structlog  # noqa: E402
+from cvm_samples import fake_cnpj, inf_diario_zip  # noqa: E402
+from http_stub import StubHttpServer  # noqa: E402
+
+from cvm_cache import CvmArchiveCache  # noqa: E402
+from cvm_inf_diario import cvm_months, download_months  # noqa: E402
+
+
+def run(n_months: int, workers: int, latency: float) -> float:
+    months = cvm_months(n_months)
+    payload = inf_diario_zip("202401", [fake_cnpj(i) for i in range(50)])
+    with StubHttpServer(latency=latency) as stub, tempfile.TemporaryDirectory() as tmp:
+        for ym in months:
+            stub.put(f"/FI/DOC/INF_DIARIO/DADOS/inf_diario_fi_{ym}.zip", payload)
+        cache = CvmArchiveCache(root=tmp)
+        t0 = time.perf_counter()
+        archives, failures = download_months(
+            cache, months, max_workers=workers, base_url=stub.url("")
+        )
+        elapsed = time.perf_counter() - t0
+        assert len(archives) == n_months and not failures
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=0.25, help="latência (s) por arquivo")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 16])
+    parser.add_argument("--months", type=int, nargs="+", default=[60, 120])
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    print(f"latência simulada por arquivo: {args.latency:.2f} s")
+    print(f"{'meses':>6} {'workers':>8} {'tempo (s)':>10} {'speedup':>8}")
+    for n_months in args.months:
+        baseline = None
+        for workers in args.workers:
+            elapsed = run(n_months, workers, args.latency)
+            baseline = baseline or elapsed
+            print(f"{n_months:>6} {workers:>8} {elapsed:>10.2f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
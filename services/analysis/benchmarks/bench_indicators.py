@@ -0,0 +1,63 @@
+"""
+Benchmark — indicadores de risco e retorno sobre painéis grandes de fundos.
+
+Painel sintético (datas × fundos) com ~20% de históricos incompletos; mede
+risk_return_indicators inteiro (uma passada matricial). Meta: milhares de
+fundos bem abaixo de 1 s.
+
+Uso:
+    python benchmarks/bench_indicators.py [--assets 1000 5000] [--days 1250]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import structlog  # noqa: E402
+
+from indicators import risk_return_indicators  # noqa: E402
+
+
+def _panel(n_assets: int, days: int, rng: np.random.Generator):
+    dates = pd.bdate_range("2020-01-02", periods=days)
+    bench = pd.Series(rng.normal(0.0004, 0.012, days), index=dates)
+    betas = rng.uniform(0, 1.5, n_assets)
+    returns = rng.normal(0.0002, 0.008, (days, n_assets)) + np.outer(bench, betas)
+    starts = rng.integers(0, days // 2, n_assets)
+    starts[rng.random(n_assets) > 0.2] = 0
+    returns[np.arange(days)[:, None] < starts] = np.nan
+    risk_free = pd.Series(rng.uniform(0.0003, 0.0005, days), index=dates)
+    return pd.DataFrame(returns, index=dates), bench, risk_free
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--assets", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--days", type=int, default=1250)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    rng = np.random.default_rng(42)
+    print(f"{args.days} pregões; melhor de {args.repeat}")
+    print(f"{'fundos':>7} {'tempo (s)':>10} {'fundos/s':>11}")
+    for n_assets in args.assets:
+        returns, bench, risk_free = _panel(n_assets, args.days, rng)
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            risk_return_indicators(returns, bench, risk_free)
+            best = min(best, time.perf_counter() - t0)
+        print(f"{n_assets:>7} {best:>10.3f} {n_assets / best:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark — pico de memória para extrair um fundo de um arquivo INF_DIARIO.
+
+Compara a abordagem original (zip inteiro em BytesIO + DataFrame de strings
+do mercado todo + filtro) com read_inf_diario(archive, [cnpj]) (CSV
+descomprimido em streaming + filtro em bytes).
+
+Cada abordagem roda em um processo novo; o pico de RSS (ru_maxrss) é
+comparado com o RSS do processo logo antes da leitura. O arquivo é sintético
+(tests/cvm_samples.py) com o tamanho aproximado de um mês real da CVM.
+
+Uso:
+    python benchmarks/bench_inf_diario_memory.py [--funds 25000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import multiprocessing as mp
+import resource
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).resolve().parents[3]))  # common/
+sys.path.insert(0, str(Path(__file__).parent.parent / "tests"))
+
+import pandas as pd  # noqa: E402
+from cvm_samples import fake_cnpj, inf_diario_zip  # noqa: E402
+
+from cvm_inf_diario import read_inf_diario  # noqa: E402
+
+
+def _rss_mib() -> float:
+    # ru_maxrss: KiB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _original(archive: str, cnpj: str) -> int:
+    content = Path(archive).read_bytes()  # equivale a r.content
+    with zipfile.ZipFile(io.BytesIO(content)) as zf:
+        with zf.open(zf.namelist()[0]) as f:
+            monthly = pd.read_csv(
+                io.TextIOWrapper(f, encoding="latin-1"),
+                sep=";",
+                dtype=str,
+                low_memory=False,
+            )
+    filtered = monthly[monthly["CNPJ_FUNDO"].str.strip() == cnpj]
+    return len(filtered)
+
+
+def _streaming(archive: str, cnpj: str) -> int:
+    return len(read_inf_diario(archive, [cnpj]))
+
+
+def _worker(name: str, archive: str, cnpj: str, queue) -> None:
+    fn = {"original": _original, "streaming": _streaming}[name]
+    before = _rss_mib()
+    t0 = time.perf_counter()
+    rows = fn(archive, cnpj)
+    queue.put((rows, _rss_mib() - before, time.perf_counter() - t0))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--funds", type=int, default=25000, help="fundos no arquivo sintético")
+    args = parser.parse_args()
+
+    cnpjs = [fake_cnpj(i) for i in range(args.funds)]
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = Path(tmp) / "inf_diario_fi_202401.zip"
+        archive.write_bytes(inf_diario_zip("202401", cnpjs))
+        with zipfile.ZipFile(archive) as zf:
+            csv_mib = zf.infolist()[0].file_size / 2**20
+        print(
+            f"arquivo sintético: {args.funds} fundos, CSV {csv_mib:.0f} MiB, "
+            f"zip {archive.stat().st_size / 2**20:.1f} MiB"
+        )
+        print(f"{'abordagem':>10} {'linhas':>7} {'pico RSS (MiB)':>15} {'tempo (s)':>10}")
+
+        ctx = mp.get_context("spawn")
+        for name in ("original", "streaming"):
+            queue = ctx.Queue()
+            proc = ctx.Process(
+                target=_worker, args=(name, str(archive), cnpjs[args.funds // 2], queue)
+            )
+            proc.start()
+            rows, peak, elapsed = queue.get()
+            proc.join()
+            print(f"{name:>10} {rows:>7} {peak:>15.1f} {elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
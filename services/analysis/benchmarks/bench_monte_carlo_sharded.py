@@ -0,0 +1,69 @@
+"""
+Benchmark — Monte Carlo de carteira em shards com redução por sketch.
+
+Carteira sintética de 4 ativos; mede o tempo por número de workers e o
+tamanho do sketch (constante) comparado ao array de caminhos equivalente.
+
+Uso:
+    python benchmarks/bench_monte_carlo_sharded.py [--iterations 100000] [--workers 1 2 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import structlog  # noqa: E402
+
+from monte_carlo import project_portfolio_monte_carlo  # noqa: E402
+
+
+def _assets(n_assets: int = 4, days: int = 1250) -> dict:
+    rng = np.random.default_rng(42)
+    dates = pd.bdate_range("2020-01-02", periods=days)
+    mix = rng.normal(size=(n_assets, n_assets)) * 0.004
+    returns = rng.normal(size=(days, n_assets)) @ mix + 0.0003
+    return {
+        f"ativo_{i}": {"data": pd.DataFrame({"Date": dates, "Value": np.exp(np.cumsum(r))})}
+        for i, r in enumerate(returns.T)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument("--horizon", type=int, default=504)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--method", default="bootstrap")
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    assets = _assets()
+    paths_mb = args.iterations * args.horizon * 4 / 2**20
+    print(f"{args.iterations} caminhos × {args.horizon} pregões — {args.method}")
+    print(f"array equivalente de caminhos: {paths_mb:.0f} MB (float32)")
+    print(f"{'workers':>7} {'tempo (s)':>10} {'reprodutível':>13}")
+    for workers in args.workers:
+        kwargs = dict(
+            method=args.method,
+            iterations=args.iterations,
+            n_periods=args.horizon,
+            seed=1,
+            workers=workers,
+        )
+        t0 = time.perf_counter()
+        first = project_portfolio_monte_carlo(assets, **kwargs)
+        elapsed = time.perf_counter() - t0
+        same = first.equals(project_portfolio_monte_carlo(assets, **kwargs))
+        print(f"{workers:>7} {elapsed:>10.2f} {str(same):>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark — bandas Monte Carlo em streaming (QuantileSketch) × percentil exato.
+
+Histórico sintético de ~5 anos; mede tempo e pico de memória (tracemalloc)
+das bandas com caminhos guardados e em streaming, e o maior erro relativo.
+O modo exato é pulado quando o array de caminhos passaria de --max-exact-mb.
+
+Uso:
+    python benchmarks/bench_monte_carlo_streaming.py [--iterations 1000000] [--horizon 504]
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import structlog  # noqa: E402
+
+from monte_carlo import project_monte_carlo  # noqa: E402
+
+
+def _measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    parser.add_argument("--horizon", type=int, default=504)
+    parser.add_argument("--method", default="bootstrap")
+    parser.add_argument("--max-exact-mb", type=float, default=1024)
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    rng = np.random.default_rng(42)
+    dates = pd.bdate_range("2020-01-02", periods=1250)
+    history = pd.DataFrame(
+        {"Date": dates, "Close": 120_000 * np.exp(np.cumsum(rng.normal(0.0003, 0.013, 1250)))}
+    )
+    kwargs = dict(method=args.method, iterations=args.iterations, n_periods=args.horizon, seed=1)
+
+    print(f"{args.iterations} caminhos × {args.horizon} pregões — {args.method}")
+    print(f"{'modo':<10} {'tempo (s)':>10} {'pico MB':>9}")
+    stream, elapsed, peak = _measure(lambda: project_monte_carlo(history, streaming=True, **kwargs))
+    print(f"{'streaming':<10} {elapsed:>10.2f} {peak:>9.1f}")
+
+    paths_mb = args.iterations * args.horizon * 4 / 2**20
+    if paths_mb > args.max_exact_mb:
+        print(f"{'exato':<10} pulado (caminhos ocupariam {paths_mb:.0f} MB)")
+        return
+    exact, elapsed, peak = _measure(lambda: project_monte_carlo(history, streaming=False, **kwargs))
+    print(f"{'exato':<10} {elapsed:>10.2f} {peak:>9.1f}")
+    cols = exact.columns[1:]
+    error = np.abs(stream[cols].to_numpy() / exact[cols].to_numpy() - 1).max()
+    print(f"maior erro relativo das bandas: {error:.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark — métricas móveis: somas acumuladas × recálculo ingênuo por janela.
+
+Painel sintético (pregões × ativos); compara rolling_metrics (O(n)) com o
+recálculo de cada janela do zero (O(n·w), sliding_window_view) e mede o
+custo de acrescentar um pregão a um RollingState já alimentado.
+
+Uso:
+    python benchmarks/bench_rolling.py [--assets 500] [--days 2520] [--windows 21 63 252]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from numpy.lib.stride_tricks import sliding_window_view  # noqa: E402
+
+from rolling import RollingState, rolling_metrics  # noqa: E402
+
+
+def _naive(prices: pd.DataFrame, bench: pd.Series, window: int, rf: float) -> dict:
+    """Cada janela recalculada do zero (O(n·w)) — as mesmas quatro métricas."""
+    p = prices.to_numpy()
+    r = prices.pct_change(fill_method=None).to_numpy()
+    rb = bench.pct_change(fill_method=None).to_numpy()
+    wr = sliding_window_view(r, window, axis=0)
+    we = wr - rf
+    wb = sliding_window_view(rb, window)[:, None, :]
+    cov = ((wr - wr.mean(-1, keepdims=True)) * (wb - wb.mean(-1, keepdims=True))).sum(-1)
+    return {
+        "volatility": wr.std(axis=-1, ddof=1) * np.sqrt(252),
+        "sharpe": we.mean(-1) / we.std(axis=-1, ddof=1) * np.sqrt(252),
+        "beta": cov / ((wb - wb.mean(-1, keepdims=True)) ** 2).sum(-1),
+        "drawdown": p[window - 1 :] / sliding_window_view(p, window, axis=0).max(-1) - 1,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--assets", type=int, default=500)
+    parser.add_argument("--days", type=int, default=2520)
+    parser.add_argument("--windows", type=int, nargs="+", default=[21, 63, 252])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    dates = pd.bdate_range("2010-01-04", periods=args.days + 1)
+    steps = rng.normal(0.0003, 0.012, (args.days + 1, args.assets + 1))
+    levels = 100 * np.exp(np.cumsum(steps, axis=0))
+    prices = pd.DataFrame(levels[:, :-1], index=dates)
+    bench = pd.Series(levels[:, -1], index=dates)
+    history, new_prices = prices.iloc[:-1], prices.iloc[-1:]
+
+    print(f"{args.days} pregões × {args.assets} ativos")
+    print(f"{'janela':>6} {'O(n) (s)':>9} {'ingênuo (s)':>12} {'+1 pregão (ms)':>15}")
+    for window in args.windows:
+        t0 = time.perf_counter()
+        rolling_metrics(history, window, bench, 0.0004)
+        fast = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for start in range(0, args.assets, 25):  # blocos de ativos: limita a memória
+            _naive(history.iloc[:, start : start + 25], bench.iloc[:-1], window, 0.0004)
+        naive = time.perf_counter() - t0
+
+        state = RollingState(window, list(prices.columns))
+        state.update(history, bench.iloc[:-1], 0.0004)
+        t0 = time.perf_counter()
+        state.update(new_prices, bench.iloc[-1:], 0.0004)
+        step = (time.perf_counter() - t0) * 1000
+        print(f"{window:>6} {fast:>9.3f} {naive:>12.3f} {step:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Cache local de arquivos da CVM Dados Abertos
+============================================
+Armazena em disco os arquivos baixados de dados.cvm.gov.br (zips mensais do
+INF_DIARIO, cad_fi.csv) para que cada execução não precise baixar tudo de novo.
+
+Funcionamento:
+ - Conteúdo endereçado por SHA-256: cada arquivo é gravado uma única vez em
+   ``objects/<2 primeiros hex>/<sha256>``; URLs com o mesmo conteúdo
+   compartilham o mesmo blob.
+ - ``index.json`` mapeia URL → sha256, ETag, Last-Modified e data de busca.
+   Cada gravação relê o índice sob lock (``index.lock``) e troca só a
+   entrada da URL, então instâncias e processos simultâneos não se apagam.
+ - Arquivos imutáveis (meses já fechados) nunca são buscados de novo.
+ - Arquivos mutáveis (mês corrente, cadastro) são revalidados com
+   If-None-Match / If-Modified-Since — o corpo só é baixado se o servidor
+   indicar alteração (HTTP 200 em vez de 304).
+ - Se a revalidação falhar por erro de rede, a cópia local é usada e o
+   fato é registrado em log.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+import requests
+import structlog
+
+from common.utils import http_get
+
+try:
+    import fcntl
+except ImportError:  # Windows: só o lock entre threads do processo
+    fcntl = None  # type: ignore[assignment]
+
+log = structlog.get_logger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / "cache" / "cvm"
+
+_CHUNK_SIZE = 1024 * 1024  # 1 MiB por leitura do corpo HTTP
+
+# Um lock por index.json, compartilhado pelas instâncias do processo
+_INDEX_LOCKS: Dict[Path, threading.Lock] = {}
+_INDEX_LOCKS_GUARD = threading.Lock()
+
+
+def _index_lock(path: Path) -> threading.Lock:
+    with _INDEX_LOCKS_GUARD:
+        return _INDEX_LOCKS.setdefault(path.resolve(), threading.Lock())
+
+
+def default_cache_dir() -> Path:
+    """Diretório do cache: variável CVM_CACHE_DIR ou services/analysis/cache/cvm."""
+    return Path(os.getenv("CVM_CACHE_DIR", str(DEFAULT_CACHE_DIR)))
+
+
+class CvmArchiveCache:
+    """
+    Cache em disco, endereçado por conteúdo, para arquivos da CVM.
+
+    Args:
+        root: Diretório raiz do cache. Default: default_cache_dir().
+        timeout: Timeout (s) de cada requisição HTTP. Default: 60.
+    """
+
+    def __init__(self, root: Optional[Union[str, Path]] = None, timeout: float = 60) -> None:
+        self.root = Path(root) if root is not None else default_cache_dir()
+        self.timeout = timeout
+        self._index_path = self.root / "index.json"
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict[str, Any]] = self._load_index()
+
+    # ------------------------------------------------------------------
+    # Índice
+    # ------------------------------------------------------------------
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        if not self._index_path.exists():
+            return {}
+        try:
+            return json.loads(self._index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            log.warning("cvm_cache.indice_corrompido", path=str(self._index_path), erro=str(e))
+            return {}
+
+    @contextmanager
+    def _index_locked(self) -> Iterator[None]:
+        """
+        Exclusão mútua na escrita do índice: entre as instâncias do processo
+        (lock por caminho) e entre processos (flock em index.lock, se houver).
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with _index_lock(self._index_path):
+            if fcntl is None:
+                yield
+                return
+            with open(self.root / "index.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save_index(self, index: Dict[str, Dict[str, Any]]) -> None:
+        """Grava o índice de forma atômica (arquivo temporário + os.replace)."""
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".index-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(index, f, indent=1, sort_keys=True)
+            os.replace(tmp, self._index_path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _blob_path(self, sha256: str) -> Path:
+        return self.root / "objects" / sha256[:2] / sha256
+
+    def entry(self, url: str) -> Optional[Dict[str, Any]]:
+        """Metadados registrados para a URL (ou None se nunca baixada)."""
+        with self._lock:
+            entry = self._index.get(url)
+            return dict(entry) if entry else None
+
+    def cached_path(self, url: str) -> Optional[Path]:
+        """Caminho do blob local da URL, se existir, sem acessar a rede."""
+        entry = self.entry(url)
+        if entry is None:
+            return None
+        path = self._blob_path(entry["sha256"])
+        return path if path.exists() else None
+
+    # ------------------------------------------------------------------
+    # Busca
+    # ------------------------------------------------------------------
+
+    def fetch(self, url: str, immutable: bool = False) -> Path:
+        """
+        Retorna o caminho local do arquivo da URL, baixando-o se necessário.
+
+        Args:
+            url: URL do arquivo na CVM.
+            immutable: True se o conteúdo não muda mais (mês fechado). Uma vez
+                armazenado como imutável, o arquivo nunca é buscado de novo.
+
+        Returns:
+            Path do blob no cache (somente leitura).
+
+        Raises:
+            requests.HTTPError: Se o servidor retornar erro e não houver cópia local.
+            requests.RequestException: Falha de rede sem cópia local.
+        """
+        entry = self.entry(url)
+        local = self.cached_path(url)
+
+        if entry is not None and local is not None and entry.get("immutable"):
+            log.debug("cvm_cache.hit_imutavel", url=url)
+            return local
+
+        headers: Dict[str, str] = {}
+        if entry is not None and local is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            with http_get(url, headers=headers, timeout=self.timeout, stream=True) as resp:
+                if resp.status_code == 304 and local is not None:
+                    log.info("cvm_cache.nao_modificado", url=url)
+                    self._record(url, entry["sha256"], resp, immutable)  # type: ignore[index]
+                    return local
+                resp.raise_for_status()
+                sha256 = self._store_body(resp)
+                self._record(url, sha256, resp, immutable)
+                log.info("cvm_cache.baixado", url=url, sha256=sha256, immutable=immutable)
+                return self._blob_path(sha256)
+        except requests.RequestException as e:
+            if local is None:
+                raise
+            log.warning(
+                "cvm_cache.revalidacao_falhou_usando_copia_local",
+                url=url,
+                erro=str(e),
+                buscado_em=entry.get("fetched_at") if entry else None,
+            )
+            return local
+
+    def _store_body(self, resp: requests.Response) -> str:
+        """Grava o corpo em blocos num temporário, calcula o SHA-256 e move para objects/."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".download-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in resp.iter_content(chunk_size=_CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+            sha256 = digest.hexdigest()
+            target = self._blob_path(sha256)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, target)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return sha256
+
+    def _record(
+        self,
+        url: str,
+        sha256: str,
+        resp: requests.Response,
+        immutable: bool,
+    ) -> None:
+        """
+        Registra a URL no índice. O índice em disco é relido sob lock antes
+        da gravação: entradas gravadas por outras instâncias (ou processos)
+        desde a carga prevalecem, e só a entrada desta URL é trocada.
+        """
+        with self._lock, self._index_locked():
+            index = {**self._index, **self._load_index()}
+            previous = index.get(url, {})
+            index[url] = {
+                "sha256": sha256,
+                "etag": resp.headers.get("ETag") or previous.get("etag"),
+                "last_modified": resp.headers.get("Last-Modified") or previous.get("last_modified"),
+                "immutable": immutable,
+                "fetched_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            self._save_index(index)
+            self._index = index
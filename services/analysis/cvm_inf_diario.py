@@ -0,0 +1,397 @@
+"""
+Leitura dos arquivos INF_DIARIO da CVM (informe diário de fundos)
+=================================================================
+Cada arquivo mensal ``inf_diario_fi_AAAAMM.zip`` contém um CSV (latin-1, ``;``)
+com uma linha por fundo e dia. Este módulo converte o CSV em colunas tipadas:
+
+ - CNPJ_FUNDO: str (sem espaços)
+ - DT_COMPTC: datetime64[ns]
+ - VL_QUOTA: float64
+
+A partir de 2024 (Resolução CVM 175) o CSV passou a usar CNPJ_FUNDO_CLASSE;
+ambas as grafias são aceitas e expostas como CNPJ_FUNDO.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import structlog
+
+from cvm_cache import CvmArchiveCache
+
+log = structlog.get_logger(__name__)
+
+# Downloads simultâneos de arquivos mensais (limite educado com o servidor da CVM)
+CVM_DOWNLOAD_WORKERS = int(os.getenv("CVM_DOWNLOAD_WORKERS", "8"))
+
+# A CVM republica o mês anterior por alguns dias (envios atrasados e
+# retificações): só depois desse prazo, contado do fim do mês, ele é imutável
+CVM_IMMUTABLE_AFTER_DAYS = int(os.getenv("CVM_IMMUTABLE_AFTER_DAYS", "15"))
+
+CVM_BASE_URL = os.getenv("CVM_BASE_URL", "https://dados.cvm.gov.br/dados")
+INF_DIARIO_PATH = "/FI/DOC/INF_DIARIO/DADOS/inf_diario_fi_{ym}.zip"
+
+CNPJ_COLUMNS = ("CNPJ_FUNDO", "CNPJ_FUNDO_CLASSE")
+QUOTA_COLUMNS = ["CNPJ_FUNDO", "DT_COMPTC", "VL_QUOTA"]
+
+_READ_BUFFER = 1024 * 1024  # CSV descomprimido lido em blocos de 1 MiB
+_CSV_CHUNK_ROWS = 200_000  # linhas por bloco ao ler o arquivo completo
+_PREFILTER_MAX = 8  # até quantos CNPJs compensa o pré-filtro por substring
+
+
+def cvm_months(n_months: int, today: Optional[date] = None) -> List[str]:
+    """
+    Lista os últimos n_months meses no formato AAAAMM, do mais recente ao mais antigo.
+
+    O primeiro elemento é sempre o mês corrente (ainda aberto na CVM).
+    """
+    today = today or date.today()
+    current = today.year * 12 + today.month - 1
+    return [
+        f"{total // 12:04d}{total % 12 + 1:02d}" for total in range(current, current - n_months, -1)
+    ]
+
+
+def month_is_settled(
+    ym: str, today: Optional[date] = None, grace_days: Optional[int] = None
+) -> bool:
+    """
+    True se já se passaram grace_days dias inteiros desde o fim do mês AAAAMM.
+
+    Args:
+        ym: Mês no formato AAAAMM.
+        today: Data de referência. Default: hoje.
+        grace_days: Prazo após o fim do mês. Default: CVM_IMMUTABLE_AFTER_DAYS.
+    """
+    today = today or date.today()
+    grace_days = CVM_IMMUTABLE_AFTER_DAYS if grace_days is None else grace_days
+    year, month = int(ym[:4]), int(ym[4:])
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    return (today - next_month).days >= grace_days
+
+
+def inf_diario_url(ym: str, base_url: Optional[str] = None) -> str:
+    """URL do arquivo mensal INF_DIARIO para o mês AAAAMM."""
+    return (base_url or CVM_BASE_URL).rstrip("/") + INF_DIARIO_PATH.format(ym=ym)
+
+
+def _cnpj_column(header: Iterable[str]) -> str:
+    for col in CNPJ_COLUMNS:
+        if col in header:
+            return col
+    raise ValueError(f"CSV INF_DIARIO sem coluna de CNPJ ({', '.join(CNPJ_COLUMNS)})")
+
+
+def _filter_lines(f: IO[bytes], cnpj_index: int, cnpjs: Iterable[str]) -> bytes:
+    """
+    Mantém só as linhas cujo campo de CNPJ pertence a cnpjs, sem decodificar o CSV.
+
+    Para poucos CNPJs, uma busca de substring em bytes (feita em C) descarta
+    quase todas as linhas antes do split. A agulha é só o CNPJ, sem os
+    separadores, para não perder campo na primeira coluna nem com espaços; o
+    teste definitivo é sempre a pertinência do campo (sem espaços) ao conjunto.
+    """
+    wanted = {c.strip().encode("latin-1") for c in cnpjs}
+    needles = list(wanted) if len(wanted) <= _PREFILTER_MAX else None
+    kept = []
+    for line in f:
+        if needles is not None and not any(n in line for n in needles):
+            continue
+        fields = line.split(b";", cnpj_index + 1)
+        if len(fields) > cnpj_index and fields[cnpj_index].strip() in wanted:
+            kept.append(line)
+    return b"".join(kept)
+
+
+def _typed_quotas(raw: pd.DataFrame, cnpj_col: str) -> pd.DataFrame:
+    """Converte colunas string do CSV para o esquema tipado de cotas."""
+    df = pd.DataFrame(
+        {
+            "CNPJ_FUNDO": raw[cnpj_col].str.strip(),
+            "DT_COMPTC": pd.to_datetime(raw["DT_COMPTC"], errors="coerce"),
+            "VL_QUOTA": pd.to_numeric(
+                raw["VL_QUOTA"].str.replace(",", ".", regex=False),
+                errors="coerce",
+            ).astype("float64"),
+        }
+    )
+    return df
+
+
+def _open_csv(zf: zipfile.ZipFile) -> Tuple[io.BufferedReader, bytes, List[str], str]:
+    """Abre o CSV do zip: (leitor posicionado após o cabeçalho, linha, colunas, coluna CNPJ)."""
+    member = zf.open(zf.namelist()[0])
+    f = io.BufferedReader(member, buffer_size=_READ_BUFFER)  # type: ignore[arg-type]
+    header_line = f.readline()
+    header = header_line.decode("latin-1").strip().split(";")
+    return f, header_line, header, _cnpj_column(header)
+
+
+def iter_inf_diario(
+    archive: Union[str, Path], chunksize: int = _CSV_CHUNK_ROWS
+) -> Iterator[pd.DataFrame]:
+    """
+    Cotas tipadas do zip INF_DIARIO, bloco a bloco (chunksize linhas).
+
+    Só um bloco existe em memória por vez: é a base da conversão para
+    Parquet (cvm_quota_store), cujo pico não depende do tamanho do mês.
+
+    Raises:
+        ValueError: Se o CSV não tiver coluna de CNPJ reconhecida.
+    """
+    with zipfile.ZipFile(archive) as zf:
+        f, _, header, cnpj_col = _open_csv(zf)
+        with f:
+            reader = pd.read_csv(
+                f,
+                sep=";",
+                encoding="latin-1",
+                dtype=str,
+                header=None,
+                names=header,
+                usecols=[cnpj_col, "DT_COMPTC", "VL_QUOTA"],
+                chunksize=chunksize,
+            )
+            for chunk in reader:
+                yield _typed_quotas(chunk, cnpj_col)
+
+
+def read_inf_diario(
+    archive: Union[str, Path],
+    cnpjs: Optional[Iterable[str]] = None,
+    chunksize: int = _CSV_CHUNK_ROWS,
+) -> pd.DataFrame:
+    """
+    Lê o CSV de um zip INF_DIARIO e devolve as cotas tipadas.
+
+    O CSV é descomprimido em streaming e nunca existe inteiro em memória. Com
+    cnpjs, as linhas são filtradas em bytes antes de qualquer parsing, e o pico
+    de memória deixa de depender do tamanho do arquivo do mercado.
+
+    Args:
+        archive: Caminho do arquivo .zip mensal.
+        cnpjs: Se informado, mantém apenas as linhas destes CNPJs.
+        chunksize: Linhas por bloco na leitura do arquivo completo.
+
+    Returns:
+        DataFrame com colunas CNPJ_FUNDO, DT_COMPTC e VL_QUOTA.
+
+    Raises:
+        ValueError: Se o CSV não tiver coluna de CNPJ reconhecida.
+    """
+    if cnpjs is None:
+        # Arquivo completo: cada bloco vira colunas tipadas antes do próximo
+        frames = list(iter_inf_diario(archive, chunksize))
+        if not frames:
+            return _typed_quotas(pd.DataFrame(columns=QUOTA_COLUMNS, dtype=str), "CNPJ_FUNDO")
+        return pd.concat(frames, ignore_index=True)
+
+    with zipfile.ZipFile(archive) as zf:
+        f, header_line, header, cnpj_col = _open_csv(zf)
+        with f:
+            # Só as linhas do(s) fundo(s) pedido(s) chegam ao pandas
+            body = _filter_lines(f, header.index(cnpj_col), cnpjs)
+    raw = pd.read_csv(
+        io.BytesIO(header_line + body),
+        sep=";",
+        encoding="latin-1",
+        dtype=str,
+        usecols=[cnpj_col, "DT_COMPTC", "VL_QUOTA"],
+    )
+    return _typed_quotas(raw, cnpj_col)
+
+
+def download_months(
+    cache: CvmArchiveCache,
+    months: Sequence[str],
+    max_workers: Optional[int] = None,
+    open_month: Optional[str] = None,
+    base_url: Optional[str] = None,
+    today: Optional[date] = None,
+) -> Tuple[Dict[str, Path], List[Tuple[str, str]]]:
+    """
+    Baixa (ou obtém do cache) os zips INF_DIARIO dos meses informados.
+
+    Os downloads rodam em um pool de threads limitado a max_workers; com
+    max_workers=1 o comportamento é o laço sequencial original.
+
+    Args:
+        cache: Cache de arquivos CVM.
+        months: Meses AAAAMM.
+        max_workers: Máximo de downloads simultâneos.
+            Default: CVM_DOWNLOAD_WORKERS (variável de ambiente, 8).
+        open_month: Mês ainda aberto na CVM (revalidado no cache).
+            Default: o primeiro de months.
+        base_url: Raiz do portal de dados. Default: CVM_BASE_URL.
+        today: Data de referência do prazo de republicação: meses encerrados
+            há menos de CVM_IMMUTABLE_AFTER_DAYS dias também são revalidados.
+            Default: hoje.
+
+    Returns:
+        Tupla (archives, failures): archives mapeia mês → caminho local do
+        zip, na ordem de months; failures lista (mês, erro) dos que falharam.
+    """
+    if max_workers is None:
+        max_workers = CVM_DOWNLOAD_WORKERS
+    if open_month is None and months:
+        open_month = months[0]
+
+    def fetch(ym: str) -> Path:
+        immutable = ym != open_month and month_is_settled(ym, today)
+        return cache.fetch(inf_diario_url(ym, base_url), immutable=immutable)
+
+    results: Dict[str, Path] = {}
+    errors: Dict[str, str] = {}
+    workers = max(1, min(max_workers, len(months)))
+
+    if workers == 1:
+        for ym in months:
+            try:
+                results[ym] = fetch(ym)
+            except Exception as e:
+                errors[ym] = str(e)
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cvm") as pool:
+            futures = {pool.submit(fetch, ym): ym for ym in months}
+            for future in as_completed(futures):
+                ym = futures[future]
+                try:
+                    results[ym] = future.result()
+                except Exception as e:
+                    errors[ym] = str(e)
+
+    log.info(
+        "download_months.ok",
+        meses=len(months),
+        obtidos=len(results),
+        falhas=len(errors),
+        workers=workers,
+    )
+    archives = {ym: results[ym] for ym in months if ym in results}
+    failures = [(ym, errors[ym]) for ym in months if ym in errors]
+    return archives, failures
+
+
+def open_quota_store() -> Optional[Any]:
+    """
+    Abre o dataset Parquet de cotas (cvm_quota_store).
+
+    Retorna None se pyarrow não estiver instalado — nesse caso as cotas são
+    filtradas diretamente do CSV de cada mês.
+    """
+    try:
+        from cvm_quota_store import CvmQuotaStore
+    except ImportError:
+        log.warning(
+            "open_quota_store.pyarrow_nao_instalado",
+            mensagem="pyarrow não disponível — lendo CSVs mensais da CVM sem Parquet",
+        )
+        return None
+    return CvmQuotaStore()
+
+
+def fetch_fund_quotas(
+    cnpjs: Iterable[str],
+    months: Union[int, Sequence[str]] = 60,
+    as_dict: bool = False,
+    cache: Optional[CvmArchiveCache] = None,
+    store: Optional[Any] = None,
+    use_parquet: bool = True,
+    max_workers: Optional[int] = None,
+    base_url: Optional[str] = None,
+) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """
+    Cotas diárias de vários fundos com uma única passada por arquivo mensal.
+
+    Cada mês é baixado (ou lido do cache) uma vez, independentemente de
+    quantos CNPJs forem pedidos. Com pyarrow, o mês é convertido uma vez em
+    Parquet e a leitura de todos os CNPJs é uma única consulta com
+    predicate pushdown; sem pyarrow, cada CSV é filtrado em streaming contra
+    o conjunto de CNPJs (teste de pertinência em hash).
+
+    Args:
+        cnpjs: CNPJs dos fundos (formato CVM, ex: "00.000.000/0001-00").
+        months: Quantidade de meses até o corrente, ou lista de meses AAAAMM
+            (o primeiro é tratado como mês aberto). Default: 60.
+        as_dict: Se True, devolve {cnpj: DataFrame[Date, Value]}.
+        cache: Cache de arquivos CVM. Default: CvmArchiveCache().
+        store: CvmQuotaStore a usar. Default: open_quota_store().
+        use_parquet: Se False, ignora o dataset Parquet e filtra os CSVs.
+        max_workers: Downloads simultâneos. Default: CVM_DOWNLOAD_WORKERS.
+        base_url: Raiz do portal de dados. Default: CVM_BASE_URL.
+
+    Returns:
+        DataFrame longo com colunas CNPJ_FUNDO, Date e Value, ordenado por
+        CNPJ_FUNDO e Date (uma linha por fundo e dia). ``attrs["failures"]``
+        lista (mês, erro) dos meses que não puderam ser lidos. Com as_dict,
+        dict com um DataFrame [Date, Value] por CNPJ pedido (vazio se sem
+        cotas), cada um com a mesma lista em ``attrs["failures"]``.
+    """
+    wanted = sorted({c.strip() for c in cnpjs})
+    month_list = cvm_months(months) if isinstance(months, int) else list(months)
+    cache = cache or CvmArchiveCache()
+    if not use_parquet:
+        store = None
+    elif store is None:
+        store = open_quota_store()
+
+    archives, failures = download_months(
+        cache, month_list, max_workers=max_workers, base_url=base_url
+    )
+    frames = []
+    for ym, archive in archives.items():
+        try:
+            if store is not None:
+                # Conversão para Parquet só na primeira vez (ou se o zip mudou)
+                sha256 = (cache.entry(inf_diario_url(ym, base_url)) or {}).get("sha256")
+                if not store.has_month(ym, sha256):
+                    store.ingest_month(ym, archive, sha256)
+            else:
+                frames.append(read_inf_diario(archive, wanted))
+        except Exception as e:
+            failures.append((ym, str(e)))
+
+    if store is not None:
+        ingested = [ym for ym in archives if ym not in dict(failures)]
+        frames = [store.read(wanted, ingested)]
+
+    if not frames:
+        frames = [_typed_quotas(pd.DataFrame(columns=QUOTA_COLUMNS, dtype=str), "CNPJ_FUNDO")]
+    quotas = (
+        pd.concat(frames, ignore_index=True)
+        .rename(columns={"DT_COMPTC": "Date", "VL_QUOTA": "Value"})
+        .dropna(subset=["Date", "Value"])
+        .sort_values(["CNPJ_FUNDO", "Date"], kind="stable")
+        .drop_duplicates(["CNPJ_FUNDO", "Date"], keep="last")
+        .reset_index(drop=True)
+    )
+    log.info(
+        "fetch_fund_quotas.ok",
+        fundos_pedidos=len(wanted),
+        fundos_com_cotas=quotas["CNPJ_FUNDO"].nunique(),
+        registros=len(quotas),
+        meses=len(month_list),
+        meses_falhos=len(failures),
+    )
+
+    if as_dict:
+        empty = quotas.iloc[0:0][["Date", "Value"]]
+        groups = {
+            cnpj: group[["Date", "Value"]].reset_index(drop=True)
+            for cnpj, group in quotas.groupby("CNPJ_FUNDO", sort=False)
+        }
+        result = {cnpj: groups.get(cnpj, empty.copy()) for cnpj in wanted}
+        for frame in result.values():
+            frame.attrs["failures"] = failures
+        return result
+
+    quotas.attrs["failures"] = failures
+    return quotas
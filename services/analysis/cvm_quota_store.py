@@ -0,0 +1,250 @@
+"""
+Armazenamento colunar (Parquet) das cotas diárias da CVM
+========================================================
+Cada arquivo mensal INF_DIARIO é convertido uma única vez em
+``inf_diario_fi_AAAAMM.parquet``, ordenado por CNPJ_FUNDO e dividido em row
+groups pequenos. A conversão é em streaming (blocos do CSV gravados por um
+ParquetWriter, com merge externo se o CSV não vier ordenado): o pico de
+memória não cresce com o tamanho do mês. As estatísticas min/max de cada
+row group permitem que a leitura de um CNPJ (predicate pushdown) descarte
+quase todo o arquivo sem decodificá-lo.
+
+O SHA-256 do zip de origem (ver cvm_cache) fica nos metadados do Parquet: o
+mês só é reprocessado quando o arquivo da CVM muda (mês corrente).
+
+Requer pyarrow.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import structlog
+
+from cvm_cache import default_cache_dir
+from cvm_inf_diario import QUOTA_COLUMNS, iter_inf_diario
+
+log = structlog.get_logger(__name__)
+
+SCHEMA = pa.schema(
+    [
+        ("CNPJ_FUNDO", pa.string()),
+        ("DT_COMPTC", pa.timestamp("ns")),
+        ("VL_QUOTA", pa.float64()),
+    ]
+)
+
+_SOURCE_KEY = b"source_sha256"
+_ROW_GROUP_SIZE = 16_384  # ~poucas centenas de fundos por row group
+
+
+def _key(df: pd.DataFrame, i: int) -> Tuple[str, pd.Timestamp]:
+    """Chave de ordenação (CNPJ, data) da linha i."""
+    return df["CNPJ_FUNDO"].iat[i], df["DT_COMPTC"].iat[i]
+
+
+class _RowGroupWriter:
+    """ParquetWriter que acumula linhas até completar um row group de _ROW_GROUP_SIZE."""
+
+    def __init__(self, path: Path, schema: pa.Schema) -> None:
+        self._writer = pq.ParquetWriter(path, schema, compression="zstd", write_statistics=True)
+        self._schema = schema
+        self._pending: List[pd.DataFrame] = []
+        self._rows = 0
+
+    def write(self, df: pd.DataFrame) -> None:
+        self._pending.append(df)
+        self._rows += len(df)
+        if self._rows >= _ROW_GROUP_SIZE:
+            self._flush(final=False)
+
+    def _flush(self, final: bool) -> None:
+        if not self._pending:
+            return
+        df = pd.concat(self._pending, ignore_index=True)
+        cut = len(df) if final else len(df) - len(df) % _ROW_GROUP_SIZE
+        table = pa.Table.from_pandas(
+            df.iloc[:cut][QUOTA_COLUMNS], schema=self._schema, preserve_index=False
+        )
+        self._writer.write_table(table, row_group_size=_ROW_GROUP_SIZE)
+        rest = df.iloc[cut:]
+        self._pending = [rest] if len(rest) else []
+        self._rows = len(rest)
+
+    def close(self) -> None:
+        self._flush(final=True)
+        self._writer.close()
+
+
+def _merge_runs(runs: Sequence[Path], target: Path, schema: pa.Schema) -> None:
+    """
+    Intercala sequências Parquet ordenadas por (CNPJ, data) em um único arquivo.
+
+    Cada sequência contribui com um row group por vez. Em cada passo, tudo o
+    que é ≤ à menor das últimas chaves carregadas já pode ser emitido: nenhuma
+    linha ainda não lida de qualquer sequência é menor que isso.
+    """
+    sources = [pq.ParquetFile(run).iter_batches(batch_size=_ROW_GROUP_SIZE) for run in runs]
+    buffers: List[Optional[pd.DataFrame]] = [None] * len(sources)
+    writer = _RowGroupWriter(target, schema)
+
+    def refill(i: int) -> None:
+        batch = next(sources[i], None)
+        buffers[i] = batch.to_pandas() if batch is not None else None
+
+    for i in range(len(sources)):
+        refill(i)
+    while any(buf is not None for buf in buffers):
+        live = [i for i, buf in enumerate(buffers) if buf is not None]
+        bound = min(_key(buffers[i], -1) for i in live)  # type: ignore[arg-type]
+        ready = []
+        for i in live:
+            buf = buffers[i]
+            cnpj, when = buf["CNPJ_FUNDO"], buf["DT_COMPTC"]  # type: ignore[index]
+            take = (cnpj < bound[0]) | ((cnpj == bound[0]) & (when <= bound[1]))
+            ready.append(buf[take.to_numpy()])  # type: ignore[index]
+            rest = buf[~take.to_numpy()]  # type: ignore[index]
+            buffers[i] = rest if len(rest) else None
+            if buffers[i] is None:
+                refill(i)
+        merged = pd.concat(ready, ignore_index=True)
+        writer.write(merged.sort_values(["CNPJ_FUNDO", "DT_COMPTC"], kind="stable"))
+    writer.close()
+
+
+class CvmQuotaStore:
+    """
+    Dataset Parquet de cotas INF_DIARIO, um arquivo por mês.
+
+    Args:
+        root: Diretório do dataset. Default: <CVM_CACHE_DIR>/inf_diario.
+    """
+
+    def __init__(self, root: Optional[Union[str, Path]] = None) -> None:
+        self.root = Path(root) if root is not None else default_cache_dir() / "inf_diario"
+
+    def month_path(self, ym: str) -> Path:
+        return self.root / f"inf_diario_fi_{ym}.parquet"
+
+    def source_sha256(self, ym: str) -> Optional[str]:
+        """SHA-256 do zip que originou o mês armazenado (None se ausente)."""
+        path = self.month_path(ym)
+        if not path.exists():
+            return None
+        metadata = pq.read_schema(path).metadata or {}
+        value = metadata.get(_SOURCE_KEY)
+        return value.decode() if value else None
+
+    def has_month(self, ym: str, source_sha256: Optional[str] = None) -> bool:
+        """True se o mês já foi ingerido (a partir do mesmo zip, se informado)."""
+        stored = self.source_sha256(ym)
+        if stored is None:
+            return self.month_path(ym).exists()
+        return source_sha256 is None or stored == source_sha256
+
+    def ingest_month(
+        self,
+        ym: str,
+        archive: Union[str, Path],
+        source_sha256: Optional[str] = None,
+        chunksize: Optional[int] = None,
+    ) -> Path:
+        """
+        Converte o zip INF_DIARIO do mês em Parquet ordenado por CNPJ.
+
+        O CSV é lido em blocos (iter_inf_diario) e nunca existe inteiro em
+        memória. Blocos consecutivos já em ordem formam uma sequência
+        ordenada gravada direto em disco; o arquivo da CVM normalmente já vem
+        ordenado e vira uma sequência só, renomeada para o destino. Se houver
+        várias, elas são intercaladas (merge externo) lendo um row group de
+        cada por vez.
+
+        Args:
+            ym: Mês no formato AAAAMM.
+            archive: Caminho do zip mensal (normalmente o blob do cvm_cache).
+            source_sha256: Identificador do zip gravado nos metadados.
+            chunksize: Linhas por bloco lido do CSV. Default: o de iter_inf_diario.
+
+        Returns:
+            Caminho do arquivo Parquet gerado.
+        """
+        schema = SCHEMA
+        if source_sha256:
+            schema = SCHEMA.with_metadata({_SOURCE_KEY: source_sha256.encode()})
+        self.root.mkdir(parents=True, exist_ok=True)
+        target = self.month_path(ym)
+        tmp = target.with_suffix(".parquet.tmp")
+        chunks = (
+            iter_inf_diario(archive) if chunksize is None else iter_inf_diario(archive, chunksize)
+        )
+
+        runs: List[Path] = []
+        writer: Optional[_RowGroupWriter] = None
+        last_key: Optional[Tuple[str, pd.Timestamp]] = None
+        rows = 0
+        try:
+            for chunk in chunks:
+                chunk = chunk.dropna(subset=["DT_COMPTC"])
+                if chunk.empty:
+                    continue
+                chunk = chunk.sort_values(["CNPJ_FUNDO", "DT_COMPTC"], kind="stable")
+                first = _key(chunk, 0)
+                if writer is None or (last_key is not None and first < last_key):
+                    # Fora de ordem em relação ao bloco anterior: nova sequência
+                    if writer is not None:
+                        writer.close()
+                    runs.append(target.with_suffix(f".run{len(runs)}.tmp"))
+                    writer = _RowGroupWriter(runs[-1], schema)
+                writer.write(chunk)
+                last_key = _key(chunk, -1)
+                rows += len(chunk)
+            if writer is not None:
+                writer.close()
+
+            if len(runs) == 1:
+                runs[0].replace(tmp)
+            else:
+                _merge_runs(runs, tmp, schema)
+            tmp.replace(target)
+        finally:
+            for run in runs:
+                run.unlink(missing_ok=True)
+            tmp.unlink(missing_ok=True)
+        log.info("cvm_quota_store.mes_ingerido", ym=ym, registros=rows, sequencias=len(runs))
+        return target
+
+    def read(
+        self,
+        cnpjs: Iterable[str],
+        months: Optional[Iterable[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Lê as cotas dos CNPJs informados, usando predicate pushdown.
+
+        Args:
+            cnpjs: CNPJs desejados (formato da CVM, ex: "00.000.000/0001-00").
+            months: Meses AAAAMM a considerar. Default: todos os ingeridos.
+
+        Returns:
+            DataFrame com colunas CNPJ_FUNDO, DT_COMPTC e VL_QUOTA, ordenado
+            por CNPJ_FUNDO e DT_COMPTC.
+        """
+        if months is None:
+            files = sorted(self.root.glob("inf_diario_fi_*.parquet"))
+        else:
+            files = [p for p in (self.month_path(ym) for ym in months) if p.exists()]
+        if not files:
+            return SCHEMA.empty_table().to_pandas()
+
+        dataset = ds.dataset([str(p) for p in files], schema=SCHEMA, format="parquet")
+        table = dataset.to_table(filter=ds.field("CNPJ_FUNDO").isin(list(cnpjs)))
+        return (
+            table.to_pandas()
+            .sort_values(["CNPJ_FUNDO", "DT_COMPTC"], kind="stable")
+            .reset_index(drop=True)
+        )
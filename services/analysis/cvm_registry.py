@@ -0,0 +1,352 @@
+"""
+Cadastro de fundos da CVM (cad_fi.csv) indexado para busca rápida
+=================================================================
+O cad_fi.csv (~60 mil fundos) é baixado pelo cvm_cache (revalidado por ETag),
+lido uma única vez e persistido como snapshot tipado junto com os índices.
+Execuções seguintes só reconstroem algo se o arquivo da CVM mudar.
+
+Índices:
+ - Colunas normalizadas (maiúsculas, sem acento) de nome, gestor e administrador.
+ - Índice de tokens (palavra → linhas) e lista ordenada de tokens para busca
+   por prefixo de palavra.
+ - Índices de igualdade para CNPJ do gestor, situação (SIT) e classe.
+
+Semântica de busca por termo: o termo deve começar no início de uma palavra
+(palavras separadas por espaço). "BB DTVM" encontra "BB DTVM S.A."; " LP"
+equivale a "LP" no início de uma palavra, como nos filtros originais.
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import pickle
+import tempfile
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import structlog
+
+from cvm_cache import CvmArchiveCache, default_cache_dir
+from cvm_inf_diario import CVM_BASE_URL
+
+log = structlog.get_logger(__name__)
+
+CAD_FI_PATH = "/FI/CAD/DADOS/cad_fi.csv"
+
+_SNAPSHOT_VERSION = 1
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+def cad_fi_url(base_url: Optional[str] = None) -> str:
+    """URL do cadastro de fundos da CVM."""
+    return (base_url or CVM_BASE_URL).rstrip("/") + CAD_FI_PATH
+
+
+def normalize_text(value: str) -> str:
+    """Maiúsculas, sem acentos e com espaços simples: "Ações  Ltda" → "ACOES LTDA"."""
+    ascii_text = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode("ascii")
+    return " ".join(ascii_text.upper().split())
+
+
+def _normalize_column(series: pd.Series) -> pd.Series:
+    return (
+        series.fillna("")
+        .str.normalize("NFKD")
+        .str.encode("ascii", "ignore")
+        .str.decode("ascii")
+        .str.upper()
+        .str.split()
+        .str.join(" ")
+    )
+
+
+def _find_column(columns: Iterable[str], must: str, exclude: str = "") -> Optional[str]:
+    for col in columns:
+        upper = col.upper()
+        if must in upper and (not exclude or exclude not in upper):
+            return col
+    return None
+
+
+class _TokenIndex:
+    """Índice invertido palavra → posições, com busca por prefixo de palavra."""
+
+    def __init__(self, normalized: Sequence[str]) -> None:
+        postings: Dict[str, List[int]] = {}
+        for pos, text in enumerate(normalized):
+            for token in set(text.split()):
+                postings.setdefault(token, []).append(pos)
+        self.postings = {t: np.asarray(p, dtype=np.int32) for t, p in postings.items()}
+        self.tokens = sorted(self.postings)
+
+    def exact(self, token: str) -> np.ndarray:
+        return self.postings.get(token, _EMPTY)
+
+    def prefix(self, prefix: str) -> np.ndarray:
+        lo = bisect.bisect_left(self.tokens, prefix)
+        hi = bisect.bisect_left(self.tokens, prefix + "\uffff")
+        if hi - lo == 1:
+            return self.postings[self.tokens[lo]]
+        if hi == lo:
+            return _EMPTY
+        return np.unique(np.concatenate([self.postings[t] for t in self.tokens[lo:hi]]))
+
+
+def _equality_index(series: pd.Series) -> Dict[str, np.ndarray]:
+    codes, uniques = pd.factorize(series.fillna("").str.strip())
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return {
+        str(value): order[bounds[i] : bounds[i + 1]].astype(np.int32)
+        for i, value in enumerate(uniques)
+    }
+
+
+class FundRegistry:
+    """
+    Cadastro de fundos da CVM com índices para busca por nome, gestor,
+    administrador, situação e classe.
+
+    Use FundRegistry.load() para obter a instância (carregada uma vez por
+    processo); o construtor recebe o DataFrame cru do cad_fi.csv.
+
+    Args:
+        df: Conteúdo do cad_fi.csv (todas as colunas como str).
+    """
+
+    _loaded: Dict[str, "FundRegistry"] = {}
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df.reset_index(drop=True)
+        cols = list(self.df.columns)
+        self.manager_col = _find_column(cols, "GESTOR", exclude="CNPJ")
+        self.manager_cnpj_col = _find_column(cols, "CNPJ_GESTOR")
+        self.admin_col = _find_column(cols, "ADMIN", exclude="CNPJ")
+        self.class_col = "CLASSE" if "CLASSE" in cols else None
+
+        self._text: Dict[str, np.ndarray] = {}
+        self._tokens: Dict[str, _TokenIndex] = {}
+        for field, col in (
+            ("name", "DENOM_SOCIAL"),
+            ("manager", self.manager_col),
+            ("administrator", self.admin_col),
+        ):
+            if col is None:
+                continue
+            normalized = _normalize_column(self.df[col])
+            self._text[field] = np.asarray(" " + normalized, dtype=object)
+            self._tokens[field] = _TokenIndex(normalized.tolist())
+
+        # Resultados de contains() por (campo, termo): consultas repetidas são O(1)
+        self._memo: Dict[Tuple[str, str], np.ndarray] = {}
+
+        self._equal: Dict[str, Dict[str, np.ndarray]] = {}
+        if self.manager_cnpj_col is not None:
+            self._equal["manager_cnpj"] = _equality_index(self.df[self.manager_cnpj_col])
+        self._equal["status"] = _equality_index(_normalize_column(self.df["SIT"]))
+        if self.class_col is not None:
+            self._equal["fund_class"] = _equality_index(_normalize_column(self.df[self.class_col]))
+
+    # ------------------------------------------------------------------
+    # Carga e snapshot
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def load(
+        cls,
+        cache: Optional[CvmArchiveCache] = None,
+        snapshot_dir: Optional[Union[str, Path]] = None,
+        base_url: Optional[str] = None,
+    ) -> "FundRegistry":
+        """
+        Carrega o cadastro: memória do processo → snapshot em disco → CSV.
+
+        O cad_fi.csv é revalidado no servidor da CVM (ETag); se não mudou, o
+        snapshot já indexado é reutilizado sem reler o CSV.
+
+        Args:
+            cache: Cache de arquivos CVM. Default: CvmArchiveCache().
+            snapshot_dir: Onde gravar o snapshot. Default: <CVM_CACHE_DIR>/registry.
+            base_url: Raiz do portal de dados. Default: CVM_BASE_URL.
+
+        Returns:
+            FundRegistry pronto para consulta.
+        """
+        cache = cache or CvmArchiveCache()
+        url = cad_fi_url(base_url)
+        archive = cache.fetch(url)
+        sha256 = (cache.entry(url) or {}).get("sha256") or archive.name
+
+        memo = cls._loaded.get(sha256)
+        if memo is not None:
+            return memo
+
+        snapshot = Path(snapshot_dir or default_cache_dir() / "registry") / f"cad_fi_{sha256}.pkl"
+        registry = cls._read_snapshot(snapshot)
+        if registry is None:
+            df = pd.read_csv(archive, sep=";", encoding="latin-1", dtype=str)
+            registry = cls(df)
+            registry._write_snapshot(snapshot)
+            log.info("fund_registry.indexado", fundos=len(df), snapshot=str(snapshot))
+        else:
+            log.info("fund_registry.snapshot_carregado", fundos=len(registry.df))
+
+        cls._loaded[sha256] = registry
+        return registry
+
+    @staticmethod
+    def _read_snapshot(path: Path) -> Optional["FundRegistry"]:
+        if not path.exists():
+            return None
+        try:
+            with path.open("rb") as f:
+                payload = pickle.load(f)
+            if payload.get("version") != _SNAPSHOT_VERSION:
+                return None
+            return payload["registry"]
+        except Exception as e:
+            log.warning("fund_registry.snapshot_invalido", path=str(path), erro=str(e))
+            return None
+
+    def _write_snapshot(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for old in path.parent.glob("cad_fi_*.pkl"):
+            old.unlink(missing_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".registry-")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(
+                {"version": _SNAPSHOT_VERSION, "registry": self},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp, path)
+
+    # ------------------------------------------------------------------
+    # Consultas (retornam posições no DataFrame)
+    # ------------------------------------------------------------------
+
+    def contains(self, field: str, term: str) -> np.ndarray:
+        """
+        Posições cujo campo contém o termo a partir do início de uma palavra.
+
+        Args:
+            field: "name", "manager" ou "administrator".
+            term: Texto buscado (acentos e caixa são ignorados).
+
+        Returns:
+            Posições ordenadas (np.int32).
+        """
+        index = self._tokens.get(field)
+        norm = normalize_text(term)
+        if index is None or not norm:
+            return _EMPTY
+        memo = self._memo.get((field, norm))
+        if memo is not None:
+            return memo
+        tokens = norm.split()
+        candidates = index.prefix(tokens[0])
+        for token in tokens[1:-1]:
+            candidates = np.intersect1d(candidates, index.exact(token), assume_unique=True)
+        if len(tokens) > 1:
+            candidates = np.intersect1d(candidates, index.prefix(tokens[-1]), assume_unique=True)
+        if len(tokens) > 1:
+            # Confirma a frase (ordem e adjacência) só nos candidatos
+            needle = " " + norm
+            text = self._text[field]
+            keep = [pos for pos in candidates if needle in text[pos]]
+            candidates = np.asarray(keep, dtype=np.int32)
+        self._memo[(field, norm)] = candidates
+        return candidates
+
+    def contains_any(self, field: str, terms: Iterable[str]) -> np.ndarray:
+        """União de contains() para vários termos (equivalente a "A|B|C")."""
+        parts = [self.contains(field, t) for t in terms]
+        return np.unique(np.concatenate(parts)) if parts else _EMPTY
+
+    def starts_with_any(self, field: str, prefixes: Iterable[str]) -> np.ndarray:
+        """Posições cujo campo começa com algum dos prefixos ("^A|^B")."""
+        text = self._text.get(field)
+        if text is None:
+            return _EMPTY
+        found = []
+        for prefix in prefixes:
+            needle = " " + normalize_text(prefix)
+            candidates = self.contains(field, prefix)
+            found.extend(pos for pos in candidates if text[pos].startswith(needle))
+        return np.unique(np.asarray(found, dtype=np.int32))
+
+    def equals(self, key: str, value: str) -> np.ndarray:
+        """Posições com igualdade exata em manager_cnpj, status ou fund_class."""
+        if key != "manager_cnpj":
+            value = normalize_text(value)
+        return self._equal.get(key, {}).get(value.strip(), _EMPTY)
+
+    def status_contains(self, term: str) -> np.ndarray:
+        """Posições cuja situação (SIT) contém o termo (ex: "FUNCIONAMENTO")."""
+        norm = normalize_text(term)
+        parts = [pos for sit, pos in self._equal["status"].items() if norm in sit]
+        return np.unique(np.concatenate(parts)) if parts else _EMPTY
+
+    def rows(self, positions: np.ndarray) -> pd.DataFrame:
+        """Linhas do cadastro nas posições informadas."""
+        return self.df.iloc[positions]
+
+    def query(
+        self,
+        name_all: Iterable[str] = (),
+        name_any: Iterable[str] = (),
+        name_prefix_any: Iterable[str] = (),
+        manager_cnpj: Optional[str] = None,
+        manager_any: Iterable[str] = (),
+        administrator_any: Iterable[str] = (),
+        status_contains: Optional[str] = None,
+        fund_class: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Combina filtros (E lógico entre eles) e devolve as linhas do cadastro.
+
+        Args:
+            name_all: Termos que devem todos aparecer no nome.
+            name_any: Pelo menos um destes termos no nome.
+            name_prefix_any: Nome começa com algum destes prefixos.
+            manager_cnpj: CNPJ exato do gestor.
+            manager_any: Pelo menos um termo no nome do gestor.
+            administrator_any: Pelo menos um termo no nome do administrador.
+            status_contains: Trecho da situação (ex: "FUNCIONAMENTO").
+            fund_class: Classe exata (ex: "Renda Fixa").
+
+        Returns:
+            DataFrame com as colunas originais do cad_fi.csv, na ordem do cadastro.
+        """
+        filters: List[np.ndarray] = [self.contains("name", t) for t in name_all]
+        for field, terms in (("name", name_any), ("manager", manager_any)):
+            terms = list(terms)
+            if terms:
+                filters.append(self.contains_any(field, terms))
+        administrator_any = list(administrator_any)
+        if administrator_any:
+            filters.append(self.contains_any("administrator", administrator_any))
+        name_prefix_any = list(name_prefix_any)
+        if name_prefix_any:
+            filters.append(self.starts_with_any("name", name_prefix_any))
+        if manager_cnpj is not None:
+            filters.append(self.equals("manager_cnpj", manager_cnpj))
+        if status_contains is not None:
+            filters.append(self.status_contains(status_contains))
+        if fund_class is not None:
+            filters.append(self.equals("fund_class", fund_class))
+
+        if not filters:
+            return self.df
+        # Interseção começando pelo filtro mais seletivo
+        filters.sort(key=len)
+        positions = filters[0]
+        for other in filters[1:]:
+            if len(positions) == 0:
+                break
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return self.rows(positions)
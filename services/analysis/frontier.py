@@ -0,0 +1,398 @@
+"""
+Fronteira eficiente de Markowitz e carteira de Sharpe máximo
+=============================================================
+Resolve min ½·wᵀΣw − λ·μᵀw sujeito a Σw = 1 (orçamento) para todo λ ≥ 0 —
+a fronteira inteira — em vez de um QP independente por retorno-alvo:
+
+ - sem restrição de sinal (long_only=False): forma fechada. Com o Cholesky
+   de Σ, w(λ) = a + λ·b, onde a = Σ⁻¹1/(1ᵀΣ⁻¹1) é a variância mínima;
+ - long-only (w ≥ 0): conjunto ativo paramétrico (critical line). Entre dois
+   pontos de virada a solução continua linear em λ sobre os ativos livres F;
+   cada segmento parte do conjunto ativo do anterior (um ativo entra ou sai)
+   e o Cholesky de Σ[F, F] é atualizado em O(k²) em vez de refatorado.
+
+Os N retornos-alvo da varredura caem cada um em um segmento e saem em forma
+fechada; o Sharpe máximo é o máximo analítico de (μᵀw − rf)/σ(w) em cada
+segmento. Covariância amostral ou Ledoit-Wolf (encolhimento para identidade
+escalada), útil quando há muitos ativos para o histórico disponível.
+
+Configuração (variáveis de ambiente):
+    FRONTIER_POINTS: Pontos (retornos-alvo) da fronteira. Default: 200.
+    FRONTIER_COVARIANCE: "sample" ou "ledoit_wolf". Default: sample.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import structlog
+from scipy.linalg import LinAlgError, cho_factor, cho_solve, solve_triangular
+
+from indicators import TRADING_DAYS_PER_YEAR, align_series
+from monte_carlo import portfolio_returns
+
+log = structlog.get_logger(__name__)
+
+FRONTIER_POINTS = int(os.getenv("FRONTIER_POINTS", "200"))
+FRONTIER_COVARIANCE = os.getenv("FRONTIER_COVARIANCE", "sample")
+
+COVARIANCE_METHODS = ("sample", "ledoit_wolf")
+
+# Tolerância relativa para pesos nulos e multiplicadores nos pontos de virada
+_TOL = 1e-12
+
+
+# ---------------------------------------------------------------------------
+# Covariância
+# ---------------------------------------------------------------------------
+
+
+def ledoit_wolf(returns: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Covariância de Ledoit-Wolf: (1 − δ)·S + δ·(tr(S)/p)·I.
+
+    S é a covariância amostral com divisor n; δ é a intensidade ótima de
+    Ledoit & Wolf (2004), a mesma de sklearn.covariance.LedoitWolf.
+
+    Args:
+        returns: Array (observações × ativos).
+
+    Returns:
+        (covariância encolhida, δ em [0, 1]).
+    """
+    x = returns - returns.mean(axis=0)
+    n, p = x.shape
+    cov = x.T @ x / n
+    mu = np.trace(cov) / p
+    x2 = x * x
+    phi = (x2.T @ x2).sum() / n - (cov * cov).sum()  # soma das variâncias de S
+    gamma = ((cov - mu * np.eye(p)) ** 2).sum()
+    shrinkage = 0.0 if gamma == 0 else min(phi / n, gamma) / gamma
+    return (1 - shrinkage) * cov + shrinkage * mu * np.eye(p), float(shrinkage)
+
+
+def covariance_matrix(returns: np.ndarray, method: str = "sample") -> Tuple[np.ndarray, float]:
+    """
+    Covariância dos retornos (observações × ativos).
+
+    Returns:
+        (covariância, δ de encolhimento — 0 para a amostral).
+
+    Raises:
+        ValueError: Método desconhecido.
+    """
+    if method == "sample":
+        return np.atleast_2d(np.cov(returns, rowvar=False)), 0.0
+    if method == "ledoit_wolf":
+        return ledoit_wolf(returns)
+    raise ValueError(f"frontier: covariância desconhecida {method!r} (use {COVARIANCE_METHODS})")
+
+
+# ---------------------------------------------------------------------------
+# Cholesky de Σ[F, F] mantido ao longo da varredura
+# ---------------------------------------------------------------------------
+
+
+class _FreeSetCholesky:
+    """Fator L (L·Lᵀ = Σ[F, F]) do conjunto livre F, atualizado a cada entrada/saída."""
+
+    def __init__(self, cov: np.ndarray) -> None:
+        self.cov = cov
+        self.free: List[int] = []
+        self.factor = np.zeros((0, 0))
+
+    def add(self, j: int) -> None:
+        """Acrescenta o ativo j a F: uma linha nova de L (solve triangular, O(k²))."""
+        k = len(self.free)
+        row = solve_triangular(self.factor, self.cov[self.free, j], lower=True) if k else []
+        pivot = self.cov[j, j] - np.dot(row, row)
+        if pivot <= _TOL * self.cov[j, j]:
+            raise LinAlgError(f"frontier: covariância singular ao incluir o ativo {j}")
+        grown = np.zeros((k + 1, k + 1))
+        grown[:k, :k] = self.factor
+        grown[k, :k] = row
+        grown[k, k] = np.sqrt(pivot)
+        self.factor = grown
+        self.free.append(j)
+
+    def remove(self, j: int) -> None:
+        """Retira o ativo j de F: apaga a linha e corrige o bloco final por rank-1 (O(k²))."""
+        i = self.free.index(j)
+        tail = self.factor[i + 1 :, i].copy()
+        factor = np.delete(np.delete(self.factor, i, axis=0), i, axis=1)
+        block = factor[i:, i:]  # L33·L33ᵀ + l32·l32ᵀ = bloco de Σ sem o ativo j
+        for k in range(len(tail)):
+            r = np.hypot(block[k, k], tail[k])
+            c, s = r / block[k, k], tail[k] / block[k, k]
+            block[k, k] = r
+            block[k + 1 :, k] = (block[k + 1 :, k] + s * tail[k + 1 :]) / c
+            tail[k + 1 :] = c * tail[k + 1 :] - s * block[k + 1 :, k]
+        self.factor = factor
+        self.free.pop(i)
+
+    def solve(self, rhs: np.ndarray) -> np.ndarray:
+        return cho_solve((self.factor, True), rhs)
+
+
+# ---------------------------------------------------------------------------
+# Segmentos w(λ) = a + λ·b da fronteira
+# ---------------------------------------------------------------------------
+
+
+def _segment(solve, free: np.ndarray, mu: np.ndarray, cov: np.ndarray) -> Dict[str, Any]:
+    """
+    Segmento com os livres F: w_F = a + λ·b e γ(λ) = g0 + g1·λ (multiplicador do orçamento).
+
+    Guarda também Σa e Σb (todos os ativos), reaproveitados nos multiplicadores
+    dos ativos em zero e nos coeficientes de σ²(λ) = r + s·λ + u·λ² e
+    μᵀw = ta + tb·λ.
+    """
+    uv = solve(np.column_stack([np.ones(len(free)), mu[free]]))
+    su, sv = uv.sum(axis=0)
+    a, b = uv[:, 0] / su, uv[:, 1] - (sv / su) * uv[:, 0]
+    sa, sb = cov[:, free] @ a, cov[:, free] @ b
+    return {
+        "free": free,
+        "a": a,
+        "b": b,
+        "g0": 1 / su,
+        "g1": -sv / su,
+        "sa": sa,
+        "sb": sb,
+        "ta": mu[free] @ a,
+        "tb": mu[free] @ b,
+        "r": a @ sa[free],
+        "s": 2 * (a @ sb[free]),
+        "u": b @ sb[free],
+    }
+
+
+def _long_only_segments(mu: np.ndarray, cov: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    Segmentos da fronteira long-only, de λ = ∞ (ativo de maior retorno) a λ = 0.
+
+    Em cada segmento os livres F têm w_F = a + λ·b; os demais ficam em zero com
+    multiplicador η_j(λ) = c_j + d_j·λ ≥ 0. O próximo ponto de virada é o maior
+    λ abaixo do atual em que um w_F zera (sai) ou um η_j zera (entra).
+    """
+    n = len(mu)
+    chol = _FreeSetCholesky(cov)
+    chol.add(int(np.argmax(mu)))
+    lam, last = np.inf, -1
+    segments: List[Dict[str, Any]] = []
+    scale = np.abs(cov).max()
+    for _ in range(4 * n + 4):
+        free = np.array(chol.free)
+        seg = _segment(chol.solve, free, mu, cov)
+        is_free = np.zeros(n, dtype=bool)
+        is_free[free] = True
+
+        # λ em que cada evento acontece (−∞ se não acontece abaixo do λ atual)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            at = np.full(n, -np.inf)
+            b = seg["b"]
+            at[free] = np.where(b > _TOL, -seg["a"] / b, -np.inf)
+            c = seg["sa"] - seg["g0"]
+            d = seg["sb"] - seg["g1"] - mu
+            enter = ~is_free & (d > _TOL * scale)
+            at[enter] = -c[enter] / d[enter]
+        if last >= 0:
+            at[last] = -np.inf  # não desfaz a troca que acabou de acontecer
+        at[at > lam] = -np.inf
+        j = int(np.argmax(at))
+        lam_next = max(at[j], 0.0)
+        seg.update(lam_lo=lam_next, lam_hi=lam)
+        segments.append(seg)
+        if lam_next <= 0:
+            return segments
+        if is_free[j]:
+            chol.remove(j)
+        else:
+            chol.add(j)
+        lam, last = lam_next, j
+    raise RuntimeError("frontier: conjunto ativo não convergiu")
+
+
+def _unconstrained_segments(mu: np.ndarray, cov: np.ndarray) -> List[Dict[str, Any]]:
+    """Um único segmento (todos os ativos livres, λ ∈ [0, ∞)) — forma fechada."""
+    factor = cho_factor(cov, lower=True)
+    seg = _segment(lambda rhs: cho_solve(factor, rhs), np.arange(len(mu)), mu, cov)
+    seg.update(lam_lo=0.0, lam_hi=np.inf)
+    return [seg]
+
+
+def _segment_sharpe(seg: Dict[str, Any], lam: float, rf: float) -> float:
+    """Sharpe diário da carteira do segmento em λ (λ = inf: limite, tb/√u)."""
+    if np.isinf(lam):
+        # Segmento sem teto: inf·0 e inf − inf dariam NaN; o limite é finito (u > 0)
+        return seg["tb"] / np.sqrt(seg["u"])
+    var = seg["r"] + seg["s"] * lam + seg["u"] * lam * lam
+    return (seg["ta"] + seg["tb"] * lam - rf) / np.sqrt(max(var, 1e-300))
+
+
+def _max_sharpe_lambda(seg: Dict[str, Any], rf: float) -> float:
+    """
+    λ do segmento com maior (μᵀw − rf)/σ(w): raiz da derivada ou uma das pontas.
+
+    Devolve inf quando o Sharpe só cresce com λ sem atingir o máximo (sem
+    restrição de sinal e rf acima do retorno da variância mínima).
+    """
+    p, q = seg["ta"] - rf, seg["tb"]
+    r, s, u = seg["r"], seg["s"], seg["u"]
+    candidates = [seg["lam_lo"]] + ([seg["lam_hi"]] if np.isfinite(seg["lam_hi"]) else [])
+    denom = q * s / 2 - p * u
+    if denom != 0:
+        root = (p * s / 2 - q * r) / denom
+        if seg["lam_lo"] <= root <= seg["lam_hi"]:
+            candidates.append(root)
+    best = max(candidates, key=lambda lam: _segment_sharpe(seg, lam, rf))
+    if np.isinf(seg["lam_hi"]) and u > 0 and q / np.sqrt(u) > _segment_sharpe(seg, best, rf):
+        return np.inf
+    return best
+
+
+def _weights(seg: Dict[str, Any], lams: np.ndarray, n: int) -> np.ndarray:
+    """Pesos completos (len(lams) × n) do segmento nos λ dados."""
+    out = np.zeros((len(lams), n))
+    out[:, seg["free"]] = seg["a"] + np.outer(lams, seg["b"])
+    return out
+
+
+# ---------------------------------------------------------------------------
+# API
+# ---------------------------------------------------------------------------
+
+
+def efficient_frontier(
+    returns: pd.DataFrame,
+    n_points: Optional[int] = None,
+    long_only: bool = True,
+    covariance: Optional[str] = None,
+    risk_free: Union[pd.Series, float, None] = None,
+    periods_per_year: int = TRADING_DAYS_PER_YEAR,
+) -> Dict[str, Any]:
+    """
+    Fronteira eficiente, carteira de variância mínima e de Sharpe máximo.
+
+    Args:
+        returns: Retornos simples diários, datas × ativos. Datas com algum NaN
+            são descartadas.
+        n_points: Retornos-alvo, igualmente espaçados entre a variância mínima
+            e o maior retorno esperado. Default: FRONTIER_POINTS.
+        long_only: Pesos ≥ 0 (True) ou livres, só com Σw = 1 (False).
+        covariance: "sample" ou "ledoit_wolf". Default: FRONTIER_COVARIANCE.
+        risk_free: Retorno diário livre de risco (média no período se Series,
+            ex: indicators.risk_free_returns()). Default: 0.
+        periods_per_year: Períodos por ano para anualizar. Default: 252.
+
+    Returns:
+        Dict com:
+            frontier: DataFrame (um ponto por linha) com expected_return,
+                volatility e sharpe anualizados e o peso de cada ativo;
+            min_variance / max_sharpe: Series com as mesmas colunas (max_sharpe
+                é NaN se o Sharpe não tem máximo — pesos livres e rf acima do
+                retorno da variância mínima);
+            shrinkage: δ de Ledoit-Wolf (0 para a amostral);
+            segments: pontos de virada (trocas de conjunto ativo) + 1.
+
+    Raises:
+        ValueError: Menos de 2 ativos/3 datas ou covariância desconhecida.
+        LinAlgError: Covariância singular (use covariance="ledoit_wolf").
+    """
+    n_points = FRONTIER_POINTS if n_points is None else n_points
+    method = FRONTIER_COVARIANCE if covariance is None else covariance
+    clean = returns.dropna()
+    if clean.shape[1] < 2 or len(clean) < 3:
+        raise ValueError("frontier: são necessários ao menos 2 ativos e 3 datas completas")
+    x = clean.to_numpy(dtype=np.float64)
+    mu = x.mean(axis=0)
+    cov, shrinkage = covariance_matrix(x, method)
+    rf = float(np.nanmean(align_series(risk_free, clean.index, fill=True)))
+
+    segments = (_long_only_segments if long_only else _unconstrained_segments)(mu, cov)
+
+    # Retorno esperado ao longo de λ é linear por segmento: t = ta + λ·tb
+    t_min = segments[-1]["ta"] + segments[-1]["lam_lo"] * segments[-1]["tb"]
+    targets = np.linspace(t_min, mu.max(), n_points)
+    # O início (λ_lo) de cada segmento decresce ao longo da varredura: o dono de
+    # cada alvo é o primeiro segmento que começa abaixo dele
+    starts = np.array([seg["ta"] + seg["lam_lo"] * seg["tb"] for seg in segments])
+    slack = _TOL * np.abs(targets).max()
+    owner = np.minimum(np.searchsorted(-starts, -(targets + slack)), len(segments) - 1)
+
+    weights = np.zeros((n_points, len(mu)))
+    for k in np.unique(owner):
+        seg, rows = segments[k], owner == k
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lams = np.where(seg["tb"] > 0, (targets[rows] - seg["ta"]) / seg["tb"], seg["lam_lo"])
+        weights[rows] = _weights(seg, np.clip(lams, seg["lam_lo"], seg["lam_hi"]), len(mu))
+    if long_only:
+        np.clip(weights, 0.0, None, out=weights)
+
+    lam_best = [_max_sharpe_lambda(seg, rf) for seg in segments]
+    k = int(np.argmax([_segment_sharpe(seg, lam, rf) for seg, lam in zip(segments, lam_best)]))
+    special = np.vstack(
+        [
+            _weights(segments[-1], np.array([0.0]), len(mu)),
+            _weights(segments[k], np.array([lam_best[k]]), len(mu)),
+        ]
+    )
+    if np.isinf(lam_best[k]):
+        special[1] = np.nan
+        log.warning("frontier.sharpe_sem_maximo", risk_free=rf, retorno_variancia_minima=t_min)
+
+    columns = list(clean.columns)
+    frontier = _frame(weights, mu, cov, rf, periods_per_year, columns)
+    extremes = _frame(special, mu, cov, rf, periods_per_year, columns)
+    log.info(
+        "frontier.ok",
+        ativos=len(mu),
+        pontos=n_points,
+        long_only=long_only,
+        covariancia=method,
+        encolhimento=round(shrinkage, 4),
+        segmentos=len(segments),
+        sharpe_max=round(float(extremes["sharpe"].iloc[1]), 4),
+    )
+    return {
+        "frontier": frontier,
+        "min_variance": extremes.iloc[0].rename("min_variance"),
+        "max_sharpe": extremes.iloc[1].rename("max_sharpe"),
+        "shrinkage": shrinkage,
+        "segments": len(segments),
+    }
+
+
+def portfolio_frontier(assets: Dict[str, Dict[str, Any]], **kwargs: Any) -> Dict[str, Any]:
+    """
+    Fronteira eficiente dos ativos de fetch_portfolio_assets().
+
+    Usa os retornos simples diários nas datas comuns a todos os ativos;
+    kwargs vão para efficient_frontier().
+    """
+    log_returns, _ = portfolio_returns(assets)
+    return efficient_frontier(np.expm1(log_returns), **kwargs)
+
+
+def _frame(
+    weights: np.ndarray,
+    mu: np.ndarray,
+    cov: np.ndarray,
+    rf: float,
+    periods_per_year: int,
+    columns: List[str],
+) -> pd.DataFrame:
+    """Retorno, volatilidade e Sharpe anualizados + pesos, uma linha por carteira."""
+    daily_return = weights @ mu
+    volatility = np.sqrt(np.clip(((weights @ cov) * weights).sum(axis=1), 0, None))
+    stats = pd.DataFrame(
+        {
+            "expected_return": daily_return * periods_per_year,
+            "volatility": volatility * np.sqrt(periods_per_year),
+            "sharpe": (daily_return - rf) / volatility * np.sqrt(periods_per_year),
+        }
+    )
+    return pd.concat([stats, pd.DataFrame(weights, columns=columns)], axis=1)
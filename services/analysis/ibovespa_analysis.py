@@ -3,7 +3,7 @@ Sessão 01 — IBOVESPA + Comparação com Carteira Atual
 ======================================================
 Módulo exploratório que:
  1. Busca histórico real do IBOVESPA (^BVSP) via yfinance
- 2. Projeta IBOVESPA para 2 anos via ARIMA (pmdarima auto_arima)
+ 2. Projeta IBOVESPA para 2 anos via ARIMA (ordem por AIC em grade, em paralelo)
  3. Busca dados reais dos 3 ativos da carteira (CVM, Tesouro, BCB)
  4. Normaliza todas as séries em base 100 para comparação
  5. Gera gráfico comparativo com matplotlib
@@ -18,11 +18,15 @@ Regras absolutas (CLAUDE.md):
 
 from __future__ import annotations
 
-import io
-import zipfile
+import functools
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import date, timedelta
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import matplotlib
 
@@ -31,10 +35,29 @@ import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import requests
 import structlog
 import yfinance as yf
 
+# Raiz do repositório no path (common/): o módulo é importado e executado a
+# partir de services/analysis, sem pacote instalado
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+from common.utils import get_http_client, http_get
+
+from arima_cache import ArimaModelCache
+from arima_search import ARIMA_SEARCH_WORKERS, grid_search, order_grid, select_d
+from backtest import backtest_rebalancing
+from bcb_store import BcbSeriesStore
+from cvm_cache import CvmArchiveCache
+from cvm_inf_diario import fetch_fund_quotas
+from cvm_registry import FundRegistry
+from indicators import align_series, risk_free_returns, risk_return_indicators, simple_returns
+from monte_carlo import portfolio_prices
+from pipeline_cache import StageCache, code_version, fingerprint
+from price_store import PriceHistoryStore, load_history, load_panel
+from singleflight import SingleFlight
+from source_chain import Source, SourceChain, raise_if_cancelled
+
 # ---------------------------------------------------------------------------
 # Logger
 # ---------------------------------------------------------------------------
@@ -46,18 +69,55 @@ log = structlog.get_logger(__name__)
 # ---------------------------------------------------------------------------
 
 
-def fetch_ibovespa_history(years: int = 5) -> pd.DataFrame:
+# Histórico de preços persistido: só os pregões novos são pedidos ao yfinance
+_PRICE_STORE = PriceHistoryStore()
+
+
+def _close_frame(raw: pd.DataFrame) -> pd.DataFrame:
+    """Normaliza o retorno de Ticker.history (índice de datas) em colunas Date/Close."""
+    if raw.empty:
+        return pd.DataFrame({"Date": pd.Series(dtype="datetime64[ns]"), "Close": []})
+
+    # Normalizar índice → coluna Date
+    df = raw[["Close"]].copy()
+    df.index = pd.to_datetime(df.index)
+    df.index = df.index.tz_localize(None) if df.index.tz is not None else df.index
+    df = df.reset_index().rename(columns={"index": "Date", "Datetime": "Date"})
+    if "Date" not in df.columns and df.columns[0] != "Date":
+        first_col = str(df.columns[0])
+        df = df.rename(columns={first_col: "Date"})
+
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df.sort_values("Date").reset_index(drop=True)
+
+
+def fetch_ibovespa_history(
+    years: int = 5,
+    ticker_factory: Optional[Callable[[str], Any]] = None,
+    store: Optional[PriceHistoryStore] = None,
+) -> pd.DataFrame:
     """
     Busca histórico do IBOVESPA (^BVSP) via yfinance.
 
+    O histórico fica em cache local (price_store.PriceHistoryStore): no mesmo
+    dia não há nova consulta ao yfinance e, nos dias seguintes, só os pregões
+    posteriores ao último armazenado são baixados — o Daily_Return é
+    recalculado apenas na emenda.
+
     Args:
         years: Quantidade de anos de histórico desejado (padrão: 5).
+        ticker_factory: Construtor do ticker (padrão: yf.Ticker). Permite
+            substituir a fonte em testes.
+        store: Cache de preços. Default: base local compartilhada.
 
     Returns:
-        DataFrame com colunas: Date, Close, Daily_Return
+        DataFrame com colunas: Date, Close, Daily_Return. df.attrs traz a
+        atualidade do cache: source ("cache" | "delta" | "full"), stale,
+        last_bar e fetched_at.
     """
     end_date = date.today()
     start_date = end_date - timedelta(days=years * 365)
+    factory = ticker_factory or yf.Ticker
 
     log.info(
         "fetch_ibovespa_history.start",
@@ -66,28 +126,27 @@ def fetch_ibovespa_history(years: int = 5) -> pd.DataFrame:
         end=str(end_date),
     )
 
-    ticker = yf.Ticker("^BVSP")
-    raw: pd.DataFrame = ticker.history(
-        start=start_date.strftime("%Y-%m-%d"),
-        end=end_date.strftime("%Y-%m-%d"),
-        auto_adjust=True,
-    )
+    def _download(fetch_from: date, fetch_to: date) -> pd.DataFrame:
+        ticker = factory("^BVSP")
+        raw: pd.DataFrame = ticker.history(
+            start=fetch_from.strftime("%Y-%m-%d"),
+            end=fetch_to.strftime("%Y-%m-%d"),
+            auto_adjust=True,
+        )
+        return _close_frame(raw)
 
-    if raw.empty:
-        raise RuntimeError("yfinance retornou DataFrame vazio para ^BVSP")
+    df = load_history(store or _PRICE_STORE, "^BVSP", start_date, end_date, _download)
 
-    # Normalizar índice → coluna Date
-    df = raw[["Close"]].copy()
-    df.index = pd.to_datetime(df.index)
-    df.index = df.index.tz_localize(None) if df.index.tz is not None else df.index
-    df = df.reset_index().rename(columns={"index": "Date", "Datetime": "Date"})
-    if "Date" not in df.columns and df.columns[0] != "Date":
-        first_col = str(df.columns[0])
-        df = df.rename(columns={first_col: "Date"})
+    if df.empty:
+        raise RuntimeError("yfinance retornou DataFrame vazio para ^BVSP")
 
-    df["Date"] = pd.to_datetime(df["Date"])
-    df = df.sort_values("Date").reset_index(drop=True)
-    df["Daily_Return"] = df["Close"].pct_change()
+    log.info(
+        "fetch_ibovespa_history.cache",
+        fonte=df.attrs["source"],
+        desatualizado=df.attrs["stale"],
+        ultimo_pregao=df.attrs["last_bar"],
+        consultado_em=df.attrs["fetched_at"],
+    )
 
     periodo_real = df["Date"].max() - df["Date"].min()
     dias_esperados = years * 365
@@ -107,7 +166,94 @@ def fetch_ibovespa_history(years: int = 5) -> pd.DataFrame:
             data_final=str(df["Date"].max().date()),
         )
 
-    return pd.DataFrame(df[["Date", "Close", "Daily_Return"]])
+    result = pd.DataFrame(df[["Date", "Close", "Daily_Return"]])
+    result.attrs = dict(df.attrs)
+    return result
+
+
+def _batch_closes(
+    downloader: Callable[..., pd.DataFrame], tickers: List[str], start: date, end: date
+) -> Dict[str, pd.DataFrame]:
+    """Uma única requisição agrupada ao yfinance → {ticker: DataFrame Date/Close}."""
+    log.info("fetch_price_panel.request", tickers=tickers, start=str(start), end=str(end))
+    raw: pd.DataFrame = downloader(
+        tickers,
+        start=start.strftime("%Y-%m-%d"),
+        end=end.strftime("%Y-%m-%d"),
+        auto_adjust=True,
+        group_by="column",
+        progress=False,
+    )
+    if raw is None or raw.empty:
+        return {}
+    closes = raw["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(tickers[0])
+    return {
+        str(ticker): _close_frame(closes[[ticker]].rename(columns={ticker: "Close"}).dropna())
+        for ticker in closes.columns
+    }
+
+
+def fetch_price_panel(
+    tickers: List[str],
+    years: int = 5,
+    downloader: Optional[Callable[..., pd.DataFrame]] = None,
+    store: Optional[PriceHistoryStore] = None,
+) -> Dict[str, Any]:
+    """
+    Busca fechamentos de vários tickers e alinha em um único painel.
+
+    Usa o mesmo cache de fetch_ibovespa_history: tickers consultados hoje não
+    vão à rede e os demais baixam só os pregões novos. Tickers que precisam
+    do mesmo trecho são pedidos em uma única chamada agrupada (yf.download)
+    em vez de uma chamada Ticker.history por ativo.
+
+    Args:
+        tickers: Códigos no formato do yfinance (ex: ["PETR4.SA", "^BVSP"]).
+        years: Quantidade de anos de histórico desejado (padrão: 5).
+        downloader: Função de download em lote (padrão: yf.download).
+        store: Cache de preços. Default: base local compartilhada.
+
+    Returns:
+        Dict com prices (DataFrame float64 Date x Ticker, em ordem de coluna),
+        mask (bool, True onde há pregão), meta (atualidade por ticker) e
+        failures (tickers sem dados).
+
+    Raises:
+        RuntimeError: Se nenhum ticker retornou dados.
+    """
+    end_date = date.today()
+    start_date = end_date - timedelta(days=years * 365)
+    download = downloader or yf.download
+
+    log.info(
+        "fetch_price_panel.start",
+        tickers=len(tickers),
+        start=str(start_date),
+        end=str(end_date),
+    )
+
+    panel = load_panel(
+        store or _PRICE_STORE,
+        tickers,
+        start_date,
+        end_date,
+        lambda group, a, b: _batch_closes(download, group, a, b),
+    )
+
+    if len(panel["failures"]) == len(panel["prices"].columns):
+        raise RuntimeError(f"yfinance não retornou dados para {list(tickers)}")
+
+    log.info(
+        "fetch_price_panel.ok",
+        pregoes=len(panel["prices"]),
+        tickers=len(panel["prices"].columns),
+        falhas=list(panel["failures"]),
+        data_inicial=str(panel["prices"].index.min().date()),
+        data_final=str(panel["prices"].index.max().date()),
+    )
+    return panel
 
 
 # ---------------------------------------------------------------------------
@@ -115,19 +261,27 @@ def fetch_ibovespa_history(years: int = 5) -> pd.DataFrame:
 # ---------------------------------------------------------------------------
 
 
+# Modelos ajustados por série: poucos pregões novos reajustam sem nova busca
+_ARIMA_CACHE = ArimaModelCache()
+
+
 def project_ibovespa(
     historical_df: pd.DataFrame,
     n_periods: int = 504,
+    model_cache: Optional[ArimaModelCache] = None,
 ) -> pd.DataFrame:
     """
     Projeta o IBOVESPA para n_periods dias úteis usando ARIMA.
 
-    Tenta auto_arima (pmdarima) para seleção automática de parâmetros.
-    Se falhar, usa ARIMA(1,1,1) documentando a escolha.
+    A ordem é escolhida por _search_arima_order (grade ARIMA(p,d,q) por AIC,
+    em paralelo). O modelo ajustado fica no ArimaModelCache: com poucos
+    pregões novos ele é reajustado a partir dos parâmetros gravados, sem
+    repetir a busca de ordem.
 
     Args:
         historical_df: DataFrame retornado por fetch_ibovespa_history().
         n_periods: Dias úteis de projeção (~504 = 2 anos). Default: 504.
+        model_cache: Cache de modelos. Default: o do módulo (ARIMA_CACHE_DIR).
 
     Returns:
         DataFrame com colunas: Date, Projected_Close, CI_Lower_95, CI_Upper_95
@@ -137,84 +291,41 @@ def project_ibovespa(
     # Trabalhar em log para garantir positividade e melhor estacionaridade
     log_close = np.log(close)
 
-    forecast_log = None
-    conf_int_log = None
-
-    # --- Tentativa 1: pmdarima auto_arima para seleção automática de ordem ---
-    try:
-        from pmdarima import auto_arima
-
-        log.info("project_ibovespa.tentando_auto_arima")
-        model_pm = auto_arima(
-            log_close.values,  # array puro — evita problemas de índice com sklearn
-            seasonal=False,
-            suppress_warnings=True,
-            error_action="ignore",
-            stepwise=True,
-            information_criterion="aic",
-            max_p=3,
-            max_q=3,
-            max_d=2,
-        )
-        order_used = model_pm.order
-        log.info("project_ibovespa.auto_arima_order_selecionado", order=order_used)
-
-        forecast_log, conf_int_log = model_pm.predict(
-            n_periods=n_periods,
-            return_conf_int=True,
-            alpha=0.05,
-        )
-    except ImportError:
-        log.warning(
-            "project_ibovespa.pmdarima_nao_instalado",
-            mensagem="pmdarima não disponível — usando ARIMA(1,1,1) via statsmodels",
-        )
-    except Exception as e:
-        log.warning(
-            "project_ibovespa.auto_arima_falhou",
-            erro=str(e),
-            mensagem="auto_arima falhou (possivelmente incompatibilidade "
-            "pmdarima/sklearn) — usando ARIMA(1,1,1) via statsmodels",
-        )
-
-    # --- Fallback: statsmodels ARIMA(1,1,1) ---
-    if forecast_log is None:
-        from statsmodels.tsa.arima.model import ARIMA as SM_ARIMA
-
-        log.info("project_ibovespa.usando_statsmodels_arima_111")
-        sm_model = SM_ARIMA(log_close, order=(1, 1, 1)).fit()
-        return _project_with_statsmodels(sm_model, close, n_periods)
-
-    projected_close = np.exp(forecast_log)
-    assert conf_int_log is not None
-    ci_lower = np.exp(conf_int_log[:, 0])
-    ci_upper = np.exp(conf_int_log[:, 1])
-
-    # Gerar datas futuras (dias úteis)
-    last_date = pd.Timestamp(str(close.index.max()))
-    future_dates = pd.bdate_range(
-        start=last_date + pd.Timedelta(days=1),
-        periods=n_periods,
-    )
-
-    result = pd.DataFrame(
-        {
-            "Date": future_dates,
-            "Projected_Close": projected_close,
-            "CI_Lower_95": ci_lower,
-            "CI_Upper_95": ci_upper,
-        }
+    cache = model_cache if model_cache is not None else _ARIMA_CACHE
+    key = historical_df.attrs.get("ticker", "^BVSP")
+    model, mode = cache.fit(
+        key, log_close.to_numpy(dtype=np.float64), _search_arima_order, dates=log_close.index
     )
 
+    result = _project_with_statsmodels(model, close, n_periods)
     log.info(
         "project_ibovespa.ok",
         periodos=n_periods,
+        modelo=mode,
         data_inicio_projecao=str(result["Date"].iloc[0].date()),
         data_fim_projecao=str(result["Date"].iloc[-1].date()),
     )
     return result
 
 
+def _search_arima_order(log_close: np.ndarray) -> Tuple[Any, Tuple[int, int, int]]:
+    """
+    Busca completa de ordem: grade ARIMA(p, d, q) por AIC (arima_search).
+
+    Mesma grade da busca exaustiva do auto_arima (p, q ≤ 3, p + q ≤ 5, d pelo
+    teste KPSS até 2), com os ajustes independentes distribuídos em
+    ARIMA_SEARCH_WORKERS processos — a ordem e o AIC escolhidos são os mesmos
+    da execução serial.
+
+    Returns:
+        (resultado statsmodels ajustado, ordem (p, d, q)).
+    """
+    d = select_d(log_close, max_d=2)
+    log.info("project_ibovespa.busca_ordem", d=d, workers=ARIMA_SEARCH_WORKERS)
+    grid = order_grid(max_p=3, max_q=3, d=d, max_order=5)
+    return grid_search(log_close, grid, ARIMA_SEARCH_WORKERS)
+
+
 def _project_with_statsmodels(
     model,
     close: pd.Series,
@@ -249,6 +360,15 @@ def _project_with_statsmodels(
 # ---------------------------------------------------------------------------
 
 
+# Base local das séries SGS: só o trecho novo de cada série é baixado
+_BCB_STORE = BcbSeriesStore()
+
+# Requisições idênticas ao BCB dentro da mesma execução compartilham uma busca;
+# o resultado memorizado vale BCB_RESULT_TTL segundos (processos longos re-buscam)
+BCB_RESULT_TTL = float(os.getenv("BCB_RESULT_TTL", "900"))
+_BCB_FLIGHT = SingleFlight("_fetch_bcb_series", ttl=BCB_RESULT_TTL, max_entries=64)
+
+
 def _fetch_bcb_series(series_id: int, start_date: Optional[str] = None) -> pd.DataFrame:
     """
     Busca série temporal do Banco Central do Brasil (SGS/BCB).
@@ -256,6 +376,15 @@ def _fetch_bcb_series(series_id: int, start_date: Optional[str] = None) -> pd.Da
     O BCB aceita no máximo 10 anos de janela para séries diárias.
     Por padrão usa 9 anos atrás da data atual (margem de segurança).
 
+    A série fica armazenada localmente (bcb_store.BcbSeriesStore): apenas os
+    dias posteriores à última observação gravada são pedidos ao BCB, e
+    intervalos acima de 10 anos são divididos em janelas baixadas em paralelo.
+
+    Chamadas com a mesma (série, data inicial, data final) no mesmo processo
+    fazem uma única requisição: chamadores simultâneos aguardam a busca em
+    andamento e os seguintes, por BCB_RESULT_TTL segundos, recebem o
+    resultado memorizado (contadores em bcb_cache_stats()).
+
     Args:
         series_id: Código da série (ex: 12=CDI, 432=SELIC).
         start_date: Data inicial no formato DD/MM/AAAA.
@@ -272,30 +401,28 @@ def _fetch_bcb_series(series_id: int, start_date: Optional[str] = None) -> pd.Da
         five_years_ago = date.today() - timedelta(days=5 * 365)
         start_date = five_years_ago.strftime("%d/%m/%Y")
     today = date.today().strftime("%d/%m/%Y")
-    url = (
-        f"https://api.bcb.gov.br/dados/serie/bcdata.sgs.{series_id}/dados"
-        f"?formato=json&dataInicial={start_date}&dataFinal={today}"
-    )
-    log.info("_fetch_bcb_series.request", series_id=series_id, url=url)
 
-    resp = requests.get(
-        url,
-        timeout=90,
-        headers={
-            "Accept": "application/json",
-            "User-Agent": "b3-portfolio-analysis/1.0 (educational; non-commercial)",
-        },
+    df = _BCB_FLIGHT.do(
+        (series_id, start_date, today),
+        lambda: _load_bcb_series(series_id, start_date, today),
     )
-    resp.raise_for_status()
-    data = resp.json()
+    # Cópia: o DataFrame memorizado é compartilhado entre chamadores
+    return df.copy()
 
-    if not data:
-        raise RuntimeError(f"BCB série {series_id}: response vazio")
 
-    df = pd.DataFrame(data)
-    df["Date"] = pd.to_datetime(df["data"], dayfirst=True)
-    df["Rate"] = pd.to_numeric(df["valor"], errors="coerce")
-    df = pd.DataFrame(df[["Date", "Rate"]].dropna()).sort_values("Date").reset_index(drop=True)
+def bcb_cache_stats() -> Dict[str, int]:
+    """Contadores hits/shared/misses/errors das buscas BCB deste processo."""
+    return _BCB_FLIGHT.stats()
+
+
+def _load_bcb_series(series_id: int, start_date: str, end_date: str) -> pd.DataFrame:
+    """Lê a série da base local, baixando do SGS/BCB apenas o trecho que falta."""
+    start = pd.to_datetime(start_date, dayfirst=True).date()
+    end = pd.to_datetime(end_date, dayfirst=True).date()
+    df = _BCB_STORE.series(series_id, start, end)
+
+    if df.empty:
+        raise RuntimeError(f"BCB série {series_id}: response vazio")
 
     log.info(
         "_fetch_bcb_series.ok",
@@ -357,139 +484,74 @@ def _accumulate_rate_to_index(
 # ---------------------------------------------------------------------------
 
 
-def _fetch_rf_lp_high() -> Dict[str, Any]:
-    """
-    Ativo 1: Fundos de Investimento RF LP High.
-    Cadeia: CVM Dados Abertos → CDI (BCB série 12).
-    """
-    # --- Tentativa 1: CVM Dados Abertos ---
-    try:
-        log.info("_fetch_rf_lp_high.tentando_cvm")
-        # Arquivo de cadastro atual: cad_fi.csv
-        cad_url = "https://dados.cvm.gov.br/dados/FI/CAD/DADOS/cad_fi.csv"
-        resp = requests.get(cad_url, timeout=60)
-        resp.raise_for_status()
-
-        # CVM usa encoding latin-1 (ISO-8859-1)
-        cad_df = pd.read_csv(
-            io.StringIO(resp.content.decode("latin-1")),
-            sep=";",
-            dtype=str,
-            low_memory=False,
-        )
-
-        # Buscar por nome do fundo
-        search_terms = ["RF LP HIGH", "RENDA FIXA LP HIGH", "RF LP HI"]
-        mask = pd.Series(False, index=cad_df.index)
-        for term in search_terms:
-            mask |= (
-                cad_df["DENOM_SOCIAL"]
-                .str.upper()
-                .str.contains(term, na=False, regex=False)
-            )
-
-        found = cad_df[mask]
-        if found.empty:
-            log.warning(
-                "_fetch_rf_lp_high.nao_localizado_cvm",
-                mensagem="Fundo RF LP High não localizado na CVM por nome — "
-                "necessário fornecer CNPJ manualmente",
-                termos_buscados=search_terms,
-            )
-            raise ValueError("RF LP High não encontrado na CVM por nome")
+def _rf_lp_high_from_cvm(timeout: float) -> Dict[str, Any]:
+    """Fonte real do RF LP High: cadastro + cotas diárias da CVM Dados Abertos."""
+    log.info("_fetch_rf_lp_high.tentando_cvm")
+    cache = CvmArchiveCache(timeout=timeout)
+    # Cadastro atual (cad_fi.csv) em cache local, indexado por nome
+    registry = FundRegistry.load(cache=cache)
+    raise_if_cancelled()
 
-        # Pegar o primeiro resultado (pode haver mais de um fundo com nome similar)
-        cnpj = found.iloc[0]["CNPJ_FUNDO"].strip()
-        nome_encontrado = found.iloc[0]["DENOM_SOCIAL"].strip()
-        log.info(
-            "_fetch_rf_lp_high.cvm_fundo_encontrado",
-            cnpj=cnpj,
-            nome=nome_encontrado,
-            total_fundos_encontrados=len(found),
+    # Buscar por nome do fundo
+    search_terms = ["RF LP HIGH", "RENDA FIXA LP HIGH", "RF LP HI"]
+    found = registry.query(name_any=search_terms)
+    if found.empty:
+        log.warning(
+            "_fetch_rf_lp_high.nao_localizado_cvm",
+            mensagem="Fundo RF LP High não localizado na CVM por nome — "
+            "necessário fornecer CNPJ manualmente",
+            termos_buscados=search_terms,
         )
+        raise ValueError("RF LP High não encontrado na CVM por nome")
 
-        # Baixar cotas mensais dos últimos 5 anos
-        end_year = date.today().year
-        end_month = date.today().month
-        frames = []
-        failures = []
-
-        for delta_months in range(0, 60):  # até 60 meses = 5 anos
-            y = end_year - (delta_months + end_month - 1) // 12
-            m = (end_month - 1 - delta_months % 12) % 12 + 1
-            # Calcular mês correto
-            total_months = end_year * 12 + end_month - 1 - delta_months
-            y = total_months // 12
-            m = total_months % 12 + 1
-            ym = f"{y:04d}{m:02d}"
-            # Arquivos mensais disponíveis como .zip (contêm CSV interno)
-            url_cota = (
-                f"https://dados.cvm.gov.br/dados/FI/DOC/INF_DIARIO/DADOS/"
-                f"inf_diario_fi_{ym}.zip"
-            )
-            try:
-                r = requests.get(url_cota, timeout=60)
-                r.raise_for_status()
-                with zipfile.ZipFile(io.BytesIO(r.content)) as zf:
-                    csv_name = zf.namelist()[0]
-                    with zf.open(csv_name) as f:
-                        monthly = pd.read_csv(
-                            io.TextIOWrapper(f, encoding="latin-1"),
-                            sep=";",
-                            dtype=str,
-                            low_memory=False,
-                        )
-                filtered = monthly[monthly["CNPJ_FUNDO"].str.strip() == cnpj]
-                if not filtered.empty:
-                    filtered = filtered[["DT_COMPTC", "VL_QUOTA"]].copy()
-                    filtered["Date"] = pd.to_datetime(filtered["DT_COMPTC"])
-                    filtered["Value"] = pd.to_numeric(
-                        filtered["VL_QUOTA"].str.replace(",", "."),
-                        errors="coerce",
-                    )
-                    frames.append(filtered[["Date", "Value"]])
-            except Exception as e:
-                failures.append((ym, str(e)))
-
-        if failures:
-            log.warning(
-                "_fetch_rf_lp_high.cvm_meses_falhos",
-                meses_falhos=len(failures),
-            )
-
-        if not frames:
-            raise ValueError(
-                f"RF LP High (CNPJ={cnpj}) não retornou cotas — "
-                "arquivos mensais CVM sem dados para este fundo."
-            )
+    # Pegar o primeiro resultado (pode haver mais de um fundo com nome similar)
+    cnpj = found.iloc[0]["CNPJ_FUNDO"].strip()
+    nome_encontrado = found.iloc[0]["DENOM_SOCIAL"].strip()
+    log.info(
+        "_fetch_rf_lp_high.cvm_fundo_encontrado",
+        cnpj=cnpj,
+        nome=nome_encontrado,
+        total_fundos_encontrados=len(found),
+    )
 
-        data_df = (
-            pd.concat(frames, ignore_index=True)
-            .dropna()
-            .sort_values("Date")
-            .drop_duplicates("Date")
-            .reset_index(drop=True)
-        )
-        period = f"{data_df['Date'].min().date()} → {data_df['Date'].max().date()}"
-        log.info(
-            "_fetch_rf_lp_high.cvm_ok",
-            registros=len(data_df),
-            period=period,
+    # Cotas mensais dos últimos 5 anos (cache local + Parquet, downloads em paralelo)
+    quotas = fetch_fund_quotas([cnpj], months=60, cache=cache)  # até 60 meses = 5 anos
+    failures = quotas.attrs.get("failures", [])
+    if failures:
+        log.warning(
+            "_fetch_rf_lp_high.cvm_meses_falhos",
+            meses_falhos=len(failures),
         )
-        return {
-            "data": data_df,
-            "source": f"CVM Dados Abertos (CNPJ: {cnpj}, {nome_encontrado})",
-            "period": period,
-            "proxy_used": False,
-        }
 
-    except Exception as e:
-        log.warning(
-            "_fetch_rf_lp_high.cvm_falhou_usando_proxy_cdi",
-            erro=str(e),
+    if quotas.empty:
+        raise ValueError(
+            f"RF LP High (CNPJ={cnpj}) não retornou cotas — "
+            "arquivos mensais CVM sem dados para este fundo."
         )
 
-    # --- Fallback: CDI acumulado (BCB série 12) ---
+    data_df = (
+        pd.DataFrame(quotas[["Date", "Value"]])
+        .dropna()
+        .sort_values("Date")
+        .drop_duplicates("Date")
+        .reset_index(drop=True)
+    )
+    period = f"{data_df['Date'].min().date()} → {data_df['Date'].max().date()}"
+    log.info(
+        "_fetch_rf_lp_high.cvm_ok",
+        registros=len(data_df),
+        period=period,
+    )
+    return {
+        "data": data_df,
+        "source": f"CVM Dados Abertos (CNPJ: {cnpj}, {nome_encontrado})",
+        "period": period,
+        "proxy_used": False,
+    }
+
+
+def _rf_lp_high_cdi_proxy(timeout: float) -> Dict[str, Any]:
+    """Proxy do RF LP High: CDI acumulado (BCB série 12)."""
     log.info("_fetch_rf_lp_high.usando_proxy_cdi")
     cdi_df = _fetch_bcb_series(12)
     data_df = _accumulate_rate_to_index(cdi_df, rate_type="daily_pct")
@@ -502,102 +564,103 @@ def _fetch_rf_lp_high() -> Dict[str, Any]:
     }
 
 
-def _fetch_lft_2031() -> Dict[str, Any]:
+_RF_LP_HIGH_CHAIN = SourceChain(
+    "rf_lp_high",
+    [
+        Source("cvm_inf_diario", _rf_lp_high_from_cvm, timeout=60),
+        Source("bcb_cdi_12", _rf_lp_high_cdi_proxy, proxy=True, timeout=90),
+    ],
+)
+
+
+def _fetch_rf_lp_high() -> Dict[str, Any]:
     """
-    Ativo 2: Tesouro Direto LFT 01.03.2031.
-    Cadeia: API Tesouro gov.br → SELIC acumulada (BCB série 432).
+    Ativo 1: Fundos de Investimento RF LP High.
+    Cadeia: CVM Dados Abertos → CDI (BCB série 12).
     """
-    # --- Tentativa 1: API Tesouro gov.br ---
-    endpoints = [
-        "https://www.tesourodireto.com.br/json/br/com/b3/tesourodireto/component/"
-        "publicarea/PortfolioTesouroDiretoComponent/bd/bdTd.json",
-        "https://apigtw.tesouro.gov.br/api/v1/titulos/precos-taxas",
-    ]
-
-    for endpoint in endpoints:
-        try:
-            log.info("_fetch_lft_2031.tentando_tesouro", endpoint=endpoint)
-            resp = requests.get(endpoint, timeout=30)
-            resp.raise_for_status()
-            raw = resp.json()
-
-            # O JSON do bdTd tem estrutura: TrsrBdTrad.TrsrBd (lista de títulos)
-            # Navegar até os dados históricos de preços
-            titulos = None
-            if "TrsrBdTrad" in raw:
-                titulos = raw["TrsrBdTrad"].get("TrsrBd", [])
-            elif isinstance(raw, list):
-                titulos = raw
-
-            if not titulos:
-                log.warning("_fetch_lft_2031.endpoint_sem_dados", endpoint=endpoint)
-                continue
-
-            # Buscar LFT
-            lft_entries = []
-            for t in titulos:
-                nome = (
-                    t.get("TrsrNm", "") or t.get("nm", "") or t.get("name", "") or ""
-                ).upper()
-                if "LFT" in nome or "SELIC" in nome or "TESOURO SELIC" in nome:
-                    lft_entries.append(t)
-
-            if not lft_entries:
-                log.warning(
-                    "_fetch_lft_2031.lft_nao_encontrado_no_endpoint",
-                    endpoint=endpoint,
-                )
-                continue
-
-            # Tentar extrair histórico de preços
-            # A estrutura do bdTd não traz histórico — apenas preço atual
-            # Verificar se há chave histórica
-            rows = []
-            for entry in lft_entries:
-                hist = entry.get("TrsrBdPrice", []) or entry.get("prices", [])
-                if hist:
-                    for h in hist:
-                        dt = h.get("prcDt") or h.get("date")
-                        price = h.get("untrRedVal") or h.get("price")
-                        if dt and price:
-                            rows.append({"Date": dt, "Value": float(price)})
-
-            if not rows:
-                log.warning(
-                    "_fetch_lft_2031.historico_nao_disponivel_no_endpoint",
-                    endpoint=endpoint,
-                )
-                continue
-
-            data_df = pd.DataFrame(rows)
-            data_df["Date"] = pd.to_datetime(data_df["Date"])
-            data_df = (
-                data_df.dropna()
-                .sort_values("Date")
-                .drop_duplicates("Date")
-                .reset_index(drop=True)
-            )
-            period = f"{data_df['Date'].min().date()} → {data_df['Date'].max().date()}"
-            log.info(
-                "_fetch_lft_2031.tesouro_ok",
-                registros=len(data_df),
-                period=period,
-            )
-            return {
-                "data": data_df,
-                "source": f"API Tesouro Direto ({endpoint})",
-                "period": period,
-                "proxy_used": False,
-            }
-
-        except Exception as e:
-            log.warning(
-                "_fetch_lft_2031.endpoint_falhou",
-                endpoint=endpoint,
-                erro=str(e),
-            )
+    return _RF_LP_HIGH_CHAIN.run()
+
+
+_TESOURO_ENDPOINTS = {
+    "tesouro_bdtd": "https://www.tesourodireto.com.br/json/br/com/b3/tesourodireto/component/"
+    "publicarea/PortfolioTesouroDiretoComponent/bd/bdTd.json",
+    "tesouro_apigtw": "https://apigtw.tesouro.gov.br/api/v1/titulos/precos-taxas",
+}
+
+
+def _lft_2031_from_tesouro(endpoint: str, timeout: float) -> Dict[str, Any]:
+    """Fonte real da LFT 2031: histórico de preços de um endpoint do Tesouro."""
+    log.info("_fetch_lft_2031.tentando_tesouro", endpoint=endpoint)
+    resp = http_get(endpoint, timeout=timeout)
+    raise_if_cancelled()
+    resp.raise_for_status()
+    raw = resp.json()
+
+    # O JSON do bdTd tem estrutura: TrsrBdTrad.TrsrBd (lista de títulos)
+    # Navegar até os dados históricos de preços
+    titulos = None
+    if "TrsrBdTrad" in raw:
+        titulos = raw["TrsrBdTrad"].get("TrsrBd", [])
+    elif isinstance(raw, list):
+        titulos = raw
+
+    if not titulos:
+        log.warning("_fetch_lft_2031.endpoint_sem_dados", endpoint=endpoint)
+        raise ValueError(f"Endpoint sem dados: {endpoint}")
+
+    # Buscar LFT
+    lft_entries = []
+    for t in titulos:
+        nome = (t.get("TrsrNm", "") or t.get("nm", "") or t.get("name", "") or "").upper()
+        if "LFT" in nome or "SELIC" in nome or "TESOURO SELIC" in nome:
+            lft_entries.append(t)
+
+    if not lft_entries:
+        log.warning(
+            "_fetch_lft_2031.lft_nao_encontrado_no_endpoint",
+            endpoint=endpoint,
+        )
+        raise ValueError(f"LFT não encontrada no endpoint: {endpoint}")
+
+    # Tentar extrair histórico de preços
+    # A estrutura do bdTd não traz histórico — apenas preço atual
+    # Verificar se há chave histórica
+    rows = []
+    for entry in lft_entries:
+        hist = entry.get("TrsrBdPrice", []) or entry.get("prices", [])
+        if hist:
+            for h in hist:
+                dt = h.get("prcDt") or h.get("date")
+                price = h.get("untrRedVal") or h.get("price")
+                if dt and price:
+                    rows.append({"Date": dt, "Value": float(price)})
+
+    if not rows:
+        log.warning(
+            "_fetch_lft_2031.historico_nao_disponivel_no_endpoint",
+            endpoint=endpoint,
+        )
+        raise ValueError(f"Histórico de preços indisponível no endpoint: {endpoint}")
 
-    # --- Fallback: SELIC acumulada (BCB série 432) ---
+    data_df = pd.DataFrame(rows)
+    data_df["Date"] = pd.to_datetime(data_df["Date"])
+    data_df = data_df.dropna().sort_values("Date").drop_duplicates("Date").reset_index(drop=True)
+    period = f"{data_df['Date'].min().date()} → {data_df['Date'].max().date()}"
+    log.info(
+        "_fetch_lft_2031.tesouro_ok",
+        registros=len(data_df),
+        period=period,
+    )
+    return {
+        "data": data_df,
+        "source": f"API Tesouro Direto ({endpoint})",
+        "period": period,
+        "proxy_used": False,
+    }
+
+
+def _lft_2031_selic_proxy(timeout: float) -> Dict[str, Any]:
+    """Proxy da LFT 2031: SELIC acumulada (BCB série 432)."""
     log.warning(
         "_fetch_lft_2031.usando_proxy_selic",
         mensagem="Proxy utilizado: SELIC acumulada (BCB série 432). "
@@ -614,75 +677,75 @@ def _fetch_lft_2031() -> Dict[str, Any]:
     }
 
 
-def _fetch_lca_bb_prefixada() -> Dict[str, Any]:
-    """
-    Ativo 3: LCA BB Prefixada.
-    LCAs não possuem dados públicos de cota.
-    Cadeia: ANBIMA IRF-M → CDI (BCB série 12).
+_LFT_2031_CHAIN = SourceChain(
+    "lft_2031",
+    [
+        *(
+            Source(name, functools.partial(_lft_2031_from_tesouro, endpoint), timeout=30)
+            for name, endpoint in _TESOURO_ENDPOINTS.items()
+        ),
+        Source("bcb_selic_432", _lft_2031_selic_proxy, proxy=True, timeout=90),
+    ],
+)
 
-    Registra limitação no log: LCA BB Prefixada não possui dados públicos
-    de cota — proxy utilizado.
+
+def _fetch_lft_2031() -> Dict[str, Any]:
     """
-    log.warning(
-        "_fetch_lca_bb_prefixada.sem_dados_publicos",
-        mensagem="LCA BB Prefixada não possui dados públicos de cota. "
-        "Tentando proxy ANBIMA IRF-M, fallback CDI.",
+    Ativo 2: Tesouro Direto LFT 01.03.2031.
+    Cadeia: API Tesouro gov.br → SELIC acumulada (BCB série 432).
+    """
+    return _LFT_2031_CHAIN.run()
+
+
+def _lca_from_anbima(timeout: float) -> Dict[str, Any]:
+    """Proxy preferido da LCA: índice ANBIMA IRF-M (renda fixa prefixada)."""
+    log.info("_fetch_lca_bb_prefixada.tentando_anbima")
+    # ANBIMA não tem API pública aberta sem autenticação para IRF-M histórico
+    # Tentativa com o endpoint de carteiras de mercado
+    anbima_url = (
+        "https://api.anbima.com.br/feed/precos-v1/titulos-publicos/"
+        "mercado-secundario-tpf/ult-dia-utl"
     )
+    resp = http_get(anbima_url, timeout=timeout, headers={"accept": "application/json"})
+    raise_if_cancelled()
+    resp.raise_for_status()
 
-    # --- Tentativa 1: ANBIMA IRF-M ---
-    try:
-        log.info("_fetch_lca_bb_prefixada.tentando_anbima")
-        # ANBIMA não tem API pública aberta sem autenticação para IRF-M histórico
-        # Tentativa com o endpoint de carteiras de mercado
-        anbima_url = (
-            "https://api.anbima.com.br/feed/precos-v1/titulos-publicos/"
-            "mercado-secundario-tpf/ult-dia-utl"
-        )
-        resp = requests.get(
-            anbima_url, timeout=15, headers={"accept": "application/json"}
-        )
-        resp.raise_for_status()
-
-        data = resp.json()
-        # ANBIMA API pode exigir token — se chegar aqui, está ok
-        rows = []
-        if isinstance(data, list):
-            for item in data:
-                if "IRF-M" in str(item.get("titulo", "")).upper():
-                    rows.append(
-                        {
-                            "Date": item.get("data_referencia"),
-                            "Value": item.get("numero_indice"),
-                        }
-                    )
-
-        if not rows:
-            raise ValueError("ANBIMA não retornou dados de IRF-M acessíveis")
-
-        data_df = pd.DataFrame(rows)
-        data_df["Date"] = pd.to_datetime(data_df["Date"])
-        data_df["Value"] = pd.to_numeric(data_df["Value"], errors="coerce")
-        data_df = data_df.dropna().sort_values("Date").reset_index(drop=True)
-        period = f"{data_df['Date'].min().date()} → {data_df['Date'].max().date()}"
-        log.info(
-            "_fetch_lca_bb_prefixada.anbima_ok",
-            registros=len(data_df),
-            period=period,
-        )
-        return {
-            "data": data_df,
-            "source": "Proxy: ANBIMA IRF-M (índice de renda fixa prefixada)",
-            "period": period,
-            "proxy_used": True,
-        }
+    data = resp.json()
+    # ANBIMA API pode exigir token — se chegar aqui, está ok
+    rows = []
+    if isinstance(data, list):
+        for item in data:
+            if "IRF-M" in str(item.get("titulo", "")).upper():
+                rows.append(
+                    {
+                        "Date": item.get("data_referencia"),
+                        "Value": item.get("numero_indice"),
+                    }
+                )
+
+    if not rows:
+        raise ValueError("ANBIMA não retornou dados de IRF-M acessíveis")
+
+    data_df = pd.DataFrame(rows)
+    data_df["Date"] = pd.to_datetime(data_df["Date"])
+    data_df["Value"] = pd.to_numeric(data_df["Value"], errors="coerce")
+    data_df = data_df.dropna().sort_values("Date").reset_index(drop=True)
+    period = f"{data_df['Date'].min().date()} → {data_df['Date'].max().date()}"
+    log.info(
+        "_fetch_lca_bb_prefixada.anbima_ok",
+        registros=len(data_df),
+        period=period,
+    )
+    return {
+        "data": data_df,
+        "source": "Proxy: ANBIMA IRF-M (índice de renda fixa prefixada)",
+        "period": period,
+        "proxy_used": True,
+    }
 
-    except Exception as e:
-        log.warning(
-            "_fetch_lca_bb_prefixada.anbima_falhou",
-            erro=str(e),
-        )
 
-    # --- Fallback final: CDI acumulado (BCB série 12) ---
+def _lca_cdi_proxy(timeout: float) -> Dict[str, Any]:
+    """Proxy final da LCA: CDI acumulado (BCB série 12)."""
     log.warning(
         "_fetch_lca_bb_prefixada.usando_proxy_cdi",
         mensagem="LCA BB Prefixada — proxy utilizado: CDI acumulado (BCB série 12). "
@@ -700,21 +763,115 @@ def _fetch_lca_bb_prefixada() -> Dict[str, Any]:
     }
 
 
-def fetch_portfolio_assets() -> Dict[str, Dict[str, Any]]:
+# Os dois são proxies; o IRF-M (prefixado) é preferível ao CDI (pós-fixado)
+_LCA_BB_PREFIXADA_CHAIN = SourceChain(
+    "lca_bb_prefixada",
+    [
+        Source("anbima_irfm", _lca_from_anbima, proxy=True, timeout=15, tier=1),
+        Source("bcb_cdi_12", _lca_cdi_proxy, proxy=True, timeout=90, tier=2),
+    ],
+)
+
+
+def _fetch_lca_bb_prefixada() -> Dict[str, Any]:
+    """
+    Ativo 3: LCA BB Prefixada.
+    LCAs não possuem dados públicos de cota.
+    Cadeia: ANBIMA IRF-M → CDI (BCB série 12).
+
+    Registra limitação no log: LCA BB Prefixada não possui dados públicos
+    de cota — proxy utilizado.
     """
-    Busca dados dos 3 ativos da carteira atual.
+    log.warning(
+        "_fetch_lca_bb_prefixada.sem_dados_publicos",
+        mensagem="LCA BB Prefixada não possui dados públicos de cota. "
+        "Tentando proxy ANBIMA IRF-M, fallback CDI.",
+    )
+    return _LCA_BB_PREFIXADA_CHAIN.run()
+
+
+# Ativos da carteira: chave → função que percorre a cadeia de fontes do ativo.
+# Novos ativos entram aqui (ver register_asset) e são buscados em paralelo.
+PORTFOLIO_ASSETS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "rf_lp_high": _fetch_rf_lp_high,
+    "lft_2031": _fetch_lft_2031,
+    "lca_bb_prefixada": _fetch_lca_bb_prefixada,
+}
+
+# Prazo (s) de cada ativo e orçamento (s) da busca completa
+ASSET_FETCH_DEADLINE = float(os.getenv("ASSET_FETCH_DEADLINE", "300"))
+ASSET_FETCH_BUDGET = float(os.getenv("ASSET_FETCH_BUDGET", "600"))
+
+
+def register_asset(key: str, fetcher: Callable[[], Dict[str, Any]]) -> None:
+    """
+    Inclui um ativo em fetch_portfolio_assets.
+
+    Args:
+        key: Chave do ativo no dicionário de resultado.
+        fetcher: Função sem argumentos que retorna o dict data/source/period/proxy_used.
+    """
+    PORTFOLIO_ASSETS[key] = fetcher
+
+
+def fetch_portfolio_assets(
+    deadline: Optional[float] = None,
+    budget: Optional[float] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Busca dados dos ativos da carteira atual (PORTFOLIO_ASSETS).
+
+    Cada ativo percorre sua cadeia de fontes em uma thread própria: a latência
+    total é a do ativo mais lento, não a soma. O resultado mantém a ordem de
+    PORTFOLIO_ASSETS e é o mesmo da busca sequencial.
+
+    Args:
+        deadline: Prazo (s) de cada ativo. Default: ASSET_FETCH_DEADLINE (300).
+        budget: Prazo (s) da busca completa. Default: ASSET_FETCH_BUDGET (600).
 
     Returns:
         Dicionário com chaves: rf_lp_high, lft_2031, lca_bb_prefixada.
         Cada valor é um dict com: data (DataFrame), source (str),
         period (str), proxy_used (bool).
+
+    Raises:
+        TimeoutError: Se um ativo exceder o prazo ou a busca exceder o orçamento.
+        Exception: A falha do primeiro ativo (na ordem de PORTFOLIO_ASSETS) que
+            não conseguiu nenhuma fonte.
     """
-    log.info("fetch_portfolio_assets.start")
+    deadline = ASSET_FETCH_DEADLINE if deadline is None else deadline
+    budget = ASSET_FETCH_BUDGET if budget is None else budget
+    log.info(
+        "fetch_portfolio_assets.start",
+        ativos=list(PORTFOLIO_ASSETS),
+        prazo_ativo_s=deadline,
+        orcamento_s=budget,
+    )
 
-    assets = {}
-    assets["rf_lp_high"] = _fetch_rf_lp_high()
-    assets["lft_2031"] = _fetch_lft_2031()
-    assets["lca_bb_prefixada"] = _fetch_lca_bb_prefixada()
+    started = time.monotonic()
+    limit = started + min(deadline, budget)
+    fetchers = dict(PORTFOLIO_ASSETS)
+    pool = ThreadPoolExecutor(max_workers=max(1, len(fetchers)), thread_name_prefix="asset")
+    try:
+        futures = {key: pool.submit(fetcher) for key, fetcher in fetchers.items()}
+        assets = {}
+        for key, future in futures.items():
+            try:
+                assets[key] = future.result(timeout=max(0.0, limit - time.monotonic()))
+            except FuturesTimeoutError:
+                if future.done():
+                    raise  # timeout levantado pelo próprio ativo
+                log.error(
+                    "fetch_portfolio_assets.prazo_excedido",
+                    ativo=key,
+                    decorrido_s=round(time.monotonic() - started, 1),
+                )
+                raise TimeoutError(
+                    f"Ativo '{key}' não concluiu em {min(deadline, budget):.0f} s"
+                ) from None
+    finally:
+        # Threads presas em I/O não são interrompidas; apenas deixamos de esperar
+        pool.shutdown(wait=False, cancel_futures=True)
 
     for key, val in assets.items():
         log.info(
@@ -725,6 +882,12 @@ def fetch_portfolio_assets() -> Dict[str, Dict[str, Any]]:
             proxy_used=val["proxy_used"],
             registros=len(val["data"]),
         )
+    log.info(
+        "fetch_portfolio_assets.ok",
+        duracao_s=round(time.monotonic() - started, 2),
+    )
+    log.info("fetch_portfolio_assets.bcb_cache", **bcb_cache_stats())
+    get_http_client().log_metrics()
 
     return assets
 
@@ -773,10 +936,12 @@ def generate_comparison_chart(
     projection_df: pd.DataFrame,
     assets: Dict[str, Dict[str, Any]],
     output_path: Optional[str] = None,
+    backtests: Optional[Dict[str, pd.DataFrame]] = None,
 ) -> str:
     """
     Gera gráfico comparativo com 2 subplots:
       - Subplot 1: histórico IBOVESPA + 3 ativos (normalizados base 100)
+        e, se informadas, as carteiras de backtest_portfolio()
       - Subplot 2: projeção IBOVESPA 2 anos com IC 95%
 
     Args:
@@ -784,6 +949,8 @@ def generate_comparison_chart(
         projection_df: DataFrame de project_ibovespa().
         assets: Dict de fetch_portfolio_assets().
         output_path: Caminho de saída. Default: services/analysis/outputs/...
+        backtests: Dict de backtest_portfolio(); cada política é redesenhada a
+            partir do nível do IBOVESPA normalizado na sua data inicial.
 
     Returns:
         Caminho absoluto do arquivo PNG gerado.
@@ -865,6 +1032,21 @@ def generate_comparison_chart(
             color=asset_colors.get(key, "gray"),
         )
 
+    for name, frame in (backtests or {}).items():
+        if name == "ibovespa":
+            continue
+        # Frames começam em 100 na data inicial comum dos ativos: leva ao nível do IBOVESPA
+        start_level = ibov_norm.set_index("Date")["Normalized"].asof(frame["Date"].iloc[0])
+        if pd.isna(start_level):
+            start_level = 100.0
+        ax1.plot(
+            frame["Date"],
+            frame["Normalized"] * start_level / 100.0,
+            label=f"Carteira — {name}",
+            linewidth=1.2,
+            linestyle=":",
+        )
+
     ax1.set_title("Histórico — Base 100 na data inicial do IBOVESPA", fontsize=11)
     ax1.set_ylabel("Índice (Base 100)")
     ax1.xaxis.set_major_formatter(mdates.DateFormatter("%Y"))
@@ -930,13 +1112,286 @@ def generate_comparison_chart(
     return str(output_file)
 
 
+# ---------------------------------------------------------------------------
+# 7. Indicadores de risco e retorno
+# ---------------------------------------------------------------------------
+
+BENCHMARK_TICKER = os.getenv("BENCHMARK_TICKER", "^BVSP")
+RISK_FREE_BCB_SERIES = int(os.getenv("RISK_FREE_BCB_SERIES", "12"))
+
+
+def compute_indicators(
+    prices: pd.DataFrame,
+    benchmark: Optional[str] = None,
+    series_id: Optional[int] = None,
+    var_level: Optional[float] = None,
+) -> pd.DataFrame:
+    """
+    Alfa, Beta, Sharpe, Treynor, Sortino, R², correlação, VaR e CVaR de um painel.
+
+    O livre de risco é a série do BCB (CDI — série 12 — por padrão) buscada
+    com _fetch_bcb_series desde a primeira data do painel.
+
+    Args:
+        prices: Painel de preços Date × ativo (fetch_price_panel()["prices"]);
+            deve conter a coluna do benchmark.
+        benchmark: Coluna do benchmark. Default: BENCHMARK_TICKER (^BVSP).
+        series_id: Série SGS do livre de risco: 12 (CDI, % ao dia) ou 432
+            (SELIC, % ao ano). Default: RISK_FREE_BCB_SERIES.
+        var_level: Nível do VaR/CVaR. Default: INDICATORS_VAR_LEVEL.
+
+    Returns:
+        DataFrame (ativos × indicadores) de indicators.risk_return_indicators,
+        sem a linha do próprio benchmark.
+
+    Raises:
+        KeyError: Se o benchmark não estiver no painel.
+        RuntimeError: Se a série do BCB vier vazia.
+    """
+    benchmark = benchmark or BENCHMARK_TICKER
+    series_id = RISK_FREE_BCB_SERIES if series_id is None else series_id
+    if benchmark not in prices.columns:
+        raise KeyError(f"benchmark {benchmark!r} ausente do painel")
+
+    returns = simple_returns(prices)
+    start = pd.Timestamp(returns.index.min()).strftime("%d/%m/%Y")
+    rate_type = "annual_pct" if series_id == 432 else "daily_pct"
+    risk_free = risk_free_returns(_fetch_bcb_series(series_id, start), rate_type)
+
+    result = risk_return_indicators(
+        returns.drop(columns=[benchmark]), returns[benchmark], risk_free, var_level
+    )
+    log.info(
+        "compute_indicators.ok",
+        ativos=len(result),
+        benchmark=benchmark,
+        livre_de_risco=f"BCB série {series_id}",
+    )
+    return result
+
+
+# ---------------------------------------------------------------------------
+# 8. Backtest de rebalanceamento
+# ---------------------------------------------------------------------------
+
+
+def backtest_portfolio(
+    assets: Dict[str, Dict[str, Any]],
+    ibov_df: pd.DataFrame,
+    policies: Optional[List[Dict[str, Any]]] = None,
+    weights: Optional[Dict[str, float]] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Backtest da carteira (RF LP High / LFT 2031 / LCA) contra o IBOVESPA.
+
+    Roda backtest.backtest_rebalancing nas datas comuns aos ativos e devolve
+    cada série no formato de normalize_series (base 100 na primeira data
+    comum), o mesmo que generate_comparison_chart usa. O IBOVESPA é alinhado
+    a essas datas repetindo o último fechamento em dias sem pregão na B3.
+
+    Args:
+        assets: Dict de fetch_portfolio_assets().
+        ibov_df: DataFrame de fetch_ibovespa_history().
+        policies: Políticas de rebalanceamento. Default: backtest.DEFAULT_POLICIES.
+        weights: Peso-alvo de cada ativo. Default: iguais.
+
+    Returns:
+        Dict nome → DataFrame (Date, Value, Normalized): "ibovespa" e uma
+        entrada por política.
+
+    Raises:
+        ValueError: Ativos sem datas comuns suficientes ou política inválida.
+    """
+    prices = portfolio_prices(assets)
+    result = backtest_rebalancing(prices, weights, policies)
+    ibov = ibov_df.dropna(subset=["Close"]).set_index("Date")["Close"]
+    close = align_series(ibov, prices.index, fill=True)
+
+    frames = {
+        "ibovespa": normalize_series(pd.DataFrame({"Date": prices.index, "Value": close}), "Value")
+    }
+    for name, values in result["values"].items():
+        frame = pd.DataFrame({"Date": prices.index, "Value": values.to_numpy()})
+        frames[name] = normalize_series(frame, "Value")
+
+    summary = result["summary"]
+    log.info(
+        "backtest_portfolio.ok",
+        inicio=str(prices.index[0].date()),
+        fim=str(prices.index[-1].date()),
+        ibovespa=round(float(frames["ibovespa"]["Normalized"].iloc[-1]), 2),
+        **{name: round(float(value), 2) for name, value in summary["final_value"].items()},
+    )
+    return frames
+
+
+# ---------------------------------------------------------------------------
+# 9. Pipeline da Sessão 01 (etapas memorizadas em disco)
+# ---------------------------------------------------------------------------
+
+# Ordem das etapas; --from-stage recalcula a etapa indicada e as seguintes
+PIPELINE_STAGES = ("history", "projection", "assets", "chart")
+
+
+def _modules_of(*objs: Any) -> List[Any]:
+    """Módulos que definem os objetos (entram em code_version pelo arquivo inteiro)."""
+    return [sys.modules[obj.__module__] for obj in objs]
+
+
+def _assets_code_version() -> str:
+    """
+    Versão do código da etapa "assets".
+
+    Os fetchers de PORTFOLIO_ASSETS só percorrem as cadeias; a versão inclui
+    também a definição de cada cadeia (fontes, timeouts, tiers), as funções
+    de cada fonte, os auxiliares do BCB e os arquivos dos módulos de cadeia,
+    cache e armazenamento que elas usam.
+    """
+    chains = (_RF_LP_HIGH_CHAIN, _LFT_2031_CHAIN, _LCA_BB_PREFIXADA_CHAIN)
+    layout, fetchers = [], []
+    for chain in chains:
+        for source in chain.sources:
+            fetch = source.fetch
+            if isinstance(fetch, functools.partial):
+                layout.append([str(arg) for arg in fetch.args])
+                fetch = fetch.func
+            layout.append([chain.name, source.name, source.proxy, source.timeout, source.tier])
+            fetchers.append(fetch)
+    modules = _modules_of(
+        SourceChain,
+        SingleFlight,
+        PriceHistoryStore,
+        BcbSeriesStore,
+        CvmArchiveCache,
+        FundRegistry,
+        fetch_fund_quotas,
+        http_get,
+    )
+    return fingerprint(
+        layout,
+        code_version(
+            fetch_portfolio_assets,
+            *PORTFOLIO_ASSETS.values(),
+            *fetchers,
+            _fetch_bcb_series,
+            _load_bcb_series,
+            _accumulate_rate_to_index,
+            *modules,
+        ),
+    )
+
+
+def run_session_01(
+    force: bool = False,
+    from_stage: Optional[str] = None,
+    cache: Optional[StageCache] = None,
+    years: int = 5,
+    n_periods: int = 504,
+    output_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Executa histórico → projeção → ativos → gráfico reaproveitando etapas inalteradas.
+
+    A chave de cada etapa combina parâmetros, versão do código da etapa
+    (funções e módulos que elas usam: price_store, arima_cache/arima_search,
+    cadeias de fontes) e o conteúdo das saídas das etapas anteriores. Histórico e ativos dependem de
+    fontes externas: a chave inclui a data do dia, então são buscados no máximo
+    uma vez por dia. Mudar só o gráfico refaz só o gráfico.
+
+    Args:
+        force: Recalcula todas as etapas.
+        from_stage: Recalcula a etapa indicada e as seguintes (PIPELINE_STAGES).
+        cache: Onde gravar as saídas. Default: StageCache() (PIPELINE_CACHE_DIR).
+        years: Anos de histórico do IBOVESPA.
+        n_periods: Dias úteis de projeção.
+        output_path: Caminho do PNG. Default: o de generate_comparison_chart.
+
+    Returns:
+        Dict com history, projection, assets e chart (caminho do PNG).
+
+    Raises:
+        ValueError: Se from_stage não for uma etapa conhecida.
+    """
+    if from_stage is not None and from_stage not in PIPELINE_STAGES:
+        raise ValueError(f"etapa desconhecida: {from_stage!r} (use {PIPELINE_STAGES})")
+    if force:
+        first_forced = 0
+    elif from_stage is not None:
+        first_forced = PIPELINE_STAGES.index(from_stage)
+    else:
+        first_forced = len(PIPELINE_STAGES)
+    cache = cache if cache is not None else StageCache()
+    today = date.today()
+
+    def forced(stage: str) -> bool:
+        return PIPELINE_STAGES.index(stage) >= first_forced
+
+    ibov = cache.run(
+        "history",
+        fingerprint(
+            years,
+            today,
+            code_version(fetch_ibovespa_history, _close_frame, *_modules_of(load_history)),
+        ),
+        lambda: fetch_ibovespa_history(years=years),
+        force=forced("history"),
+    )
+    proj = cache.run(
+        "projection",
+        fingerprint(
+            ibov,
+            n_periods,
+            code_version(
+                project_ibovespa,
+                _search_arima_order,
+                _project_with_statsmodels,
+                *_modules_of(ArimaModelCache, grid_search),
+            ),
+        ),
+        lambda: project_ibovespa(ibov, n_periods=n_periods),
+        force=forced("projection"),
+    )
+    assets = cache.run(
+        "assets",
+        fingerprint(list(PORTFOLIO_ASSETS), today, _assets_code_version()),
+        fetch_portfolio_assets,
+        force=forced("assets"),
+    )
+    chart = cache.run(
+        "chart",
+        fingerprint(
+            ibov,
+            proj,
+            assets,
+            output_path,
+            today,
+            code_version(generate_comparison_chart, normalize_series),
+        ),
+        lambda: generate_comparison_chart(ibov, proj, assets, output_path=output_path),
+        force=forced("chart"),
+        valid=lambda path: Path(path).exists(),
+    )
+    return {"history": ibov, "projection": proj, "assets": assets, "chart": chart}
+
+
 # ---------------------------------------------------------------------------
 # Execução standalone
 # ---------------------------------------------------------------------------
 
 if __name__ == "__main__":
+    import argparse
+
     import structlog
 
+    parser = argparse.ArgumentParser(description="Sessão 01 — IBOVESPA vs carteira atual")
+    parser.add_argument("--force", action="store_true", help="recalcula todas as etapas")
+    parser.add_argument(
+        "--from-stage",
+        choices=PIPELINE_STAGES,
+        help="recalcula a etapa indicada e as seguintes",
+    )
+    args = parser.parse_args()
+
     structlog.configure(
         processors=[
             structlog.dev.ConsoleRenderer(),
@@ -947,20 +1402,20 @@ if __name__ == "__main__":
     print("Sessão 01 — IBOVESPA + Comparação com Carteira Atual")
     print("=" * 60)
 
-    print("\n[1/4] Buscando histórico IBOVESPA...")
-    ibov = fetch_ibovespa_history()
+    session = run_session_01(force=args.force, from_stage=args.from_stage)
+    ibov, proj, assets = session["history"], session["projection"], session["assets"]
+
+    print("\n[1/4] Histórico IBOVESPA")
     print(
         f"  → {len(ibov)} registros | {ibov['Date'].min().date()} → {ibov['Date'].max().date()}"
     )
 
-    print("\n[2/4] Projetando IBOVESPA (ARIMA, 2 anos)...")
-    proj = project_ibovespa(ibov)
+    print("\n[2/4] Projeção IBOVESPA (ARIMA, 2 anos)")
     print(
         f"  → {len(proj)} pontos | {proj['Date'].iloc[0].date()} → {proj['Date'].iloc[-1].date()}"
     )
 
-    print("\n[3/4] Buscando ativos da carteira...")
-    assets = fetch_portfolio_assets()
+    print("\n[3/4] Ativos da carteira")
     for key, val in assets.items():
         proxy_tag = " [PROXY]" if val["proxy_used"] else ""
         print(f"  {key}:")
@@ -968,8 +1423,7 @@ if __name__ == "__main__":
         print(f"    Período: {val['period']}")
         print(f"    Registros: {len(val['data'])}")
 
-    print("\n[4/4] Gerando gráfico comparativo...")
-    output = generate_comparison_chart(ibov, proj, assets)
-    print(f"  → Gráfico salvo em: {output}")
+    print("\n[4/4] Gráfico comparativo")
+    print(f"  → Gráfico salvo em: {session['chart']}")
 
     print("\n✓ Sessão 01 concluída.")
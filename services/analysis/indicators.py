@@ -0,0 +1,193 @@
+"""
+Indicadores de risco e retorno sobre um painel de retornos
+==========================================================
+Calcula, para todos os ativos de uma vez (operações matriciais NumPy, sem
+laço Python por ativo), os indicadores listados no README:
+
+ - Alfa de Jensen e Beta (CAPM, sobre retornos em excesso ao livre de risco);
+ - Sharpe, Treynor e Sortino (anualizados);
+ - R² e correlação com o benchmark;
+ - VaR e CVaR históricos diários no nível INDICATORS_VAR_LEVEL.
+
+O painel segue o formato de fetch_price_panel (linhas = datas, colunas =
+ativos) e pode ter lacunas (NaN): cada ativo usa só as datas em que ele e o
+benchmark têm retorno. O livre de risco é a série diária do BCB (CDI, série
+12) convertida por risk_free_returns().
+
+Configuração (variáveis de ambiente):
+    INDICATORS_VAR_LEVEL: Nível de confiança do VaR/CVaR. Default: 0.95.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+import structlog
+
+log = structlog.get_logger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+INDICATORS_VAR_LEVEL = float(os.getenv("INDICATORS_VAR_LEVEL", "0.95"))
+
+
+def simple_returns(prices: pd.DataFrame) -> pd.DataFrame:
+    """
+    Retornos simples diários de um painel de preços (datas × ativos).
+
+    Lacunas não são preenchidas: o retorno após um NaN também é NaN.
+    """
+    return prices.sort_index().pct_change(fill_method=None).iloc[1:]
+
+
+def risk_free_returns(rate_df: pd.DataFrame, rate_type: str = "daily_pct") -> pd.Series:
+    """
+    Converte uma série de taxas do BCB (_fetch_bcb_series) em retorno diário decimal.
+
+    Args:
+        rate_df: DataFrame com colunas Date e Rate.
+        rate_type: "daily_pct" (% ao dia, série 12 — CDI) ou "annual_pct"
+            (% ao ano, série 432 — SELIC, convertida por (1 + taxa)^(1/252) − 1).
+
+    Returns:
+        Series de retornos diários indexada por Date.
+
+    Raises:
+        ValueError: Se rate_type for inválido.
+    """
+    rates = rate_df.set_index("Date")["Rate"].astype(float).sort_index() / 100
+    if rate_type == "daily_pct":
+        return rates.rename("risk_free")
+    if rate_type == "annual_pct":
+        return ((1 + rates) ** (1 / TRADING_DAYS_PER_YEAR) - 1).rename("risk_free")
+    raise ValueError(f"indicators: rate_type inválido {rate_type!r}")
+
+
+def align_series(values: Union[pd.Series, float, None], index: pd.Index, fill: bool) -> np.ndarray:
+    """
+    Série (ou escalar) alinhada às datas do painel, como array float64.
+
+    Args:
+        values: Series indexada por data, escalar ou None (zeros).
+        index: Datas do painel.
+        fill: Preenche datas sem valor com o último anterior (taxas do BCB).
+    """
+    if values is None:
+        return np.zeros(len(index))
+    if np.isscalar(values):
+        return np.full(len(index), float(values))
+    aligned = values.sort_index().reindex(index.union(values.index))
+    if fill:
+        aligned = aligned.ffill()
+    return aligned.reindex(index).to_numpy(dtype=np.float64)
+
+
+def _tail_risk(returns: np.ndarray, valid: np.ndarray, level: float) -> np.ndarray:
+    """VaR e CVaR históricos por coluna (2 × ativos), ignorando datas inválidas."""
+    # NaN ordenado ao fim: as n primeiras linhas de cada coluna são as válidas
+    ordered = np.sort(np.where(valid, returns, np.nan), axis=0)
+    n = valid.sum(axis=0)
+    k = np.floor((1 - level) * (n - 1)).astype(np.int64)
+    k = np.clip(k, 0, None)
+    cols = np.arange(ordered.shape[1])
+    var = np.where(n > 0, ordered[k, cols], np.nan)
+    # Soma acumulada só da cauda (até a maior posição de VaR), não do painel todo
+    head = np.nan_to_num(ordered[: int(k.max(initial=0)) + 1])
+    cvar = np.where(n > 0, np.cumsum(head, axis=0)[k, cols] / (k + 1), np.nan)
+    return np.vstack([var, cvar])
+
+
+def risk_return_indicators(
+    returns: pd.DataFrame,
+    benchmark: pd.Series,
+    risk_free: Union[pd.Series, float, None] = None,
+    var_level: Optional[float] = None,
+    periods_per_year: int = TRADING_DAYS_PER_YEAR,
+) -> pd.DataFrame:
+    """
+    Indicadores de risco e retorno de todos os ativos do painel, em uma passada.
+
+    Momentos por ativo são somas mascaradas (matriz de válidos × retornos),
+    então ativos com históricos de tamanhos diferentes convivem no mesmo painel.
+
+    Args:
+        returns: Retornos simples diários, datas × ativos (simple_returns()).
+        benchmark: Retornos diários do benchmark (ex: IBOVESPA) indexados por data.
+        risk_free: Retorno diário livre de risco (risk_free_returns()) ou
+            escalar. Datas sem taxa publicada usam a última anterior. Default: 0.
+        var_level: Nível do VaR/CVaR. Default: INDICATORS_VAR_LEVEL.
+        periods_per_year: Períodos por ano para anualizar. Default: 252.
+
+    Returns:
+        DataFrame (ativos × indicadores) com observations, annual_return,
+        annual_volatility, alpha, beta, sharpe, treynor, sortino, r_squared,
+        correlation, var_XX e cvar_XX (VaR/CVaR diários, negativos = perda).
+        Indicadores sem dados suficientes ficam NaN.
+
+    Raises:
+        ValueError: Se var_level não estiver em (0, 1).
+    """
+    level = INDICATORS_VAR_LEVEL if var_level is None else var_level
+    if not 0 < level < 1:
+        raise ValueError(f"indicators: nível de VaR inválido {level}")
+
+    index = returns.index
+    r = returns.to_numpy(dtype=np.float64)
+    b = align_series(benchmark, index, fill=False)
+    rf = align_series(risk_free, index, fill=True)
+    valid = np.isfinite(r) & np.isfinite(b)[:, None] & np.isfinite(rf)[:, None]
+    m = valid.astype(np.float64)
+
+    ex = np.where(valid, r - rf[:, None], 0.0)  # excesso do ativo (0 fora da máscara)
+    exb = np.nan_to_num(b - rf)  # excesso do benchmark
+    raw = np.where(valid, r, 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n = m.sum(axis=0)
+        dof = np.where(n > 1, n - 1, np.nan)
+        # Somas por ativo sobre as datas válidas dele: produtos matriciais com a máscara
+        s_x, s_xx = ex.sum(axis=0), (ex * ex).sum(axis=0)
+        s_b, s_bb = exb @ m, (exb * exb) @ m
+        s_xb = exb @ ex
+
+        mean_x, mean_b = s_x / n, s_b / n
+        var_x = (s_xx - s_x * mean_x) / dof
+        var_b = (s_bb - s_b * mean_b) / dof
+        cov = (s_xb - s_x * mean_b) / dof
+        sd_x, sd_b = np.sqrt(np.clip(var_x, 0, None)), np.sqrt(np.clip(var_b, 0, None))
+
+        beta = cov / var_b
+        correlation = cov / (sd_x * sd_b)
+        downside = np.sqrt((np.minimum(ex, 0.0) ** 2).sum(axis=0) / n)
+
+        mean_r = raw.sum(axis=0) / n
+        var_r = ((raw * raw).sum(axis=0) - raw.sum(axis=0) * mean_r) / dof
+        annual = periods_per_year
+        out = {
+            "observations": n.astype(np.int64),
+            "annual_return": mean_r * annual,
+            "annual_volatility": np.sqrt(np.clip(var_r, 0, None) * annual),
+            "alpha": (mean_x - beta * mean_b) * annual,
+            "beta": beta,
+            "sharpe": mean_x / sd_x * np.sqrt(annual),
+            "treynor": mean_x * annual / beta,
+            "sortino": mean_x / downside * np.sqrt(annual),
+            "r_squared": correlation**2,
+            "correlation": correlation,
+        }
+
+    tag = f"{level * 100:g}".replace(".", "_")
+    out[f"var_{tag}"], out[f"cvar_{tag}"] = _tail_risk(r, valid, level)
+    result = pd.DataFrame(out, index=returns.columns)
+    result.index.name = "asset"
+
+    log.info(
+        "indicators.ok",
+        ativos=r.shape[1],
+        datas=r.shape[0],
+        sem_dados=int((n < 2).sum()),
+        nivel_var=level,
+    )
+    return result
@@ -0,0 +1,549 @@
+"""
+Projeção Monte Carlo do IBOVESPA (e de qualquer série de fechamento)
+====================================================================
+Gera todos os caminhos de preço num único array NumPy (iterações × pregões)
+em float32, bloco a bloco (chunk_size caminhos por vez) para limitar a memória
+temporária. Três métodos de amostragem dos log-retornos diários:
+
+ - "bootstrap": reamostra com reposição os log-retornos históricos;
+ - "gbm": movimento browniano geométrico — normal com média e desvio dos
+   log-retornos históricos;
+ - "arima": ARIMA(1,1,0) no log do preço, isto é, AR(1) nos log-retornos
+   ajustado por mínimos quadrados, com os resíduos históricos reamostrados.
+
+As bandas seguem o formato de project_ibovespa: Date, Projected_Close
+(mediana dos caminhos) e CI_Lower_XX / CI_Upper_XX por nível de confiança.
+
+Com muitos caminhos (streaming), os blocos não são guardados: cada bloco
+alimenta um QuantileSketch (histograma logarítmico por pregão) e é descartado.
+A memória fica constante — um bloco mais o sketch — e cada banda fica a menos
+de MONTE_CARLO_SKETCH_ERROR (relativo) do percentil exato dos caminhos.
+
+Para a carteira (vários ativos correlacionados), project_portfolio_monte_carlo
+divide os caminhos entre processos (shards) e reduz por QuantileSketch.
+
+Configuração (variáveis de ambiente):
+    MONTE_CARLO_ITERATIONS: Caminhos simulados. Default: 10000.
+    MONTE_CARLO_CONFIDENCE_LEVELS: Níveis das bandas. Default: 0.95,0.99.
+    MONTE_CARLO_PROJECTION_YEARS: Horizonte em anos (252 pregões/ano). Default: 2.
+    MONTE_CARLO_CHUNK_SIZE: Caminhos gerados por bloco. Default: 4096.
+    MONTE_CARLO_STREAMING_ITERATIONS: A partir de quantos caminhos as bandas
+        são calculadas em streaming. Default: 200000.
+    MONTE_CARLO_SKETCH_ERROR: Erro relativo máximo das bandas em streaming. Default: 0.001.
+    MONTE_CARLO_WORKERS: Processos (shards) da simulação da carteira. Default: 4.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import structlog
+
+from quantile_sketch import QuantileSketch
+
+log = structlog.get_logger(__name__)
+
+TRADING_DAYS_PER_YEAR = 252
+MONTE_CARLO_ITERATIONS = int(os.getenv("MONTE_CARLO_ITERATIONS", "10000"))
+MONTE_CARLO_CONFIDENCE_LEVELS = tuple(
+    float(x) for x in os.getenv("MONTE_CARLO_CONFIDENCE_LEVELS", "0.95,0.99").split(",") if x
+)
+MONTE_CARLO_PROJECTION_YEARS = float(os.getenv("MONTE_CARLO_PROJECTION_YEARS", "2"))
+MONTE_CARLO_CHUNK_SIZE = int(os.getenv("MONTE_CARLO_CHUNK_SIZE", "4096"))
+MONTE_CARLO_STREAMING_ITERATIONS = int(os.getenv("MONTE_CARLO_STREAMING_ITERATIONS", "200000"))
+MONTE_CARLO_SKETCH_ERROR = float(os.getenv("MONTE_CARLO_SKETCH_ERROR", "0.001"))
+
+METHODS = ("bootstrap", "gbm", "arima")
+
+# |phi| do AR(1) limitado para manter a simulação estacionária
+_MAX_AR_COEF = 0.99
+
+
+def default_horizon() -> int:
+    """Pregões projetados (MONTE_CARLO_PROJECTION_YEARS × 252; 504 para 2 anos)."""
+    return int(round(MONTE_CARLO_PROJECTION_YEARS * TRADING_DAYS_PER_YEAR))
+
+
+def log_returns(historical_df: pd.DataFrame) -> Tuple[np.ndarray, float, pd.Timestamp]:
+    """
+    Log-retornos diários, último fechamento e última data do histórico.
+
+    Args:
+        historical_df: DataFrame com colunas Date e Close (fetch_ibovespa_history()).
+
+    Raises:
+        ValueError: Se houver menos de 3 fechamentos válidos.
+    """
+    close = historical_df.set_index("Date")["Close"].dropna().sort_index()
+    if len(close) < 3:
+        raise ValueError("monte_carlo: histórico precisa de ao menos 3 fechamentos")
+    values = close.to_numpy(dtype=np.float64)
+    return np.diff(np.log(values)), float(values[-1]), pd.Timestamp(close.index[-1])
+
+
+# ---------------------------------------------------------------------------
+# Geradores de log-retornos (um bloco de caminhos por chamada)
+# ---------------------------------------------------------------------------
+
+
+def _ar1_fit(returns: np.ndarray) -> Tuple[float, float, np.ndarray]:
+    """AR(1) por mínimos quadrados: r_t = c + phi·r_{t-1} + e_t. Devolve (c, phi, resíduos)."""
+    x, y = returns[:-1], returns[1:]
+    var = float(np.var(x))
+    phi = float(np.cov(x, y, bias=True)[0, 1] / var) if var > 0 else 0.0
+    phi = float(np.clip(phi, -_MAX_AR_COEF, _MAX_AR_COEF))
+    c = float(y.mean() - phi * x.mean())
+    return c, phi, (y - c - phi * x)
+
+
+class _Sampler:
+    """Estado de um método de amostragem: parâmetros estimados uma vez por simulação."""
+
+    def __init__(self, method: str, returns: np.ndarray) -> None:
+        if method not in METHODS:
+            raise ValueError(f"monte_carlo: método desconhecido {method!r} (use {METHODS})")
+        self.method = method
+        self.returns = returns.astype(np.float32)
+        self.mu = np.float32(returns.mean())
+        self.sigma = np.float32(returns.std(ddof=1))
+        if method == "arima":
+            c, phi, resid = _ar1_fit(returns)
+            self.c, self.phi = np.float32(c), np.float32(phi)
+            self.resid = resid.astype(np.float32)
+            self.last_return = np.float32(returns[-1])
+
+    def params(self) -> Dict[str, float]:
+        out = {"mu": float(self.mu), "sigma": float(self.sigma)}
+        if self.method == "arima":
+            out.update(c=float(self.c), phi=float(self.phi))
+        return out
+
+    def __call__(self, rng: np.random.Generator, n: int, horizon: int) -> np.ndarray:
+        """Bloco (n, horizon) de log-retornos em float32."""
+        if self.method == "bootstrap":
+            return self.returns[rng.integers(0, len(self.returns), size=(n, horizon))]
+        if self.method == "gbm":
+            z = rng.standard_normal(size=(n, horizon), dtype=np.float32)
+            z *= self.sigma
+            z += self.mu
+            return z
+        # arima: r_t = c + e_t + phi·r_{t-1}. A recursão anda no tempo; cada passo
+        # é uma operação vetorial sobre os n caminhos (layout pregão × caminho)
+        drive = self.resid[rng.integers(0, len(self.resid), size=(horizon, n))]
+        drive += self.c
+        prev = np.full(n, self.last_return, dtype=np.float32)
+        for t in range(horizon):
+            row = drive[t]
+            row += self.phi * prev
+            prev = row
+        return drive.T
+
+
+# ---------------------------------------------------------------------------
+# Simulação e bandas
+# ---------------------------------------------------------------------------
+
+
+def _fill_block(
+    sampler: _Sampler, rng: np.random.Generator, block: np.ndarray, last_close: float
+) -> None:
+    """Preenche block (n, horizonte) com preços simulados, in-place."""
+    np.cumsum(sampler(rng, block.shape[0], block.shape[1]), axis=1, out=block)
+    np.exp(block, out=block)
+    block *= np.float32(last_close)
+
+
+def simulate_paths(
+    historical_df: pd.DataFrame,
+    method: str = "bootstrap",
+    iterations: Optional[int] = None,
+    horizon: Optional[int] = None,
+    seed: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Caminhos de preço simulados a partir do último fechamento.
+
+    Args:
+        historical_df: DataFrame com Date e Close (fetch_ibovespa_history()).
+        method: "bootstrap", "gbm" ou "arima".
+        iterations: Caminhos. Default: MONTE_CARLO_ITERATIONS.
+        horizon: Pregões à frente. Default: default_horizon() (504).
+        seed: Semente do gerador (resultado reprodutível).
+        chunk_size: Caminhos por bloco. Default: MONTE_CARLO_CHUNK_SIZE.
+
+    Returns:
+        Array float32 (iterations, horizon) com o preço de cada caminho em cada pregão.
+
+    Raises:
+        ValueError: Método desconhecido ou histórico insuficiente.
+    """
+    iterations = MONTE_CARLO_ITERATIONS if iterations is None else iterations
+    horizon = default_horizon() if horizon is None else horizon
+    chunk_size = max(1, MONTE_CARLO_CHUNK_SIZE if chunk_size is None else chunk_size)
+    returns, last_close, _ = log_returns(historical_df)
+    sampler = _Sampler(method, returns)
+    rng = np.random.default_rng(seed)
+
+    paths = np.empty((iterations, horizon), dtype=np.float32)
+    for start in range(0, iterations, chunk_size):
+        _fill_block(sampler, rng, paths[start : start + chunk_size], last_close)
+
+    log.info(
+        "monte_carlo.simulado",
+        metodo=method,
+        iteracoes=iterations,
+        horizonte=horizon,
+        mb=round(paths.nbytes / 2**20, 1),
+        **{k: round(v, 6) for k, v in sampler.params().items()},
+    )
+    return paths
+
+
+def sketch_paths(
+    historical_df: pd.DataFrame,
+    method: str = "bootstrap",
+    iterations: Optional[int] = None,
+    horizon: Optional[int] = None,
+    seed: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    relative_error: Optional[float] = None,
+) -> QuantileSketch:
+    """
+    Simula os caminhos em streaming, acumulando só um QuantileSketch.
+
+    Gera exatamente os mesmos caminhos de simulate_paths (mesma semente e
+    chunk_size), mas reaproveita um único buffer de chunk_size × horizonte:
+    a memória não depende de iterations.
+
+    Args:
+        historical_df: DataFrame com Date e Close (fetch_ibovespa_history()).
+        method: "bootstrap", "gbm" ou "arima".
+        iterations: Caminhos. Default: MONTE_CARLO_ITERATIONS.
+        horizon: Pregões à frente. Default: default_horizon() (504).
+        seed: Semente do gerador (resultado reprodutível).
+        chunk_size: Caminhos por bloco. Default: MONTE_CARLO_CHUNK_SIZE.
+        relative_error: Erro relativo do sketch. Default: MONTE_CARLO_SKETCH_ERROR.
+
+    Returns:
+        QuantileSketch (horizonte passos) com todos os caminhos.
+
+    Raises:
+        ValueError: Método desconhecido ou histórico insuficiente.
+    """
+    iterations = MONTE_CARLO_ITERATIONS if iterations is None else iterations
+    horizon = default_horizon() if horizon is None else horizon
+    chunk_size = max(1, MONTE_CARLO_CHUNK_SIZE if chunk_size is None else chunk_size)
+    relative_error = MONTE_CARLO_SKETCH_ERROR if relative_error is None else relative_error
+    returns, last_close, _ = log_returns(historical_df)
+    sampler = _Sampler(method, returns)
+    rng = np.random.default_rng(seed)
+
+    sketch = QuantileSketch(horizon, relative_error)
+    buffer = np.empty((min(chunk_size, max(iterations, 1)), horizon), dtype=np.float32)
+    for start in range(0, iterations, chunk_size):
+        block = buffer[: min(chunk_size, iterations - start)]
+        _fill_block(sampler, rng, block, last_close)
+        sketch.add(block)
+
+    log.info(
+        "monte_carlo.simulado_streaming",
+        metodo=method,
+        iteracoes=iterations,
+        horizonte=horizon,
+        erro_relativo=relative_error,
+        mb=round((buffer.nbytes + sketch.nbytes) / 2**20, 1),
+        **{k: round(v, 6) for k, v in sampler.params().items()},
+    )
+    return sketch
+
+
+def band_quantiles(levels: Sequence[float]) -> np.ndarray:
+    """Quantis usados nas bandas: mediana e (1 ± nível)/2 de cada nível, ordenados."""
+    qs = {0.5}
+    for level in levels:
+        if not 0 < level < 1:
+            raise ValueError(f"monte_carlo: nível de confiança inválido {level}")
+        qs.update({(1 - level) / 2, (1 + level) / 2})
+    return np.array(sorted(qs))
+
+
+def bands_frame(
+    quantiles: np.ndarray,
+    values: np.ndarray,
+    last_date: pd.Timestamp,
+    levels: Sequence[float],
+) -> pd.DataFrame:
+    """
+    Monta o DataFrame no formato de project_ibovespa a partir dos quantis por pregão.
+
+    Args:
+        quantiles: Quantis (ordenados) de band_quantiles().
+        values: Array (len(quantiles), horizonte) com o valor de cada quantil.
+        last_date: Última data histórica; a projeção começa no dia útil seguinte.
+        levels: Níveis de confiança (geram CI_Lower_XX / CI_Upper_XX).
+    """
+    index = {round(float(q), 10): i for i, q in enumerate(quantiles)}
+    horizon = values.shape[1]
+    out = {
+        "Date": pd.bdate_range(start=last_date + pd.Timedelta(days=1), periods=horizon),
+        "Projected_Close": values[index[0.5]].astype(np.float64),
+    }
+    for level in levels:
+        tag = f"{level * 100:g}".replace(".", "_")
+        out[f"CI_Lower_{tag}"] = values[index[round((1 - level) / 2, 10)]].astype(np.float64)
+        out[f"CI_Upper_{tag}"] = values[index[round((1 + level) / 2, 10)]].astype(np.float64)
+    return pd.DataFrame(out)
+
+
+def projection_bands(
+    paths: np.ndarray,
+    last_date: pd.Timestamp,
+    levels: Optional[Sequence[float]] = None,
+) -> pd.DataFrame:
+    """
+    Bandas percentis dos caminhos, no formato de project_ibovespa.
+
+    Args:
+        paths: Array (iterações, horizonte) de simulate_paths().
+        last_date: Última data do histórico.
+        levels: Níveis de confiança. Default: MONTE_CARLO_CONFIDENCE_LEVELS.
+
+    Returns:
+        DataFrame com Date, Projected_Close (mediana) e CI_Lower_XX / CI_Upper_XX.
+    """
+    levels = MONTE_CARLO_CONFIDENCE_LEVELS if levels is None else tuple(levels)
+    qs = band_quantiles(levels)
+    return bands_frame(qs, np.quantile(paths, qs, axis=0), last_date, levels)
+
+
+def project_monte_carlo(
+    historical_df: pd.DataFrame,
+    method: str = "bootstrap",
+    iterations: Optional[int] = None,
+    n_periods: Optional[int] = None,
+    seed: Optional[int] = None,
+    levels: Optional[Sequence[float]] = None,
+    chunk_size: Optional[int] = None,
+    streaming: Optional[bool] = None,
+    relative_error: Optional[float] = None,
+) -> pd.DataFrame:
+    """
+    Projeta o fechamento por Monte Carlo — alternativa a project_ibovespa.
+
+    Em streaming (sketch_paths) cada banda é o percentil de posição
+    ⌊q·(n−1)⌋ dos caminhos com erro relativo ≤ relative_error; fora dele,
+    percentis exatos (np.quantile) sobre o array completo de caminhos.
+
+    Args:
+        historical_df: DataFrame retornado por fetch_ibovespa_history().
+        method: "bootstrap", "gbm" ou "arima".
+        iterations: Caminhos. Default: MONTE_CARLO_ITERATIONS (10000).
+        n_periods: Dias úteis de projeção. Default: default_horizon() (504).
+        seed: Semente (resultado reprodutível).
+        levels: Níveis de confiança. Default: MONTE_CARLO_CONFIDENCE_LEVELS.
+        chunk_size: Caminhos por bloco. Default: MONTE_CARLO_CHUNK_SIZE.
+        streaming: Calcula as bandas em streaming. Default: iterations >=
+            MONTE_CARLO_STREAMING_ITERATIONS.
+        relative_error: Erro relativo em streaming. Default: MONTE_CARLO_SKETCH_ERROR.
+
+    Returns:
+        DataFrame com Date, Projected_Close, CI_Lower_95, CI_Upper_95
+        (e as colunas dos demais níveis de confiança).
+    """
+    iterations = MONTE_CARLO_ITERATIONS if iterations is None else iterations
+    if streaming is None:
+        streaming = iterations >= MONTE_CARLO_STREAMING_ITERATIONS
+    _, _, last_date = log_returns(historical_df)
+    if streaming:
+        levels = MONTE_CARLO_CONFIDENCE_LEVELS if levels is None else tuple(levels)
+        qs = band_quantiles(levels)
+        sketch = sketch_paths(
+            historical_df, method, iterations, n_periods, seed, chunk_size, relative_error
+        )
+        result = bands_frame(qs, sketch.quantiles(qs), last_date, levels)
+    else:
+        paths = simulate_paths(historical_df, method, iterations, n_periods, seed, chunk_size)
+        result = projection_bands(paths, last_date, levels)
+    log.info(
+        "monte_carlo.ok",
+        metodo=method,
+        streaming=streaming,
+        data_inicio_projecao=str(result["Date"].iloc[0].date()),
+        data_fim_projecao=str(result["Date"].iloc[-1].date()),
+    )
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Carteira — ativos correlacionados, caminhos divididos em shards paralelos
+# ---------------------------------------------------------------------------
+
+PORTFOLIO_METHODS = ("bootstrap", "gbm")
+MONTE_CARLO_WORKERS = int(os.getenv("MONTE_CARLO_WORKERS", "4"))
+
+
+def portfolio_prices(assets: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Valores dos ativos nas datas comuns a todos (datas × ativos, ordenado).
+
+    Args:
+        assets: Dict de fetch_portfolio_assets() (cada "data" com Date e Value).
+    """
+    series = {}
+    for key, asset in assets.items():
+        values = asset["data"].set_index("Date")["Value"].dropna().sort_index()
+        series[key] = values[~values.index.duplicated(keep="last")]
+    return pd.concat(series, axis=1, join="inner").sort_index()
+
+
+def portfolio_returns(assets: Dict[str, Dict[str, Any]]) -> Tuple[pd.DataFrame, pd.Timestamp]:
+    """
+    Log-retornos diários conjuntos dos ativos, nas datas comuns a todos.
+
+    Args:
+        assets: Dict de fetch_portfolio_assets() (cada "data" com Date e Value).
+
+    Returns:
+        (DataFrame datas × ativos de log-retornos, última data comum).
+
+    Raises:
+        ValueError: Menos de 3 datas comuns.
+    """
+    joint = portfolio_prices(assets)
+    if len(joint) < 3:
+        raise ValueError("monte_carlo: ativos precisam de ao menos 3 datas em comum")
+    return np.log(joint).diff().dropna(), pd.Timestamp(joint.index[-1])
+
+
+def _covariance_factor(returns: np.ndarray) -> np.ndarray:
+    """Fator L com L·Lᵀ = covariância (autovalores negativos de arredondamento zerados)."""
+    cov = np.atleast_2d(np.cov(returns, rowvar=False))
+    eigval, eigvec = np.linalg.eigh(cov)
+    return eigvec * np.sqrt(np.clip(eigval, 0.0, None))
+
+
+def _portfolio_shard(
+    returns: np.ndarray,
+    weights: np.ndarray,
+    method: str,
+    n_paths: int,
+    horizon: int,
+    chunk_size: int,
+    seed: np.random.SeedSequence,
+    relative_error: float,
+) -> QuantileSketch:
+    """Simula n_paths caminhos da carteira (base 100) e devolve só o sketch de quantis."""
+    rng = np.random.default_rng(seed)
+    sketch = QuantileSketch(horizon, relative_error)
+    r32 = returns.astype(np.float32)
+    w100 = (100 * weights).astype(np.float32)
+    if method == "gbm":
+        mu = returns.mean(axis=0).astype(np.float32)
+        factor_t = _covariance_factor(returns).T.astype(np.float32)
+    for start in range(0, n_paths, chunk_size):
+        n = min(chunk_size, n_paths - start)
+        if method == "bootstrap":
+            # linhas históricas inteiras: preserva a correlação entre os ativos
+            block = r32[rng.integers(0, len(r32), size=(n, horizon))]
+        else:
+            z = rng.standard_normal(size=(n, horizon, len(weights)), dtype=np.float32)
+            block = z @ factor_t
+            block += mu
+        np.cumsum(block, axis=1, out=block)
+        np.exp(block, out=block)
+        sketch.add(block @ w100)
+    return sketch
+
+
+def project_portfolio_monte_carlo(
+    assets: Dict[str, Dict[str, Any]],
+    weights: Optional[Dict[str, float]] = None,
+    method: str = "bootstrap",
+    iterations: Optional[int] = None,
+    n_periods: Optional[int] = None,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+    levels: Optional[Sequence[float]] = None,
+    chunk_size: Optional[int] = None,
+    relative_error: Optional[float] = None,
+) -> pd.DataFrame:
+    """
+    Projeta o valor da carteira (base 100, pesos fixos) por Monte Carlo em shards.
+
+    Os caminhos são divididos entre `workers` processos. Cada shard usa um
+    gerador próprio, filho de SeedSequence(seed).spawn(workers), e devolve só
+    um QuantileSketch; os sketches são somados em ordem de shard. Nenhum
+    processo guarda todos os caminhos. Para a mesma semente e o mesmo número
+    de workers o resultado é idêntico bit a bit.
+
+    Args:
+        assets: Dict de fetch_portfolio_assets().
+        weights: Peso de cada ativo (normalizado para somar 1). Default: iguais.
+        method: "bootstrap" (linhas históricas conjuntas) ou "gbm" (normal
+            multivariada com a covariância histórica).
+        iterations: Caminhos. Default: MONTE_CARLO_ITERATIONS.
+        n_periods: Dias úteis de projeção. Default: default_horizon() (504).
+        seed: Semente. None sorteia uma (registrada no log para reprodução).
+        workers: Processos/shards. Default: MONTE_CARLO_WORKERS.
+        levels: Níveis de confiança. Default: MONTE_CARLO_CONFIDENCE_LEVELS.
+        chunk_size: Caminhos por bloco em cada shard. Default: MONTE_CARLO_CHUNK_SIZE.
+        relative_error: Erro relativo máximo das bandas. Default: MONTE_CARLO_SKETCH_ERROR.
+
+    Returns:
+        DataFrame com Date, Projected_Close (mediana do valor da carteira,
+        base 100) e CI_Lower_XX / CI_Upper_XX.
+
+    Raises:
+        ValueError: Método inválido, pesos de ativos ausentes ou histórico insuficiente.
+    """
+    if method not in PORTFOLIO_METHODS:
+        raise ValueError(f"monte_carlo: método desconhecido {method!r} (use {PORTFOLIO_METHODS})")
+    iterations = MONTE_CARLO_ITERATIONS if iterations is None else iterations
+    horizon = default_horizon() if n_periods is None else n_periods
+    chunk_size = max(1, MONTE_CARLO_CHUNK_SIZE if chunk_size is None else chunk_size)
+    levels = MONTE_CARLO_CONFIDENCE_LEVELS if levels is None else tuple(levels)
+    workers = max(1, min(MONTE_CARLO_WORKERS if workers is None else workers, iterations))
+    relative_error = MONTE_CARLO_SKETCH_ERROR if relative_error is None else relative_error
+
+    returns, last_date = portfolio_returns(assets)
+    keys = list(returns.columns)
+    raw = weights if weights is not None else {key: 1.0 for key in keys}
+    missing = set(keys) - set(raw)
+    if missing:
+        raise ValueError(f"monte_carlo: pesos ausentes para {sorted(missing)}")
+    w = np.array([raw[key] for key in keys], dtype=np.float64)
+    w = w / w.sum()
+
+    root = np.random.SeedSequence(seed)
+    sizes = [iterations // workers + (i < iterations % workers) for i in range(workers)]
+    shards = [
+        (returns.to_numpy(), w, method, size, horizon, chunk_size, child, relative_error)
+        for size, child in zip(sizes, root.spawn(workers))
+    ]
+    if workers == 1:
+        sketches = [_portfolio_shard(*shards[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            sketches = list(pool.map(_portfolio_shard, *zip(*shards)))
+    total = sketches[0]
+    for sketch in sketches[1:]:
+        total.merge(sketch)
+
+    qs = band_quantiles(levels)
+    result = bands_frame(qs, total.quantiles(qs), last_date, levels)
+    log.info(
+        "monte_carlo.carteira_ok",
+        metodo=method,
+        ativos=keys,
+        pesos=[round(float(x), 4) for x in w],
+        iteracoes=iterations,
+        workers=workers,
+        seed=root.entropy,
+        sketch_mb=round(total.nbytes / 2**20, 1),
+    )
+    return result
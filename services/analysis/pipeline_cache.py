@@ -0,0 +1,235 @@
+"""
+Memoização em disco das etapas do pipeline
+==========================================
+Cada etapa é identificada por uma impressão digital (SHA-256) das suas
+entradas: dados (DataFrames pelo conteúdo), parâmetros e versão do código
+(fonte das funções da etapa e dos módulos que elas usam). Se a impressão
+digital é a mesma da última execução, a saída gravada em disco é
+reaproveitada e a etapa não roda.
+
+Uma entrada por etapa: só a saída da execução mais recente fica guardada.
+
+Configuração (variáveis de ambiente):
+    PIPELINE_CACHE_DIR: Diretório das saídas. Default: services/analysis/cache/pipeline.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import tempfile
+import time
+from datetime import date, datetime
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+import structlog
+
+log = structlog.get_logger(__name__)
+
+
+def default_cache_dir() -> Path:
+    """Diretório das saídas memorizadas (PIPELINE_CACHE_DIR ou cache/pipeline)."""
+    env = os.getenv("PIPELINE_CACHE_DIR")
+    return Path(env) if env else Path(__file__).parent / "cache" / "pipeline"
+
+
+# ---------------------------------------------------------------------------
+# Impressão digital
+# ---------------------------------------------------------------------------
+
+
+def _feed(h: "hashlib._Hash", obj: Any) -> None:
+    """Alimenta o hash com uma representação canônica de obj."""
+    if isinstance(obj, pd.DataFrame):
+        h.update(b"df")
+        h.update(repr([(str(c), str(t)) for c, t in obj.dtypes.items()]).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(b"s")
+        h.update(f"{obj.name}:{obj.dtype}".encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(f"nd{obj.dtype}{obj.shape}".encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        h.update(b"{")
+        for key in sorted(obj, key=repr):
+            _feed(h, key)
+            _feed(h, obj[key])
+        h.update(b"}")
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"[")
+        for item in obj:
+            _feed(h, item)
+        h.update(b"]")
+    elif isinstance(obj, (bytes, bytearray)):
+        h.update(b"b" + bytes(obj))
+    elif obj is None or isinstance(obj, (str, int, float, bool, date, datetime)):
+        h.update(f"{type(obj).__name__}:{obj!r}".encode())
+    else:
+        raise TypeError(f"fingerprint: tipo não suportado {type(obj).__name__}")
+    h.update(b";")
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    SHA-256 das entradas de uma etapa.
+
+    Aceita DataFrame, Series, ndarray, dict, list/tuple, bytes e escalares
+    (str, int, float, bool, None, date). DataFrames entram pelo conteúdo
+    (valores, índice, colunas e dtypes), não pela identidade do objeto.
+
+    Raises:
+        TypeError: Se alguma parte tiver tipo não suportado.
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        _feed(h, part)
+    return h.hexdigest()
+
+
+def code_version(*parts: Union[Callable[..., Any], ModuleType]) -> str:
+    """
+    Hash do código de uma etapa (muda quando o código muda).
+
+    Funções entram pelo código-fonte; módulos, pelo conteúdo do arquivo —
+    use-os para cobrir o que as funções da etapa chamam indiretamente.
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, ModuleType) and getattr(part, "__file__", None):
+            h.update(Path(part.__file__).read_bytes())
+            continue
+        try:
+            source = inspect.getsource(part)
+        except (OSError, TypeError):
+            source = getattr(part, "__qualname__", repr(part))
+        h.update(source.encode())
+    return h.hexdigest()[:16]
+
+
+# ---------------------------------------------------------------------------
+# Armazenamento
+# ---------------------------------------------------------------------------
+
+
+class StageCache:
+    """
+    Saída da última execução de cada etapa, gravada em disco.
+
+    Layout:
+        <root>/<etapa>.pkl        — saída serializada (pickle)
+        <root>/manifest.json      — {etapa: {key, saved_at, duration_s}}
+
+    Args:
+        root: Diretório do cache. Default: default_cache_dir().
+    """
+
+    def __init__(self, root: Optional[Union[str, Path]] = None) -> None:
+        self.root = Path(root) if root is not None else default_cache_dir()
+        self.manifest_path = self.root / "manifest.json"
+        self._manifest: Dict[str, Dict[str, Any]] = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            log.warning("pipeline_cache.manifesto_invalido", erro=str(e))
+            return {}
+
+    def _write_atomic(self, path: Path, data: bytes) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    # ------------------------------------------------------------------
+
+    def key(self, stage: str) -> Optional[str]:
+        """Impressão digital da saída gravada da etapa (ou None)."""
+        return self._manifest.get(stage, {}).get("key")
+
+    def get(self, stage: str, key: str) -> Any:
+        """
+        Saída gravada da etapa, se a impressão digital confere.
+
+        Raises:
+            KeyError: Se não houver saída gravada com essa chave.
+        """
+        if self.key(stage) != key:
+            raise KeyError(stage)
+        try:
+            with open(self.root / f"{stage}.pkl", "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            log.warning("pipeline_cache.saida_ilegivel", etapa=stage, erro=str(e))
+            raise KeyError(stage) from e
+
+    def put(self, stage: str, key: str, value: Any, duration_s: float = 0.0) -> None:
+        """Grava a saída da etapa (substitui a anterior)."""
+        self._write_atomic(self.root / f"{stage}.pkl", pickle.dumps(value, protocol=5))
+        self._manifest[stage] = {
+            "key": key,
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+            "duration_s": round(duration_s, 3),
+        }
+        self._write_atomic(
+            self.manifest_path, json.dumps(self._manifest, indent=2, sort_keys=True).encode()
+        )
+
+    def run(
+        self,
+        stage: str,
+        key: str,
+        compute: Callable[[], Any],
+        force: bool = False,
+        valid: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """
+        Reaproveita a saída da etapa ou executa compute() e grava o resultado.
+
+        Args:
+            stage: Nome da etapa.
+            key: Impressão digital das entradas (fingerprint()).
+            compute: Função sem argumentos que produz a saída.
+            force: Ignora a saída gravada e executa de novo.
+            valid: Checagem extra da saída gravada (ex: arquivo ainda existe).
+
+        Returns:
+            Saída da etapa.
+        """
+        if not force:
+            try:
+                value = self.get(stage, key)
+            except KeyError:
+                pass
+            else:
+                if valid is None or valid(value):
+                    log.info("pipeline_cache.hit", etapa=stage, key=key[:12])
+                    return value
+        started = time.monotonic()
+        value = compute()
+        duration = time.monotonic() - started
+        self.put(stage, key, value, duration)
+        log.info(
+            "pipeline_cache.executada",
+            etapa=stage,
+            key=key[:12],
+            forcada=force,
+            duracao_s=round(duration, 2),
+        )
+        return value
@@ -0,0 +1,168 @@
+"""
+Avaliação em lote de carteiras candidatas
+=========================================
+Pontua K carteiras (matriz de pesos K × N) sobre o mesmo painel de retornos
+(datas × N ativos) de uma vez — base para sugerir 2–3 ativos novos à carteira
+atual testando todas as combinações e pesos.
+
+ - retorno esperado e volatilidade saem dos momentos: W·μ e diag(W·Σ·Wᵀ),
+   sem formar as séries das carteiras;
+ - drawdown máximo e CVaR precisam da série de cada carteira: os retornos
+   W·Rᵀ são formados em blocos de chunk_size carteiras (3 buffers de
+   chunk_size × datas, reaproveitados entre blocos), com a riqueza e o pico
+   por produto/máximo acumulados e a cauda por np.partition (sem ordenar a
+   série inteira).
+
+Carteiras com pesos fixos, rebalanceadas a cada pregão (retorno do dia = Σ wᵢ·rᵢ).
+
+Configuração (variáveis de ambiente):
+    PORTFOLIO_EVAL_CHUNK_SIZE: Carteiras por bloco. Default: 2048.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import structlog
+
+from indicators import INDICATORS_VAR_LEVEL, TRADING_DAYS_PER_YEAR, align_series
+
+log = structlog.get_logger(__name__)
+
+PORTFOLIO_EVAL_CHUNK_SIZE = int(os.getenv("PORTFOLIO_EVAL_CHUNK_SIZE", "2048"))
+
+
+def simplex_grid(n_assets: int, step: float) -> np.ndarray:
+    """
+    Todos os vetores de pesos ≥ 0 múltiplos de step que somam 1.
+
+    Ex: simplex_grid(3, 0.5) → [1,0,0], [0.5,0.5,0], ..., [0,0,1] (6 linhas).
+
+    Raises:
+        ValueError: Se 1/step não for inteiro.
+    """
+    units = round(1 / step)
+    if not np.isclose(units * step, 1.0):
+        raise ValueError(f"portfolio_eval: 1/step deve ser inteiro (step={step})")
+    if n_assets == 1:
+        return np.ones((1, 1))
+    # Estrelas e barras: posições das n−1 barras entre `units` unidades
+    bars = np.array(list(itertools.combinations(range(units + n_assets - 1), n_assets - 1)))
+    edges = np.column_stack(
+        [np.full(len(bars), -1), bars, np.full(len(bars), units + n_assets - 1)]
+    )
+    return (np.diff(edges, axis=1) - 1) / units
+
+
+def _drawdown_and_tail(
+    w: np.ndarray, rt: np.ndarray, k: int, buffers: Tuple[np.ndarray, np.ndarray, np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Drawdown máximo e média das k+1 piores observações de um bloco de carteiras.
+
+    Os três buffers (chunk_size × datas) são reaproveitados entre blocos: a
+    série das carteiras é particionada no próprio buffer e a riqueza dividida
+    pelo pico no lugar, sem alocar arrays do tamanho do bloco.
+    """
+    n = len(w)
+    block, wealth, peak = (buf[:n] for buf in buffers)
+    np.matmul(w, rt, out=block)
+    np.add(block, 1.0, out=wealth)
+    np.cumprod(wealth, axis=1, out=wealth)
+    np.maximum.accumulate(wealth, axis=1, out=peak)
+    np.maximum(peak, 1.0, out=peak)  # o capital inicial (1) também é pico
+    np.divide(wealth, peak, out=wealth)
+    max_drawdown = wealth.min(axis=1) - 1.0
+    block.partition(k, axis=1)
+    return max_drawdown, block[:, : k + 1].mean(axis=1)
+
+
+def evaluate_portfolios(
+    weights: Union[np.ndarray, pd.DataFrame],
+    returns: pd.DataFrame,
+    risk_free: Union[pd.Series, float, None] = None,
+    var_level: Optional[float] = None,
+    chunk_size: Optional[int] = None,
+    periods_per_year: int = TRADING_DAYS_PER_YEAR,
+) -> pd.DataFrame:
+    """
+    Retorno, volatilidade, Sharpe, drawdown máximo e CVaR de K carteiras.
+
+    Args:
+        weights: Matriz K × N de pesos. DataFrame é alinhado às colunas de
+            returns pelo nome; ndarray segue a ordem das colunas.
+        returns: Retornos simples diários, datas × N ativos. Datas com algum
+            NaN são descartadas (todas as carteiras usam as mesmas datas).
+        risk_free: Retorno diário livre de risco (média no período se Series).
+            Default: 0.
+        var_level: Nível do CVaR. Default: INDICATORS_VAR_LEVEL.
+        chunk_size: Carteiras por bloco. Default: PORTFOLIO_EVAL_CHUNK_SIZE.
+        periods_per_year: Períodos por ano para anualizar. Default: 252.
+
+    Returns:
+        DataFrame K × (expected_return, volatility, sharpe, max_drawdown,
+        cvar_XX), com o índice de weights quando DataFrame. Retorno e
+        volatilidade anualizados; drawdown (≤ 0) e CVaR diário (negativo =
+        perda) no mesmo formato de indicators.risk_return_indicators.
+
+    Raises:
+        ValueError: Formas incompatíveis, nível inválido ou menos de 2 datas.
+    """
+    level = INDICATORS_VAR_LEVEL if var_level is None else var_level
+    if not 0 < level < 1:
+        raise ValueError(f"portfolio_eval: nível de CVaR inválido {level}")
+    chunk_size = max(1, PORTFOLIO_EVAL_CHUNK_SIZE if chunk_size is None else chunk_size)
+    index = weights.index if isinstance(weights, pd.DataFrame) else None
+    if isinstance(weights, pd.DataFrame):
+        weights = weights.reindex(columns=returns.columns, fill_value=0.0)
+    w = np.asarray(weights, dtype=np.float64)
+    if w.ndim != 2 or w.shape[1] != returns.shape[1]:
+        raise ValueError(f"portfolio_eval: pesos devem ter {returns.shape[1]} colunas")
+
+    clean = returns.dropna()
+    if len(clean) < 2:
+        raise ValueError("portfolio_eval: são necessárias ao menos 2 datas completas")
+    r = clean.to_numpy(dtype=np.float64)
+    rt = np.ascontiguousarray(r.T)
+    rf = float(np.nanmean(align_series(risk_free, clean.index, fill=True)))
+    n_dates = len(r)
+    k = int(np.floor((1 - level) * (n_dates - 1)))
+
+    daily = w @ r.mean(axis=0)
+    cov = np.atleast_2d(np.cov(r, rowvar=False))
+    volatility = np.sqrt(np.clip(((w @ cov) * w).sum(axis=1), 0.0, None))
+
+    max_drawdown = np.empty(len(w))
+    cvar = np.empty(len(w))
+    shape = (min(chunk_size, len(w)), n_dates)
+    buffers = (np.empty(shape), np.empty(shape), np.empty(shape))
+    for start in range(0, len(w), chunk_size):
+        rows = slice(start, start + chunk_size)
+        max_drawdown[rows], cvar[rows] = _drawdown_and_tail(w[rows], rt, k, buffers)
+
+    scale = np.sqrt(periods_per_year)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = (daily - rf) / volatility * scale
+    tag = f"{level * 100:g}".replace(".", "_")
+    result = pd.DataFrame(
+        {
+            "expected_return": daily * periods_per_year,
+            "volatility": volatility * scale,
+            "sharpe": sharpe,
+            "max_drawdown": max_drawdown,
+            f"cvar_{tag}": cvar,
+        },
+        index=index,
+    )
+    log.info(
+        "portfolio_eval.ok",
+        carteiras=len(w),
+        ativos=w.shape[1],
+        datas=n_dates,
+        blocos=-(-len(w) // chunk_size),
+    )
+    return result
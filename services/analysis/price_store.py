@@ -0,0 +1,423 @@
+"""
+Cache incremental de históricos de preços (yfinance)
+====================================================
+Os fechamentos diários de cada ticker ficam em uma base SQLite local, com o
+retorno diário já calculado e metadados de atualidade:
+
+ - covered_from: data inicial coberta pelo histórico armazenado;
+ - last_bar: último pregão armazenado;
+ - fetched_at: momento da última consulta bem-sucedida à fonte.
+
+Uma nova consulta decide entre três caminhos (PriceHistoryStore.plan):
+
+ - "cache": já houve consulta hoje e o início pedido está coberto — sem rede
+   (o yfinance é chamado com end exclusivo, logo o pregão corrente nunca entra
+   e o histórico não muda ao longo do dia);
+ - "delta": baixa a partir de last_bar (inclusive) e acrescenta só os pregões
+   novos; o retorno é recalculado apenas na emenda. Se o fechamento de
+   last_bar mudou na fonte (ajuste por proventos), o histórico é rebaixado;
+ - "full": sem histórico, ou início pedido anterior ao coberto.
+
+load_panel() aplica as mesmas regras a vários tickers, agrupando em uma única
+consulta os que precisam do mesmo trecho, e devolve um painel largo alinhado.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import structlog
+
+log = structlog.get_logger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / "cache" / "prices"
+
+# Tolerância relativa para considerar o fechamento de last_bar inalterado
+_SEAM_RTOL = 1e-9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickers (
+    ticker TEXT PRIMARY KEY,
+    covered_from TEXT NOT NULL,
+    last_bar TEXT NOT NULL,
+    fetched_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bars (
+    ticker TEXT NOT NULL,
+    date TEXT NOT NULL,
+    close REAL NOT NULL,
+    daily_return REAL,
+    PRIMARY KEY (ticker, date)
+) WITHOUT ROWID;
+"""
+
+
+def default_cache_dir() -> Path:
+    """Diretório da base: variável PRICE_CACHE_DIR ou services/analysis/cache/prices."""
+    return Path(os.getenv("PRICE_CACHE_DIR", str(DEFAULT_CACHE_DIR)))
+
+
+class PriceHistoryStore:
+    """
+    Base SQLite de fechamentos diários por ticker.
+
+    Args:
+        path: Arquivo SQLite. Default: <PRICE_CACHE_DIR>/prices.sqlite.
+        clock: Fonte do horário atual (fetched_at e atualidade). Default: datetime.now.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        clock: Callable[[], datetime] = datetime.now,
+    ) -> None:
+        self.path = Path(path) if path is not None else default_cache_dir() / "prices.sqlite"
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._ready = False
+
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            conn.executescript(_SCHEMA)
+            self._ready = True
+        return conn
+
+    def metadata(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """covered_from, last_bar (date) e fetched_at (datetime) do ticker, ou None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT covered_from, last_bar, fetched_at FROM tickers WHERE ticker = ?",
+                (ticker,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "covered_from": date.fromisoformat(row[0]),
+            "last_bar": date.fromisoformat(row[1]),
+            "fetched_at": datetime.fromisoformat(row[2]),
+        }
+
+    def plan(self, ticker: str, start: date) -> Tuple[str, date]:
+        """
+        Decide como atender um pedido a partir de start.
+
+        Returns:
+            ("cache", last_bar), ("delta", last_bar) ou ("full", start); a data
+            é o início da consulta à fonte (inclusive).
+        """
+        meta = self.metadata(ticker)
+        if meta is None or start < meta["covered_from"]:
+            return "full", start
+        if meta["fetched_at"].date() >= self.clock().date():
+            return "cache", meta["last_bar"]
+        return "delta", meta["last_bar"]
+
+    def replace(self, ticker: str, bars: pd.DataFrame, start: date) -> None:
+        """Substitui todo o histórico do ticker por bars (colunas Date e Close)."""
+        bars = _clean(bars)
+        returns = bars["Close"].pct_change()
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM bars WHERE ticker = ?", (ticker,))
+            self._insert(conn, ticker, bars, returns)
+            self._set_meta(conn, ticker, start, bars["Date"].iloc[-1].date())
+        log.info("price_store.substituido", ticker=ticker, registros=len(bars))
+
+    def append(self, ticker: str, bars: pd.DataFrame) -> bool:
+        """
+        Acrescenta os pregões posteriores a last_bar, recalculando só a emenda.
+
+        bars deve começar em last_bar (sobreposição de um pregão), usada para
+        detectar reescrita do histórico na fonte.
+
+        Returns:
+            False se o fechamento de last_bar divergiu (histórico deve ser
+            rebaixado); True caso contrário.
+        """
+        meta = self.metadata(ticker)
+        if meta is None:
+            raise KeyError(ticker)
+        last_bar = pd.Timestamp(meta["last_bar"])
+        bars = _clean(bars)
+
+        with self._lock, closing(self._connect()) as conn, conn:
+            last_close = conn.execute(
+                "SELECT close FROM bars WHERE ticker = ? AND date = ?",
+                (ticker, meta["last_bar"].isoformat()),
+            ).fetchone()[0]
+            overlap = bars.loc[bars["Date"] == last_bar, "Close"]
+            if len(overlap) and not np.isclose(overlap.iloc[0], last_close, rtol=_SEAM_RTOL):
+                log.warning(
+                    "price_store.historico_reescrito",
+                    ticker=ticker,
+                    data=str(meta["last_bar"]),
+                    armazenado=last_close,
+                    fonte=float(overlap.iloc[0]),
+                )
+                return False
+
+            new = bars[bars["Date"] > last_bar].reset_index(drop=True)
+            if not new.empty:
+                # Emenda: o primeiro retorno novo usa o último fechamento armazenado
+                prev = pd.concat([pd.Series([last_close]), new["Close"]], ignore_index=True)
+                returns = prev.pct_change().iloc[1:].reset_index(drop=True)
+                self._insert(conn, ticker, new, returns)
+                last_bar = new["Date"].iloc[-1]
+            self._set_meta(conn, ticker, meta["covered_from"], last_bar.date())
+
+        log.info("price_store.delta", ticker=ticker, registros_novos=len(new))
+        return True
+
+    def read(self, ticker: str, start: date, end: date) -> pd.DataFrame:
+        """
+        Histórico armazenado em [start, end) como DataFrame Date/Close/Daily_Return.
+
+        O primeiro retorno do recorte é NaN, como em um pct_change sobre o recorte.
+        """
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(
+                "SELECT date AS Date, close AS Close, daily_return AS Daily_Return FROM bars"
+                " WHERE ticker = ? AND date >= ? AND date < ? ORDER BY date",
+                conn,
+                params=(ticker, start.isoformat(), end.isoformat()),
+            )
+        df["Date"] = pd.to_datetime(df["Date"])
+        df["Daily_Return"] = df["Daily_Return"].astype(float)
+        if len(df):
+            df.loc[0, "Daily_Return"] = np.nan
+        return df
+
+    def read_many(self, tickers: Iterable[str], start: date, end: date) -> pd.DataFrame:
+        """Fechamentos de vários tickers em [start, end), formato longo Ticker/Date/Close."""
+        tickers = list(tickers)
+        marks = ",".join("?" * len(tickers))
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(
+                "SELECT ticker AS Ticker, date AS Date, close AS Close FROM bars"
+                f" WHERE ticker IN ({marks}) AND date >= ? AND date < ? ORDER BY ticker, date",
+                conn,
+                params=(*tickers, start.isoformat(), end.isoformat()),
+            )
+        df["Date"] = pd.to_datetime(df["Date"])
+        return df
+
+    def touch(self, ticker: str) -> None:
+        """Registra consulta bem-sucedida à fonte sem pregões novos."""
+        meta = self.metadata(ticker)
+        if meta is None:
+            return
+        with self._lock, closing(self._connect()) as conn, conn:
+            self._set_meta(conn, ticker, meta["covered_from"], meta["last_bar"])
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _insert(
+        conn: sqlite3.Connection, ticker: str, bars: pd.DataFrame, returns: pd.Series
+    ) -> None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO bars (ticker, date, close, daily_return) VALUES (?, ?, ?, ?)",
+            [
+                (ticker, d.date().isoformat(), float(c), None if pd.isna(r) else float(r))
+                for d, c, r in zip(bars["Date"], bars["Close"], returns)
+            ],
+        )
+
+    def _set_meta(
+        self, conn: sqlite3.Connection, ticker: str, covered_from: date, last_bar: date
+    ) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO tickers (ticker, covered_from, last_bar, fetched_at)"
+            " VALUES (?, ?, ?, ?)",
+            (
+                ticker,
+                covered_from.isoformat(),
+                last_bar.isoformat(),
+                self.clock().isoformat(timespec="seconds"),
+            ),
+        )
+
+
+def _clean(bars: pd.DataFrame) -> pd.DataFrame:
+    bars = pd.DataFrame(bars[["Date", "Close"]]).dropna()
+    bars["Date"] = pd.to_datetime(bars["Date"]).dt.normalize()
+    return bars.drop_duplicates("Date", keep="last").sort_values("Date").reset_index(drop=True)
+
+
+def refresh(
+    store: PriceHistoryStore,
+    tickers: Iterable[str],
+    start: date,
+    end: date,
+    download_many: Callable[[List[str], date, date], Dict[str, pd.DataFrame]],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Atualiza a base para [start, end) com o mínimo de consultas à fonte.
+
+    Tickers que precisam do mesmo trecho (mesmo caminho e mesma data inicial
+    de consulta) são pedidos juntos em uma única chamada a download_many.
+    Uma falha da fonte em um ticker já coberto vira cache desatualizado
+    (stale); sem histórico armazenado, a exceção fica em "error".
+
+    Args:
+        store: Base local.
+        tickers: Códigos dos ativos.
+        start: Data inicial (inclusive).
+        end: Data final (exclusiva, como no yfinance).
+        download_many: download_many(tickers, inicio, fim) -> {ticker: DataFrame Date/Close}.
+
+    Returns:
+        {ticker: {"source": "cache" | "delta" | "full", "stale": bool, "error": Exception | None}}
+    """
+    status: Dict[str, Dict[str, Any]] = {}
+    pending: Dict[Tuple[str, date], List[str]] = {}
+    for ticker in tickers:
+        mode, fetch_from = store.plan(ticker, start)
+        status[ticker] = {"source": mode, "stale": False, "error": None}
+        if mode != "cache":
+            pending.setdefault((mode, fetch_from), []).append(ticker)
+
+    while pending:
+        mode, fetch_from = key = next(iter(pending))
+        group = pending.pop(key)
+        try:
+            batch = download_many(group, fetch_from, end)
+        except Exception as e:
+            for ticker in group:
+                meta = store.metadata(ticker)
+                if meta is not None and meta["covered_from"] <= start:
+                    status[ticker]["stale"] = True
+                    log.warning(
+                        "price_store.servindo_cache_desatualizado", ticker=ticker, erro=str(e)
+                    )
+                else:
+                    status[ticker]["error"] = e
+            continue
+
+        for ticker in group:
+            bars = batch.get(ticker)
+            if bars is None or bars.empty:
+                if mode == "delta":
+                    store.touch(ticker)
+            elif mode == "full":
+                store.replace(ticker, bars, fetch_from)
+            elif not store.append(ticker, bars):
+                status[ticker]["source"] = "full"
+                refetch_from = min(start, store.metadata(ticker)["covered_from"])
+                pending.setdefault(("full", refetch_from), []).append(ticker)
+
+    return status
+
+
+def _freshness(store: PriceHistoryStore, ticker: str, status: Dict[str, Any]) -> Dict[str, Any]:
+    meta = store.metadata(ticker)
+    return {
+        "ticker": ticker,
+        "source": status["source"],
+        "stale": status["stale"],
+        "last_bar": str(meta["last_bar"]) if meta else None,
+        "fetched_at": meta["fetched_at"].isoformat() if meta else None,
+    }
+
+
+def load_history(
+    store: PriceHistoryStore,
+    ticker: str,
+    start: date,
+    end: date,
+    download: Callable[[date, date], pd.DataFrame],
+) -> pd.DataFrame:
+    """
+    Histórico [start, end) do ticker, consultando a fonte só quando necessário.
+
+    Se a atualização incremental falhar e houver histórico armazenado, o cache
+    é servido e marcado como desatualizado (attrs["stale"] = True).
+
+    Args:
+        store: Base local.
+        ticker: Código do ativo (ex: "^BVSP").
+        start: Data inicial (inclusive).
+        end: Data final (exclusiva, como no yfinance).
+        download: download(inicio, fim) -> DataFrame Date/Close da fonte.
+
+    Returns:
+        DataFrame Date/Close/Daily_Return (vazio se a fonte nada retornou), com
+        attrs ticker, source ("cache" | "delta" | "full"), stale, last_bar e fetched_at.
+
+    Raises:
+        Exception: A exceção de download, se não houver histórico armazenado.
+    """
+    status = refresh(store, [ticker], start, end, lambda _, a, b: {ticker: download(a, b)})
+    if status[ticker]["error"] is not None:
+        raise status[ticker]["error"]
+
+    df = store.read(ticker, start, end)
+    df.attrs.update(_freshness(store, ticker, status[ticker]))
+    return df
+
+
+def load_panel(
+    store: PriceHistoryStore,
+    tickers: Iterable[str],
+    start: date,
+    end: date,
+    download_many: Callable[[List[str], date, date], Dict[str, pd.DataFrame]],
+) -> Dict[str, Any]:
+    """
+    Painel largo de fechamentos [start, end) de vários tickers.
+
+    As linhas são a união dos pregões observados (calendário da bolsa); um
+    ticker sem pregão em uma data fica NaN e com False na máscara.
+
+    Args:
+        store: Base local.
+        tickers: Códigos dos ativos (a ordem define as colunas).
+        start: Data inicial (inclusive).
+        end: Data final (exclusiva).
+        download_many: Ver refresh().
+
+    Returns:
+        Dict com:
+            prices: DataFrame float64 (Date x Ticker), um único bloco em
+                ordem de coluna (cada ticker contíguo em memória).
+            mask: DataFrame bool com True onde há pregão do ticker.
+            meta: {ticker: atualidade (source, stale, last_bar, fetched_at)}.
+            failures: {ticker: motivo} para tickers sem nenhum dado.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    status = refresh(store, tickers, start, end, download_many)
+
+    long = store.read_many(tickers, start, end)
+    wide = long.pivot(index="Date", columns="Ticker", values="Close").reindex(columns=tickers)
+    values = np.asfortranarray(wide.to_numpy(dtype=np.float64))
+    index = pd.DatetimeIndex(wide.index, name="Date")
+    columns = pd.Index(tickers, name="Ticker")
+    present = ~np.isnan(values)
+
+    failures = {}
+    for i, ticker in enumerate(tickers):
+        if status[ticker]["error"] is not None:
+            failures[ticker] = str(status[ticker]["error"])
+        elif not present[:, i].any():
+            failures[ticker] = "sem dados no período"
+    if failures:
+        log.warning("price_store.painel_incompleto", falhas=failures)
+
+    return {
+        "prices": pd.DataFrame(values, index=index, columns=columns, copy=False),
+        "mask": pd.DataFrame(present, index=index, columns=columns, copy=False),
+        "meta": {ticker: _freshness(store, ticker, status[ticker]) for ticker in tickers},
+        "failures": failures,
+    }
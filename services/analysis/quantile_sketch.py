@@ -0,0 +1,141 @@
+"""
+Sketch de quantis mesclável, por passo do horizonte
+===================================================
+Histograma em buckets de largura logarítmica (no estilo do DDSketch) para
+valores positivos (preços, valor de carteira). Há um histograma para cada
+passo do horizonte, guardado como matriz (horizonte × buckets) de contagens.
+
+ - add(bloco) acumula um bloco (caminhos × horizonte) sem guardar os caminhos;
+ - merge(outro) soma contagens inteiras: o resultado não depende da ordem
+   dos merges nem de como os caminhos foram divididos entre blocos/shards;
+ - quantiles(qs) devolve, por passo, o centro do bucket do quantil.
+
+O bucket k cobre (γ^(k-1), γ^k], com γ = (1+α)/(1-α). Qualquer valor do
+bucket fica a menos de α (relativo) do centro 2γ^k/(γ+1).
+
+Limite de erro: sendo x_r o valor de posição r = ⌊q·(n−1)⌋ entre os n valores
+do passo (np.quantile(..., method="lower")), o quantil estimado fica em
+[(1−α)·x_r, (1+α)·x_r]. A memória é horizonte × buckets contagens int64, onde
+buckets ≈ ln(máx/mín)/ln(γ) — depende da faixa de valores, não de n.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Sequence
+
+import numpy as np
+
+DEFAULT_RELATIVE_ERROR = 0.001
+
+# Folga (em buckets) ao realocar, para não crescer a cada bloco
+_GROW_MARGIN = 64
+
+
+class QuantileSketch:
+    """
+    Histograma logarítmico por passo do horizonte.
+
+    Args:
+        horizon: Passos do horizonte (colunas dos blocos).
+        relative_error: α — erro relativo máximo do valor de cada quantil.
+
+    Raises:
+        ValueError: Se relative_error não estiver em (0, 1).
+    """
+
+    def __init__(self, horizon: int, relative_error: float = DEFAULT_RELATIVE_ERROR) -> None:
+        if not 0 < relative_error < 1:
+            raise ValueError(f"quantile_sketch: relative_error inválido {relative_error}")
+        self.horizon = horizon
+        self.relative_error = relative_error
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self._log_gamma = math.log(self.gamma)
+        self.offset = 0  # índice do bucket da coluna 0 de counts
+        self.counts = np.zeros((horizon, 0), dtype=np.int64)
+        self.count = 0  # caminhos acumulados
+
+    @property
+    def nbytes(self) -> int:
+        """Memória das contagens (bytes) — não cresce com o número de caminhos."""
+        return self.counts.nbytes
+
+    def _ensure(self, lo: int, hi: int) -> None:
+        """Garante colunas para os buckets lo..hi (inclusive)."""
+        cur_lo, cur_hi = self.offset, self.offset + self.counts.shape[1] - 1
+        if self.counts.shape[1] and lo >= cur_lo and hi <= cur_hi:
+            return
+        if self.counts.shape[1]:
+            lo, hi = min(lo, cur_lo), max(hi, cur_hi)
+        lo, hi = lo - _GROW_MARGIN, hi + _GROW_MARGIN
+        grown = np.zeros((self.horizon, hi - lo + 1), dtype=np.int64)
+        if self.counts.shape[1]:
+            start = self.offset - lo
+            grown[:, start : start + self.counts.shape[1]] = self.counts
+        self.counts, self.offset = grown, lo
+
+    def add(self, values: np.ndarray) -> None:
+        """
+        Acumula um bloco (caminhos × horizonte) de valores positivos.
+
+        Raises:
+            ValueError: Forma incompatível ou valores não positivos / não finitos.
+        """
+        values = np.asarray(values)
+        if values.ndim != 2 or values.shape[1] != self.horizon:
+            raise ValueError(f"quantile_sketch: bloco deve ter {self.horizon} colunas")
+        if values.size == 0:
+            return
+        if not (np.isfinite(values).all() and (values > 0).all()):
+            raise ValueError("quantile_sketch: valores devem ser positivos e finitos")
+        keys = np.ceil(np.log(values, dtype=np.float64) / self._log_gamma).astype(np.int64)
+        self._ensure(int(keys.min()), int(keys.max()))
+        width = self.counts.shape[1]
+        flat = keys - self.offset
+        flat += np.arange(self.horizon, dtype=np.int64) * width  # linha = passo
+        self.counts += np.bincount(flat.ravel(), minlength=self.horizon * width).reshape(
+            self.horizon, width
+        )
+        self.count += values.shape[0]
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """
+        Soma as contagens de other (mesmo horizonte e α) neste sketch.
+
+        Raises:
+            ValueError: Sketches incompatíveis.
+        """
+        if other.horizon != self.horizon or other.gamma != self.gamma:
+            raise ValueError("quantile_sketch: horizonte ou erro relativo diferentes")
+        if other.count == 0:
+            return self
+        self._ensure(other.offset, other.offset + other.counts.shape[1] - 1)
+        start = other.offset - self.offset
+        self.counts[:, start : start + other.counts.shape[1]] += other.counts
+        self.count += other.count
+        return self
+
+    def quantiles(self, qs: Sequence[float]) -> np.ndarray:
+        """
+        Quantis por passo do horizonte.
+
+        O quantil q é o valor de posição ⌊q·(n−1)⌋ entre os n caminhos do passo
+        (ordenados), estimado com erro relativo ≤ α.
+
+        Returns:
+            Array float64 (len(qs), horizonte).
+
+        Raises:
+            ValueError: Sketch vazio ou q fora de [0, 1].
+        """
+        if self.count == 0:
+            raise ValueError("quantile_sketch: sketch vazio")
+        cum = np.cumsum(self.counts, axis=1)
+        out = np.empty((len(qs), self.horizon))
+        for i, q in enumerate(qs):
+            if not 0 <= q <= 1:
+                raise ValueError(f"quantile_sketch: quantil inválido {q}")
+            rank = math.floor(q * (self.count - 1))
+            bucket = (cum <= rank).sum(axis=1) + self.offset
+            out[i] = 2 * np.power(self.gamma, bucket) / (self.gamma + 1)
+        return out
@@ -0,0 +1,364 @@
+"""
+Métricas móveis (janelas de 21/63/252 pregões) em O(n)
+======================================================
+Volatilidade, Sharpe, Beta e drawdown em janela deslizante para todos os
+ativos de um painel de preços (datas × ativos), em dois modos:
+
+ - rolling_metrics(): histórico completo de uma vez. Somas por janela saem de
+   somas acumuladas (S[t] − S[t−w]) e o máximo da janela do algoritmo de van
+   Herk/Gil-Werman (máximos por bloco) — O(n) por série, vetorizado nos ativos;
+ - RollingState: estado incremental. Momentos da janela com Welford
+   (entra o pregão novo, sai o mais antigo) e deque monotônico para o máximo;
+   cada pregão acrescentado custa O(1) por ativo, então a atualização diária
+   depois de fetch_ibovespa_history toca só as linhas novas.
+
+Os dois modos seguem a mesma definição (e a de pandas .rolling(window)):
+
+ - retornos simples p_t / p_{t−1} − 1;
+ - volatilidade e Sharpe exigem os `window` retornos da janela válidos;
+   Beta exige os `window` pares ativo/benchmark válidos; senão NaN;
+ - drawdown: p_t / máx(preços válidos dos últimos `window` pregões) − 1.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from indicators import TRADING_DAYS_PER_YEAR, align_series
+
+# Janelas usadas nos dashboards (1 mês, 1 trimestre, 1 ano de pregões)
+DEFAULT_WINDOWS = (21, 63, 252)
+
+
+# ---------------------------------------------------------------------------
+# Histórico completo — somas acumuladas
+# ---------------------------------------------------------------------------
+
+
+def _window_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Soma das últimas `window` linhas em cada linha (NaN antes da 1ª janela cheia)."""
+    acc = np.zeros((values.shape[0] + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=acc[1:])
+    out = np.full(values.shape, np.nan)
+    out[window - 1 :] = acc[window:] - acc[:-window]
+    return out
+
+
+def _centered(x: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    x menos a média de cada coluna (0 fora de valid).
+
+    Deslocar antes das somas acumuladas evita perder precisão em séries longas.
+    """
+    x0 = np.where(valid, x, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        center = np.nan_to_num(x0.sum(axis=0) / valid.sum(axis=0))
+    x0 -= center
+    x0[~valid] = 0.0
+    return x0, center
+
+
+def _window_moments(x: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """n, média e M2 (soma dos desvios ao quadrado) dos valores válidos de cada janela."""
+    valid = np.isfinite(x)
+    x0, center = _centered(x, valid)
+    n = _window_sum(valid.astype(np.float64), window)
+    sx = _window_sum(x0, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = sx / n
+        m2 = _window_sum(x0 * x0, window) - sx * mean
+    return n, mean + center, m2
+
+
+def _window_beta(x: np.ndarray, y: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """n e cov(x, y)/var(y) dos pares válidos de cada janela (y: uma coluna por data)."""
+    valid = np.isfinite(x) & np.isfinite(y)[:, None]
+    x0, _ = _centered(x, valid)
+    y0, _ = _centered(np.broadcast_to(y[:, None], x.shape), valid)
+    n = _window_sum(valid.astype(np.float64), window)
+    sx, sy = _window_sum(x0, window), _window_sum(y0, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        my = sy / n
+        cyy = _window_sum(y0 * y0, window) - sy * my
+        cxy = _window_sum(x0 * y0, window) - sx * my
+        return n, cxy / cyy
+
+
+def _window_max(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Máximo dos últimos `window` valores (janela parcial no início), ignorando NaN.
+
+    van Herk/Gil-Werman: em blocos de `window` linhas, o máximo da janela que
+    termina em t é max(sufixo do bloco de t−w+1, prefixo do bloco de t).
+    """
+    rows = values.shape[0]
+    blocks = -(-rows // window)
+    padded = np.full((blocks * window,) + values.shape[1:], -np.inf)
+    padded[:rows] = np.where(np.isnan(values), -np.inf, values)
+    shaped = padded.reshape((blocks, window) + values.shape[1:])
+    prefix = np.maximum.accumulate(shaped, axis=1).reshape(padded.shape)[:rows]
+    suffix = np.maximum.accumulate(shaped[:, ::-1], axis=1)[:, ::-1].reshape(padded.shape)
+    out = prefix.copy()
+    if rows >= window:
+        out[window - 1 :] = np.maximum(suffix[: rows - window + 1], prefix[window - 1 :])
+    return np.where(np.isinf(out), np.nan, out)
+
+
+def _prepare(
+    prices: pd.DataFrame,
+    benchmark: Optional[pd.Series],
+    risk_free: Union[pd.Series, float, None],
+    previous: Optional[Tuple[np.ndarray, float]] = None,
+) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray], Optional[np.ndarray], np.ndarray]:
+    """Preços e retornos do ativo, preços e retornos do benchmark e livre de risco alinhados."""
+    p = prices.to_numpy(dtype=np.float64)
+    prev_p = np.full(p.shape[1], np.nan) if previous is None else previous[0]
+    r = p / np.vstack([prev_p[None], p])[:-1] - 1
+    pb = rb = None
+    if benchmark is not None:
+        pb = align_series(benchmark, prices.index, fill=False)
+        prev_b = np.nan if previous is None else previous[1]
+        rb = pb / np.concatenate([[prev_b], pb])[:-1] - 1
+    rf = align_series(risk_free, prices.index, fill=True)
+    return p, r, pb, rb, rf
+
+
+def rolling_metrics(
+    prices: pd.DataFrame,
+    window: int,
+    benchmark: Optional[pd.Series] = None,
+    risk_free: Union[pd.Series, float, None] = None,
+    periods_per_year: int = TRADING_DAYS_PER_YEAR,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Volatilidade, Sharpe, Beta e drawdown móveis de todo o histórico, em O(n).
+
+    Args:
+        prices: Painel de preços Date × ativo (fetch_price_panel()["prices"]).
+        window: Pregões por janela (ex: 21, 63, 252).
+        benchmark: Preços do benchmark indexados por data. None omite o Beta.
+        risk_free: Retorno diário livre de risco (indicators.risk_free_returns())
+            ou escalar, para o Sharpe. Default: 0.
+        periods_per_year: Períodos por ano para anualizar. Default: 252.
+
+    Returns:
+        Dict com "volatility", "sharpe", "beta" (se houver benchmark) e
+        "drawdown" — cada um um DataFrame com o índice e as colunas de prices.
+
+    Raises:
+        ValueError: Se window < 2.
+    """
+    if window < 2:
+        raise ValueError(f"rolling: janela inválida {window}")
+    p, r, _, rb, rf = _prepare(prices, benchmark, risk_free)
+    full = window - 0.5  # n == window, com folga de arredondamento das somas
+
+    n, _, m2 = _window_moments(r, window)
+    ne, me, m2e = _window_moments(r - rf[:, None], window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = {
+            "volatility": np.where(n > full, np.sqrt(m2 / (window - 1) * periods_per_year), np.nan),
+            "sharpe": np.where(
+                ne > full, me / np.sqrt(m2e / (window - 1)) * np.sqrt(periods_per_year), np.nan
+            ),
+        }
+        if rb is not None:
+            nb, beta = _window_beta(r, rb, window)
+            out["beta"] = np.where(nb > full, beta, np.nan)
+        out["drawdown"] = p / _window_max(p, window) - 1
+    return {
+        key: pd.DataFrame(values, index=prices.index, columns=prices.columns)
+        for key, values in out.items()
+    }
+
+
+# ---------------------------------------------------------------------------
+# Estado incremental — Welford em janela e deque monotônico
+# ---------------------------------------------------------------------------
+
+
+class _WindowComoments:
+    """Momentos de uma janela deslizante de pares (x, y), atualizados por Welford."""
+
+    def __init__(self, window: int, width: int) -> None:
+        self.window = window
+        self.xs = np.full((window, width), np.nan)
+        self.ys = np.full((window, width), np.nan)
+        self.pos = 0
+        self.n = np.zeros(width)
+        self.mx, self.my = np.zeros(width), np.zeros(width)
+        self.cxx, self.cyy, self.cxy = np.zeros(width), np.zeros(width), np.zeros(width)
+
+    def _step(self, x: np.ndarray, y: np.ndarray, sign: float) -> None:
+        """Inclui (sign=+1) ou retira (sign=−1) o par de cada coluna válida."""
+        valid = np.isfinite(x) & np.isfinite(y)
+        x, y = np.where(valid, x, 0.0), np.where(valid, y, 0.0)
+        n = self.n + sign * valid
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mx = np.where(valid & (n > 0), self.mx + sign * (x - self.mx) / n, self.mx)
+            my = np.where(valid & (n > 0), self.my + sign * (y - self.my) / n, self.my)
+        # (x − média sem o par) · (y − média com o par), nos dois sentidos
+        if sign > 0:
+            dx, dy, ex, ey = x - self.mx, y - self.my, x - mx, y - my
+        else:
+            dx, dy, ex, ey = x - mx, y - my, x - self.mx, y - self.my
+        self.cxx += sign * np.where(valid, dx * ex, 0.0)
+        self.cyy += sign * np.where(valid, dy * ey, 0.0)
+        self.cxy += sign * np.where(valid, dx * ey, 0.0)
+        empty = n == 0
+        self.n, self.mx, self.my = n, np.where(empty, 0.0, mx), np.where(empty, 0.0, my)
+        for c in (self.cxx, self.cyy, self.cxy):
+            c[empty] = 0.0
+
+    def _recompute(self) -> None:
+        """Recalcula os momentos do buffer (a cada volta: sem deriva acumulada)."""
+        valid = np.isfinite(self.xs) & np.isfinite(self.ys)
+        self.n = valid.sum(axis=0).astype(np.float64)
+        x, y = np.where(valid, self.xs, 0.0), np.where(valid, self.ys, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.mx = np.nan_to_num(x.sum(axis=0) / self.n)
+            self.my = np.nan_to_num(y.sum(axis=0) / self.n)
+        dx, dy = np.where(valid, x - self.mx, 0.0), np.where(valid, y - self.my, 0.0)
+        self.cxx, self.cyy, self.cxy = (
+            (dx * dx).sum(axis=0),
+            (dy * dy).sum(axis=0),
+            (dx * dy).sum(axis=0),
+        )
+
+    def push(self, x: np.ndarray, y: np.ndarray) -> None:
+        """Entra o par (x, y) de cada coluna; sai o par mais antigo da janela."""
+        self._step(self.xs[self.pos], self.ys[self.pos], -1.0)
+        self._step(x, y, 1.0)
+        self.xs[self.pos], self.ys[self.pos] = x, y
+        self.pos = (self.pos + 1) % self.window
+        if self.pos == 0:
+            self._recompute()
+
+
+class _WindowMax:
+    """Máximo dos últimos `window` valores de cada coluna (deque monotônico por coluna)."""
+
+    def __init__(self, window: int, width: int) -> None:
+        self.window = window
+        self.t = 0
+        self.queues: List[Deque[Tuple[int, float]]] = [deque() for _ in range(width)]
+
+    def push(self, values: np.ndarray) -> np.ndarray:
+        out = np.full(len(values), np.nan)
+        oldest = self.t - self.window
+        for j, (queue, value) in enumerate(zip(self.queues, values)):
+            if value == value:  # não NaN
+                while queue and queue[-1][1] <= value:
+                    queue.pop()
+                queue.append((self.t, value))
+            while queue and queue[0][0] <= oldest:
+                queue.popleft()
+            if queue:
+                out[j] = queue[0][1]
+        self.t += 1
+        return out
+
+
+class RollingState:
+    """
+    Métricas móveis de um painel, atualizadas pregão a pregão em O(1) por ativo.
+
+    Alimente com o histórico e depois só com as linhas novas; o resultado de
+    cada update() é igual às mesmas linhas de rolling_metrics() sobre o
+    histórico completo.
+
+    Args:
+        window: Pregões por janela (ex: 21, 63, 252).
+        columns: Ativos (colunas do painel de preços, nesta ordem).
+        benchmark: Se True, update() recebe o benchmark e calcula o Beta.
+        periods_per_year: Períodos por ano para anualizar. Default: 252.
+
+    Raises:
+        ValueError: Se window < 2.
+    """
+
+    def __init__(
+        self,
+        window: int,
+        columns: List[str],
+        benchmark: bool = True,
+        periods_per_year: int = TRADING_DAYS_PER_YEAR,
+    ) -> None:
+        if window < 2:
+            raise ValueError(f"rolling: janela inválida {window}")
+        self.window = window
+        self.columns = list(columns)
+        self.periods_per_year = periods_per_year
+        width = len(self.columns)
+        self._returns = _WindowComoments(window, width)
+        self._excess = _WindowComoments(window, width)
+        self._beta = _WindowComoments(window, width) if benchmark else None
+        self._max = _WindowMax(window, width)
+        self._last: Optional[Tuple[np.ndarray, float]] = None
+        self.last_date: Optional[pd.Timestamp] = None
+
+    def update(
+        self,
+        prices: pd.DataFrame,
+        benchmark: Optional[pd.Series] = None,
+        risk_free: Union[pd.Series, float, None] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Acrescenta pregões (posteriores ao último visto) e devolve as métricas deles.
+
+        Args:
+            prices: Linhas novas do painel (Date × ativo, mesmas colunas).
+            benchmark: Preços do benchmark nas mesmas datas (obrigatório se o
+                estado foi criado com benchmark=True).
+            risk_free: Retorno diário livre de risco ou escalar. Default: 0.
+
+        Returns:
+            Dict no formato de rolling_metrics(), só com as linhas novas.
+
+        Raises:
+            ValueError: Colunas diferentes, datas repetidas/anteriores ou
+                benchmark ausente.
+        """
+        if list(prices.columns) != self.columns:
+            raise ValueError("rolling: colunas diferentes das do estado")
+        prices = prices.sort_index()
+        if self.last_date is not None and len(prices) and prices.index[0] <= self.last_date:
+            raise ValueError(f"rolling: datas devem ser posteriores a {self.last_date.date()}")
+        if self._beta is not None and benchmark is None:
+            raise ValueError("rolling: estado com Beta exige o benchmark")
+
+        p, r, pb, rb, rf = _prepare(
+            prices, benchmark if self._beta is not None else None, risk_free, self._last
+        )
+        full, scale = self.window - 0.5, np.sqrt(self.periods_per_year)
+        out = {key: np.full(p.shape, np.nan) for key in ("volatility", "sharpe", "drawdown")}
+        if self._beta is not None:
+            out["beta"] = np.full(p.shape, np.nan)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for i in range(len(p)):
+                self._returns.push(r[i], r[i])
+                excess = r[i] - rf[i]
+                self._excess.push(excess, excess)
+                ret, exc = self._returns, self._excess
+                var = ret.cxx / (self.window - 1)
+                out["volatility"][i] = np.where(ret.n > full, np.sqrt(var) * scale, np.nan)
+                sd = np.sqrt(exc.cxx / (self.window - 1))
+                out["sharpe"][i] = np.where(exc.n > full, exc.mx / sd * scale, np.nan)
+                if self._beta is not None:
+                    self._beta.push(r[i], np.full(p.shape[1], rb[i]))
+                    b = self._beta
+                    out["beta"][i] = np.where(b.n > full, b.cxy / b.cyy, np.nan)
+                out["drawdown"][i] = p[i] / self._max.push(p[i]) - 1
+
+        if len(p):
+            self._last = (p[-1], float(pb[-1]) if pb is not None else np.nan)
+            self.last_date = pd.Timestamp(prices.index[-1])
+        return {
+            key: pd.DataFrame(values, index=prices.index, columns=self.columns)
+            for key, values in out.items()
+        }
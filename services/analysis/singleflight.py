@@ -0,0 +1,146 @@
+"""
+Deduplicação de requisições idênticas dentro de um processo (single-flight)
+===========================================================================
+Chamadas com a mesma chave compartilham uma única execução:
+ - Se a chamada já está em andamento, os demais chamadores esperam por ela e
+   recebem o mesmo resultado (ou a mesma exceção).
+ - Se já terminou com sucesso, o resultado fica memorizado por ttl segundos
+   (ou até forget()), limitado às max_entries chaves usadas mais recentemente.
+
+Falhas não são memorizadas: a próxima chamada tenta de novo.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import structlog
+
+log = structlog.get_logger(__name__)
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalescência e memoização de chamadas por chave.
+
+    Contadores (ver stats()):
+        hits: chamadas atendidas por resultado já memorizado.
+        shared: chamadas que aguardaram uma execução em andamento.
+        misses: execuções reais de fn (inclusive após o resultado expirar).
+        errors: execuções que levantaram exceção.
+
+    Args:
+        name: Nome usado nos logs.
+        ttl: Validade (s) de um resultado memorizado. None = sem expiração;
+            0 = só coalescência das chamadas em andamento.
+        max_entries: Máximo de resultados memorizados; o usado há mais tempo
+            sai primeiro. None = sem limite.
+        clock: Relógio monotônico (injetável em testes).
+    """
+
+    def __init__(
+        self,
+        name: str = "singleflight",
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _Call] = {}
+        # chave → (expira_em, resultado), do uso mais antigo ao mais recente
+        self._results: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._stats = {"hits": 0, "shared": 0, "misses": 0, "errors": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Executa fn() uma única vez por chave e devolve o resultado compartilhado.
+
+        Args:
+            key: Identificador da requisição (ex: (series_id, inicio, fim)).
+            fn: Função sem argumentos que produz o resultado.
+
+        Returns:
+            Resultado de fn() — o mesmo objeto para todos os chamadores.
+
+        Raises:
+            Exception: A exceção levantada por fn(), repassada a todos que aguardavam.
+        """
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and cached[0] > self.clock():
+                self._results.move_to_end(key)
+                self._stats["hits"] += 1
+                log.debug(f"{self.name}.hit", key=key)
+                return cached[1]
+            if cached is not None:
+                del self._results[key]
+                log.debug(f"{self.name}.expirado", key=key)
+            call = self._inflight.get(key)
+            if call is not None:
+                self._stats["shared"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._inflight[key] = call
+                self._stats["misses"] += 1
+                leader = True
+
+        if not leader:
+            log.debug(f"{self.name}.aguardando_em_andamento", key=key)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        else:
+            with self._lock:
+                self._remember(key, call.result)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def _remember(self, key: Hashable, result: Any) -> None:
+        """Memoriza o resultado (com o lock já adquirido), respeitando ttl e max_entries."""
+        if self.ttl is not None and self.ttl <= 0:
+            return
+        expires = float("inf") if self.ttl is None else self.clock() + self.ttl
+        self._results[key] = (expires, result)
+        self._results.move_to_end(key)
+        while self.max_entries is not None and len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    def forget(self, key: Optional[Hashable] = None) -> None:
+        """Descarta o resultado memorizado da chave (ou de todas, se None)."""
+        with self._lock:
+            if key is None:
+                self._results.clear()
+            else:
+                self._results.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Cópia dos contadores hits/shared/misses/errors."""
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,480 @@
+"""
+Cadeia de fontes de dados com circuit breaker e ordenação adaptativa
+====================================================================
+Cada ativo da carteira é buscado em uma cadeia de fontes (ex: API Tesouro →
+SELIC acumulada). SourceChain implementa o padrão "tenta A, registra, cai para
+B" uma única vez:
+
+ - circuit breaker por fonte: após FAILURE_THRESHOLD falhas consecutivas a
+   fonte fica aberta (pulada) por SOURCE_BREAKER_COOLDOWN segundos; depois
+   disso uma tentativa decide se fecha ou reabre;
+ - ordenação: fontes reais antes de proxies (tier); dentro do mesmo tier, maior
+   taxa de sucesso primeiro e, em empate, menor latência observada;
+ - o estado (sucessos, falhas, latência, circuitos abertos e fonte vencedora de
+   cada cadeia) é persistido em JSON e sobrevive entre execuções.
+
+Se todas as fontes disponíveis falharem, as que estavam com circuito aberto
+ainda são tentadas antes de desistir: o breaker economiza tempo, mas nunca
+impede a cadeia de obter um dado.
+
+Com SOURCE_HEDGING=1 a cadeia usa requisições "hedged" (ver SourceChain): uma
+fonte lenta não segura a cadeia pelo timeout inteiro.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import structlog
+
+log = structlog.get_logger(__name__)
+
+DEFAULT_HEALTH_PATH = Path(__file__).parent / "cache" / "source_health.json"
+
+# Falhas consecutivas para abrir o circuito e duração (s) do circuito aberto
+FAILURE_THRESHOLD = int(os.getenv("SOURCE_BREAKER_FAILURES", "2"))
+SOURCE_BREAKER_COOLDOWN = float(os.getenv("SOURCE_BREAKER_COOLDOWN", str(6 * 3600)))
+
+_EWMA_ALPHA = 0.3  # peso da última medida na latência média
+_MAX_SAMPLES = 50  # latências de sucesso guardadas por fonte (percentis do hedge)
+_MIN_SAMPLES = 5  # amostras mínimas para confiar no percentil
+
+# Modo hedge (opcional): dispara a próxima fonte quando a atual passa do
+# percentil de latência; sem histórico, usa o atraso padrão
+SOURCE_HEDGING = os.getenv("SOURCE_HEDGING", "0").lower() in ("1", "true", "yes")
+SOURCE_HEDGE_PERCENTILE = float(os.getenv("SOURCE_HEDGE_PERCENTILE", "0.9"))
+SOURCE_HEDGE_DEFAULT_DELAY = float(os.getenv("SOURCE_HEDGE_DEFAULT_DELAY", "5"))
+SOURCE_HEDGE_PROXY_GRACE = float(os.getenv("SOURCE_HEDGE_PROXY_GRACE", "5"))
+
+
+_DEFAULT_HEALTH_LOCK = threading.Lock()
+
+
+def default_health_path() -> Path:
+    """Arquivo de estado: variável SOURCE_HEALTH_PATH ou services/analysis/cache/."""
+    return Path(os.getenv("SOURCE_HEALTH_PATH", str(DEFAULT_HEALTH_PATH)))
+
+
+class Source:
+    """
+    Uma fonte da cadeia.
+
+    Args:
+        name: Identificador estável (chave do estado persistido).
+        fetch: fetch(timeout) -> dict data/source/period/proxy_used. Deve
+            levantar exceção quando a fonte não entrega dados.
+        proxy: True se a fonte é um proxy (não o dado real do ativo).
+        timeout: Timeout (s) repassado a fetch.
+        tier: Prioridade (menor = preferida). Default: 0 para fontes reais,
+            1 para proxies.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[float], Dict[str, Any]],
+        proxy: bool = False,
+        timeout: float = 30,
+        tier: Optional[int] = None,
+    ) -> None:
+        self.name = name
+        self.fetch = fetch
+        self.proxy = proxy
+        self.timeout = timeout
+        self.tier = int(proxy) if tier is None else tier
+
+    def __repr__(self) -> str:
+        return f"Source({self.name!r}, proxy={self.proxy}, tier={self.tier})"
+
+
+class SourceHealth:
+    """
+    Estatísticas e circuit breakers das fontes, persistidos em JSON.
+
+    Args:
+        path: Arquivo de estado. Default: default_health_path().
+        persist: Lê e grava o estado em path. False mantém tudo em memória.
+        cooldown: Duração (s) do circuito aberto. Default: SOURCE_BREAKER_COOLDOWN.
+        failure_threshold: Falhas consecutivas para abrir. Default: FAILURE_THRESHOLD.
+        clock: Relógio (epoch, s). Default: time.time.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        persist: bool = True,
+        cooldown: Optional[float] = None,
+        failure_threshold: Optional[int] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path) if path is not None else default_health_path()
+        self.persist = persist
+        self.cooldown = SOURCE_BREAKER_COOLDOWN if cooldown is None else cooldown
+        self.failure_threshold = failure_threshold or FAILURE_THRESHOLD
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, Any]] = {"sources": {}, "chains": {}}
+        if persist and self.path.exists():
+            try:
+                self._state = json.loads(self.path.read_text())
+            except (OSError, ValueError) as e:
+                log.warning("source_health.estado_invalido", path=str(self.path), erro=str(e))
+
+    _default: Optional["SourceHealth"] = None
+
+    @classmethod
+    def default(cls) -> "SourceHealth":
+        """
+        Instância compartilhada do processo (arquivo default_health_path()).
+
+        As cadeias da carteira rodam em threads paralelas: a criação é
+        protegida por lock para que todas gravem no mesmo estado.
+        """
+        if cls._default is None:
+            with _DEFAULT_HEALTH_LOCK:
+                if cls._default is None:
+                    cls._default = cls()
+        return cls._default
+
+    # ------------------------------------------------------------------
+
+    def stats(self, name: str) -> Dict[str, Any]:
+        """Cópia das estatísticas da fonte (vazias se nunca usada)."""
+        with self._lock:
+            return dict(self._state["sources"].get(name, {}))
+
+    def winner(self, chain: str) -> Optional[str]:
+        """Fonte que atendeu a última execução da cadeia."""
+        with self._lock:
+            return self._state["chains"].get(chain, {}).get("winner")
+
+    def success_rate(self, name: str) -> float:
+        """Taxa de sucesso suavizada (Laplace): 0.5 para fonte nunca usada."""
+        s = self.stats(name)
+        return (s.get("successes", 0) + 1) / (s.get("attempts", 0) + 2)
+
+    def latency(self, name: str) -> float:
+        """Latência média (s) das tentativas da fonte (0 se nunca usada)."""
+        return float(self.stats(name).get("latency_s", 0.0))
+
+    def latency_percentile(self, name: str, q: float) -> Optional[float]:
+        """
+        Percentil q (0–1) das latências de sucesso recentes da fonte.
+
+        Returns:
+            Latência (s), ou None com menos de _MIN_SAMPLES amostras.
+        """
+        samples = sorted(self.stats(name).get("samples", []))
+        if len(samples) < _MIN_SAMPLES:
+            return None
+        return float(samples[min(len(samples) - 1, math.ceil(q * len(samples)) - 1)])
+
+    def is_open(self, name: str) -> bool:
+        """True se o circuito da fonte está aberto (fonte deve ser pulada)."""
+        return self.stats(name).get("open_until", 0.0) > self.clock()
+
+    def record(self, name: str, ok: bool, latency: float, error: Optional[str] = None) -> None:
+        """Registra uma tentativa e abre/fecha o circuito da fonte."""
+        with self._lock:
+            s = self._state["sources"].setdefault(name, {})
+            s["attempts"] = s.get("attempts", 0) + 1
+            prev = s.get("latency_s")
+            s["latency_s"] = latency if prev is None else prev + _EWMA_ALPHA * (latency - prev)
+            if ok:
+                s["samples"] = (s.get("samples", []) + [round(latency, 4)])[-_MAX_SAMPLES:]
+                s["successes"] = s.get("successes", 0) + 1
+                s["consecutive_failures"] = 0
+                s["open_until"] = 0.0
+                s["last_success"] = self.clock()
+            else:
+                s["failures"] = s.get("failures", 0) + 1
+                s["consecutive_failures"] = s.get("consecutive_failures", 0) + 1
+                s["last_error"] = (error or "")[:300]
+                if s["consecutive_failures"] >= self.failure_threshold:
+                    s["open_until"] = self.clock() + self.cooldown
+                    log.warning(
+                        "source_health.circuito_aberto",
+                        fonte=name,
+                        falhas_consecutivas=s["consecutive_failures"],
+                        cooldown_s=self.cooldown,
+                    )
+            self._save()
+
+    def record_winner(self, chain: str, name: str) -> None:
+        with self._lock:
+            self._state["chains"][chain] = {"winner": name, "at": self.clock()}
+            self._save()
+
+    def _save(self) -> None:
+        if not self.persist:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(self._state, indent=1, sort_keys=True))
+            tmp.replace(self.path)
+        except OSError as e:
+            log.warning("source_health.falha_ao_gravar", path=str(self.path), erro=str(e))
+
+
+class SourceCancelled(Exception):
+    """Tentativa abandonada porque outra fonte já venceu (modo hedge)."""
+
+
+_current = threading.local()
+
+
+def raise_if_cancelled() -> None:
+    """
+    Ponto de cancelamento cooperativo para funções de fonte.
+
+    No modo hedge, a tentativa perdedora recebe um sinal de cancelamento; a
+    fonte que chama esta função entre etapas (ex: após cada requisição) para
+    de trabalhar ao levantar SourceCancelled. Fora do modo hedge não faz nada.
+    """
+    event = getattr(_current, "cancel", None)
+    if event is not None and event.is_set():
+        raise SourceCancelled()
+
+
+class SourceChain:
+    """
+    Cadeia ordenada de fontes para um mesmo dado.
+
+    Modo hedge (opcional): se a fonte em andamento não responder dentro do
+    percentil hedge_percentile de sua latência histórica, a próxima fonte é
+    iniciada em paralelo e vence o primeiro resultado válido. Um resultado
+    de tier pior (proxy) só é aceito quando não há fonte melhor em andamento
+    ou após proxy_grace segundos de espera por ela. As tentativas perdedoras
+    são canceladas (cooperativamente, ver raise_if_cancelled).
+
+    Args:
+        name: Nome da cadeia (logs e fonte vencedora no estado).
+        sources: Fontes na ordem declarada (desempate final da ordenação).
+        health: Estado compartilhado. Default: SourceHealth.default().
+        hedge: Ativa o modo hedge. Default: variável SOURCE_HEDGING.
+        hedge_percentile: Percentil da latência que dispara a próxima fonte.
+            Default: SOURCE_HEDGE_PERCENTILE (0.9).
+        proxy_grace: Espera máxima (s) de um resultado proxy por uma fonte
+            real em andamento. Default: SOURCE_HEDGE_PROXY_GRACE (5).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        sources: List[Source],
+        health: Optional[SourceHealth] = None,
+        hedge: Optional[bool] = None,
+        hedge_percentile: Optional[float] = None,
+        proxy_grace: Optional[float] = None,
+    ) -> None:
+        self.name = name
+        self.sources = list(sources)
+        self._health = health
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile or SOURCE_HEDGE_PERCENTILE
+        self.proxy_grace = SOURCE_HEDGE_PROXY_GRACE if proxy_grace is None else proxy_grace
+        self.last_winner: Optional[str] = None
+
+    @property
+    def health(self) -> SourceHealth:
+        return self._health or SourceHealth.default()
+
+    def ordered(self) -> List[Source]:
+        """Fontes na ordem de tentativa: tier, taxa de sucesso, latência."""
+        health = self.health
+        return sorted(
+            self.sources,
+            key=lambda s: (s.tier, -health.success_rate(s.name), health.latency(s.name)),
+        )
+
+    def hedge_delay(self, source: Source) -> float:
+        """Espera (s) pela fonte antes de disparar a próxima no modo hedge."""
+        delay = self.health.latency_percentile(source.name, self.hedge_percentile)
+        if delay is None:
+            delay = SOURCE_HEDGE_DEFAULT_DELAY
+        return min(delay, source.timeout)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Percorre a cadeia até uma fonte entregar dados.
+
+        Returns:
+            O dict retornado pela fonte vencedora.
+
+        Raises:
+            RuntimeError: Se todas as fontes falharem (a última falha fica em __cause__).
+        """
+        health = self.health
+        ordered = self.ordered()
+        available = [s for s in ordered if not health.is_open(s.name)]
+        skipped = [s for s in ordered if s not in available]
+        if skipped:
+            log.info(
+                "source_chain.fontes_puladas",
+                cadeia=self.name,
+                fontes=[s.name for s in skipped],
+                motivo="circuito aberto",
+            )
+
+        hedge = SOURCE_HEDGING if self.hedge is None else self.hedge
+        if hedge:
+            winner, result, last_error = self._run_hedged(available + skipped, skipped)
+        else:
+            winner, result, last_error = self._run_sequential(available + skipped, skipped)
+
+        if winner is None:
+            raise RuntimeError(f"{self.name}: todas as fontes falharam") from last_error
+
+        self.last_winner = winner.name
+        health.record_winner(self.name, winner.name)
+        log.info(
+            "source_chain.vencedor",
+            cadeia=self.name,
+            fonte=winner.name,
+            proxy=winner.proxy,
+            hedge=hedge,
+        )
+        return result
+
+    # ------------------------------------------------------------------
+
+    def _run_sequential(
+        self, candidates: List[Source], skipped: List[Source]
+    ) -> Tuple[Optional[Source], Optional[Dict[str, Any]], Optional[BaseException]]:
+        last_error: Optional[BaseException] = None
+        for source in candidates:
+            if source in skipped:
+                log.warning(
+                    "source_chain.tentando_circuito_aberto", cadeia=self.name, fonte=source.name
+                )
+            result = self._attempt(source)
+            if isinstance(result, BaseException):
+                last_error = result
+                continue
+            return source, result, None
+        return None, None, last_error
+
+    def _run_hedged(
+        self, candidates: List[Source], skipped: List[Source]
+    ) -> Tuple[Optional[Source], Optional[Dict[str, Any]], Optional[BaseException]]:
+        outcomes: "queue.Queue[Tuple[Source, Any]]" = queue.Queue()
+        waiting = list(candidates)
+        running: Dict[str, Tuple[Source, threading.Event]] = {}
+        best: Optional[Tuple[Source, Dict[str, Any]]] = None
+        grace_until = next_hedge_at = 0.0
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            nonlocal next_hedge_at
+            source = waiting.pop(0)
+            if source in skipped:
+                log.warning(
+                    "source_chain.tentando_circuito_aberto", cadeia=self.name, fonte=source.name
+                )
+            cancel = threading.Event()
+            running[source.name] = (source, cancel)
+            threading.Thread(
+                target=self._hedged_attempt,
+                args=(source, cancel, outcomes),
+                name=f"hedge-{self.name}-{source.name}",
+                daemon=True,
+            ).start()
+            next_hedge_at = time.monotonic() + self.hedge_delay(source)
+
+        def worth_launching() -> bool:
+            # Depois de um resultado, só vale tentar fontes de tier melhor
+            return bool(waiting) and (best is None or waiting[0].tier < best[0].tier)
+
+        def may_hedge() -> bool:
+            # Disparo com outra fonte em voo só para circuito fechado: como no
+            # modo sequencial, fonte com circuito aberto é só último recurso
+            return worth_launching() and not self.health.is_open(waiting[0].name)
+
+        launch()
+        while True:
+            if best is not None and not any(s.tier < best[0].tier for s, _ in running.values()):
+                break
+            if not running:
+                if not worth_launching():
+                    break
+                launch()
+                continue
+
+            deadlines = []
+            if may_hedge():
+                deadlines.append(next_hedge_at)
+            if best is not None:
+                deadlines.append(grace_until)
+            wait = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+
+            try:
+                source, outcome = outcomes.get(timeout=wait)
+            except queue.Empty:
+                now = time.monotonic()
+                if best is not None and now >= grace_until:
+                    log.info(
+                        "source_chain.hedge_espera_esgotada",
+                        cadeia=self.name,
+                        fonte=best[0].name,
+                        aguardando=list(running),
+                    )
+                    break
+                if may_hedge() and now >= next_hedge_at:
+                    log.info(
+                        "source_chain.hedge_disparado",
+                        cadeia=self.name,
+                        aguardando=list(running),
+                        proxima=waiting[0].name,
+                    )
+                    launch()
+                continue
+
+            running.pop(source.name, None)
+            if isinstance(outcome, BaseException):
+                last_error = outcome
+                if may_hedge():
+                    launch()
+            elif best is None or source.tier < best[0].tier:
+                best = (source, outcome)
+                grace_until = time.monotonic() + self.proxy_grace
+
+        for source, cancel in running.values():
+            cancel.set()
+            log.info("source_chain.hedge_cancelado", cadeia=self.name, fonte=source.name)
+        if best is None:
+            return None, None, last_error
+        return best[0], best[1], None
+
+    def _hedged_attempt(
+        self, source: Source, cancel: threading.Event, outcomes: "queue.Queue[Tuple[Source, Any]]"
+    ) -> None:
+        _current.cancel = cancel
+        try:
+            outcomes.put((source, self._attempt(source)))
+        finally:
+            _current.cancel = None
+
+    def _attempt(self, source: Source) -> Union[Dict[str, Any], BaseException]:
+        log.info("source_chain.tentando", cadeia=self.name, fonte=source.name)
+        t0 = time.monotonic()
+        try:
+            result = source.fetch(source.timeout)
+        except SourceCancelled as e:
+            log.info("source_chain.tentativa_cancelada", cadeia=self.name, fonte=source.name)
+            return e
+        except Exception as e:
+            self.health.record(source.name, False, time.monotonic() - t0, str(e))
+            log.warning(
+                "source_chain.fonte_falhou", cadeia=self.name, fonte=source.name, erro=str(e)
+            )
+            return e
+        self.health.record(source.name, True, time.monotonic() - t0)
+        return result
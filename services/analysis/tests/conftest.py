@@ -0,0 +1,12 @@
+"""
+Configuração comum dos testes.
+
+Os pontos de entrada (ibovespa_analysis, busca_fundo_cvm) põem a raiz do
+repositório no path ao serem importados; os testes que importam direto os
+módulos que usam common/ (cvm_cache, bcb_store, ...) dependem dela aqui.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
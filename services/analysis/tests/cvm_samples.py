@@ -0,0 +1,50 @@
+"""
+Geração de arquivos INF_DIARIO sintéticos para testes e benchmarks.
+
+Os valores de cota são sintéticos (sequência determinística) e servem apenas
+para validar estrutura e filtragem — nunca como dado financeiro.
+"""
+
+from __future__ import annotations
+
+import io
+import zipfile
+from datetime import date, timedelta
+from typing import List, Sequence
+
+HEADER = "TP_FUNDO;{cnpj_col};DT_COMPTC;VL_TOTAL;VL_QUOTA;VL_PATRIM_LIQ;CAPTC_DIA;RESG_DIA;NR_COTST"
+
+
+def fake_cnpj(i: int) -> str:
+    """CNPJ no formato da CVM (não validado) derivado de um inteiro."""
+    digits = f"{i:012d}"
+    return f"{digits[:2]}.{digits[2:5]}.{digits[5:8]}/{digits[8:12]}-00"
+
+
+def month_days(ym: str) -> List[date]:
+    first = date(int(ym[:4]), int(ym[4:]), 1)
+    days = []
+    d = first
+    while d.month == first.month:
+        if d.weekday() < 5:
+            days.append(d)
+        d += timedelta(days=1)
+    return days
+
+
+def inf_diario_csv(ym: str, cnpjs: Sequence[str], cnpj_col: str = "CNPJ_FUNDO") -> bytes:
+    """CSV latin-1 no layout INF_DIARIO: uma linha por fundo e dia útil do mês."""
+    lines = [HEADER.format(cnpj_col=cnpj_col)]
+    for i, cnpj in enumerate(cnpjs):
+        for j, d in enumerate(month_days(ym)):
+            quota = f"{1 + i * 0.001 + j * 0.0001:.8f}"
+            lines.append(f"FI;{cnpj};{d.isoformat()};1000.00;{quota};1000.00;0.00;0.00;10")
+    return ("\n".join(lines) + "\n").encode("latin-1")
+
+
+def inf_diario_zip(ym: str, cnpjs: Sequence[str], cnpj_col: str = "CNPJ_FUNDO") -> bytes:
+    """Zip em memória com o CSV mensal, como publicado pela CVM."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(f"inf_diario_fi_{ym}.csv", inf_diario_csv(ym, cnpjs, cnpj_col))
+    return buf.getvalue()
@@ -0,0 +1,149 @@
+"""
+Servidor HTTP local que substitui dados.cvm.gov.br nos testes e benchmarks.
+
+Serve arquivos em memória com ETag/Last-Modified, responde 304 a requisições
+condicionais e conta quantas requisições (e bytes) cada caminho recebeu.
+Caminhos dinâmicos (ex: API SGS do BCB) são atendidos por funções registradas
+com route(), que recebem a query string. fail() enfileira respostas de erro
+(429/5xx) e gzip=True comprime o corpo quando o cliente aceita.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+
+class StubHttpServer:
+    """
+    Servidor HTTP em thread própria para uso em testes.
+
+    Args:
+        latency: Atraso (s) aplicado a cada resposta, simulando rede lenta.
+        gzip: Comprime as respostas 200 para clientes com Accept-Encoding: gzip.
+    """
+
+    def __init__(self, latency: float = 0.0, gzip: bool = False) -> None:
+        self.latency = latency
+        self.gzip = gzip
+        self.failures: Dict[str, List[Tuple[int, Optional[str]]]] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.files: Dict[str, bytes] = {}
+        self.routes: Dict[str, Callable[[Dict[str, str]], Optional[bytes]]] = {}
+        self.queries: List[Tuple[str, Dict[str, str]]] = []
+        self.requests: Counter = Counter()
+        self.not_modified: Counter = Counter()
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+
+    def put(self, path: str, content: bytes) -> None:
+        """Publica (ou substitui) o conteúdo servido em path."""
+        self.files[path] = content
+
+    def route(self, path: str, handler: Callable[[Dict[str, str]], Optional[bytes]]) -> None:
+        """Atende path com handler(query); None vira 404."""
+        self.routes[path] = handler
+
+    def fail(self, path: str, *statuses: int, retry_after: Optional[str] = None) -> None:
+        """As próximas requisições a path recebem statuses, um por vez."""
+        self.failures.setdefault(path, []).extend((s, retry_after) for s in statuses)
+
+    def url(self, path: str) -> str:
+        assert self._server is not None, "servidor não iniciado"
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def start(self) -> "StubHttpServer":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):  # noqa: A002 — silenciar stderr
+                pass
+
+            def do_GET(self):  # noqa: N802 — nome exigido por BaseHTTPRequestHandler
+                with stub._lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    self._get()
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def _get(self):
+                path, _, query_string = self.path.partition("?")
+                query = dict(parse_qsl(query_string))
+                with stub._lock:
+                    stub.requests[path] += 1
+                    stub.queries.append((path, query))
+                    queued = stub.failures.get(path)
+                    failure = queued.pop(0) if queued else None
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if failure is not None:
+                    status, retry_after = failure
+                    self.send_response(status)
+                    if retry_after is not None:
+                        self.send_header("Retry-After", retry_after)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                handler = stub.routes.get(path)
+                content = handler(query) if handler else stub.files.get(path)
+                if content is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                etag = '"' + hashlib.sha256(content).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    with stub._lock:
+                        stub.not_modified[path] += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", formatdate(usegmt=True))
+                if stub.gzip and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    content = gzip.compress(content)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+                with stub._lock:
+                    stub.bytes_sent += len(content)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StubHttpServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
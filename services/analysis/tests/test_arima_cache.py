@@ -0,0 +1,174 @@
+"""
+Testes para arima_cache.py — cache do modelo ARIMA e reajuste incremental.
+
+A série é um passeio aleatório sintético em log (sem dado financeiro real);
+a busca de ordem é substituída por um ARIMA(1,1,0) fixo que conta chamadas.
+"""
+
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+class _Clock:
+    def __init__(self, today: date = date(2025, 1, 2)) -> None:
+        self.today = today
+
+    def __call__(self) -> date:
+        return self.today
+
+
+def _series(n: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 11.5 + np.cumsum(rng.normal(0.0003, 0.012, n))
+
+
+@pytest.fixture
+def search_calls():
+    return []
+
+
+@pytest.fixture
+def search(search_calls):
+    from statsmodels.tsa.arima.model import ARIMA
+
+    def fn(y):
+        search_calls.append(len(y))
+        return ARIMA(y, order=(1, 1, 0)).fit(), (1, 1, 0)
+
+    return fn
+
+
+@pytest.fixture
+def cache(tmp_path):
+    from arima_cache import ArimaModelCache
+
+    return ArimaModelCache(
+        tmp_path, max_new_bars=10, research_days=30, aic_tolerance=0.05, clock=_Clock()
+    )
+
+
+class TestArimaModelCache:
+    """Reuso, reajuste incremental e gatilhos da busca completa."""
+
+    def test_mesma_serie_reusa_modelo(self, cache, search, search_calls):
+        y = _series(300)
+        first, mode1 = cache.fit("^BVSP", y, search)
+        second, mode2 = cache.fit("^BVSP", y, search)
+        assert (mode1, mode2) == ("search", "cache")
+        assert search_calls == [300]
+        np.testing.assert_allclose(second.params, first.params)
+
+    def test_pregoes_novos_reajuste_incremental(self, cache, search, search_calls):
+        y = _series(305)
+        cache.fit("^BVSP", y[:300], search)
+
+        results, mode = cache.fit("^BVSP", y, search)
+
+        assert mode == "warm"
+        assert search_calls == [300]
+        assert results.nobs == 305
+        entry = cache.load("^BVSP")
+        assert entry["nobs"] == 305 and entry["order"] == (1, 1, 0)
+        assert cache.fit("^BVSP", y, search)[1] == "cache"
+
+    def test_serie_revisada_busca_de_novo(self, cache, search, search_calls):
+        y = _series(305)
+        cache.fit("^BVSP", y[:300], search)
+        revised = y.copy()
+        revised[100] += 0.01
+        assert cache.fit("^BVSP", revised, search)[1] == "search"
+        assert search_calls == [300, 305]
+
+    def test_pregoes_demais_busca_de_novo(self, cache, search):
+        y = _series(320)
+        cache.fit("^BVSP", y[:300], search)
+        assert cache.fit("^BVSP", y, search)[1] == "search"
+
+    def test_busca_agendada(self, cache, search):
+        y = _series(302)
+        cache.fit("^BVSP", y[:300], search)
+        cache.clock.today += timedelta(days=30)
+        assert cache.fit("^BVSP", y, search)[1] == "search"
+        assert cache.load("^BVSP")["searched_on"] == cache.clock.today.isoformat()
+
+    def test_diagnostico_degradado(self, tmp_path, search, search_calls):
+        from arima_cache import ArimaModelCache
+
+        strict = ArimaModelCache(tmp_path, aic_tolerance=-1.0, clock=_Clock())
+        y = _series(302)
+        strict.fit("^BVSP", y[:300], search)
+        assert strict.fit("^BVSP", y, search)[1] == "search"
+        assert search_calls == [300, 302]
+
+    def test_janela_movel_reajuste_incremental(self, cache, search, search_calls):
+        y = _series(301)
+        dates = pd.bdate_range("2020-01-02", periods=301)
+        cache.fit("^BVSP", y[:300], search, dates=dates[:300])
+
+        # Dia seguinte: entra um pregão novo e sai o mais antigo
+        results, mode = cache.fit("^BVSP", y[1:], search, dates=dates[1:])
+
+        assert mode == "warm"
+        assert search_calls == [300]
+        assert results.nobs == 301, "modelo segue ancorado no início da última busca"
+        assert cache.fit("^BVSP", y[1:], search, dates=dates[1:])[1] == "cache"
+
+    def test_janela_movel_com_trecho_revisado(self, cache, search, search_calls):
+        y = _series(301)
+        dates = pd.bdate_range("2020-01-02", periods=301)
+        cache.fit("^BVSP", y[:300], search, dates=dates[:300])
+        revised = y[1:].copy()
+        revised[50] += 0.01
+        assert cache.fit("^BVSP", revised, search, dates=dates[1:])[1] == "search"
+        assert search_calls == [300, 300]
+
+    def test_janela_que_comeca_antes_busca_de_novo(self, cache, search):
+        y = _series(301)
+        dates = pd.bdate_range("2020-01-02", periods=301)
+        cache.fit("^BVSP", y[1:], search, dates=dates[1:])
+        assert cache.fit("^BVSP", y, search, dates=dates)[1] == "search"
+
+    def test_chaves_independentes(self, cache, search, search_calls):
+        cache.fit("^BVSP", _series(300, seed=1), search)
+        cache.fit("PETR4.SA", _series(300, seed=2), search)
+        assert len(search_calls) == 2
+        assert cache.fit("^BVSP", _series(300, seed=1), search)[1] == "cache"
+
+
+class TestProjectIbovespaComCache:
+    """project_ibovespa reaproveita o modelo gravado."""
+
+    def test_segunda_projecao_sem_busca(self, cache, search, search_calls, monkeypatch):
+        import ibovespa_analysis as ia
+
+        monkeypatch.setattr(ia, "_search_arima_order", search)
+        dates = pd.bdate_range("2023-01-02", periods=300)
+        hist = pd.DataFrame({"Date": dates, "Close": np.exp(_series(300))})
+
+        first = ia.project_ibovespa(hist, n_periods=20, model_cache=cache)
+        second = ia.project_ibovespa(hist, n_periods=20, model_cache=cache)
+
+        assert search_calls == [300]
+        pd.testing.assert_frame_equal(first, second)
+        assert list(first.columns) == ["Date", "Projected_Close", "CI_Lower_95", "CI_Upper_95"]
+        assert first["Date"].iloc[0] > dates[-1]
+
+    def test_janela_movel_do_historico_sem_busca(self, cache, search, search_calls, monkeypatch):
+        import ibovespa_analysis as ia
+
+        monkeypatch.setattr(ia, "_search_arima_order", search)
+        dates = pd.bdate_range("2023-01-02", periods=301)
+        hist = pd.DataFrame({"Date": dates, "Close": np.exp(_series(301))})
+
+        ia.project_ibovespa(hist.iloc[:300], n_periods=20, model_cache=cache)
+        result = ia.project_ibovespa(hist.iloc[1:], n_periods=20, model_cache=cache)
+
+        assert search_calls == [300]
+        assert result["Date"].iloc[0] > dates[-1]
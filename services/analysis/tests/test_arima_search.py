@@ -0,0 +1,110 @@
+"""
+Testes para arima_search.py — seleção de ordem ARIMA em grade, serial × paralela.
+
+Série sintética: ARIMA(1,1,0) simulado em log (sem dado financeiro real).
+"""
+
+import math
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pytest
+
+
+def _series(n: int = 400, phi: float = 0.4, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    eps = rng.normal(0.0, 0.01, n)
+    dx = np.zeros(n)
+    for t in range(1, n):
+        dx[t] = phi * dx[t - 1] + eps[t]
+    return 11.0 + np.cumsum(dx)
+
+
+class TestGridSearch:
+    """Paralelo escolhe exatamente o mesmo que o serial."""
+
+    def test_grade(self):
+        from arima_search import order_grid
+
+        grid = order_grid(max_p=1, max_q=2, d=1)
+        assert grid == [(0, 1, 0), (0, 1, 1), (0, 1, 2), (1, 1, 0), (1, 1, 1), (1, 1, 2)]
+
+    def test_paralelo_igual_ao_serial(self):
+        from arima_search import evaluate_orders, grid_search, order_grid
+
+        y = _series()
+        grid = order_grid(max_p=2, max_q=1, d=1)
+
+        serial = evaluate_orders(y, grid, workers=1)
+        parallel = evaluate_orders(y, grid, workers=3)
+        assert parallel == serial
+
+        res_s, order_s = grid_search(y, grid, workers=1)
+        res_p, order_p = grid_search(y, grid, workers=3)
+        assert order_s == order_p == grid[int(np.argmin(serial))]
+        assert res_p.aic == res_s.aic == min(serial)
+
+    def test_empate_fica_com_a_primeira(self, monkeypatch):
+        import arima_search
+
+        monkeypatch.setattr(arima_search, "fit_aic", lambda y, order: 1.0)
+        grid = arima_search.order_grid(max_p=1, max_q=1)
+        assert arima_search.grid_search(_series(100), grid, workers=1)[1] == grid[0]
+
+    def test_nenhuma_candidata(self, monkeypatch):
+        import arima_search
+
+        monkeypatch.setattr(arima_search, "fit_aic", lambda y, order: math.inf)
+        with pytest.raises(ValueError, match="nenhuma ordem"):
+            arima_search.grid_search(_series(100), [(1, 1, 0)], workers=1)
+
+    def test_candidata_invalida_vale_inf(self):
+        from arima_search import fit_aic
+
+        assert fit_aic(np.array([1.0, np.nan, 2.0]), (1, 1, 0)) == math.inf
+
+
+class TestSelectD:
+    """Diferenciação pelo KPSS, como o ndiffs do pmdarima."""
+
+    @pytest.mark.parametrize("integration, expected", [(0, 0), (1, 1), (2, 2)])
+    def test_ordem_de_integracao(self, integration, expected):
+        from arima_search import select_d
+
+        y = np.random.default_rng(4).normal(0.0, 1.0, 600)
+        for _ in range(integration):
+            y = np.cumsum(y)
+        assert select_d(y, max_d=2) == expected
+
+    def test_serie_constante(self):
+        from arima_search import select_d
+
+        assert select_d(np.full(100, 3.0)) == 0
+
+
+class TestSearchArimaOrder:
+    """Busca de ordem da projeção: grade do auto_arima, serial ou em paralelo."""
+
+    def test_grade_do_auto_arima(self):
+        from arima_search import order_grid
+
+        grid = order_grid(max_p=3, max_q=3, d=1, max_order=5)
+        assert len(grid) == 15 and (3, 1, 3) not in grid
+        assert all(p + q <= 5 for p, _, q in grid)
+
+    def test_mesma_ordem_e_aic_com_1_e_4_workers(self, monkeypatch):
+        import ibovespa_analysis as ia
+
+        y = _series()
+        results = {}
+        for workers in (1, 4):
+            monkeypatch.setattr(ia, "ARIMA_SEARCH_WORKERS", workers)
+            results[workers] = ia._search_arima_order(y)
+        (res_s, order_s), (res_p, order_p) = results[1], results[4]
+        assert order_s == order_p
+        assert order_s[1] == 1
+        assert res_p.aic == res_s.aic
+        assert res_s.nobs == 400
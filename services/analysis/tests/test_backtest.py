@@ -0,0 +1,167 @@
+"""
+Testes para backtest.py — rebalanceamento vetorizado por segmento.
+
+Painel sintético; o backtest em lote é comparado com uma simulação pregão a
+pregão, política a política.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+WEIGHTS = {"rf_lp_high": 0.5, "lft_2031": 0.3, "lca_bb_prefixada": 0.2}
+
+
+@pytest.fixture(scope="module")
+def prices():
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range("2021-01-04", periods=600)
+    steps = rng.normal([0.0005, 0.0003, -0.0001], [0.002, 0.008, 0.02], size=(600, 3))
+    return pd.DataFrame(100 * np.exp(np.cumsum(steps, axis=0)), index=dates, columns=list(WEIGHTS))
+
+
+def _reference(prices, weights, policy):
+    """Simulação direta: quantidades fixas, checagem diária da regra."""
+    from backtest import BACKTEST_TRANSACTION_COST, _check_dates
+
+    w = np.array([weights[key] for key in prices.columns])
+    p = prices.to_numpy()
+    check = _check_dates(policy, prices.index)
+    threshold, cost = policy.get("threshold"), policy.get("cost", BACKTEST_TRANSACTION_COST)
+    holdings, out = 100 * w, [100.0]
+    for t in range(1, len(p)):
+        holdings = holdings * p[t] / p[t - 1]
+        value = holdings.sum()
+        if check[t] and (threshold is None or np.abs(holdings / value - w).max() > threshold):
+            # V' = V − cost·Σ|w·V' − h| resolvido exatamente (V' é linear por partes)
+            after = value
+            for _ in range(50):
+                after = value - cost * np.abs(w * after - holdings).sum()
+            holdings, value = w * after, after
+        out.append(value)
+    return np.array(out)
+
+
+class TestBacktestRebalancing:
+    """Lote de políticas igual à simulação pregão a pregão."""
+
+    POLICIES = [
+        {"name": "bh"},
+        {"name": "mensal", "frequency": "monthly", "cost": 0.002},
+        {"name": "anual", "frequency": "yearly"},
+        {"name": "banda", "threshold": 0.03},
+        {"name": "tri_banda", "frequency": "quarterly", "threshold": 0.02, "cost": 0.0},
+        {"name": "cada_10", "frequency": 10},
+    ]
+
+    def test_igual_a_simulacao_direta(self, prices):
+        from backtest import backtest_rebalancing
+
+        result = backtest_rebalancing(prices, WEIGHTS, self.POLICIES)
+        assert list(result["values"].columns) == [p["name"] for p in self.POLICIES]
+        for policy in self.POLICIES:
+            np.testing.assert_allclose(
+                result["values"][policy["name"]], _reference(prices, WEIGHTS, policy), rtol=1e-10
+            )
+
+    def test_resumo(self, prices):
+        from backtest import backtest_rebalancing
+
+        result = backtest_rebalancing(prices, WEIGHTS, self.POLICIES)
+        summary = result["summary"]
+        months = prices.index.to_period("M").nunique()
+        assert summary.loc["bh", "rebalances"] == 0
+        assert summary.loc["mensal", "rebalances"] == months - 1
+        assert summary.loc["anual", "rebalances"] == 2
+        assert summary.loc["tri_banda", "costs"] == 0
+        assert (summary["turnover"] >= 0).all()
+        pd.testing.assert_series_equal(
+            summary["final_value"], result["values"].iloc[-1], check_names=False
+        )
+
+    def test_buy_and_hold_e_custo_reduzem_valor(self, prices):
+        from backtest import backtest_rebalancing
+
+        policies = [
+            {"name": "sem_custo", "frequency": "monthly", "cost": 0.0},
+            {"name": "com_custo", "frequency": "monthly", "cost": 0.01},
+        ]
+        result = backtest_rebalancing(prices, WEIGHTS, policies)
+        values = result["values"]
+        assert (values["com_custo"] <= values["sem_custo"] + 1e-9).all()
+        hold = backtest_rebalancing(prices, WEIGHTS, [{"name": "bh"}])["values"]["bh"]
+        expected = (prices / prices.iloc[0] * pd.Series(WEIGHTS) * 100).sum(axis=1)
+        np.testing.assert_allclose(hold, expected)
+
+    def test_entradas_invalidas(self, prices):
+        from backtest import backtest_rebalancing
+
+        with pytest.raises(ValueError, match="pesos ausentes"):
+            backtest_rebalancing(prices, {"rf_lp_high": 1.0})
+        with pytest.raises(ValueError, match="frequência desconhecida"):
+            backtest_rebalancing(prices, policies=[{"name": "x", "frequency": "weekly"}])
+        with pytest.raises(ValueError, match="repetidos"):
+            backtest_rebalancing(prices, policies=[{"name": "x"}, {"name": "x"}])
+
+    def test_policy_grid(self, prices):
+        from backtest import backtest_rebalancing, policy_grid
+
+        grid = policy_grid(["monthly", 21, None], [None, 0.05], [0.0, 0.001])
+        assert len(grid) == 12
+        result = backtest_rebalancing(prices, WEIGHTS, grid)
+        assert result["values"].shape == (len(prices), 12)
+
+
+class TestBacktestPortfolio:
+    """Frames base 100 no formato de normalize_series, aceitos pelo gráfico."""
+
+    @pytest.fixture
+    def inputs(self, prices):
+        assets = {
+            key: {
+                "data": pd.DataFrame({"Date": prices.index, "Value": prices[key].to_numpy()}),
+                "source": "sintético",
+                "period": "",
+                "proxy_used": False,
+            }
+            for key in prices.columns
+        }
+        dates = pd.bdate_range("2020-06-01", prices.index[-1])
+        close = 100_000 * np.exp(np.cumsum(np.random.default_rng(8).normal(0, 0.01, len(dates))))
+        ibov = pd.DataFrame({"Date": dates, "Close": close}).drop(index=[400, 401])
+        return assets, ibov
+
+    def test_frames_base_100(self, inputs):
+        import ibovespa_analysis as ia
+
+        assets, ibov = inputs
+        frames = ia.backtest_portfolio(assets, ibov, weights=WEIGHTS)
+        assert list(frames) == ["ibovespa", "buy_and_hold", "monthly", "quarterly", "band_5pct"]
+        for frame in frames.values():
+            assert list(frame.columns) == ["Date", "Value", "Normalized"]
+            assert frame["Normalized"].iloc[0] == pytest.approx(100.0)
+            assert frame["Normalized"].notna().all()
+        assert frames["ibovespa"]["Date"].equals(frames["monthly"]["Date"])
+
+    def test_grafico_com_backtests(self, inputs, tmp_path):
+        import ibovespa_analysis as ia
+
+        assets, ibov = inputs
+        frames = ia.backtest_portfolio(assets, ibov, [{"name": "mensal", "frequency": "monthly"}])
+        future = pd.bdate_range(ibov["Date"].max() + pd.Timedelta(days=1), periods=30)
+        projection = pd.DataFrame(
+            {
+                "Date": future,
+                "Projected_Close": ibov["Close"].iloc[-1],
+                "CI_Lower_95": ibov["Close"].iloc[-1] * 0.9,
+                "CI_Upper_95": ibov["Close"].iloc[-1] * 1.1,
+            }
+        )
+        output = tmp_path / "chart.png"
+        ia.generate_comparison_chart(ibov, projection, assets, str(output), backtests=frames)
+        assert output.exists() and output.stat().st_size > 0
@@ -0,0 +1,139 @@
+"""
+Testes para bcb_store.py — base local e atualização incremental de séries SGS.
+
+A API SGS é emulada pelo servidor HTTP local (tests/http_stub.py), inclusive
+o limite de 10 anos por requisição e o 404 para janelas sem observações.
+"""
+
+import json
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+import pytest
+from http_stub import StubHttpServer
+
+SERIES = 12
+PATH = f"/dados/serie/bcdata.sgs.{SERIES}/dados"
+
+
+def _rate(day: date) -> float:
+    """Taxa sintética determinística por dia útil."""
+    return round(0.03 + (day.toordinal() % 97) / 10_000, 6)
+
+
+def _sgs_handler(query):
+    start = pd.to_datetime(query["dataInicial"], dayfirst=True)
+    end = pd.to_datetime(query["dataFinal"], dayfirst=True)
+    if (end - start).days > 3650:
+        return b'{"erro": "janela maior que 10 anos"}'
+    days = pd.bdate_range(start, end)
+    if len(days) == 0:
+        return None  # o SGS responde 404 quando não há valores
+    data = [{"data": d.strftime("%d/%m/%Y"), "valor": str(_rate(d.date()))} for d in days]
+    return json.dumps(data).encode()
+
+
+@pytest.fixture
+def sgs():
+    with StubHttpServer() as stub:
+        stub.route(PATH, _sgs_handler)
+        yield stub
+
+
+@pytest.fixture
+def store(sgs, tmp_path):
+    from bcb_store import BcbSeriesStore
+
+    return BcbSeriesStore(path=tmp_path / "sgs.sqlite", base_url=sgs.url(""))
+
+
+class TestSplitWindows:
+    """Divisão de intervalos longos em janelas aceitas pelo SGS."""
+
+    def test_janelas_contiguas_e_limitadas(self):
+        from bcb_store import MAX_WINDOW_DAYS, split_windows
+
+        start, end = date(2001, 3, 15), date(2025, 6, 30)
+        windows = split_windows(start, end)
+        assert windows[0][0] == start and windows[-1][1] == end
+        for (a, b), (c, _) in zip(windows, windows[1:]):
+            assert c == b + timedelta(days=1)
+        assert all((b - a).days + 1 <= MAX_WINDOW_DAYS for a, b in windows)
+        assert len(windows) == 3
+
+    def test_intervalo_vazio(self):
+        from bcb_store import split_windows
+
+        assert split_windows(date(2024, 1, 2), date(2024, 1, 1)) == []
+
+
+class TestBcbSeriesStore:
+    """Só o trecho que falta é pedido ao BCB."""
+
+    def test_primeira_carga(self, store, sgs):
+        df = store.series(SERIES, date(2022, 1, 1), date(2023, 12, 31))
+        expected = pd.bdate_range("2022-01-01", "2023-12-31")
+        assert list(df["Date"]) == list(expected)
+        assert df["Rate"].iloc[0] == _rate(expected[0].date())
+        assert sgs.requests[PATH] == 1
+
+    def test_mesmo_intervalo_sem_rede(self, store, sgs):
+        store.series(SERIES, date(2022, 1, 1), date(2023, 12, 29))
+        store.series(SERIES, date(2022, 1, 1), date(2023, 12, 29))
+        store.series(SERIES, date(2022, 6, 1), date(2023, 1, 31))
+        assert sgs.requests[PATH] == 1
+
+    def test_atualizacao_diaria_pede_so_o_delta(self, store, sgs):
+        store.series(SERIES, date(2019, 1, 1), date(2024, 3, 1))  # sexta-feira
+        assert store.update(SERIES, date(2019, 1, 1), date(2024, 3, 6)) == 3
+
+        _, query = sgs.queries[-1]
+        assert query["dataInicial"] == "02/03/2024"
+        assert query["dataFinal"] == "06/03/2024"
+        assert store.coverage(SERIES) == (date(2019, 1, 1), date(2024, 3, 6))
+
+    def test_delta_sem_observacoes(self, store, sgs):
+        store.series(SERIES, date(2024, 1, 1), date(2024, 3, 1))  # sexta-feira
+        assert store.update(SERIES, date(2024, 1, 1), date(2024, 3, 3)) == 0
+        assert store.coverage(SERIES)[1] == date(2024, 3, 1)
+
+    def test_backfill_longo_em_janelas_paralelas(self, store, sgs):
+        from bcb_store import MAX_WINDOW_DAYS
+
+        df = store.series(SERIES, date(2004, 1, 1), date(2025, 12, 31))
+        assert sgs.requests[PATH] == 3
+        for _, query in sgs.queries:
+            start = pd.to_datetime(query["dataInicial"], dayfirst=True)
+            end = pd.to_datetime(query["dataFinal"], dayfirst=True)
+            assert (end - start).days + 1 <= MAX_WINDOW_DAYS
+        assert list(df["Date"]) == list(pd.bdate_range("2004-01-01", "2025-12-31"))
+
+    def test_inicio_anterior_estende_a_cabeca(self, store, sgs):
+        store.series(SERIES, date(2023, 1, 1), date(2023, 12, 31))
+        df = store.series(SERIES, date(2022, 1, 1), date(2023, 12, 31))
+
+        periods = [(q["dataInicial"], q["dataFinal"]) for _, q in sgs.queries[1:]]
+        assert ("01/01/2022", "31/12/2022") in periods
+        assert list(df["Date"]) == list(pd.bdate_range("2022-01-01", "2023-12-31"))
+
+    def test_persistencia_entre_instancias(self, store, sgs):
+        from bcb_store import BcbSeriesStore
+
+        store.series(SERIES, date(2023, 1, 1), date(2023, 6, 30))
+        reopened = BcbSeriesStore(path=store.path, base_url=sgs.url(""))
+        df = reopened.series(SERIES, date(2023, 1, 1), date(2023, 6, 30))
+        assert len(df) == len(pd.bdate_range("2023-01-01", "2023-06-30"))
+        assert sgs.requests[PATH] == 1
+
+    def test_falha_nao_altera_cobertura(self, store, sgs):
+        import requests
+
+        store.series(SERIES, date(2023, 1, 1), date(2023, 6, 30))
+        sgs.route(PATH, lambda query: b"nao e json")
+        with pytest.raises(requests.exceptions.JSONDecodeError):
+            store.update(SERIES, date(2023, 1, 1), date(2023, 12, 31))
+        assert store.coverage(SERIES) == (date(2023, 1, 1), date(2023, 6, 30))
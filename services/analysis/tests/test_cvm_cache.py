@@ -0,0 +1,169 @@
+"""
+Testes para cvm_cache.py — cache local dos arquivos CVM.
+
+Os arquivos são servidos por um servidor HTTP local (http_stub), nunca pela
+CVM real; o conteúdo é opaco para o cache, então não há dado financeiro.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+from http_stub import StubHttpServer
+
+
+@pytest.fixture
+def server():
+    with StubHttpServer() as stub:
+        yield stub
+
+
+@pytest.fixture
+def cache(tmp_path):
+    from cvm_cache import CvmArchiveCache
+
+    return CvmArchiveCache(root=tmp_path / "cvm")
+
+
+class TestCvmArchiveCache:
+    """Testa CvmArchiveCache contra o servidor HTTP local."""
+
+    def test_mes_fechado_baixado_uma_unica_vez(self, server, cache):
+        server.put("/inf_diario_fi_202401.zip", b"conteudo-jan")
+        url = server.url("/inf_diario_fi_202401.zip")
+
+        first = cache.fetch(url, immutable=True)
+        second = cache.fetch(url, immutable=True)
+
+        assert first == second
+        assert first.read_bytes() == b"conteudo-jan"
+        assert server.requests["/inf_diario_fi_202401.zip"] == 1
+
+    def test_mes_aberto_revalidado_sem_baixar_corpo(self, server, cache):
+        server.put("/inf_diario_fi_202402.zip", b"conteudo-fev")
+        url = server.url("/inf_diario_fi_202402.zip")
+
+        cache.fetch(url)
+        bytes_after_first = server.bytes_sent
+        path = cache.fetch(url)
+
+        assert server.requests["/inf_diario_fi_202402.zip"] == 2
+        assert server.not_modified["/inf_diario_fi_202402.zip"] == 1
+        assert server.bytes_sent == bytes_after_first, "304 não deve transferir corpo"
+        assert path.read_bytes() == b"conteudo-fev"
+
+    def test_mes_aberto_atualizado_quando_servidor_muda(self, server, cache):
+        server.put("/inf_diario_fi_202402.zip", b"versao-1")
+        url = server.url("/inf_diario_fi_202402.zip")
+        old = cache.fetch(url)
+
+        server.put("/inf_diario_fi_202402.zip", b"versao-2")
+        new = cache.fetch(url)
+
+        assert new != old
+        assert new.read_bytes() == b"versao-2"
+
+    def test_conteudo_identico_compartilha_blob(self, server, cache):
+        server.put("/a.zip", b"mesmo-conteudo")
+        server.put("/b.zip", b"mesmo-conteudo")
+
+        assert cache.fetch(server.url("/a.zip")) == cache.fetch(server.url("/b.zip"))
+
+    def test_mes_fechado_apos_virada_passa_a_imutavel(self, server, cache):
+        server.put("/inf_diario_fi_202403.zip", b"marco")
+        url = server.url("/inf_diario_fi_202403.zip")
+        cache.fetch(url, immutable=False)
+        cache.fetch(url, immutable=True)  # revalida uma vez e congela
+        cache.fetch(url, immutable=True)
+
+        assert server.requests["/inf_diario_fi_202403.zip"] == 2
+        assert cache.entry(url)["immutable"] is True
+
+    def test_indice_persistido_entre_instancias(self, server, tmp_path):
+        from cvm_cache import CvmArchiveCache
+
+        server.put("/inf_diario_fi_202401.zip", b"persistido")
+        url = server.url("/inf_diario_fi_202401.zip")
+        CvmArchiveCache(root=tmp_path / "cvm").fetch(url, immutable=True)
+
+        path = CvmArchiveCache(root=tmp_path / "cvm").fetch(url, immutable=True)
+        assert path.read_bytes() == b"persistido"
+        assert server.requests["/inf_diario_fi_202401.zip"] == 1
+
+    def test_instancias_simultaneas_preservam_entradas_uma_da_outra(self, server, tmp_path):
+        from cvm_cache import CvmArchiveCache
+
+        server.put("/a.zip", b"conteudo-a")
+        server.put("/b.zip", b"conteudo-b")
+        first = CvmArchiveCache(root=tmp_path / "cvm")
+        second = CvmArchiveCache(root=tmp_path / "cvm")  # índice carregado ainda vazio
+        first.fetch(server.url("/a.zip"))
+        second.fetch(server.url("/b.zip"))
+
+        fresh = CvmArchiveCache(root=tmp_path / "cvm")
+        assert fresh.entry(server.url("/a.zip"))["etag"]
+        assert fresh.entry(server.url("/b.zip"))["etag"]
+
+    def test_threads_com_instancias_proprias_nao_perdem_etags(self, server, tmp_path):
+        from concurrent.futures import ThreadPoolExecutor
+
+        from cvm_cache import CvmArchiveCache
+
+        urls = []
+        for i in range(16):
+            server.put(f"/m{i}.zip", f"mes-{i}".encode())
+            urls.append(server.url(f"/m{i}.zip"))
+
+        def fetch(url):
+            return CvmArchiveCache(root=tmp_path / "cvm").fetch(url)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(fetch, urls))
+
+        fresh = CvmArchiveCache(root=tmp_path / "cvm")
+        assert all(fresh.entry(url)["etag"] for url in urls)
+
+    def test_falha_ao_gravar_indice_nao_deixa_temporario(self, server, cache, monkeypatch):
+        import cvm_cache
+
+        def broken_dump(*args, **kwargs):
+            raise TypeError("falha simulada")
+
+        server.put("/a.zip", b"conteudo-a")
+        monkeypatch.setattr(cvm_cache.json, "dump", broken_dump)
+        with pytest.raises(TypeError):
+            cache.fetch(server.url("/a.zip"))
+
+        assert list(cache.root.glob(".index-*")) == []
+
+    def test_copia_local_usada_se_revalidacao_falhar(self, tmp_path):
+        from cvm_cache import CvmArchiveCache
+
+        cache = CvmArchiveCache(root=tmp_path / "cvm", timeout=2)
+        with StubHttpServer() as stub:
+            stub.put("/inf_diario_fi_202402.zip", b"ultimo-conhecido")
+            url = stub.url("/inf_diario_fi_202402.zip")
+            cache.fetch(url)
+        # servidor desligado: revalidação falha, cópia local é devolvida
+        assert cache.fetch(url).read_bytes() == b"ultimo-conhecido"
+
+    def test_404_sem_copia_local_levanta_erro(self, server, cache):
+        import requests
+
+        with pytest.raises(requests.HTTPError):
+            cache.fetch(server.url("/inexistente.zip"))
+
+
+def test_cvm_months_comeca_no_mes_corrente():
+    from datetime import date
+
+    from cvm_inf_diario import cvm_months
+
+    months = cvm_months(14, today=date(2025, 2, 10))
+    assert months[0] == "202502"
+    assert months[1] == "202501"
+    assert months[2] == "202412"
+    assert months[-1] == "202401"
+    assert len(months) == 14
@@ -0,0 +1,263 @@
+"""
+Testes para cvm_inf_diario.py — download e leitura dos arquivos INF_DIARIO.
+
+Os zips são sintéticos (tests/cvm_samples.py) e servidos por um servidor HTTP
+local (tests/http_stub.py).
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+from cvm_samples import fake_cnpj, inf_diario_zip
+from http_stub import StubHttpServer
+
+CNPJS = [fake_cnpj(i) for i in range(20)]
+MONTHS = ["202403", "202402", "202401", "202312", "202311", "202310"]
+
+
+@pytest.fixture
+def server():
+    with StubHttpServer() as stub:
+        for ym in MONTHS:
+            stub.put(f"/FI/DOC/INF_DIARIO/DADOS/inf_diario_fi_{ym}.zip", inf_diario_zip(ym, CNPJS))
+        yield stub
+
+
+@pytest.fixture
+def cache(tmp_path):
+    from cvm_cache import CvmArchiveCache
+
+    return CvmArchiveCache(root=tmp_path / "cvm")
+
+
+class TestDownloadMonths:
+    """Testa download_months (sequencial e concorrente)."""
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_baixa_todos_os_meses_na_ordem(self, server, cache, workers):
+        from cvm_inf_diario import download_months
+
+        archives, failures = download_months(
+            cache, MONTHS, max_workers=workers, base_url=server.url("")
+        )
+        assert list(archives) == MONTHS
+        assert failures == []
+        assert all(p.exists() for p in archives.values())
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_falhas_por_mes(self, server, cache, workers):
+        from cvm_inf_diario import download_months
+
+        months = MONTHS + ["202309", "202308"]  # não publicados no servidor
+        archives, failures = download_months(
+            cache, months, max_workers=workers, base_url=server.url("")
+        )
+        assert list(archives) == MONTHS
+        assert [ym for ym, _ in failures] == ["202309", "202308"]
+        assert all("404" in err for _, err in failures)
+
+    def test_apenas_mes_aberto_revalidado(self, server, cache):
+        from cvm_inf_diario import download_months
+
+        base = server.url("")
+        download_months(cache, MONTHS, max_workers=4, base_url=base)
+        download_months(cache, MONTHS, max_workers=4, base_url=base)
+
+        open_path = f"/FI/DOC/INF_DIARIO/DADOS/inf_diario_fi_{MONTHS[0]}.zip"
+        closed_path = f"/FI/DOC/INF_DIARIO/DADOS/inf_diario_fi_{MONTHS[1]}.zip"
+        assert server.requests[open_path] == 2
+        assert server.requests[closed_path] == 1
+
+    @pytest.mark.parametrize("today, revalidated", [("2024-02-05", True), ("2024-02-16", False)])
+    def test_mes_anterior_revalidado_durante_o_prazo(self, server, cache, today, revalidated):
+        from datetime import date
+
+        from cvm_inf_diario import download_months
+
+        base, months = server.url(""), ["202402", "202401"]
+        for _ in range(2):
+            download_months(
+                cache, months, max_workers=1, base_url=base, today=date.fromisoformat(today)
+            )
+        previous = "/FI/DOC/INF_DIARIO/DADOS/inf_diario_fi_202401.zip"
+        assert server.requests[previous] == (2 if revalidated else 1)
+
+    def test_mes_encerrado_apos_prazo(self):
+        from datetime import date
+
+        from cvm_inf_diario import month_is_settled
+
+        assert not month_is_settled("202312", date(2024, 1, 15), grace_days=15)
+        assert month_is_settled("202312", date(2024, 1, 16), grace_days=15)
+        assert not month_is_settled("202401", date(2024, 1, 31), grace_days=0)
+        assert month_is_settled("202401", date(2024, 2, 1), grace_days=0)
+
+    def test_concorrencia_limitada(self, cache):
+        from cvm_inf_diario import download_months
+
+        with StubHttpServer(latency=0.2) as stub:
+            for ym in MONTHS:
+                stub.put(f"/FI/DOC/INF_DIARIO/DADOS/inf_diario_fi_{ym}.zip", b"x")
+            import time
+
+            t0 = time.perf_counter()
+            download_months(cache, MONTHS, max_workers=3, base_url=stub.url(""))
+            elapsed = time.perf_counter() - t0
+        # 6 meses, 3 por vez, 0.2 s cada → ~0.4 s (sequencial seria ~1.2 s)
+        assert 0.35 <= elapsed < 1.0
+
+
+class TestReadInfDiarioStreaming:
+    """Filtro em streaming deve coincidir com a leitura completa + filtro."""
+
+    @pytest.fixture
+    def month_zip(self, tmp_path):
+        path = tmp_path / "inf_diario_fi_202401.zip"
+        path.write_bytes(inf_diario_zip("202401", CNPJS))
+        return path
+
+    @pytest.mark.parametrize("n_cnpjs", [1, 3, 12])
+    def test_equivale_a_leitura_completa(self, month_zip, n_cnpjs):
+        import pandas as pd
+        from cvm_inf_diario import read_inf_diario
+
+        wanted = CNPJS[2 : 2 + n_cnpjs]
+        full = read_inf_diario(month_zip)
+        expected = full[full["CNPJ_FUNDO"].isin(wanted)].reset_index(drop=True)
+        streamed = read_inf_diario(month_zip, wanted)
+        pd.testing.assert_frame_equal(streamed, expected)
+
+    def test_leitura_completa_em_blocos(self, month_zip):
+        import pandas as pd
+        from cvm_inf_diario import read_inf_diario
+
+        pd.testing.assert_frame_equal(
+            read_inf_diario(month_zip, chunksize=7),
+            read_inf_diario(month_zip),
+        )
+
+    def test_cnpj_ausente_retorna_vazio_tipado(self, month_zip):
+        from cvm_inf_diario import read_inf_diario
+
+        df = read_inf_diario(month_zip, ["99.999.999/9999-99"])
+        assert df.empty
+        assert df["VL_QUOTA"].dtype == "float64"
+
+    def test_linhas_crlf(self, tmp_path):
+        import io
+        import zipfile
+
+        from cvm_inf_diario import read_inf_diario
+        from cvm_samples import inf_diario_csv
+
+        csv = inf_diario_csv("202401", CNPJS[:3]).replace(b"\n", b"\r\n")
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            zf.writestr("inf_diario_fi_202401.csv", csv)
+        path = tmp_path / "crlf.zip"
+        path.write_bytes(buf.getvalue())
+
+        df = read_inf_diario(path, [CNPJS[1]])
+        assert set(df["CNPJ_FUNDO"]) == {CNPJS[1]}
+        assert df["VL_QUOTA"].notna().all()
+
+    @pytest.mark.parametrize("prefilter", [True, False])
+    def test_filtro_cnpj_na_primeira_coluna_e_com_espacos(self, monkeypatch, prefilter):
+        import io
+
+        import cvm_inf_diario
+        from cvm_inf_diario import _filter_lines
+
+        if not prefilter:
+            monkeypatch.setattr(cvm_inf_diario, "_PREFILTER_MAX", 0)
+        first, padded, other = CNPJS[0], CNPJS[1], CNPJS[2]
+        lines = [
+            f"{first};2024-01-02;1,5\n".encode(),
+            f" {padded} ;2024-01-02;2,5\n".encode(),
+            f"{other};2024-01-02;3,5\n".encode(),
+            f"{other};{first};4,5\n".encode(),  # CNPJ pedido fora da coluna do CNPJ
+        ]
+        body = _filter_lines(io.BytesIO(b"".join(lines)), 0, [first, padded])
+        assert body == lines[0] + lines[1]
+
+        padded_mid = f"FI; {first} ;2024-01-02;1,5\n".encode()
+        assert _filter_lines(io.BytesIO(padded_mid), 1, [first]) == padded_mid
+
+
+class TestFetchFundQuotas:
+    """Testa fetch_fund_quotas: vários fundos com uma passada por mês."""
+
+    def _fetch(self, server, tmp_path, cnpjs, **kwargs):
+        from cvm_cache import CvmArchiveCache
+        from cvm_inf_diario import fetch_fund_quotas
+
+        return fetch_fund_quotas(
+            cnpjs,
+            months=MONTHS,
+            cache=CvmArchiveCache(root=tmp_path / "cvm"),
+            base_url=server.url(""),
+            **kwargs,
+        )
+
+    @pytest.mark.parametrize("use_parquet", [False, True])
+    def test_formato_longo(self, server, tmp_path, use_parquet):
+        if use_parquet:
+            pytest.importorskip("pyarrow")
+            from cvm_quota_store import CvmQuotaStore
+
+            kwargs = {"store": CvmQuotaStore(tmp_path / "store")}
+        else:
+            kwargs = {"use_parquet": False}
+
+        wanted = CNPJS[:15]
+        df = self._fetch(server, tmp_path, wanted, **kwargs)
+
+        assert list(df.columns) == ["CNPJ_FUNDO", "Date", "Value"]
+        assert set(df["CNPJ_FUNDO"]) == set(wanted)
+        assert not df.duplicated(["CNPJ_FUNDO", "Date"]).any()
+        assert df.attrs["failures"] == []
+
+    def test_parquet_e_csv_equivalentes(self, server, tmp_path):
+        import pandas as pd
+
+        pytest.importorskip("pyarrow")
+        from cvm_quota_store import CvmQuotaStore
+
+        wanted = [CNPJS[0], CNPJS[5], CNPJS[19]]
+        via_csv = self._fetch(server, tmp_path, wanted, use_parquet=False)
+        via_parquet = self._fetch(server, tmp_path, wanted, store=CvmQuotaStore(tmp_path / "store"))
+        pd.testing.assert_frame_equal(via_csv, via_parquet)
+
+    def test_um_download_por_mes_para_varios_fundos(self, server, tmp_path):
+        self._fetch(server, tmp_path, CNPJS, use_parquet=False)
+        for ym in MONTHS:
+            assert server.requests[f"/FI/DOC/INF_DIARIO/DADOS/inf_diario_fi_{ym}.zip"] == 1
+
+    def test_as_dict_inclui_fundos_sem_cotas(self, server, tmp_path):
+        missing = "99.999.999/9999-99"
+        result = self._fetch(server, tmp_path, [CNPJS[3], missing], as_dict=True, use_parquet=False)
+
+        assert set(result) == {CNPJS[3], missing}
+        assert list(result[CNPJS[3]].columns) == ["Date", "Value"]
+        assert result[CNPJS[3]]["Date"].is_monotonic_increasing
+        assert result[missing].empty
+        assert all(frame.attrs["failures"] == [] for frame in result.values())
+
+    def test_as_dict_devolve_falhas(self, server, tmp_path):
+        from cvm_cache import CvmArchiveCache
+        from cvm_inf_diario import fetch_fund_quotas
+
+        result = fetch_fund_quotas(
+            [CNPJS[3], "99.999.999/9999-99"],
+            months=MONTHS + ["202309"],  # não publicado no servidor
+            as_dict=True,
+            cache=CvmArchiveCache(root=tmp_path / "cvm"),
+            use_parquet=False,
+            base_url=server.url(""),
+        )
+        assert not result[CNPJS[3]].empty
+        for frame in result.values():
+            assert [ym for ym, _ in frame.attrs["failures"]] == ["202309"]
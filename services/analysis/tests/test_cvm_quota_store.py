@@ -0,0 +1,143 @@
+"""
+Testes para cvm_inf_diario.py e cvm_quota_store.py.
+
+Usa arquivos INF_DIARIO sintéticos (tests/cvm_samples.py) — valida esquema,
+tipos e filtragem, não valores de cota.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+import pytest
+from cvm_samples import fake_cnpj, inf_diario_zip, month_days
+
+pytest.importorskip("pyarrow")
+
+CNPJS = [fake_cnpj(i) for i in range(1000)]
+
+
+@pytest.fixture
+def month_zip(tmp_path):
+    path = tmp_path / "inf_diario_fi_202401.zip"
+    path.write_bytes(inf_diario_zip("202401", CNPJS))
+    return path
+
+
+class TestReadInfDiario:
+    """Testa read_inf_diario."""
+
+    def test_colunas_tipadas(self, month_zip):
+        from cvm_inf_diario import read_inf_diario
+
+        df = read_inf_diario(month_zip)
+        assert list(df.columns) == ["CNPJ_FUNDO", "DT_COMPTC", "VL_QUOTA"]
+        assert pd.api.types.is_datetime64_any_dtype(df["DT_COMPTC"])
+        assert df["VL_QUOTA"].dtype == "float64"
+
+    def test_filtra_cnpjs(self, month_zip):
+        from cvm_inf_diario import read_inf_diario
+
+        df = read_inf_diario(month_zip, [CNPJS[7]])
+        assert set(df["CNPJ_FUNDO"]) == {CNPJS[7]}
+        assert len(df) == len(month_days("202401"))
+
+    def test_aceita_coluna_cnpj_fundo_classe(self, tmp_path):
+        from cvm_inf_diario import read_inf_diario
+
+        path = tmp_path / "inf_diario_fi_202405.zip"
+        path.write_bytes(inf_diario_zip("202405", CNPJS[:3], cnpj_col="CNPJ_FUNDO_CLASSE"))
+        df = read_inf_diario(path, [CNPJS[1]])
+        assert set(df["CNPJ_FUNDO"]) == {CNPJS[1]}
+
+
+class TestCvmQuotaStore:
+    """Testa CvmQuotaStore (Parquet ordenado por CNPJ)."""
+
+    def test_leitura_retorna_apenas_cnpj_pedido(self, tmp_path, month_zip):
+        from cvm_quota_store import CvmQuotaStore
+
+        store = CvmQuotaStore(tmp_path / "store")
+        store.ingest_month("202401", month_zip)
+        df = store.read([CNPJS[42]])
+
+        assert set(df["CNPJ_FUNDO"]) == {CNPJS[42]}
+        assert len(df) == len(month_days("202401"))
+        assert df["DT_COMPTC"].is_monotonic_increasing
+        assert df["VL_QUOTA"].dtype == "float64"
+
+    def test_arquivo_ordenado_com_estatisticas_por_row_group(self, tmp_path, month_zip):
+        import pyarrow.parquet as pq
+        from cvm_quota_store import CvmQuotaStore
+
+        store = CvmQuotaStore(tmp_path / "store")
+        path = store.ingest_month("202401", month_zip)
+        meta = pq.ParquetFile(path).metadata
+
+        assert meta.num_row_groups > 1, "row groups pequenos permitem pushdown"
+        maxs = [meta.row_group(i).column(0).statistics.max for i in range(meta.num_row_groups)]
+        mins = [meta.row_group(i).column(0).statistics.min for i in range(meta.num_row_groups)]
+        assert all(
+            hi <= lo for hi, lo in zip(maxs[:-1], mins[1:])
+        ), "row groups devem ser disjuntos por CNPJ"
+
+    @pytest.mark.parametrize("shuffled", [False, True])
+    def test_ingestao_em_blocos_pequenos(self, tmp_path, shuffled):
+        import random
+        import zipfile
+
+        import pyarrow.parquet as pq
+        from cvm_inf_diario import read_inf_diario
+        from cvm_quota_store import CvmQuotaStore
+        from cvm_samples import inf_diario_csv
+
+        header, *lines = inf_diario_csv("202401", CNPJS[:300]).decode("latin-1").splitlines()
+        if shuffled:
+            random.Random(1).shuffle(lines)  # força várias sequências e o merge externo
+        path = tmp_path / "inf_diario_fi_202401.zip"
+        with zipfile.ZipFile(path, "w") as zf:
+            zf.writestr("inf_diario_fi_202401.csv", "\n".join([header, *lines]) + "\n")
+
+        store = CvmQuotaStore(tmp_path / "store")
+        target = store.ingest_month("202401", path, source_sha256="abc", chunksize=997)
+        stored = pq.read_table(target).to_pandas()
+        expected = (
+            read_inf_diario(path)
+            .sort_values(["CNPJ_FUNDO", "DT_COMPTC"], kind="stable")
+            .reset_index(drop=True)
+        )
+        pd.testing.assert_frame_equal(stored, expected)
+        assert store.has_month("202401", "abc")
+        assert list(tmp_path.joinpath("store").iterdir()) == [target], "sem temporários"
+
+    def test_has_month_compara_sha_de_origem(self, tmp_path, month_zip):
+        from cvm_quota_store import CvmQuotaStore
+
+        store = CvmQuotaStore(tmp_path / "store")
+        assert not store.has_month("202401", "abc")
+        store.ingest_month("202401", month_zip, source_sha256="abc")
+        assert store.has_month("202401", "abc")
+        assert not store.has_month("202401", "def"), "zip alterado deve ser reingerido"
+
+    def test_leitura_multiplos_meses(self, tmp_path):
+        from cvm_quota_store import CvmQuotaStore
+
+        store = CvmQuotaStore(tmp_path / "store")
+        for ym in ("202401", "202402"):
+            path = tmp_path / f"{ym}.zip"
+            path.write_bytes(inf_diario_zip(ym, CNPJS[:5]))
+            store.ingest_month(ym, path)
+
+        both = store.read([CNPJS[0]])
+        only_feb = store.read([CNPJS[0]], months=["202402"])
+        assert len(both) == len(month_days("202401")) + len(month_days("202402"))
+        assert len(only_feb) == len(month_days("202402"))
+
+    def test_sem_meses_retorna_vazio(self, tmp_path):
+        from cvm_quota_store import CvmQuotaStore
+
+        df = CvmQuotaStore(tmp_path / "vazio").read([CNPJS[0]])
+        assert df.empty
+        assert list(df.columns) == ["CNPJ_FUNDO", "DT_COMPTC", "VL_QUOTA"]
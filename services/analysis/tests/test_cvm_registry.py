@@ -0,0 +1,178 @@
+"""
+Testes para cvm_registry.py — cadastro de fundos indexado.
+
+O cad_fi.csv é sintético e servido pelo servidor HTTP local (tests/http_stub.py).
+Os resultados indexados são comparados com os filtros pandas equivalentes.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+import pytest
+from cvm_samples import fake_cnpj
+from http_stub import StubHttpServer
+
+BB_DTVM = "30.822.936/0001-69"
+
+_NAMES = [
+    "BB RENDA FIXA LP HIGH FUNDO DE INVESTIMENTO",
+    "BB RF LP PREMIUM FIC FI",
+    "BB AÇÕES DIVIDENDOS FIA",
+    "BRADESCO RF LP HIGH FI",
+    "FUNDO DE INVESTIMENTO EM COTAS BB LP CORPORATE",
+    "ITAU MULTIMERCADO HEDGE",
+    "XP RENDA FIXA CRÉDITO PRIVADO LP",
+    "BBX CAPITAL RF",
+]
+_SIT = ["EM FUNCIONAMENTO NORMAL", "CANCELADA", "FASE PRÉ-OPERACIONAL"]
+_CLASSE = ["Renda Fixa", "Ações", "Multimercado"]
+_GESTOR = ["BB DTVM S.A.", "BRADESCO ASSET", "ITAU UNIBANCO ASSET"]
+_ADMIN = ["BB DTVM S.A.", "BANCO DO BRASIL S.A.", "BEM DTVM LTDA"]
+
+
+def _cad_fi(n: int = 600) -> pd.DataFrame:
+    rows = []
+    for i in range(n):
+        rows.append(
+            {
+                "TP_FUNDO": "FI",
+                "CNPJ_FUNDO": fake_cnpj(i),
+                "DENOM_SOCIAL": f"{_NAMES[i % len(_NAMES)]} {i}",
+                "SIT": _SIT[i % len(_SIT)],
+                "CLASSE": _CLASSE[(i // 2) % len(_CLASSE)],
+                "CPF_CNPJ_GESTOR": BB_DTVM if i % 3 == 0 else fake_cnpj(10_000 + i % 7),
+                "GESTOR": _GESTOR[i % len(_GESTOR)],
+                "CNPJ_ADMIN": fake_cnpj(20_000 + i % 5),
+                "ADMIN": _ADMIN[(i // 3) % len(_ADMIN)],
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def _word_contains(series: pd.Series, term: str) -> pd.Series:
+    """Filtro pandas de referência com a mesma semântica (início de palavra)."""
+    from cvm_registry import normalize_text
+
+    norm = " " + series.fillna("").map(normalize_text)
+    return norm.str.contains(" " + normalize_text(term), regex=False)
+
+
+@pytest.fixture(scope="module")
+def cad_df():
+    return _cad_fi()
+
+
+@pytest.fixture
+def served(cad_df, tmp_path):
+    from cvm_cache import CvmArchiveCache
+    from cvm_registry import FundRegistry
+
+    FundRegistry._loaded.clear()
+    csv = cad_df.to_csv(sep=";", index=False).encode("latin-1")
+    with StubHttpServer() as stub:
+        stub.put("/FI/CAD/DADOS/cad_fi.csv", csv)
+        cache = CvmArchiveCache(root=tmp_path / "cvm")
+        yield stub, cache, tmp_path / "registry"
+    FundRegistry._loaded.clear()
+
+
+@pytest.fixture
+def registry(served):
+    from cvm_registry import FundRegistry
+
+    stub, cache, snapshot_dir = served
+    return FundRegistry.load(cache=cache, snapshot_dir=snapshot_dir, base_url=stub.url(""))
+
+
+class TestFundRegistryConsultas:
+    """Resultados indexados devem coincidir com os filtros pandas."""
+
+    def test_nome_frase(self, registry, cad_df):
+        expected = cad_df[_word_contains(cad_df["DENOM_SOCIAL"], "RF LP HIGH")]
+        got = registry.query(name_any=["RF LP HIGH"])
+        assert list(got["CNPJ_FUNDO"]) == list(expected["CNPJ_FUNDO"])
+
+    def test_nome_ignora_acento_e_caixa(self, registry, cad_df):
+        expected = cad_df[cad_df["DENOM_SOCIAL"].str.contains("AÇÕES", regex=False)]
+        got = registry.query(name_all=["acoes"])
+        assert len(got) == len(expected) > 0
+
+    def test_prefixo_de_palavra(self, registry):
+        got = registry.query(name_all=["BB"])
+        assert got["DENOM_SOCIAL"].str.contains("BBX").any(), "'BB' é prefixo de 'BBX'"
+        assert not got["DENOM_SOCIAL"].str.startswith("ITAU").any()
+
+    def test_gestor_cnpj_e_situacao(self, registry, cad_df):
+        mask = (cad_df["CPF_CNPJ_GESTOR"] == BB_DTVM) & cad_df["SIT"].str.contains("FUNCIONAMENTO")
+        got = registry.query(manager_cnpj=BB_DTVM, status_contains="funcionamento")
+        assert list(got["CNPJ_FUNDO"]) == list(cad_df[mask]["CNPJ_FUNDO"])
+
+    def test_administrador_qualquer_termo(self, registry, cad_df):
+        terms = ["BB DTVM", "BANCO DO BRASIL", "BB S.A"]
+        mask = pd.Series(False, index=cad_df.index)
+        for term in terms:
+            mask |= _word_contains(cad_df["ADMIN"], term)
+        mask &= _word_contains(cad_df["DENOM_SOCIAL"], " LP")
+        got = registry.query(administrator_any=terms, name_all=[" LP"])
+        assert list(got["CNPJ_FUNDO"]) == list(cad_df[mask]["CNPJ_FUNDO"])
+
+    def test_nome_comeca_com(self, registry, cad_df):
+        mask = cad_df["DENOM_SOCIAL"].str.contains(r"^BB RF|^BB RENDA FIXA", regex=True)
+        got = registry.query(name_prefix_any=["BB RF", "BB RENDA FIXA"])
+        assert list(got["CNPJ_FUNDO"]) == list(cad_df[mask]["CNPJ_FUNDO"])
+
+    def test_classe(self, registry, cad_df):
+        got = registry.query(fund_class="renda fixa")
+        assert len(got) == (cad_df["CLASSE"] == "Renda Fixa").sum()
+
+    def test_sem_resultado(self, registry):
+        assert registry.query(name_all=["INEXISTENTE XYZ"]).empty
+
+    def test_sem_filtros_retorna_cadastro(self, registry, cad_df):
+        assert len(registry.query()) == len(cad_df)
+
+
+class TestFundRegistryCarga:
+    """Cadastro carregado uma vez e persistido como snapshot."""
+
+    def test_snapshot_reutilizado_sem_reler_csv(self, served, monkeypatch):
+        import cvm_registry
+        from cvm_registry import FundRegistry
+
+        stub, cache, snapshot_dir = served
+        first = FundRegistry.load(cache=cache, snapshot_dir=snapshot_dir, base_url=stub.url(""))
+        FundRegistry._loaded.clear()
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("CSV não deveria ser relido")
+
+        monkeypatch.setattr(cvm_registry.pd, "read_csv", _fail)
+        second = FundRegistry.load(cache=cache, snapshot_dir=snapshot_dir, base_url=stub.url(""))
+        assert len(second.df) == len(first.df)
+        assert list(second.query(name_any=["RF LP HIGH"])["CNPJ_FUNDO"]) == list(
+            first.query(name_any=["RF LP HIGH"])["CNPJ_FUNDO"]
+        )
+
+    def test_memoria_do_processo(self, served):
+        from cvm_registry import FundRegistry
+
+        stub, cache, snapshot_dir = served
+        kwargs = {"cache": cache, "snapshot_dir": snapshot_dir, "base_url": stub.url("")}
+        assert FundRegistry.load(**kwargs) is FundRegistry.load(**kwargs)
+
+    def test_cadastro_alterado_reindexa(self, served, cad_df):
+        from cvm_registry import FundRegistry
+
+        stub, cache, snapshot_dir = served
+        kwargs = {"cache": cache, "snapshot_dir": snapshot_dir, "base_url": stub.url("")}
+        before = FundRegistry.load(**kwargs)
+
+        changed = cad_df.head(10)
+        stub.put("/FI/CAD/DADOS/cad_fi.csv", changed.to_csv(sep=";", index=False).encode("latin-1"))
+        after = FundRegistry.load(**kwargs)
+
+        assert len(before.df) == len(cad_df)
+        assert len(after.df) == 10
@@ -0,0 +1,175 @@
+"""
+Testes para frontier.py — fronteira eficiente por conjunto ativo paramétrico.
+
+Retornos sintéticos com fatores comuns; a referência é o QP resolvido ponto a
+ponto pelo SLSQP do scipy e as fórmulas fechadas de Markowitz.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import minimize
+
+
+@pytest.fixture(scope="module")
+def returns():
+    rng = np.random.default_rng(5)
+    n = 8
+    factors = rng.normal(size=(600, 3)) @ rng.normal(size=(3, n)) * 0.006
+    data = factors + rng.normal(size=(600, n)) * 0.008 + rng.uniform(-0.0005, 0.001, n)
+    return pd.DataFrame(data, columns=[f"ativo_{i}" for i in range(n)])
+
+
+def _moments(returns):
+    x = returns.to_numpy()
+    return x.mean(axis=0), np.cov(x, rowvar=False)
+
+
+def _slsqp(mu, cov, target=None, objective=None, long_only=True):
+    n = len(mu)
+    constraints = [{"type": "eq", "fun": lambda w: w.sum() - 1}]
+    if target is not None:
+        constraints.append({"type": "eq", "fun": lambda w: w @ mu - target})
+    result = minimize(
+        objective or (lambda w: w @ cov @ w),
+        np.full(n, 1 / n),
+        constraints=constraints,
+        bounds=[(0, 1)] * n if long_only else None,
+        method="SLSQP",
+        options={"ftol": 1e-15, "maxiter": 1000},
+    )
+    return result.x
+
+
+class TestLongOnlyFrontier:
+    """Conjunto ativo paramétrico igual ao QP ponto a ponto."""
+
+    def test_volatilidade_igual_ao_qp(self, returns):
+        from frontier import efficient_frontier
+
+        mu, cov = _moments(returns)
+        result = efficient_frontier(returns, n_points=25)
+        frontier = result["frontier"]
+        for i in [0, 6, 12, 18, 24]:
+            target = frontier["expected_return"].iloc[i] / 252
+            w = _slsqp(mu, cov, target)
+            assert np.sqrt(w @ cov @ w * 252) == pytest.approx(
+                frontier["volatility"].iloc[i], rel=1e-6
+            )
+
+    def test_pesos_validos_e_retornos_alvo(self, returns):
+        from frontier import efficient_frontier
+
+        mu, _ = _moments(returns)
+        result = efficient_frontier(returns, n_points=40)
+        weights = result["frontier"][returns.columns].to_numpy()
+        assert (weights >= 0).all()
+        np.testing.assert_allclose(weights.sum(axis=1), 1.0, atol=1e-12)
+        targets = np.linspace(weights[0] @ mu, mu.max(), 40)
+        np.testing.assert_allclose(weights @ mu, targets, rtol=1e-10)
+        assert result["frontier"]["volatility"].is_monotonic_increasing
+        assert result["segments"] > 1
+
+    def test_sharpe_maximo_e_variancia_minima(self, returns):
+        from frontier import efficient_frontier
+
+        mu, cov = _moments(returns)
+        rf = 0.0002
+        result = efficient_frontier(returns, n_points=10, risk_free=rf)
+        w = _slsqp(mu, cov, objective=lambda w: -(w @ mu - rf) / np.sqrt(w @ cov @ w))
+        expected = (w @ mu - rf) / np.sqrt(w @ cov @ w) * np.sqrt(252)
+        assert result["max_sharpe"]["sharpe"] == pytest.approx(expected, rel=1e-8)
+        assert result["max_sharpe"]["sharpe"] >= result["frontier"]["sharpe"].max() - 1e-12
+
+        w = _slsqp(mu, cov)
+        assert result["min_variance"]["volatility"] == pytest.approx(
+            np.sqrt(w @ cov @ w * 252), rel=1e-6
+        )
+
+
+class TestUnconstrainedFrontier:
+    """Sem restrição de sinal: fórmulas fechadas de Markowitz."""
+
+    def test_formas_fechadas(self, returns):
+        from frontier import efficient_frontier
+
+        returns = returns + 0.0005  # variância mínima com retorno acima do rf
+        mu, cov = _moments(returns)
+        rf = 0.0001
+        result = efficient_frontier(returns, n_points=5, long_only=False, risk_free=rf)
+        inv = np.linalg.inv(cov)
+        ones = np.ones(len(mu))
+        w_mv = inv @ ones / (ones @ inv @ ones)
+        w_tan = inv @ (mu - rf) / (ones @ inv @ (mu - rf))
+        np.testing.assert_allclose(result["min_variance"][returns.columns], w_mv, atol=1e-10)
+        np.testing.assert_allclose(result["max_sharpe"][returns.columns], w_tan, atol=1e-8)
+
+    def test_sharpe_sem_maximo(self, returns):
+        import warnings
+
+        from frontier import efficient_frontier
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", RuntimeWarning)  # nada avaliado em λ = inf
+            result = efficient_frontier(returns, n_points=5, long_only=False, risk_free=0.01)
+        assert result["max_sharpe"].isna().all()
+        assert result["min_variance"].notna().all()
+
+
+class TestFreeSetCholesky:
+    """Fator atualizado por entrada/saída igual ao refatorado do zero."""
+
+    def test_inclui_e_retira(self, returns):
+        from frontier import _FreeSetCholesky
+
+        _, cov = _moments(returns)
+        chol = _FreeSetCholesky(cov)
+        for j in [3, 0, 5, 7, 1]:
+            chol.add(j)
+        chol.remove(0)
+        chol.remove(1)
+        chol.add(6)
+        chol.remove(3)
+        assert chol.free == [5, 7, 6]
+        expected = np.linalg.cholesky(cov[np.ix_(chol.free, chol.free)])
+        np.testing.assert_allclose(chol.factor, expected, atol=1e-15)
+
+
+class TestCovariance:
+    """Ledoit-Wolf e validações."""
+
+    def test_ledoit_wolf_igual_sklearn(self):
+        sklearn_cov = pytest.importorskip("sklearn.covariance")
+        from frontier import ledoit_wolf
+
+        x = np.random.default_rng(2).normal(size=(60, 100))
+        cov, shrinkage = ledoit_wolf(x)
+        reference = sklearn_cov.LedoitWolf().fit(x)
+        assert shrinkage == pytest.approx(reference.shrinkage_, rel=1e-10)
+        np.testing.assert_allclose(cov, reference.covariance_, atol=1e-14)
+
+    def test_mais_ativos_que_datas(self):
+        from scipy.linalg import LinAlgError
+
+        from frontier import efficient_frontier
+
+        rng = np.random.default_rng(9)
+        wide = pd.DataFrame(rng.normal(0.0005, 0.01, (40, 60)) + rng.uniform(0, 1e-3, 60))
+        with pytest.raises(LinAlgError):
+            efficient_frontier(wide, n_points=5, long_only=False)
+        result = efficient_frontier(wide, n_points=5, long_only=False, covariance="ledoit_wolf")
+        assert 0 < result["shrinkage"] <= 1
+        assert len(result["frontier"]) == 5
+
+    def test_validacoes(self, returns):
+        from frontier import efficient_frontier
+
+        with pytest.raises(ValueError, match="covariância desconhecida"):
+            efficient_frontier(returns, covariance="oas")
+        with pytest.raises(ValueError, match="2 ativos"):
+            efficient_frontier(returns.iloc[:, :1])
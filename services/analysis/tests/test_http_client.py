@@ -0,0 +1,212 @@
+"""
+Testes para common/utils.py — cliente HTTP compartilhado.
+
+As respostas (inclusive 429/5xx e gzip) vêm do servidor HTTP local (http_stub).
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pytest
+from http_stub import StubHttpServer
+
+
+@pytest.fixture
+def server():
+    with StubHttpServer() as stub:
+        yield stub
+
+
+def _client(**kwargs):
+    from common.utils import HttpClient
+
+    kwargs.setdefault("backoff_base", 0.01)
+    return HttpClient(**kwargs)
+
+
+def _host(server):
+    return server.url("/").split("/")[2]
+
+
+class TestRetry:
+    """Novas tentativas para 429/5xx com backoff."""
+
+    def test_5xx_tenta_de_novo(self, server):
+        server.put("/dados", b"ok")
+        server.fail("/dados", 503, 502)
+        client = _client(max_retries=3)
+
+        resp = client.get(server.url("/dados"))
+
+        assert resp.status_code == 200
+        assert resp.content == b"ok"
+        assert server.requests["/dados"] == 3
+        m = client.metrics()[_host(server)]
+        assert m["requests"] == 3
+        assert m["retries"] == 2
+
+    def test_429_respeita_retry_after(self, server, monkeypatch):
+        import common.utils as utils
+
+        sleeps = []
+        monkeypatch.setattr(utils.time, "sleep", sleeps.append)
+        server.put("/dados", b"ok")
+        server.fail("/dados", 429, retry_after="7")
+
+        resp = _client(max_retries=2).get(server.url("/dados"))
+
+        assert resp.status_code == 200
+        assert sleeps == [7.0]
+
+    def test_esgotadas_devolve_ultima_resposta(self, server):
+        server.put("/dados", b"ok")
+        server.fail("/dados", 500, 500, 500)
+
+        resp = _client(max_retries=1).get(server.url("/dados"))
+
+        assert resp.status_code == 500
+        assert server.requests["/dados"] == 2
+
+    def test_timeout_do_chamador_e_orcamento_total(self, server):
+        import time
+
+        server.put("/dados", b"ok")
+        server.fail("/dados", *[503] * 10)
+        client = _client(max_retries=8, backoff_base=0.2)
+
+        t0 = time.monotonic()
+        resp = client.get(server.url("/dados"), timeout=0.5)
+        elapsed = time.monotonic() - t0
+
+        assert resp.status_code == 503, "sem orçamento: devolve a última resposta"
+        assert elapsed < 0.6
+        assert server.requests["/dados"] < 9
+
+    def test_retries_por_chamada(self, server):
+        server.put("/dados", b"ok")
+        server.fail("/dados", 503)
+
+        resp = _client(max_retries=3).get(server.url("/dados"), retries=0)
+
+        assert resp.status_code == 503
+        assert server.requests["/dados"] == 1
+
+    def test_404_nao_tenta_de_novo(self, server):
+        client = _client(max_retries=3)
+        assert client.get(server.url("/nada")).status_code == 404
+        assert server.requests["/nada"] == 1
+
+    def test_falha_de_conexao(self, server):
+        import requests
+
+        url = server.url("/dados")
+        server.stop()
+        client = _client(max_retries=2)
+
+        with pytest.raises(requests.ConnectionError):
+            client.get(url, timeout=1)
+        m = client.metrics()[url.split("/")[2]]
+        assert m["errors"] == 3
+        assert m["retries"] == 2
+
+
+class TestTransporte:
+    """gzip, streaming e limite de conexões por host."""
+
+    def test_gzip_e_bytes_na_rede(self):
+        body = b"Date;Rate\n" * 5_000
+        with StubHttpServer(gzip=True) as server:
+            server.put("/serie", body)
+            client = _client()
+
+            resp = client.get(server.url("/serie"))
+
+            assert resp.content == body
+            assert resp.headers["Content-Encoding"] == "gzip"
+            assert 0 < client.metrics()[_host(server)]["bytes"] < len(body) // 10
+
+    def test_stream_conta_bytes_ao_consumir(self, server):
+        server.put("/arquivo.zip", b"x" * 100_000)
+        client = _client()
+
+        with client.get(server.url("/arquivo.zip"), stream=True) as resp:
+            assert client.metrics()[_host(server)]["bytes"] == 0
+            total = sum(len(chunk) for chunk in resp.iter_content(8192))
+
+        assert total == 100_000
+        assert client.metrics()[_host(server)]["bytes"] == 100_000
+
+    def test_stream_consumido_sem_contador_da_rede(self, server, monkeypatch):
+        server.put("/arquivo.zip", b"y" * 5_000)
+        client = _client()
+
+        with client.get(server.url("/arquivo.zip"), stream=True) as resp:
+            monkeypatch.setattr(resp.raw, "tell", lambda: 0)
+            monkeypatch.delitem(resp.headers, "Content-Length")
+            assert b"".join(resp.iter_content(1024)) == b"y" * 5_000
+
+        assert client.metrics()[_host(server)]["bytes"] == 5_000
+
+    def test_limite_por_host(self):
+        with StubHttpServer(latency=0.1) as server:
+            server.put("/dados", b"ok")
+            client = _client(max_per_host=2)
+            threads = [
+                threading.Thread(target=client.get, args=(server.url("/dados"),)) for _ in range(6)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            assert server.requests["/dados"] == 6
+            assert server.max_in_flight <= 2
+            m = client.metrics()[_host(server)]
+            assert m["requests"] == 6
+            assert m["latency_max_s"] >= 0.1
+
+
+class TestImportacao:
+    """Os pontos de entrada acham common/ sem PYTHONPATH nem conftest."""
+
+    def test_ibovespa_analysis_importavel_de_services_analysis(self):
+        import os
+        import subprocess
+
+        env = {k: v for k, v in os.environ.items() if k != "PYTHONPATH"}
+        proc = subprocess.run(
+            [sys.executable, "-c", "import ibovespa_analysis"],
+            cwd=Path(__file__).parent.parent,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+        assert proc.returncode == 0, proc.stderr
+
+
+class TestConfiguracao:
+    """Retries e timeout do cliente não herdam as variáveis do yfinance."""
+
+    def test_defaults_independentes_do_yfinance(self):
+        import os
+        import subprocess
+
+        env = {k: v for k, v in os.environ.items() if not k.startswith("HTTP_")}
+        env.update(YFINANCE_MAX_RETRIES="9", YFINANCE_TIMEOUT="99")
+        proc = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "from common.utils import HTTP_MAX_RETRIES as r, HTTP_TIMEOUT as t; print(r, t)",
+            ],
+            cwd=Path(__file__).resolve().parents[3],
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        assert proc.stdout.split() == ["3", "10.0"], proc.stderr
@@ -0,0 +1,147 @@
+"""
+Testes para indicators.py — indicadores de risco e retorno vetorizados.
+
+Painel sintético; cada indicador é comparado com o cálculo direto, ativo a
+ativo, com pandas/NumPy.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(scope="module")
+def panel():
+    rng = np.random.default_rng(3)
+    dates = pd.bdate_range("2022-01-03", periods=500)
+    bench = pd.Series(rng.normal(0.0004, 0.012, 500), index=dates)
+    betas = np.array([0.0, 0.5, 1.0, 1.4])
+    returns = pd.DataFrame(
+        rng.normal(0.0002, 0.008, (500, 4)) + np.outer(bench, betas),
+        index=dates,
+        columns=["a", "b", "c", "d"],
+    )
+    returns.iloc[:120, 1] = np.nan  # ativo com histórico mais curto
+    returns.iloc[200:210, 2] = np.nan  # lacuna no meio
+    # CDI publicado em dias alternados (preenchido para frente)
+    risk_free = pd.Series(rng.uniform(0.0003, 0.0005, 500), index=dates).iloc[::2]
+    return returns, bench, risk_free
+
+
+def _naive(x: pd.Series, bench: pd.Series, rf: pd.Series) -> dict:
+    x = x.dropna()
+    b, f = bench[x.index], rf[x.index]
+    ex, eb = x - f, b - f
+    beta = np.cov(ex, eb)[0, 1] / eb.var()
+    var = np.quantile(x, 0.05, method="lower")
+    return {
+        "observations": len(x),
+        "annual_return": x.mean() * 252,
+        "annual_volatility": x.std() * np.sqrt(252),
+        "alpha": (ex.mean() - beta * eb.mean()) * 252,
+        "beta": beta,
+        "sharpe": ex.mean() / ex.std() * np.sqrt(252),
+        "treynor": ex.mean() * 252 / beta,
+        "sortino": ex.mean() / np.sqrt((np.minimum(ex, 0) ** 2).mean()) * np.sqrt(252),
+        "r_squared": np.corrcoef(ex, eb)[0, 1] ** 2,
+        "correlation": np.corrcoef(ex, eb)[0, 1],
+        "var_95": var,
+        "cvar_95": x[x <= var].mean(),
+    }
+
+
+class TestRiskReturnIndicators:
+    """Painel inteiro em uma passada, igual ao cálculo por ativo."""
+
+    def test_igual_ao_calculo_por_ativo(self, panel):
+        from indicators import risk_return_indicators
+
+        returns, bench, risk_free = panel
+        result = risk_return_indicators(returns, bench, risk_free, var_level=0.95)
+        rf = risk_free.reindex(returns.index).ffill()
+        for asset in returns.columns:
+            expected = pd.Series(_naive(returns[asset], bench, rf), dtype=float)
+            got = result.loc[asset, expected.index].astype(float)
+            np.testing.assert_allclose(got, expected, rtol=1e-9, err_msg=asset)
+
+    def test_beta_recuperado(self, panel):
+        from indicators import risk_return_indicators
+
+        returns, bench, _ = panel
+        result = risk_return_indicators(returns, bench)
+        np.testing.assert_allclose(result["beta"], [0.0, 0.5, 1.0, 1.4], atol=0.15)
+        assert result["r_squared"].between(0, 1).all()
+
+    def test_livre_de_risco_escalar(self, panel):
+        from indicators import risk_return_indicators
+
+        returns, bench, _ = panel
+        flat = pd.Series(0.0004, index=returns.index)
+        a = risk_return_indicators(returns, bench, 0.0004)
+        b = risk_return_indicators(returns, bench, flat)
+        pd.testing.assert_frame_equal(a, b)
+
+    def test_ativo_sem_dados_fica_nan(self, panel):
+        from indicators import risk_return_indicators
+
+        returns, bench, _ = panel
+        returns = returns.assign(vazio=np.nan)
+        result = risk_return_indicators(returns, bench, var_level=0.99)
+        assert result.loc["vazio", "observations"] == 0
+        assert result.loc["vazio"].drop("observations").isna().all()
+        assert result.loc["a"].notna().all()
+        assert {"var_99", "cvar_99"} <= set(result.columns)
+
+    def test_nivel_invalido(self, panel):
+        from indicators import risk_return_indicators
+
+        returns, bench, _ = panel
+        with pytest.raises(ValueError, match="nível de VaR"):
+            risk_return_indicators(returns, bench, var_level=95)
+
+
+class TestRiskFreeReturns:
+    """Conversão das taxas do BCB em retorno diário decimal."""
+
+    def test_cdi_e_selic(self):
+        from indicators import risk_free_returns
+
+        rates = pd.DataFrame(
+            {"Date": pd.bdate_range("2024-01-01", periods=2), "Rate": [0.05, 13.75]}
+        )
+        daily = risk_free_returns(rates, "daily_pct")
+        annual = risk_free_returns(rates, "annual_pct")
+        assert daily.iloc[0] == pytest.approx(0.0005)
+        assert (1 + annual.iloc[1]) ** 252 == pytest.approx(1.1375)
+        with pytest.raises(ValueError, match="rate_type"):
+            risk_free_returns(rates, "mensal")
+
+
+class TestComputeIndicators:
+    """Integração com _fetch_bcb_series (CDI) e o painel de preços."""
+
+    def test_usa_cdi_do_bcb(self, panel, monkeypatch):
+        import ibovespa_analysis as ia
+
+        returns, bench, _ = panel
+        prices = (1 + returns.fillna(0)).cumprod() * 100
+        prices["^BVSP"] = (1 + bench).cumprod() * 100_000
+        calls = []
+
+        def fake_bcb(series_id, start_date=None):
+            calls.append((series_id, start_date))
+            return pd.DataFrame({"Date": prices.index, "Rate": 0.04})
+
+        monkeypatch.setattr(ia, "_fetch_bcb_series", fake_bcb)
+        result = ia.compute_indicators(prices)
+
+        assert calls == [(12, prices.index[1].strftime("%d/%m/%Y"))]
+        assert list(result.index) == ["a", "b", "c", "d"]
+        assert result["beta"].iloc[3] == pytest.approx(1.4, abs=0.1)
+        with pytest.raises(KeyError, match="benchmark"):
+            ia.compute_indicators(prices.drop(columns=["^BVSP"]))
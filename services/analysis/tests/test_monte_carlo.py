@@ -0,0 +1,249 @@
+"""
+Testes para monte_carlo.py — projeção Monte Carlo vetorizada.
+
+Histórico sintético (passeio aleatório em log); os testes validam forma,
+tipos, reprodutibilidade e invariantes das bandas, não valores de mercado.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(scope="module")
+def history():
+    rng = np.random.default_rng(11)
+    dates = pd.bdate_range("2021-01-04", periods=750)
+    close = 100_000 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, 750)))
+    return pd.DataFrame({"Date": dates, "Close": close})
+
+
+class TestSimulatePaths:
+    """Array único (iterações × pregões), float32, em blocos."""
+
+    @pytest.mark.parametrize("method", ["bootstrap", "gbm", "arima"])
+    def test_forma_e_tipo(self, history, method):
+        from monte_carlo import simulate_paths
+
+        paths = simulate_paths(history, method, iterations=1000, horizon=50, seed=1)
+        assert paths.shape == (1000, 50)
+        assert paths.dtype == np.float32
+        assert np.isfinite(paths).all() and (paths > 0).all()
+
+    @pytest.mark.parametrize("method", ["bootstrap", "gbm", "arima"])
+    def test_reprodutivel_com_semente(self, history, method):
+        from monte_carlo import simulate_paths
+
+        a = simulate_paths(history, method, iterations=300, horizon=20, seed=5, chunk_size=64)
+        b = simulate_paths(history, method, iterations=300, horizon=20, seed=5, chunk_size=64)
+        c = simulate_paths(history, method, iterations=300, horizon=20, seed=6, chunk_size=64)
+        np.testing.assert_array_equal(a, b)
+        assert not np.array_equal(a, c)
+
+    def test_bootstrap_usa_so_retornos_historicos(self, history):
+        from monte_carlo import log_returns, simulate_paths
+
+        returns, last_close, _ = log_returns(history)
+        paths = simulate_paths(history, "bootstrap", iterations=200, horizon=10, seed=2)
+        first_step = np.log(paths[:, 0] / np.float32(last_close))
+        gaps = np.abs(first_step[:, None] - returns[None, :].astype(np.float32)).min(axis=1)
+        assert gaps.max() < 1e-5
+
+    def test_gbm_mediana_segue_drift(self, history):
+        from monte_carlo import log_returns, simulate_paths
+
+        returns, last_close, _ = log_returns(history)
+        paths = simulate_paths(history, "gbm", iterations=20_000, horizon=252, seed=3)
+        expected = last_close * np.exp(returns.mean() * 252)
+        assert np.median(paths[:, -1]) == pytest.approx(expected, rel=0.02)
+
+    def test_arima_recupera_phi(self):
+        from monte_carlo import _ar1_fit
+
+        rng = np.random.default_rng(4)
+        r = np.zeros(5000)
+        for t in range(1, len(r)):
+            r[t] = 0.0002 + 0.3 * r[t - 1] + rng.normal(0, 0.01)
+        c, phi, resid = _ar1_fit(r)
+        assert phi == pytest.approx(0.3, abs=0.03)
+        assert len(resid) == len(r) - 1
+
+    def test_metodo_desconhecido(self, history):
+        from monte_carlo import simulate_paths
+
+        with pytest.raises(ValueError, match="método desconhecido"):
+            simulate_paths(history, "heston", iterations=10, horizon=5)
+
+
+class TestProjectMonteCarlo:
+    """Saída no formato de project_ibovespa."""
+
+    def test_formato_project_ibovespa(self, history):
+        from monte_carlo import project_monte_carlo
+
+        df = project_monte_carlo(history, iterations=2000, n_periods=504, seed=1, levels=[0.95])
+        assert list(df.columns) == ["Date", "Projected_Close", "CI_Lower_95", "CI_Upper_95"]
+        assert len(df) == 504
+        assert df["Date"].iloc[0] > history["Date"].max()
+        assert (df["CI_Lower_95"] <= df["Projected_Close"]).all()
+        assert (df["CI_Upper_95"] >= df["Projected_Close"]).all()
+
+    def test_niveis_aninhados(self, history):
+        from monte_carlo import project_monte_carlo
+
+        df = project_monte_carlo(
+            history, "gbm", iterations=2000, n_periods=30, seed=1, levels=[0.95, 0.99]
+        )
+        assert (df["CI_Lower_99"] <= df["CI_Lower_95"]).all()
+        assert (df["CI_Upper_99"] >= df["CI_Upper_95"]).all()
+
+    def test_bandas_iguais_ao_percentil(self, history):
+        from monte_carlo import projection_bands, simulate_paths
+
+        paths = simulate_paths(history, iterations=500, horizon=15, seed=9)
+        df = projection_bands(paths, history["Date"].max(), levels=[0.95])
+        np.testing.assert_allclose(df["CI_Lower_95"], np.percentile(paths, 2.5, axis=0))
+        np.testing.assert_allclose(df["Projected_Close"], np.median(paths, axis=0))
+
+    def test_nivel_invalido(self, history):
+        from monte_carlo import project_monte_carlo
+
+        with pytest.raises(ValueError, match="nível de confiança"):
+            project_monte_carlo(history, iterations=10, n_periods=5, levels=[95])
+
+
+@pytest.fixture(scope="module")
+def assets():
+    rng = np.random.default_rng(21)
+    dates = pd.bdate_range("2022-01-03", periods=400)
+    mix = np.array([[1.0, 0.6, 0.2], [0.0, 0.8, 0.3], [0.0, 0.0, 0.9]])
+    returns = rng.normal(size=(400, 3)) @ mix * 0.004 + 0.0004
+    return {
+        key: {
+            "data": pd.DataFrame({"Date": dates, "Value": 100 * np.exp(np.cumsum(returns[:, i]))}),
+            "source": "sintético",
+            "period": "",
+            "proxy_used": False,
+        }
+        for i, key in enumerate(["rf_lp_high", "lft_2031", "lca_bb_prefixada"])
+    }
+
+
+class TestPortfolioMonteCarlo:
+    """Shards com SeedSequence.spawn, redução por sketch, reprodutível."""
+
+    @pytest.mark.parametrize("method", ["bootstrap", "gbm"])
+    def test_reprodutivel_por_semente_e_workers(self, assets, method):
+        from monte_carlo import project_portfolio_monte_carlo
+
+        kwargs = dict(method=method, iterations=3000, n_periods=20, workers=2, levels=[0.95])
+        a = project_portfolio_monte_carlo(assets, seed=7, **kwargs)
+        b = project_portfolio_monte_carlo(assets, seed=7, **kwargs)
+        c = project_portfolio_monte_carlo(assets, seed=8, **kwargs)
+        pd.testing.assert_frame_equal(a, b)
+        assert not a.equals(c)
+        assert list(a.columns) == ["Date", "Projected_Close", "CI_Lower_95", "CI_Upper_95"]
+        assert (a["CI_Lower_95"] <= a["Projected_Close"]).all()
+        assert (a["CI_Upper_95"] >= a["Projected_Close"]).all()
+
+    def test_reducao_igual_a_soma_dos_shards(self, assets):
+        from monte_carlo import (
+            _portfolio_shard,
+            band_quantiles,
+            portfolio_returns,
+            project_portfolio_monte_carlo,
+        )
+        from quantile_sketch import QuantileSketch
+
+        df = project_portfolio_monte_carlo(
+            assets, iterations=1001, n_periods=10, seed=3, workers=3, levels=[0.95]
+        )
+
+        returns, _ = portfolio_returns(assets)
+        children = np.random.SeedSequence(3).spawn(3)
+        total = QuantileSketch(10)
+        for size, child in zip([334, 334, 333], children):
+            shard = _portfolio_shard(
+                returns.to_numpy(), np.full(3, 1 / 3), "bootstrap", size, 10, 4096, child, 0.001
+            )
+            total.merge(shard)
+        assert total.count == 1001
+        expected = total.quantiles(band_quantiles([0.95]))
+        np.testing.assert_array_equal(df["Projected_Close"], expected[1])
+
+    def test_sketch_proximo_do_percentil_exato(self, assets):
+        from monte_carlo import portfolio_returns, project_portfolio_monte_carlo
+
+        df = project_portfolio_monte_carlo(
+            assets, iterations=20_000, n_periods=5, seed=1, workers=1, levels=[0.95]
+        )
+        # Com 1 shard os caminhos são reproduzíveis fora da função
+        returns, _ = portfolio_returns(assets)
+        rng = np.random.default_rng(np.random.SeedSequence(1).spawn(1)[0])
+        r32 = returns.to_numpy().astype(np.float32)
+        block = r32[rng.integers(0, len(r32), size=(20_000, 5))]
+        values = np.exp(np.cumsum(block, axis=1)) @ np.full(3, 100 / 3, dtype=np.float32)
+        exact = np.quantile(values, 0.975, axis=0, method="lower")
+        np.testing.assert_allclose(df["CI_Upper_95"], exact, rtol=1.01e-3)
+
+    def test_pesos_ausentes_e_metodo(self, assets):
+        from monte_carlo import project_portfolio_monte_carlo
+
+        with pytest.raises(ValueError, match="pesos ausentes"):
+            project_portfolio_monte_carlo(assets, weights={"lft_2031": 1.0}, iterations=10)
+        with pytest.raises(ValueError, match="método desconhecido"):
+            project_portfolio_monte_carlo(assets, method="arima", iterations=10)
+
+
+class TestStreamingBands:
+    """Bandas em streaming: memória constante, erro relativo ≤ α."""
+
+    @pytest.mark.parametrize("method", ["bootstrap", "arima"])
+    def test_dentro_do_erro_documentado(self, history, method):
+        from monte_carlo import band_quantiles, simulate_paths, sketch_paths
+
+        kwargs = dict(iterations=5000, horizon=40, seed=2, chunk_size=700)
+        paths = simulate_paths(history, method, **kwargs)
+        sketch = sketch_paths(history, method, relative_error=0.002, **kwargs)
+
+        qs = band_quantiles([0.95, 0.99])
+        exact = np.quantile(paths, qs, axis=0, method="lower")
+        assert sketch.count == 5000
+        assert np.abs(sketch.quantiles(qs) / exact - 1).max() <= 0.002 * (1 + 1e-9)
+
+    def test_formato_e_proximidade_das_bandas_exatas(self, history):
+        from monte_carlo import project_monte_carlo
+
+        kwargs = dict(iterations=4000, n_periods=60, seed=4, levels=[0.95, 0.99])
+        exact = project_monte_carlo(history, streaming=False, **kwargs)
+        stream = project_monte_carlo(history, streaming=True, **kwargs)
+        assert list(stream.columns) == list(exact.columns)
+        pd.testing.assert_series_equal(stream["Date"], exact["Date"])
+        for col in exact.columns[1:]:
+            np.testing.assert_allclose(stream[col], exact[col], rtol=0.005)
+
+    def test_streaming_automatico_pelo_limite(self, history, monkeypatch):
+        import monte_carlo
+
+        monkeypatch.setattr(monte_carlo, "MONTE_CARLO_STREAMING_ITERATIONS", 1000)
+        monkeypatch.setattr(
+            monte_carlo,
+            "simulate_paths",
+            lambda *a, **k: pytest.fail("não deveria guardar os caminhos"),
+        )
+        df = monte_carlo.project_monte_carlo(history, iterations=1000, n_periods=10, seed=1)
+        assert len(df) == 10
+
+    def test_memoria_constante(self, history):
+        from monte_carlo import sketch_paths
+
+        small = sketch_paths(history, "gbm", iterations=2_000, horizon=5, seed=1, chunk_size=500)
+        large = sketch_paths(history, "gbm", iterations=200_000, horizon=5, seed=1, chunk_size=500)
+        assert large.count == 200_000
+        # só cresce a faixa de buckets (caudas), não com o número de caminhos
+        assert large.nbytes < 2 * small.nbytes
@@ -0,0 +1,238 @@
+"""
+Testes para pipeline_cache.py — memoização das etapas da Sessão 01.
+
+As etapas de ibovespa_analysis são substituídas por funções sintéticas que
+contam chamadas (sem rede, sem ARIMA).
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _frame(n: int = 5, shift: float = 0.0) -> pd.DataFrame:
+    dates = pd.bdate_range("2024-01-01", periods=n)
+    return pd.DataFrame({"Date": dates, "Close": 100.0 + np.arange(n) + shift})
+
+
+class TestFingerprint:
+    """Impressão digital pelo conteúdo das entradas."""
+
+    def test_mesmo_conteudo_mesma_chave(self):
+        from pipeline_cache import fingerprint
+
+        assert fingerprint(_frame(), 504, {"a": [1, 2]}) == fingerprint(
+            _frame(), 504, {"a": [1, 2]}
+        )
+
+    def test_sensivel_a_dados_e_parametros(self):
+        from pipeline_cache import fingerprint
+
+        base = fingerprint(_frame(), 504)
+        assert fingerprint(_frame(shift=0.01), 504) != base
+        assert fingerprint(_frame(), 252) != base
+        assert fingerprint(_frame().astype({"Close": "float32"}), 504) != base
+
+    def test_tipo_nao_suportado(self):
+        from pipeline_cache import fingerprint
+
+        with pytest.raises(TypeError):
+            fingerprint(object())
+
+    def test_versao_do_codigo(self):
+        from pipeline_cache import code_version
+
+        def a():
+            return 1
+
+        def b():
+            return 2
+
+        assert code_version(a) == code_version(a)
+        assert code_version(a) != code_version(b)
+
+    def test_versao_do_modulo_pelo_arquivo(self, tmp_path):
+        import importlib.util
+
+        from pipeline_cache import code_version
+
+        path = tmp_path / "modulo_etapa.py"
+        path.write_text("X = 1\n")
+        spec = importlib.util.spec_from_file_location("modulo_etapa", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        before = code_version(module)
+        assert code_version(module) == before
+        path.write_text("X = 2\n")
+        assert code_version(module) != before
+
+
+class TestStageCache:
+    """Reaproveitamento, force e persistência entre instâncias."""
+
+    def test_hit_miss_force(self, tmp_path):
+        from pipeline_cache import StageCache
+
+        cache = StageCache(tmp_path)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return _frame()
+
+        first = cache.run("etapa", "k1", compute)
+        second = StageCache(tmp_path).run("etapa", "k1", compute)
+        pd.testing.assert_frame_equal(first, second)
+        assert len(calls) == 1
+
+        cache.run("etapa", "k2", compute)
+        cache.run("etapa", "k2", compute, force=True)
+        assert len(calls) == 3
+
+    def test_saida_invalida_recalcula(self, tmp_path):
+        from pipeline_cache import StageCache
+
+        cache = StageCache(tmp_path)
+        target = tmp_path / "grafico.png"
+        target.write_bytes(b"png")
+        cache.run("chart", "k", lambda: str(target))
+        target.unlink()
+
+        calls = []
+        cache.run(
+            "chart", "k", lambda: calls.append(1) or str(target), valid=lambda p: Path(p).exists()
+        )
+        assert calls == [1]
+
+    def test_manifesto_corrompido(self, tmp_path):
+        from pipeline_cache import StageCache
+
+        (tmp_path / "manifest.json").write_text("{nao e json")
+        assert StageCache(tmp_path).run("etapa", "k", lambda: 42) == 42
+
+
+class TestRunSession01:
+    """Só as etapas com entradas alteradas são executadas de novo."""
+
+    @pytest.fixture
+    def ia(self, monkeypatch, tmp_path):
+        import ibovespa_analysis as ia
+        from pipeline_cache import StageCache
+
+        calls = []
+
+        def fake_history(years=5):
+            calls.append("history")
+            return _frame()
+
+        def fake_projection(df, n_periods=504):
+            calls.append("projection")
+            return _frame(n=3, shift=df["Close"].iloc[-1])
+
+        def fake_assets():
+            calls.append("assets")
+            return {
+                "lft_2031": {"data": _frame(), "source": "x", "period": "", "proxy_used": False}
+            }
+
+        def fake_chart(ibov, proj, assets, output_path=None):
+            calls.append("chart")
+            Path(output_path).write_bytes(b"png")
+            return output_path
+
+        monkeypatch.setattr(ia, "fetch_ibovespa_history", fake_history)
+        monkeypatch.setattr(ia, "project_ibovespa", fake_projection)
+        monkeypatch.setattr(ia, "fetch_portfolio_assets", fake_assets)
+        monkeypatch.setattr(ia, "generate_comparison_chart", fake_chart)
+
+        def run(**kwargs):
+            return ia.run_session_01(
+                cache=StageCache(tmp_path / "pipeline"),
+                output_path=str(tmp_path / "chart.png"),
+                **kwargs,
+            )
+
+        return ia, calls, run
+
+    def test_segunda_execucao_nao_recalcula(self, ia):
+        _, calls, run = ia
+        first = run()
+        assert calls == ["history", "projection", "assets", "chart"]
+        calls.clear()
+        second = run()
+        assert calls == []
+        pd.testing.assert_frame_equal(first["projection"], second["projection"])
+        assert second["chart"] == first["chart"]
+
+    def test_mudanca_so_no_grafico(self, ia, monkeypatch):
+        ia, calls, run = ia
+        run()
+        calls.clear()
+
+        def new_chart(ibov, proj, assets, output_path=None):
+            calls.append("chart_v2")
+            return output_path
+
+        monkeypatch.setattr(ia, "generate_comparison_chart", new_chart)
+        run()
+        assert calls == ["chart_v2"]
+
+    def test_mudanca_no_codigo_chamado_pelos_ativos(self, ia, monkeypatch, tmp_path):
+        ia, calls, run = ia
+        run()
+        calls.clear()
+
+        # Módulo usado pelas fontes (não pelos wrappers de PORTFOLIO_ASSETS)
+        bcb_store = sys.modules["bcb_store"]
+        edited = tmp_path / "bcb_store.py"
+        edited.write_text(Path(bcb_store.__file__).read_text() + "\n# alterado\n")
+        monkeypatch.setattr(bcb_store, "__file__", str(edited))
+        run()
+        assert calls == ["assets"], "mesma saída: o gráfico não refaz"
+
+        # Definição de uma cadeia de fontes
+        calls.clear()
+        monkeypatch.setattr(ia._LCA_BB_PREFIXADA_CHAIN.sources[0], "timeout", 20)
+        run()
+        assert calls == ["assets"]
+
+    @pytest.mark.parametrize(
+        "module, expected",
+        [
+            ("price_store", ["history", "assets"]),
+            ("arima_cache", ["projection"]),
+            ("arima_search", ["projection"]),
+        ],
+    )
+    def test_mudanca_em_modulo_usado_pela_etapa(self, ia, monkeypatch, tmp_path, module, expected):
+        ia, calls, run = ia
+        run()
+        calls.clear()
+
+        loaded = sys.modules[module]
+        edited = tmp_path / f"{module}.py"
+        edited.write_text(Path(loaded.__file__).read_text() + "\n# alterado\n")
+        monkeypatch.setattr(loaded, "__file__", str(edited))
+        run()
+        assert calls == expected, "saídas iguais: as etapas seguintes não refazem"
+
+    def test_from_stage_e_force(self, ia):
+        _, calls, run = ia
+        run()
+        calls.clear()
+        run(from_stage="assets")
+        assert calls == ["assets", "chart"]
+        calls.clear()
+        run(force=True)
+        assert calls == ["history", "projection", "assets", "chart"]
+
+    def test_etapa_desconhecida(self, ia):
+        _, _, run = ia
+        with pytest.raises(ValueError, match="etapa desconhecida"):
+            run(from_stage="grafico")
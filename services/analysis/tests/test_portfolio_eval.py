@@ -0,0 +1,102 @@
+"""
+Testes para portfolio_eval.py — avaliação em lote de carteiras.
+
+Painel sintético; cada métrica em lote é comparada com o cálculo direto,
+carteira a carteira, sobre a série de retornos dela.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(scope="module")
+def panel():
+    rng = np.random.default_rng(5)
+    dates = pd.bdate_range("2021-01-04", periods=300)
+    returns = rng.normal(0.0003, 0.01, size=(300, 5)) + rng.normal(0, 0.005, (300, 1))
+    return pd.DataFrame(returns, index=dates, columns=list("ABCDE"))
+
+
+def _reference(weights, panel, rf, level):
+    """Métricas de uma carteira pela série diária dela, sem atalhos."""
+    series = panel.to_numpy() @ weights
+    wealth = np.concatenate([[1.0], np.cumprod(1 + series)])
+    drawdown = (wealth / np.maximum.accumulate(wealth) - 1).min()
+    k = int(np.floor((1 - level) * (len(series) - 1)))
+    return {
+        "expected_return": series.mean() * 252,
+        "volatility": series.std(ddof=1) * np.sqrt(252),
+        "sharpe": (series.mean() - rf) / series.std(ddof=1) * np.sqrt(252),
+        "max_drawdown": drawdown,
+        "cvar_95": np.sort(series)[: k + 1].mean(),
+    }
+
+
+class TestEvaluatePortfolios:
+    """Métricas em lote iguais às da série de cada carteira."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 10_000])
+    def test_igual_ao_calculo_direto(self, panel, chunk_size):
+        from portfolio_eval import evaluate_portfolios
+
+        weights = np.random.default_rng(1).dirichlet(np.ones(5), 40)
+        result = evaluate_portfolios(weights, panel, risk_free=0.0001, chunk_size=chunk_size)
+        expected = pd.DataFrame([_reference(w, panel, 0.0001, 0.95) for w in weights])
+        assert list(result.columns) == list(expected.columns)
+        np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-9)
+
+    def test_pesos_em_dataframe_alinhados_por_nome(self, panel):
+        from portfolio_eval import evaluate_portfolios
+
+        weights = pd.DataFrame({"C": [0.5, 1.0], "A": [0.5, 0.0]}, index=["c+a", "so_c"])
+        result = evaluate_portfolios(weights, panel)
+        assert list(result.index) == ["c+a", "so_c"]
+        single = evaluate_portfolios(np.array([[0, 0, 1.0, 0, 0]]), panel)
+        np.testing.assert_allclose(result.iloc[1], single.iloc[0])
+
+    def test_risk_free_em_serie_e_datas_incompletas(self, panel):
+        from portfolio_eval import evaluate_portfolios
+
+        gappy = panel.copy()
+        gappy.iloc[10, 2] = np.nan
+        rf = pd.Series(0.0002, index=panel.index[::5])
+        weights = np.full((1, 5), 0.2)
+        result = evaluate_portfolios(weights, gappy, risk_free=rf)
+        expected = _reference(weights[0], gappy.dropna(), 0.0002, 0.95)
+        assert result["sharpe"].iloc[0] == pytest.approx(expected["sharpe"])
+        assert result["cvar_95"].iloc[0] == pytest.approx(expected["cvar_95"])
+
+    def test_entradas_invalidas(self, panel):
+        from portfolio_eval import evaluate_portfolios
+
+        with pytest.raises(ValueError, match="5 colunas"):
+            evaluate_portfolios(np.ones((2, 3)), panel)
+        with pytest.raises(ValueError, match="nível de CVaR"):
+            evaluate_portfolios(np.ones((2, 5)), panel, var_level=95)
+
+
+class TestSimplexGrid:
+    """Grade de pesos: todas as combinações múltiplas de step."""
+
+    def test_contagem_e_soma(self):
+        from math import comb
+
+        from portfolio_eval import simplex_grid
+
+        grid = simplex_grid(5, 0.1)
+        assert grid.shape == (comb(10 + 4, 4), 5)
+        np.testing.assert_allclose(grid.sum(axis=1), 1.0)
+        assert (grid >= 0).all()
+        assert len(np.unique(np.round(grid * 10), axis=0)) == len(grid)
+
+    def test_step_invalido(self):
+        from portfolio_eval import simplex_grid
+
+        with pytest.raises(ValueError, match="1/step"):
+            simplex_grid(3, 0.3)
@@ -0,0 +1,112 @@
+"""
+Testes para a busca paralela de ativos em fetch_portfolio_assets.
+
+Os ativos são substituídos por funções que apenas aguardam um tempo fixo e
+retornam um resultado sintético no formato real (data/source/period/proxy_used),
+sem rede.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+import pytest
+
+
+def _asset(name: str, delay: float, proxy: bool = False):
+    def fetch():
+        time.sleep(delay)
+        data = pd.DataFrame({"Date": pd.bdate_range("2024-01-01", periods=3), "Value": 100.0})
+        return {
+            "data": data,
+            "source": name,
+            "period": "2024-01-01 → 2024-01-03",
+            "proxy_used": proxy,
+        }
+
+    return fetch
+
+
+@pytest.fixture
+def assets(monkeypatch):
+    import ibovespa_analysis as ia
+
+    registry = {}
+    monkeypatch.setattr(ia, "PORTFOLIO_ASSETS", registry)
+    return ia, registry
+
+
+class TestFetchPortfolioAssetsParalelo:
+    """Latência = ativo mais lento; resultado igual ao sequencial."""
+
+    def test_latencia_do_mais_lento(self, assets):
+        ia, registry = assets
+        registry.update(
+            {
+                "a": _asset("fonte a", 0.4),
+                "b": _asset("fonte b", 0.4, proxy=True),
+                "c": _asset("fonte c", 0.4),
+            }
+        )
+        t0 = time.perf_counter()
+        result = ia.fetch_portfolio_assets()
+        assert time.perf_counter() - t0 < 0.9
+
+        assert list(result) == ["a", "b", "c"]
+        assert result["b"]["source"] == "fonte b"
+        assert result["b"]["proxy_used"] is True
+
+    def test_mesmo_resultado_que_sequencial(self, assets):
+        ia, registry = assets
+        registry.update({"x": _asset("fx", 0.05), "y": _asset("fy", 0.0, proxy=True)})
+        sequential = {key: fetch() for key, fetch in registry.items()}
+        parallel = ia.fetch_portfolio_assets()
+        for key in registry:
+            assert parallel[key]["source"] == sequential[key]["source"]
+            assert parallel[key]["proxy_used"] == sequential[key]["proxy_used"]
+            pd.testing.assert_frame_equal(parallel[key]["data"], sequential[key]["data"])
+
+    def test_register_asset(self, assets):
+        ia, registry = assets
+        ia.register_asset("novo", _asset("nova fonte", 0.0))
+        assert ia.fetch_portfolio_assets()["novo"]["source"] == "nova fonte"
+
+    def test_prazo_por_ativo(self, assets):
+        ia, registry = assets
+        release = threading.Event()
+        registry.update({"rapido": _asset("r", 0.0), "lento": lambda: release.wait(5)})
+        t0 = time.perf_counter()
+        with pytest.raises(TimeoutError, match="lento"):
+            ia.fetch_portfolio_assets(deadline=0.3)
+        assert time.perf_counter() - t0 < 1.0
+        release.set()
+
+    def test_orcamento_total(self, assets):
+        ia, registry = assets
+        registry.update({"a": _asset("a", 0.6), "b": _asset("b", 0.6)})
+        with pytest.raises(TimeoutError):
+            ia.fetch_portfolio_assets(deadline=10, budget=0.2)
+
+    def test_falha_de_ativo_propaga(self, assets):
+        ia, registry = assets
+
+        def broken():
+            raise RuntimeError("todas as fontes falharam")
+
+        registry.update({"ok": _asset("ok", 0.0), "quebrado": broken})
+        with pytest.raises(RuntimeError, match="todas as fontes"):
+            ia.fetch_portfolio_assets()
+
+    def test_timeout_do_proprio_ativo_nao_vira_prazo(self, assets):
+        ia, registry = assets
+
+        def socket_timeout():
+            raise TimeoutError("read timed out")
+
+        registry.update({"a": socket_timeout})
+        with pytest.raises(TimeoutError, match="read timed out"):
+            ia.fetch_portfolio_assets(deadline=5)
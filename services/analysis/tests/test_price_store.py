@@ -0,0 +1,334 @@
+"""
+Testes para price_store.py — cache incremental de históricos de preços.
+
+O yfinance é substituído por FakeTicker: a série é sintética, mas a interface
+(history(start, end, auto_adjust) com índice de datas com fuso) é a mesma.
+Os resultados incrementais são comparados com o cálculo completo original
+(pct_change sobre o período inteiro).
+"""
+
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+class FakeTicker:
+    """Substituto de yf.Ticker com fechamentos sintéticos em dias úteis."""
+
+    def __init__(self, closes: pd.Series, calls: list) -> None:
+        self.closes = closes
+        self.calls = calls
+
+    def history(self, start: str, end: str, auto_adjust: bool = True) -> pd.DataFrame:
+        self.calls.append((start, end))
+        window = self.closes[(self.closes.index >= start) & (self.closes.index < end)]
+        index = window.index.tz_localize("America/Sao_Paulo")
+        return pd.DataFrame({"Close": window.values}, index=pd.DatetimeIndex(index, name="Date"))
+
+
+def _closes(start: str = "2015-01-01", end: str = "2030-12-31") -> pd.Series:
+    days = pd.bdate_range(start, end)
+    rng = np.random.default_rng(7)
+    return pd.Series(100_000 * np.exp(np.cumsum(rng.normal(0, 0.01, len(days)))), index=days)
+
+
+def _reference(closes: pd.Series, start: date, end: date) -> pd.DataFrame:
+    """Cálculo original: recorte completo + pct_change."""
+    window = closes[(closes.index >= pd.Timestamp(start)) & (closes.index < pd.Timestamp(end))]
+    df = pd.DataFrame({"Date": window.index, "Close": window.values})
+    df["Daily_Return"] = df["Close"].pct_change()
+    return df
+
+
+class _Clock:
+    def __init__(self, now: datetime) -> None:
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+@pytest.fixture
+def env(tmp_path):
+    from price_store import PriceHistoryStore
+
+    closes = _closes()
+    calls: list = []
+    clock = _Clock(datetime(2024, 3, 4, 10, 0))
+    store = PriceHistoryStore(path=tmp_path / "prices.sqlite", clock=clock)
+
+    def download(start: date, end: date) -> pd.DataFrame:
+        from ibovespa_analysis import _close_frame
+
+        raw = FakeTicker(closes, calls).history(start=str(start), end=str(end))
+        return _close_frame(raw)
+
+    return store, closes, calls, clock, download
+
+
+class TestLoadHistory:
+    """Caminhos cache / delta / full de load_history."""
+
+    def test_primeira_carga_igual_ao_calculo_completo(self, env):
+        from price_store import load_history
+
+        store, closes, calls, clock, download = env
+        start, end = date(2019, 3, 5), date(2024, 3, 4)
+        df = load_history(store, "^BVSP", start, end, download)
+
+        pd.testing.assert_frame_equal(df, _reference(closes, start, end))
+        assert df.attrs["source"] == "full"
+        assert df.attrs["last_bar"] == "2024-03-01"
+        assert df.attrs["stale"] is False
+        assert len(calls) == 1
+
+    def test_mesmo_dia_sem_rede(self, env):
+        from price_store import load_history
+
+        store, closes, calls, clock, download = env
+        start, end = date(2019, 3, 5), date(2024, 3, 4)
+        load_history(store, "^BVSP", start, end, download)
+        clock.now += timedelta(hours=5)
+        df = load_history(store, "^BVSP", start, end, download)
+
+        assert len(calls) == 1
+        assert df.attrs["source"] == "cache"
+        pd.testing.assert_frame_equal(df, _reference(closes, start, end))
+
+    def test_dia_seguinte_baixa_so_o_delta(self, env):
+        from price_store import load_history
+
+        store, closes, calls, clock, download = env
+        load_history(store, "^BVSP", date(2019, 3, 5), date(2024, 3, 4), download)
+
+        clock.now = datetime(2024, 3, 8, 9, 0)
+        start, end = date(2019, 3, 9), date(2024, 3, 8)
+        df = load_history(store, "^BVSP", start, end, download)
+
+        assert calls[-1] == ("2024-03-01", "2024-03-08")
+        assert df.attrs["source"] == "delta"
+        assert df.attrs["last_bar"] == "2024-03-07"
+        assert df.attrs["fetched_at"] == "2024-03-08T09:00:00"
+        pd.testing.assert_frame_equal(df, _reference(closes, start, end))
+
+    def test_historico_reescrito_rebaixa_tudo(self, env):
+        from price_store import load_history
+
+        store, closes, calls, clock, download = env
+        start = date(2019, 3, 5)
+        load_history(store, "^BVSP", start, date(2024, 3, 4), download)
+
+        closes.loc[:"2024-03-01"] *= 0.98  # ajuste retroativo (proventos)
+        clock.now = datetime(2024, 3, 6, 9, 0)
+        df = load_history(store, "^BVSP", start, date(2024, 3, 6), download)
+
+        assert df.attrs["source"] == "full"
+        assert calls[-1] == (str(start), "2024-03-06")
+        pd.testing.assert_frame_equal(df, _reference(closes, start, date(2024, 3, 6)))
+
+    def test_inicio_anterior_ao_coberto(self, env):
+        from price_store import load_history
+
+        store, closes, calls, clock, download = env
+        load_history(store, "^BVSP", date(2021, 1, 1), date(2024, 3, 4), download)
+        df = load_history(store, "^BVSP", date(2018, 1, 1), date(2024, 3, 4), download)
+
+        assert df.attrs["source"] == "full"
+        assert store.metadata("^BVSP")["covered_from"] == date(2018, 1, 1)
+        pd.testing.assert_frame_equal(df, _reference(closes, date(2018, 1, 1), date(2024, 3, 4)))
+
+    def test_falha_no_delta_serve_cache_desatualizado(self, env):
+        from price_store import load_history
+
+        store, closes, calls, clock, download = env
+        start = date(2019, 3, 5)
+        load_history(store, "^BVSP", start, date(2024, 3, 4), download)
+
+        def offline(start, end):
+            raise ConnectionError("sem rede")
+
+        clock.now = datetime(2024, 3, 8, 9, 0)
+        df = load_history(store, "^BVSP", start, date(2024, 3, 8), offline)
+        assert df.attrs["stale"] is True
+        assert df.attrs["last_bar"] == "2024-03-01"
+        assert df.attrs["fetched_at"] == "2024-03-04T10:00:00"
+
+    def test_falha_sem_cache_propaga(self, env):
+        from price_store import load_history
+
+        store, *_ = env
+
+        def offline(start, end):
+            raise ConnectionError("sem rede")
+
+        with pytest.raises(ConnectionError):
+            load_history(store, "^BVSP", date(2019, 3, 5), date(2024, 3, 4), offline)
+
+
+class TestFetchIbovespaHistoryCache:
+    """fetch_ibovespa_history com FakeTicker no lugar de yf.Ticker."""
+
+    def test_colunas_e_cache(self, tmp_path):
+        from ibovespa_analysis import fetch_ibovespa_history
+        from price_store import PriceHistoryStore
+
+        closes = _closes(end=str(date.today() + timedelta(days=10)))
+        calls: list = []
+        store = PriceHistoryStore(path=tmp_path / "prices.sqlite")
+
+        def factory(symbol):
+            assert symbol == "^BVSP"
+            return FakeTicker(closes, calls)
+
+        first = fetch_ibovespa_history(ticker_factory=factory, store=store)
+        second = fetch_ibovespa_history(ticker_factory=factory, store=store)
+
+        assert list(first.columns) == ["Date", "Close", "Daily_Return"]
+        assert len(calls) == 1
+        assert second.attrs["source"] == "cache"
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_fonte_vazia_levanta_erro(self, tmp_path):
+        from ibovespa_analysis import fetch_ibovespa_history
+        from price_store import PriceHistoryStore
+
+        store = PriceHistoryStore(path=tmp_path / "prices.sqlite")
+        empty = pd.Series([], index=pd.DatetimeIndex([]), dtype=float)
+        with pytest.raises(RuntimeError, match="vazio"):
+            fetch_ibovespa_history(ticker_factory=lambda s: FakeTicker(empty, []), store=store)
+
+
+class FakeDownload:
+    """Substituto de yf.download: colunas MultiIndex (campo, ticker), NaN onde não há pregão."""
+
+    def __init__(self, closes: dict) -> None:
+        self.closes = closes
+        self.calls: list = []
+
+    def __call__(self, tickers, start, end, **kwargs) -> pd.DataFrame:
+        self.calls.append((tuple(tickers), start, end))
+        frames = {}
+        for ticker in tickers:
+            if ticker in self.closes:
+                series = self.closes[ticker]
+                frames[("Close", ticker)] = series[(series.index >= start) & (series.index < end)]
+        if not frames:
+            return pd.DataFrame()
+        raw = pd.DataFrame(frames)
+        raw.index.name = "Date"
+        return raw
+
+
+def _panel_closes() -> dict:
+    closes = {t: _closes() * (i + 1) for i, t in enumerate(["PETR4.SA", "VALE3.SA", "^BVSP"])}
+    closes["VALE3.SA"] = closes["VALE3.SA"].drop(pd.to_datetime(["2024-02-14", "2024-02-15"]))
+    return closes
+
+
+class TestLoadPanel:
+    """Painel largo com download agrupado e cache compartilhado."""
+
+    @pytest.fixture
+    def panel_env(self, tmp_path):
+        from price_store import PriceHistoryStore
+
+        clock = _Clock(datetime(2024, 3, 4, 10, 0))
+        store = PriceHistoryStore(path=tmp_path / "prices.sqlite", clock=clock)
+        fake = FakeDownload(_panel_closes())
+
+        def download_many(group, start, end):
+            from ibovespa_analysis import _batch_closes
+
+            return _batch_closes(fake, group, start, end)
+
+        return store, clock, fake, download_many
+
+    def test_painel_alinhado_com_mascara(self, panel_env):
+        from price_store import load_panel
+
+        store, clock, fake, download_many = panel_env
+        tickers = ["PETR4.SA", "VALE3.SA", "^BVSP"]
+        panel = load_panel(store, tickers, date(2023, 1, 2), date(2024, 3, 4), download_many)
+        prices, mask = panel["prices"], panel["mask"]
+
+        assert len(fake.calls) == 1, "um único download agrupado"
+        assert list(prices.columns) == tickers
+        assert (prices.dtypes == np.float64).all()
+        assert prices.values.flags.f_contiguous
+        assert list(prices.index) == list(pd.bdate_range("2023-01-02", "2024-03-01"))
+
+        missing = pd.to_datetime(["2024-02-14", "2024-02-15"])
+        assert not mask.loc[missing, "VALE3.SA"].any()
+        assert prices.loc[missing, "VALE3.SA"].isna().all()
+        assert mask.drop(index=missing).all().all()
+
+        expected = _panel_closes()["PETR4.SA"]["2023-01-02":"2024-03-01"]
+        np.testing.assert_array_equal(prices["PETR4.SA"].to_numpy(), expected.to_numpy())
+        assert panel["failures"] == {}
+        assert panel["meta"]["^BVSP"]["last_bar"] == "2024-03-01"
+
+    def test_cache_e_delta_agrupados(self, panel_env):
+        from price_store import load_panel
+
+        store, clock, fake, download_many = panel_env
+        tickers = ["PETR4.SA", "VALE3.SA", "^BVSP"]
+        load_panel(store, tickers, date(2023, 1, 2), date(2024, 3, 4), download_many)
+        load_panel(store, tickers, date(2023, 1, 2), date(2024, 3, 4), download_many)
+        assert len(fake.calls) == 1
+
+        clock.now = datetime(2024, 3, 7, 9, 0)
+        panel = load_panel(store, tickers, date(2023, 1, 2), date(2024, 3, 7), download_many)
+        assert fake.calls[-1] == (tuple(tickers), "2024-03-01", "2024-03-07")
+        assert len(fake.calls) == 2
+        assert panel["prices"].index[-1] == pd.Timestamp("2024-03-06")
+        assert all(m["source"] == "delta" for m in panel["meta"].values())
+
+    def test_ticker_novo_baixado_sozinho(self, panel_env):
+        from price_store import load_panel
+
+        store, clock, fake, download_many = panel_env
+        load_panel(store, ["PETR4.SA"], date(2023, 1, 2), date(2024, 3, 4), download_many)
+        load_panel(store, ["PETR4.SA", "^BVSP"], date(2023, 1, 2), date(2024, 3, 4), download_many)
+        assert fake.calls[-1][0] == ("^BVSP",)
+
+    def test_ticker_inexistente_em_failures(self, panel_env):
+        from price_store import load_panel
+
+        store, clock, fake, download_many = panel_env
+        panel = load_panel(
+            store, ["PETR4.SA", "XXXX3.SA"], date(2023, 1, 2), date(2024, 3, 4), download_many
+        )
+        assert list(panel["failures"]) == ["XXXX3.SA"]
+        assert panel["prices"]["XXXX3.SA"].isna().all()
+        assert not panel["mask"]["XXXX3.SA"].any()
+
+
+class TestFetchPricePanel:
+    """fetch_price_panel com FakeDownload no lugar de yf.download."""
+
+    def test_nenhum_dado_levanta_erro(self, tmp_path):
+        from ibovespa_analysis import fetch_price_panel
+        from price_store import PriceHistoryStore
+
+        store = PriceHistoryStore(path=tmp_path / "prices.sqlite")
+        with pytest.raises(RuntimeError, match="não retornou dados"):
+            fetch_price_panel(["XXXX3.SA"], downloader=FakeDownload({}), store=store)
+
+    def test_compartilha_cache_com_ibovespa(self, tmp_path):
+        from ibovespa_analysis import fetch_ibovespa_history, fetch_price_panel
+        from price_store import PriceHistoryStore
+
+        closes = _closes(end=str(date.today() + timedelta(days=10)))
+        store = PriceHistoryStore(path=tmp_path / "prices.sqlite")
+        ibov = fetch_ibovespa_history(ticker_factory=lambda s: FakeTicker(closes, []), store=store)
+        fake = FakeDownload({"^BVSP": closes, "PETR4.SA": closes * 0.001})
+        panel = fetch_price_panel(["^BVSP", "PETR4.SA"], downloader=fake, store=store)
+
+        assert fake.calls[0][0] == ("PETR4.SA",), "^BVSP já estava em cache"
+        np.testing.assert_array_equal(panel["prices"]["^BVSP"].dropna(), ibov["Close"])
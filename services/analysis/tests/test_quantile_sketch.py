@@ -0,0 +1,88 @@
+"""
+Testes para quantile_sketch.py — sketch de quantis mesclável por passo.
+
+Caminhos sintéticos (passeio aleatório em log); compara com np.quantile exato.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pytest
+
+QS = [0.005, 0.025, 0.5, 0.975, 0.995]
+
+
+def _paths(n: int, horizon: int = 30, seed: int = 0, scale: float = 0.013) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, scale, (n, horizon))
+    return (100_000 * np.exp(np.cumsum(steps, axis=1))).astype(np.float32)
+
+
+class TestQuantileSketch:
+    """Erro relativo ≤ α e merge exato."""
+
+    @pytest.mark.parametrize("alpha", [0.01, 0.001])
+    def test_erro_relativo_limitado(self, alpha):
+        from quantile_sketch import QuantileSketch
+
+        paths = _paths(20_000)
+        sketch = QuantileSketch(30, relative_error=alpha)
+        for block in np.array_split(paths, 9):
+            sketch.add(block)
+
+        exact = np.quantile(paths, QS, axis=0, method="lower")
+        error = np.abs(sketch.quantiles(QS) / exact - 1)
+        assert error.max() <= alpha * (1 + 1e-9)
+
+    def test_merge_independe_da_divisao(self):
+        from quantile_sketch import QuantileSketch
+
+        paths = _paths(5_000)
+        whole = QuantileSketch(30)
+        whole.add(paths)
+
+        parts = [QuantileSketch(30) for _ in range(3)]
+        for sketch, block in zip(parts, np.array_split(paths, 3)):
+            sketch.add(block)
+        merged = parts[2].merge(parts[0]).merge(parts[1])
+
+        assert merged.count == 5_000
+        np.testing.assert_array_equal(merged.quantiles(QS), whole.quantiles(QS))
+
+    def test_blocos_fora_da_faixa_inicial(self):
+        from quantile_sketch import QuantileSketch
+
+        sketch = QuantileSketch(5)
+        sketch.add(np.full((10, 5), 100.0))
+        sketch.add(np.full((10, 5), 1e7))
+        sketch.add(np.full((10, 5), 0.5))
+        lo, hi = sketch.quantiles([0.0, 1.0])
+        np.testing.assert_allclose(lo, 0.5, rtol=1e-3)
+        np.testing.assert_allclose(hi, 1e7, rtol=1e-3)
+
+    def test_memoria_nao_cresce_com_caminhos(self):
+        from quantile_sketch import QuantileSketch
+
+        sketch = QuantileSketch(30)
+        sketch.add(_paths(1_000, seed=1))
+        size = sketch.nbytes
+        for seed in range(2, 12):
+            sketch.add(_paths(1_000, seed=seed))
+        assert sketch.count == 11_000
+        assert sketch.nbytes == size
+
+    def test_entradas_invalidas(self):
+        from quantile_sketch import QuantileSketch
+
+        sketch = QuantileSketch(3)
+        with pytest.raises(ValueError, match="sketch vazio"):
+            sketch.quantiles([0.5])
+        with pytest.raises(ValueError, match="positivos"):
+            sketch.add(np.array([[1.0, 0.0, 2.0]]))
+        with pytest.raises(ValueError, match="colunas"):
+            sketch.add(np.ones((2, 4)))
+        with pytest.raises(ValueError, match="diferentes"):
+            sketch.merge(QuantileSketch(3, relative_error=0.01))
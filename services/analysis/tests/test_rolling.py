@@ -0,0 +1,134 @@
+"""
+Testes para rolling.py — métricas móveis em O(n) e estado incremental.
+
+Painel sintético com lacunas; a referência é o cálculo ingênuo com
+pandas .rolling() e o histórico completo.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+WINDOW = 21
+
+
+@pytest.fixture(scope="module")
+def market():
+    rng = np.random.default_rng(8)
+    dates = pd.bdate_range("2021-01-04", periods=600)
+    prices = pd.DataFrame(
+        100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, (600, 4)), axis=0)),
+        index=dates,
+        columns=["a", "b", "c", "d"],
+    )
+    prices.iloc[100:104, 1] = np.nan  # lacuna no meio
+    prices.iloc[:40, 2] = np.nan  # histórico mais curto
+    bench = pd.Series(1e5 * np.exp(np.cumsum(rng.normal(0.0002, 0.012, 600))), index=dates)
+    bench.iloc[250] = np.nan
+    risk_free = pd.Series(rng.uniform(0.0003, 0.0005, 600), index=dates).iloc[::3]
+    return prices, bench, risk_free
+
+
+def _naive(prices, bench, risk_free, window):
+    r = prices.pct_change(fill_method=None)
+    rb = bench.pct_change(fill_method=None)
+    rf = risk_free.reindex(prices.index.union(risk_free.index)).ffill().reindex(prices.index)
+    ex = r.sub(rf, axis=0)
+    beta = {
+        c: r[c].rolling(window).cov(rb) / rb.where(r[c].notna()).rolling(window).var() for c in r
+    }
+    return {
+        "volatility": r.rolling(window).std() * np.sqrt(252),
+        "sharpe": ex.rolling(window).mean() / ex.rolling(window).std() * np.sqrt(252),
+        "beta": pd.DataFrame(beta),
+        "drawdown": prices / prices.rolling(window, min_periods=1).max() - 1,
+    }
+
+
+def _assert_frames_close(got, expected):
+    assert got.keys() == expected.keys()
+    for key in expected:
+        a, b = got[key].to_numpy(), expected[key].to_numpy()
+        np.testing.assert_array_equal(np.isnan(a), np.isnan(b), err_msg=key)
+        np.testing.assert_allclose(a, b, rtol=1e-9, atol=1e-12, err_msg=key)
+
+
+class TestRollingMetrics:
+    """Histórico completo por somas acumuladas, igual ao cálculo ingênuo."""
+
+    @pytest.mark.parametrize("window", [WINDOW, 63, 252])
+    def test_igual_ao_pandas_rolling(self, market, window):
+        from rolling import rolling_metrics
+
+        prices, bench, risk_free = market
+        got = rolling_metrics(prices, window, bench, risk_free)
+        _assert_frames_close(got, _naive(prices, bench, risk_free, window))
+
+    def test_sem_benchmark_omite_beta(self, market):
+        from rolling import rolling_metrics
+
+        prices, _, _ = market
+        got = rolling_metrics(prices, WINDOW)
+        assert set(got) == {"volatility", "sharpe", "drawdown"}
+        assert (got["drawdown"].stack() <= 0).all()
+
+    def test_janela_maior_que_historico(self, market):
+        from rolling import rolling_metrics
+
+        prices, bench, _ = market
+        got = rolling_metrics(prices.iloc[:10], WINDOW, bench)
+        assert got["volatility"].isna().all().all()
+        assert got["drawdown"]["a"].notna().all()
+
+    def test_janela_invalida(self, market):
+        from rolling import rolling_metrics
+
+        with pytest.raises(ValueError, match="janela inválida"):
+            rolling_metrics(market[0], 1)
+
+
+class TestRollingState:
+    """Atualização incremental: só as linhas novas, mesmo resultado."""
+
+    def test_incremental_igual_ao_historico_completo(self, market):
+        from rolling import RollingState, rolling_metrics
+
+        prices, bench, risk_free = market
+        state = RollingState(WINDOW, list(prices.columns))
+        cuts = [0, 300, 301, 302, 450, len(prices)]
+        parts = [
+            state.update(prices.iloc[a:b], bench.iloc[a:b], risk_free)
+            for a, b in zip(cuts, cuts[1:])
+        ]
+        assert [len(part["volatility"]) for part in parts] == [300, 1, 1, 148, 150]
+        got = {key: pd.concat([part[key] for part in parts]) for key in parts[0]}
+        _assert_frames_close(got, rolling_metrics(prices, WINDOW, bench, risk_free))
+
+    def test_sem_deriva_em_historico_longo(self):
+        from rolling import RollingState, rolling_metrics
+
+        rng = np.random.default_rng(1)
+        dates = pd.bdate_range("2000-01-03", periods=5000)
+        prices = pd.DataFrame({"x": 50 * np.exp(np.cumsum(rng.normal(0, 0.02, 5000)))}, index=dates)
+        state = RollingState(5, ["x"], benchmark=False)
+        got = state.update(prices)
+        expected = rolling_metrics(prices, 5)
+        _assert_frames_close(got, expected)
+
+    def test_validacoes(self, market):
+        from rolling import RollingState
+
+        prices, bench, _ = market
+        state = RollingState(WINDOW, list(prices.columns))
+        with pytest.raises(ValueError, match="benchmark"):
+            state.update(prices.iloc[:5])
+        state.update(prices.iloc[:5], bench.iloc[:5])
+        with pytest.raises(ValueError, match="posteriores"):
+            state.update(prices.iloc[4:6], bench.iloc[4:6])
+        with pytest.raises(ValueError, match="colunas"):
+            state.update(prices.iloc[5:6, :2], bench.iloc[5:6])
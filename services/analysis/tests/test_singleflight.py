@@ -0,0 +1,177 @@
+"""
+Testes para singleflight.py — deduplicação de requisições idênticas.
+
+Inclui a integração com _fetch_bcb_series, com o download HTTP substituído
+por uma série sintética (sem rede).
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+import pytest
+
+
+class TestSingleFlight:
+    """Coalescência de chamadas simultâneas e memoização por chave."""
+
+    def test_chamadas_simultaneas_executam_uma_vez(self):
+        from singleflight import SingleFlight
+
+        flight = SingleFlight("teste")
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            release.wait(5)
+            return "ok"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(flight.do("k", fn))) for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(0.1)
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        assert len(calls) == 1
+        assert results == ["ok"] * 8
+        stats = flight.stats()
+        assert stats["misses"] == 1
+        assert stats["shared"] + stats["hits"] == 7
+
+    def test_resultado_memorizado(self):
+        from singleflight import SingleFlight
+
+        flight = SingleFlight("teste")
+        calls = []
+        for _ in range(3):
+            assert flight.do(("cdi", 1), lambda: calls.append(1) or 42) == 42
+        assert len(calls) == 1
+        assert flight.stats() == {"hits": 2, "shared": 0, "misses": 1, "errors": 0}
+
+    def test_chaves_distintas_nao_compartilham(self):
+        from singleflight import SingleFlight
+
+        flight = SingleFlight("teste")
+        assert flight.do(1, lambda: "a") == "a"
+        assert flight.do(2, lambda: "b") == "b"
+        assert flight.stats()["misses"] == 2
+
+    def test_erro_nao_memorizado_e_repassado(self):
+        from singleflight import SingleFlight
+
+        flight = SingleFlight("teste")
+        release = threading.Event()
+
+        def fail():
+            release.wait(5)
+            raise RuntimeError("falhou")
+
+        errors = []
+
+        def call():
+            try:
+                flight.do("k", fail)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for t in threads:
+            t.start()
+        time.sleep(0.1)
+        release.set()
+        for t in threads:
+            t.join(5)
+
+        assert errors == ["falhou"] * 4
+        assert flight.do("k", lambda: "recuperado") == "recuperado"
+        assert flight.stats()["errors"] == 1
+
+    def test_forget(self):
+        from singleflight import SingleFlight
+
+        flight = SingleFlight("teste")
+        flight.do("k", lambda: 1)
+        flight.forget("k")
+        assert flight.do("k", lambda: 2) == 2
+        flight.forget()
+        assert flight.do("k", lambda: 3) == 3
+
+    def test_resultado_expira_apos_ttl(self):
+        from singleflight import SingleFlight
+
+        now = [0.0]
+        flight = SingleFlight("teste", ttl=10, clock=lambda: now[0])
+        assert flight.do("k", lambda: 1) == 1
+        now[0] = 9.9
+        assert flight.do("k", lambda: 2) == 1
+        now[0] = 10.0
+        assert flight.do("k", lambda: 3) == 3
+        assert flight.stats() == {"hits": 1, "shared": 0, "misses": 2, "errors": 0}
+
+    def test_ttl_zero_so_coalesce(self):
+        from singleflight import SingleFlight
+
+        flight = SingleFlight("teste", ttl=0)
+        assert flight.do("k", lambda: 1) == 1
+        assert flight.do("k", lambda: 2) == 2
+
+    def test_limite_de_entradas_descarta_a_menos_usada(self):
+        from singleflight import SingleFlight
+
+        flight = SingleFlight("teste", max_entries=2)
+        flight.do("a", lambda: "a")
+        flight.do("b", lambda: "b")
+        flight.do("a", lambda: "a2")  # "a" passa a ser a mais recente
+        flight.do("c", lambda: "c")  # descarta "b"
+        assert flight.do("a", lambda: "a3") == "a"
+        assert flight.do("b", lambda: "b2") == "b2"
+
+
+class TestFetchBcbSeriesDedup:
+    """_fetch_bcb_series faz uma única requisição por (série, início, fim)."""
+
+    @pytest.fixture
+    def ia(self, monkeypatch):
+        import ibovespa_analysis as ia
+
+        calls = []
+
+        def fake_download(series_id, start_date, end_date):
+            calls.append((series_id, start_date, end_date))
+            dates = pd.bdate_range("2024-01-01", periods=5)
+            return pd.DataFrame({"Date": dates, "Rate": [0.04] * 5})
+
+        monkeypatch.setattr(ia, "_load_bcb_series", fake_download)
+        ia._BCB_FLIGHT.forget()
+        yield ia, calls
+        ia._BCB_FLIGHT.forget()
+
+    def test_mesma_serie_uma_requisicao(self, ia):
+        ia, calls = ia
+        first = ia._fetch_bcb_series(12)
+        second = ia._fetch_bcb_series(12)
+        assert len(calls) == 1
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_copia_protege_resultado_memorizado(self, ia):
+        ia, _ = ia
+        first = ia._fetch_bcb_series(432)
+        first["Rate"] = 0.0
+        assert (ia._fetch_bcb_series(432)["Rate"] == 0.04).all()
+
+    def test_series_distintas(self, ia):
+        ia, calls = ia
+        ia._fetch_bcb_series(12)
+        ia._fetch_bcb_series(432)
+        ia._fetch_bcb_series(12, start_date="01/01/2020")
+        assert len(calls) == 3
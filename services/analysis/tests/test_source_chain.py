@@ -0,0 +1,392 @@
+"""
+Testes para source_chain.py — cadeia de fontes com circuit breaker.
+
+As fontes são funções locais; na integração com ibovespa_analysis as
+chamadas HTTP e o BCB são substituídos por respostas sintéticas (sem rede).
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+import pytest
+
+
+class _Clock:
+    def __init__(self, now: float = 1_000_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _ok(label: str, calls: list):
+    def fetch(timeout):
+        calls.append(label)
+        return {"data": pd.DataFrame(), "source": label, "period": "", "proxy_used": False}
+
+    return fetch
+
+
+def _fail(label: str, calls: list):
+    def fetch(timeout):
+        calls.append(label)
+        raise ConnectionError(f"{label} fora do ar")
+
+    return fetch
+
+
+@pytest.fixture
+def health(tmp_path):
+    from source_chain import SourceHealth
+
+    return SourceHealth(
+        path=tmp_path / "health.json", cooldown=3600, failure_threshold=2, clock=_Clock()
+    )
+
+
+class TestSourceChain:
+    """Fallback, ordenação e fonte vencedora."""
+
+    def test_fallback_e_vencedor(self, health):
+        from source_chain import Source, SourceChain
+
+        calls = []
+        chain = SourceChain(
+            "ativo",
+            [Source("a", _fail("a", calls)), Source("p", _ok("p", calls), proxy=True)],
+            health=health,
+        )
+        assert chain.run()["source"] == "p"
+        assert calls == ["a", "p"]
+        assert chain.last_winner == "p"
+        assert health.winner("ativo") == "p"
+
+    def test_real_antes_de_proxy(self, health):
+        from source_chain import Source, SourceChain
+
+        calls = []
+        chain = SourceChain(
+            "ativo",
+            [Source("p", _ok("p", calls), proxy=True), Source("r", _ok("r", calls))],
+            health=health,
+        )
+        assert chain.run()["source"] == "r"
+        assert calls == ["r"]
+
+    def test_reordena_por_taxa_de_sucesso(self, health):
+        from source_chain import Source, SourceChain
+
+        calls = []
+        chain = SourceChain(
+            "ativo",
+            [Source("a", _fail("a", calls)), Source("b", _ok("b", calls))],
+            health=health,
+        )
+        chain.run()
+        assert [s.name for s in chain.ordered()] == ["b", "a"]
+        calls.clear()
+        chain.run()
+        assert calls == ["b"]
+
+    def test_desempate_por_latencia(self, health):
+        from source_chain import Source, SourceChain
+
+        health.record("lenta", True, 5.0)
+        health.record("rapida", True, 0.2)
+        chain = SourceChain(
+            "ativo",
+            [Source("lenta", _ok("lenta", [])), Source("rapida", _ok("rapida", []))],
+            health=health,
+        )
+        assert [s.name for s in chain.ordered()] == ["rapida", "lenta"]
+
+    def test_todas_falham(self, health):
+        from source_chain import Source, SourceChain
+
+        chain = SourceChain(
+            "ativo",
+            [Source("a", _fail("a", [])), Source("b", _fail("b", []), proxy=True)],
+            health=health,
+        )
+        with pytest.raises(RuntimeError, match="todas as fontes") as exc:
+            chain.run()
+        assert isinstance(exc.value.__cause__, ConnectionError)
+
+
+class TestCircuitBreaker:
+    """Fontes mortas são puladas durante o cooldown, inclusive entre execuções."""
+
+    def _chain(self, health, calls):
+        from source_chain import Source, SourceChain
+
+        return SourceChain(
+            "ativo",
+            [Source("morta", _fail("morta", calls)), Source("p", _ok("p", calls), proxy=True)],
+            health=health,
+        )
+
+    def test_abre_apos_falhas_consecutivas(self, health):
+        calls = []
+        chain = self._chain(health, calls)
+        chain.run()
+        chain.run()
+        assert health.is_open("morta")
+        calls.clear()
+        chain.run()
+        assert calls == ["p"]
+
+    def test_estado_persistido_entre_execucoes(self, health, tmp_path):
+        from source_chain import SourceHealth
+
+        chain = self._chain(health, [])
+        chain.run()
+        chain.run()
+
+        reloaded = SourceHealth(path=tmp_path / "health.json", clock=health.clock)
+        assert reloaded.is_open("morta")
+        assert reloaded.winner("ativo") == "p"
+        calls = []
+        self._chain(reloaded, calls).run()
+        assert calls == ["p"]
+
+    def test_meia_abertura_apos_cooldown(self, health):
+        calls = []
+        chain = self._chain(health, calls)
+        chain.run()
+        chain.run()
+        health.clock.now += 3601
+        calls.clear()
+        chain.run()
+        assert calls == ["morta", "p"], "uma tentativa após o cooldown"
+        assert health.is_open("morta"), "falhou de novo: reabre"
+
+    def test_circuito_aberto_ainda_e_ultimo_recurso(self, health):
+        from source_chain import Source, SourceChain
+
+        calls = []
+        health.record("unica", False, 0.1, "erro")
+        health.record("unica", False, 0.1, "erro")
+        assert health.is_open("unica")
+        chain = SourceChain("ativo", [Source("unica", _ok("unica", calls))], health=health)
+        assert chain.run()["source"] == "unica"
+        assert not health.is_open("unica")
+
+    def test_instancia_default_unica_entre_threads(self, tmp_path, monkeypatch):
+        import threading
+
+        import source_chain
+        from source_chain import SourceHealth
+
+        monkeypatch.setattr(SourceHealth, "_default", None)
+        monkeypatch.setattr(source_chain, "default_health_path", lambda: tmp_path / "h.json")
+        original = SourceHealth.__init__
+
+        def slow_init(self, *args, **kwargs):
+            time.sleep(0.05)  # alarga a janela de corrida entre o teste e a criação
+            original(self, *args, **kwargs)
+
+        monkeypatch.setattr(SourceHealth, "__init__", slow_init)
+        barrier = threading.Barrier(8)
+        found = []
+
+        def call():
+            barrier.wait()
+            found.append(SourceHealth.default())
+
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(found) == 8
+        assert all(instance is found[0] for instance in found)
+
+
+class TestCadeiasDaCarteira:
+    """_fetch_lft_2031 / _fetch_lca_bb_prefixada portados para SourceChain."""
+
+    @pytest.fixture
+    def ia(self, monkeypatch, health):
+        import ibovespa_analysis as ia
+        from source_chain import SourceHealth
+
+        monkeypatch.setattr(SourceHealth, "_default", health)
+        http_calls = []
+
+        def offline_get(url, *args, **kwargs):
+            http_calls.append(url)
+            raise ConnectionError("sem rede")
+
+        def fake_bcb(series_id, start_date=None):
+            dates = pd.bdate_range("2024-01-01", periods=10)
+            return pd.DataFrame({"Date": dates, "Rate": 0.04 if series_id == 12 else 10.5})
+
+        monkeypatch.setattr(ia, "http_get", offline_get)
+        monkeypatch.setattr(ia, "_fetch_bcb_series", fake_bcb)
+        return ia, http_calls
+
+    def test_lft_cai_para_selic_e_depois_pula_tesouro(self, ia, health):
+        ia, http_calls = ia
+        first = ia._fetch_lft_2031()
+        assert first["proxy_used"] is True
+        assert first["source"] == "Proxy: SELIC acumulada (BCB série 432)"
+        assert len(http_calls) == 2
+        assert health.winner("lft_2031") == "bcb_selic_432"
+
+        ia._fetch_lft_2031()
+        http_calls.clear()
+        third = ia._fetch_lft_2031()
+        assert http_calls == [], "endpoints do Tesouro com circuito aberto"
+        pd.testing.assert_frame_equal(third["data"], first["data"])
+
+    def test_lca_mantem_resultado(self, ia, health):
+        ia, http_calls = ia
+        result = ia._fetch_lca_bb_prefixada()
+        assert result["proxy_used"] is True
+        assert result["source"].startswith("Proxy: CDI acumulado (BCB série 12)")
+        assert health.winner("lca_bb_prefixada") == "bcb_cdi_12"
+        assert [s.name for s in ia._LCA_BB_PREFIXADA_CHAIN.ordered()][0] == "anbima_irfm"
+
+
+def _slow(label: str, delay: float, calls: list, fail: bool = False):
+    """Fonte que espera delay (checando cancelamento) e retorna ou falha."""
+    from source_chain import raise_if_cancelled
+
+    def fetch(timeout):
+        calls.append(label)
+        deadline = time.monotonic() + delay
+        while time.monotonic() < deadline:
+            time.sleep(0.01)
+            raise_if_cancelled()
+        if fail:
+            raise ConnectionError(f"{label} falhou")
+        return {"data": pd.DataFrame(), "source": label, "period": "", "proxy_used": False}
+
+    return fetch
+
+
+class TestHedge:
+    """Modo hedge: fonte lenta não segura a cadeia pelo timeout inteiro."""
+
+    def _chain(self, health, sources, **kwargs):
+        from source_chain import SourceChain
+
+        kwargs.setdefault("proxy_grace", 5)
+        return SourceChain("ativo", sources, health=health, hedge=True, **kwargs)
+
+    def test_dispara_proxima_e_cancela_perdedora(self, health, monkeypatch):
+        import source_chain
+        from source_chain import Source
+
+        monkeypatch.setattr(source_chain, "SOURCE_HEDGE_DEFAULT_DELAY", 0.1)
+        calls = []
+        chain = self._chain(
+            health,
+            [
+                Source("lenta", _slow("lenta", 3.0, calls)),
+                Source("rapida", _slow("rapida", 0.05, calls)),
+            ],
+        )
+        t0 = time.monotonic()
+        assert chain.run()["source"] == "rapida"
+        assert time.monotonic() - t0 < 1.0
+        assert calls == ["lenta", "rapida"]
+
+        time.sleep(0.1)  # a perdedora vê o cancelamento e não conta como falha
+        assert health.stats("lenta").get("failures", 0) == 0
+
+    def test_real_vence_proxy_mais_rapido(self, health, monkeypatch):
+        import source_chain
+        from source_chain import Source
+
+        monkeypatch.setattr(source_chain, "SOURCE_HEDGE_DEFAULT_DELAY", 0.05)
+        chain = self._chain(
+            health,
+            [
+                Source("real", _slow("real", 0.4, [])),
+                Source("proxy", _slow("proxy", 0.0, []), proxy=True),
+            ],
+        )
+        assert chain.run()["source"] == "real"
+
+    def test_proxy_aceito_apos_espera(self, health, monkeypatch):
+        import source_chain
+        from source_chain import Source
+
+        monkeypatch.setattr(source_chain, "SOURCE_HEDGE_DEFAULT_DELAY", 0.05)
+        chain = self._chain(
+            health,
+            [
+                Source("real", _slow("real", 5.0, [])),
+                Source("proxy", _slow("proxy", 0.0, []), proxy=True),
+            ],
+            proxy_grace=0.2,
+        )
+        t0 = time.monotonic()
+        assert chain.run()["source"] == "proxy"
+        assert time.monotonic() - t0 < 1.0
+
+    def test_falha_dispara_proxima_sem_esperar(self, health, monkeypatch):
+        import source_chain
+        from source_chain import Source
+
+        monkeypatch.setattr(source_chain, "SOURCE_HEDGE_DEFAULT_DELAY", 10)
+        chain = self._chain(
+            health,
+            [
+                Source("quebrada", _slow("quebrada", 0.05, [], fail=True)),
+                Source("proxy", _slow("proxy", 0.0, []), proxy=True),
+            ],
+        )
+        t0 = time.monotonic()
+        assert chain.run()["source"] == "proxy"
+        assert time.monotonic() - t0 < 1.0
+
+    def test_nao_dispara_fonte_com_circuito_aberto(self, health, monkeypatch):
+        import source_chain
+        from source_chain import Source
+
+        monkeypatch.setattr(source_chain, "SOURCE_HEDGE_DEFAULT_DELAY", 0.05)
+        health.record("morta", False, 0.1, "erro")
+        health.record("morta", False, 0.1, "erro")
+        calls = []
+        chain = self._chain(
+            health,
+            [
+                Source("lenta", _slow("lenta", 0.3, calls)),
+                Source("morta", _slow("morta", 0.0, calls), proxy=True),
+            ],
+        )
+        assert chain.run()["source"] == "lenta"
+        assert calls == ["lenta"], "sem hedge para fonte com circuito aberto"
+
+        calls.clear()
+        chain.sources[0] = Source("lenta", _slow("lenta", 0.3, calls, fail=True))
+        assert chain.run()["source"] == "morta", "continua último recurso"
+        assert calls == ["lenta", "morta"]
+
+    def test_atraso_pelo_percentil(self, health):
+        from source_chain import Source, SourceChain
+
+        for latency in [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 5.0]:
+            health.record("a", True, latency)
+        chain = SourceChain("ativo", [], health=health, hedge_percentile=0.9)
+        assert chain.hedge_delay(Source("a", _ok("a", []), timeout=30)) == 0.9
+        assert chain.hedge_delay(Source("a", _ok("a", []), timeout=0.5)) == 0.5
+
+    def test_todas_falham(self, health):
+        from source_chain import Source
+
+        chain = self._chain(
+            health,
+            [
+                Source("a", _slow("a", 0.0, [], fail=True)),
+                Source("b", _slow("b", 0.0, [], fail=True), proxy=True),
+            ],
+        )
+        with pytest.raises(RuntimeError, match="todas as fontes"):
+            chain.run()